@@ -0,0 +1,374 @@
+// package_benchmark.cpp : Times check, extract, fix, re-zip and recompress per package and compares with a baseline.
+//
+// Usage: package-benchmark [--input DIR] [--work DIR] [--synthetic N,N,...] [--depth D]
+//                          [--repetitions R] [--output FILE] [--baseline FILE] [--tolerance T]
+//
+// Every package below --input (default: input) whose folder names a known
+// package (cipc_*, CMF-CL-CI-*, Reporting_Frameworks_*) is benchmarked with
+// the fixer of its provider. Synthetic CIPC-like packages with the given
+// numbers of entries (default: 10000,200000; empty: none) and import chains
+// of --depth levels are generated into --work first (see synthetic_package.hpp).
+//
+// The "rezip" phase zips the extracted tree with the source package, so
+// unchanged files are copied with their compressed data; "recompress" zips
+// it without, so every file is deflated again.
+//
+// Each phase is run --repetitions times (default: 3); the best wall time and
+// the highest peak RSS are kept. Results are written as tab-separated lines:
+//
+//   package	phase	seconds	peak_rss_kib	entries	bytes	entries_per_s	mib_per_s
+//
+// The peak RSS is reset before each phase on Linux only. Elsewhere it is the
+// peak of the process so far, so it is labelled as such and not compared
+// with the baseline.
+//
+// With --baseline, every phase is compared with the same package and phase
+// of a previous results file; a phase more than --tolerance (default: 0.2)
+// slower or bigger is reported and the exit code is 1. To record a baseline,
+// write the results to the baseline file: --output benchmarks/baseline.tsv.
+
+#include "synthetic_package.hpp"
+#include "../includes/ArchiveIndex.hpp"
+#include "../includes/PackageProcessor.hpp"
+#include "../includes/Providers.hpp"
+#include "../includes/utils.hpp"
+#include <argparse/argparse.hpp>
+#include <algorithm>
+#include <chrono>
+#include <filesystem>
+#include <fstream>
+#include <functional>
+#include <iomanip>
+#include <iostream>
+#include <map>
+#include <optional>
+#include <sstream>
+#include <string>
+#include <vector>
+
+#if defined(__linux__)
+#include <sys/resource.h>
+#elif defined(_WIN32)
+#include <windows.h>
+#include <psapi.h>
+#ifdef _MSC_VER
+#pragma comment(lib, "psapi.lib")
+#endif
+#endif
+
+namespace fs = std::filesystem;
+
+namespace {
+
+    constexpr double MIN_COMPARED_SECONDS = 0.05;  ///< Faster phases are too noisy to compare times.
+
+#if defined(__linux__)
+    constexpr bool PEAK_RSS_PER_PHASE = true;      ///< The peak RSS can be reset between phases.
+#else
+    constexpr bool PEAK_RSS_PER_PHASE = false;
+#endif
+
+    /**
+     * @brief A package to benchmark.
+     */
+    struct Package {
+        std::string name;       ///< Name in the results.
+        Provider provider;      ///< Fixer to run.
+        fs::path zip;           ///< The package.
+    };
+
+    /**
+     * @brief Measurement of one phase of one package.
+     */
+    struct Row {
+        std::string package;
+        std::string phase;
+        double seconds = 0.0;
+        std::uint64_t peak_rss_kib = 0;
+        std::uint64_t entries = 0;
+        std::uint64_t bytes = 0;
+    };
+
+    /**
+     * @brief Resets the peak RSS of the process, where the OS allows it.
+     */
+    void reset_peak_rss() {
+#if defined(__linux__)
+        std::ofstream clear_refs("/proc/self/clear_refs");
+        clear_refs << "5";  // Resets VmHWM (Linux 4.0+).
+#endif
+    }
+
+    /**
+     * @brief Get the peak RSS of the process since the last reset, in KiB.
+     */
+    std::uint64_t peak_rss_kib() {
+#if defined(__linux__)
+        std::ifstream status("/proc/self/status");
+        std::string line;
+        while (std::getline(status, line)) {
+            if (line.rfind("VmHWM:", 0) == 0) {
+                return std::stoull(line.substr(6));
+            }
+        }
+        rusage usage{};
+        getrusage(RUSAGE_SELF, &usage);
+        return static_cast<std::uint64_t>(usage.ru_maxrss);
+#elif defined(_WIN32)
+        PROCESS_MEMORY_COUNTERS counters{};
+        GetProcessMemoryInfo(GetCurrentProcess(), &counters, sizeof(counters));
+        return counters.PeakWorkingSetSize / 1024;
+#else
+        return 0;
+#endif
+    }
+
+    /**
+     * @brief Runs a phase several times: best wall time, highest peak RSS.
+     *
+     * @param prepare Run before every repetition, outside the measurement (e.g. to clean the output).
+     */
+    void measure(Row& row, int repetitions, const std::function<void()>& prepare, const std::function<void()>& func) {
+        for (int i = 0; i < repetitions; ++i) {
+            prepare();
+            reset_peak_rss();
+            auto start = std::chrono::steady_clock::now();
+            func();
+            double seconds = std::chrono::duration<double>(std::chrono::steady_clock::now() - start).count();
+            row.seconds = (i == 0) ? seconds : std::min(row.seconds, seconds);
+            row.peak_rss_kib = std::max(row.peak_rss_kib, peak_rss_kib());
+        }
+    }
+
+    /**
+     * @brief Get the provider of a bundled input package from its folder name.
+     */
+    std::optional<Provider> provider_of(const std::string& name) {
+        if (name.rfind("cipc_", 0) == 0) return Provider::CIPC;
+        if (name.rfind("CMF-CL-CI-", 0) == 0) return Provider::CMFCLCI;
+        if (name.rfind("Reporting_Frameworks_", 0) == 0) return Provider::EBA;
+        return std::nullopt;
+    }
+
+    /**
+     * @brief Parses "10000,200000" into numbers.
+     */
+    std::vector<std::size_t> parse_sizes(const std::string& list) {
+        std::vector<std::size_t> sizes;
+        std::stringstream stream(list);
+        std::string item;
+        while (std::getline(stream, item, ',')) {
+            if (!item.empty()) {
+                sizes.push_back(std::stoull(item));
+            }
+        }
+        return sizes;
+    }
+
+    /**
+     * @brief Benchmarks the five phases of one package.
+     */
+    std::vector<Row> run_package(const Package& package, const fs::path& work_dir, int repetitions) {
+        const fs::path package_dir = work_dir / package.name;
+        const fs::path extract_dir = package_dir / "extract";
+        const fs::path fix_dir = package_dir / "fix";
+        const fs::path rezip = package_dir / "rezip.zip";
+        const fs::path recompress = package_dir / "recompress.zip";
+        fs::create_directories(package_dir);
+
+        std::uint64_t entries = 0;
+        std::uint64_t bytes = 0;
+        for (const auto& entry : ArchiveIndex(package.zip.string()).entries()) {
+            if (!entry.is_dir) {
+                ++entries;
+                bytes += entry.size;
+            }
+        }
+
+        std::vector<Row> rows;
+        rows.reserve(5);  // row() hands out references.
+        auto row = [&](const std::string& phase) -> Row& {
+            rows.push_back({ package.name, phase, 0.0, 0, entries, bytes });
+            return rows.back();
+        };
+        auto nothing = [] {};
+
+        PackageProcessor processor;
+        PackageChecks checks;
+        measure(row("check"), repetitions, nothing, [&] {
+            checks = processor.check_package(package.zip.string());
+        });
+        measure(row("extract"), repetitions, [&] { fs::remove_all(extract_dir); }, [&] {
+            utils::zip_dir_extractor(package.zip.string(), extract_dir.string());
+        });
+        if (PackageProcessor::has_fixer(package.provider)) {
+            measure(row("fix"), repetitions, [&] {
+                // Without the previous output and manifest, every repetition is a full run.
+                std::error_code ec;
+                fs::remove_all(fix_dir, ec);
+                fs::remove(fix_dir.string() + ".zip", ec);
+                fs::remove(RunManifest::manifest_path(fix_dir.string()), ec);
+                fs::create_directories(fix_dir);
+            }, [&] {
+                processor.fix_package(package.provider, package.zip.string(), fix_dir.string(), checks);
+            });
+        }
+        measure(row("rezip"), repetitions, nothing, [&] {
+            utils::gen_zip_archive(extract_dir.string(), rezip.string(), package.zip.string());
+        });
+        measure(row("recompress"), repetitions, nothing, [&] {
+            utils::gen_zip_archive(extract_dir.string(), recompress.string());
+        });
+        return rows;
+    }
+
+    /**
+     * @brief Reads a results file: (package, phase) -> row.
+     */
+    std::map<std::pair<std::string, std::string>, Row> load_results(const std::string& file) {
+        std::map<std::pair<std::string, std::string>, Row> results;
+        std::ifstream in(file);
+        std::string line;
+        while (std::getline(in, line)) {
+            if (line.empty() || line[0] == '#') {
+                continue;
+            }
+            std::vector<std::string> fields;
+            std::stringstream stream(line);
+            std::string field;
+            while (std::getline(stream, field, '\t')) {
+                fields.push_back(field);
+            }
+            if (fields.size() < 6) {
+                continue;
+            }
+            Row row{ fields[0], fields[1], std::stod(fields[2]), std::stoull(fields[3]), std::stoull(fields[4]), std::stoull(fields[5]) };
+            results[{ row.package, row.phase }] = row;
+        }
+        return results;
+    }
+
+    double entries_per_second(const Row& row) {
+        return row.seconds > 0 ? row.entries / row.seconds : 0.0;
+    }
+
+    double mib_per_second(const Row& row) {
+        return row.seconds > 0 ? row.bytes / (1024.0 * 1024.0) / row.seconds : 0.0;
+    }
+
+    void write_results(const std::string& file, const std::vector<Row>& rows) {
+        std::ofstream out(file, std::ios::trunc);
+        out << "# package\tphase\tseconds\t" << (PEAK_RSS_PER_PHASE ? "peak_rss_kib" : "process_peak_rss_kib")
+            << "\tentries\tbytes\tentries_per_s\tmib_per_s\n";
+        for (const auto& row : rows) {
+            out << row.package << '\t' << row.phase << '\t' << std::fixed << std::setprecision(4) << row.seconds << '\t'
+                << row.peak_rss_kib << '\t' << row.entries << '\t' << row.bytes << '\t'
+                << std::setprecision(1) << entries_per_second(row) << '\t' << mib_per_second(row) << '\n';
+        }
+    }
+
+}  // namespace
+
+int main(int argc, char* argv[])
+{
+    argparse::ArgumentParser program("package-benchmark");
+    program.add_argument("--input").help("folder with the bundled packages").default_value(std::string("input"));
+    program.add_argument("--work").help("work folder (generated packages, extracted and fixed trees)").default_value(std::string("bench_work"));
+    program.add_argument("--synthetic").help("entry counts of the synthetic packages, comma-separated (empty: none)").default_value(std::string("10000,200000"));
+    program.add_argument("--depth").help("levels per import chain of the synthetic packages").default_value(20).scan<'i', int>();
+    program.add_argument("--repetitions").help("runs per phase; the best time is kept").default_value(3).scan<'i', int>();
+    program.add_argument("--output").help("results file").default_value(std::string("benchmark_results.tsv"));
+    program.add_argument("--baseline").help("results file of a previous run to compare with").default_value(std::string(""));
+    program.add_argument("--tolerance").help("relative slowdown or growth reported as a regression").default_value(0.2).scan<'g', double>();
+    try {
+        program.parse_args(argc, argv);
+    }
+    catch (const std::exception& e) {
+        std::cerr << e.what() << "\n" << program;
+        return 2;
+    }
+
+    const fs::path input_dir = program.get<std::string>("--input");
+    const fs::path work_dir = program.get<std::string>("--work");
+    const int repetitions = std::max(1, program.get<int>("--repetitions"));
+    const double tolerance = program.get<double>("--tolerance");
+    fs::create_directories(work_dir);
+
+    std::vector<Package> packages;
+    if (fs::is_directory(input_dir)) {
+        for (const auto& entry : fs::recursive_directory_iterator(input_dir)) {
+            if (entry.is_regular_file() && entry.path().extension() == ".zip") {
+                if (auto provider = provider_of(entry.path().stem().string())) {
+                    packages.push_back({ entry.path().stem().string(), *provider, entry.path() });
+                }
+            }
+        }
+    }
+    std::sort(packages.begin(), packages.end(), [](const Package& a, const Package& b) { return a.name < b.name; });
+
+    for (std::size_t entries : parse_sizes(program.get<std::string>("--synthetic"))) {
+        synthetic::Options options;
+        options.entries = entries;
+        options.depth = static_cast<std::size_t>(std::max(1, program.get<int>("--depth")));
+        const std::string name = "synthetic-" + std::to_string(entries);
+        const fs::path zip = work_dir / (name + ".zip");
+        std::cout << "Generating " << zip.string() << "..." << std::endl;
+        synthetic::generate(zip.string(), options);
+        packages.push_back({ name, Provider::CIPC, zip });
+    }
+
+    std::vector<Row> rows;
+    for (const auto& package : packages) {
+        std::cout << "Benchmarking " << package.name << " (" << providerToString(package.provider) << ")..." << std::endl;
+        std::vector<Row> package_rows = run_package(package, work_dir, repetitions);
+        rows.insert(rows.end(), package_rows.begin(), package_rows.end());
+    }
+    write_results(program.get<std::string>("--output"), rows);
+
+    const std::string baseline_file = program.get<std::string>("--baseline");
+    std::map<std::pair<std::string, std::string>, Row> baseline;
+    if (!baseline_file.empty()) {
+        baseline = load_results(baseline_file);
+    }
+
+    std::cout << "\nPackage benchmark (best of " << repetitions << "):\n"
+        << "------------------------------\n"
+        << std::left << std::setw(42) << "Package" << std::setw(12) << "Phase"
+        << std::right << std::setw(10) << "Time [s]" << std::setw(12) << (PEAK_RSS_PER_PHASE ? "RSS [MiB]" : "RSS* [MiB]")
+        << std::setw(12) << "Entries/s" << std::setw(9) << "MiB/s";
+    if (!baseline.empty()) {
+        std::cout << std::setw(12) << "vs. base";
+    }
+    std::cout << "\n";
+
+    std::size_t regressions = 0;
+    for (const auto& row : rows) {
+        std::cout << std::left << std::setw(42) << row.package << std::setw(12) << row.phase
+            << std::right << std::fixed << std::setprecision(3) << std::setw(10) << row.seconds
+            << std::setprecision(1) << std::setw(12) << row.peak_rss_kib / 1024.0
+            << std::setprecision(0) << std::setw(12) << entries_per_second(row)
+            << std::setprecision(1) << std::setw(9) << mib_per_second(row);
+
+        auto base = baseline.find({ row.package, row.phase });
+        if (base != baseline.end()) {
+            const Row& before = base->second;
+            const double time_ratio = before.seconds > 0 ? row.seconds / before.seconds : 1.0;
+            const bool slower = time_ratio > 1.0 + tolerance && std::max(row.seconds, before.seconds) >= MIN_COMPARED_SECONDS;
+            const bool bigger = PEAK_RSS_PER_PHASE && before.peak_rss_kib > 0 && row.peak_rss_kib > before.peak_rss_kib * (1.0 + tolerance);
+            std::cout << std::setprecision(2) << std::setw(11) << time_ratio << "x";
+            if (slower || bigger) {
+                std::cout << "  REGRESSION" << (slower ? " (time)" : "") << (bigger ? " (rss)" : "");
+                ++regressions;
+            }
+        }
+        std::cout << "\n";
+    }
+
+    if (!PEAK_RSS_PER_PHASE) {
+        std::cout << "\n* Peak RSS of the process so far, not of the phase alone" << std::endl;
+    }
+    if (!baseline.empty()) {
+        std::cout << "\n" << regressions << " regression(s) against " << baseline_file << std::endl;
+    }
+    return regressions == 0 ? 0 : 1;
+}
@@ -0,0 +1,165 @@
+#include "synthetic_package.hpp"
+#include <algorithm>
+#include <cstdio>
+#include <deque>
+#include <filesystem>
+#include <stdexcept>
+#include <zip.h>
+
+namespace fs = std::filesystem;
+
+namespace synthetic {
+
+    namespace {
+
+        const char* IFRS_SCHEMA = "def/ifrs/full_ifrs/full_ifrs-cor.xsd";
+
+        /**
+         * @brief Formats a zero-padded number ("c0042").
+         */
+        std::string numbered(char prefix, std::size_t number) {
+            char buffer[32];
+            std::snprintf(buffer, sizeof(buffer), "%c%04zu", prefix, number);
+            return buffer;
+        }
+
+        std::string catalog_xml() {
+            return "<?xml version=\"1.0\" encoding=\"UTF-8\"?>\n"
+                "<catalog xmlns=\"urn:oasis:names:tc:entity:xmlns:xml:catalog\">\n"
+                "  <rewriteURI uriStartString=\"http://xbrl.example.com/synthetic/\" rewritePrefix=\"../ent/\"/>\n"
+                "</catalog>\n";
+        }
+
+        std::string taxonomy_package_xml(const std::string& name) {
+            return "<?xml version=\"1.0\" encoding=\"UTF-8\"?>\n"
+                "<tp:taxonomyPackage xmlns:tp=\"http://xbrl.org/2016/taxonomy-package\" xml:lang=\"en\">\n"
+                "  <tp:identifier>http://xbrl.example.com/synthetic/" + name + "</tp:identifier>\n"
+                "  <tp:name>" + name + "</tp:name>\n"
+                "  <tp:version>1.0</tp:version>\n"
+                "</tp:taxonomyPackage>\n";
+        }
+
+        std::string ifrs_schema(std::size_t concepts) {
+            std::string xsd = "<?xml version=\"1.0\" encoding=\"UTF-8\"?>\n"
+                "<xsd:schema xmlns:xsd=\"http://www.w3.org/2001/XMLSchema\" xmlns:xbrli=\"http://www.xbrl.org/2003/instance\""
+                " targetNamespace=\"http://xbrl.ifrs.org/taxonomy/full_ifrs\" elementFormDefault=\"qualified\">\n";
+            for (std::size_t i = 0; i < concepts; ++i) {
+                xsd += "  <xsd:element id=\"ifrs_" + numbered('C', i) + "\" name=\"" + numbered('C', i)
+                    + "\" type=\"xbrli:monetaryItemType\" substitutionGroup=\"xbrli:item\" xbrli:periodType=\"instant\"/>\n";
+            }
+            return xsd + "</xsd:schema>\n";
+        }
+
+        /**
+         * @brief Schema of one level: imports the level below and links its linkbases.
+         */
+        std::string level_schema(std::size_t chain, std::size_t level, std::size_t concepts) {
+            const std::string name = numbered('s', level);
+            const std::string ns = "http://xbrl.example.com/synthetic/" + numbered('c', chain) + "/" + name;
+            std::string xsd = "<?xml version=\"1.0\" encoding=\"UTF-8\"?>\n"
+                "<xsd:schema xmlns:xsd=\"http://www.w3.org/2001/XMLSchema\" xmlns:xbrli=\"http://www.xbrl.org/2003/instance\""
+                " xmlns:link=\"http://www.xbrl.org/2003/linkbase\" xmlns:xlink=\"http://www.w3.org/1999/xlink\""
+                " targetNamespace=\"" + ns + "\" elementFormDefault=\"qualified\">\n"
+                "  <xsd:annotation><xsd:appinfo>\n"
+                "    <link:linkbaseRef xlink:type=\"simple\" xlink:href=\"" + name + "-lab.xml\" xlink:arcrole=\"http://www.w3.org/1999/xlink/properties/linkbase\"/>\n"
+                "    <link:linkbaseRef xlink:type=\"simple\" xlink:href=\"" + name + "-pre.xml\" xlink:arcrole=\"http://www.w3.org/1999/xlink/properties/linkbase\"/>\n"
+                "  </xsd:appinfo></xsd:annotation>\n";
+            if (level > 0) {
+                const std::string below = numbered('s', level - 1);
+                xsd += "  <xsd:import namespace=\"http://xbrl.example.com/synthetic/" + numbered('c', chain) + "/" + below
+                    + "\" schemaLocation=\"" + below + ".xsd\"/>\n";
+            }
+            xsd += "  <xsd:import namespace=\"http://xbrl.ifrs.org/taxonomy/full_ifrs\" schemaLocation=\"../../" + std::string(IFRS_SCHEMA) + "\"/>\n";
+            for (std::size_t i = 0; i < concepts; ++i) {
+                xsd += "  <xsd:element id=\"" + name + "_" + numbered('C', i) + "\" name=\"" + numbered('C', i)
+                    + "\" type=\"xbrli:monetaryItemType\" substitutionGroup=\"xbrli:item\" xbrli:periodType=\"duration\"/>\n";
+            }
+            return xsd + "</xsd:schema>\n";
+        }
+
+        /**
+         * @brief Label or presentation linkbase of one level.
+         */
+        std::string level_linkbase(std::size_t level, std::size_t concepts, bool presentation) {
+            const std::string name = numbered('s', level);
+            std::string xml = "<?xml version=\"1.0\" encoding=\"UTF-8\"?>\n"
+                "<link:linkbase xmlns:link=\"http://www.xbrl.org/2003/linkbase\" xmlns:xlink=\"http://www.w3.org/1999/xlink\">\n";
+            xml += presentation
+                ? "  <link:presentationLink xlink:type=\"extended\" xlink:role=\"http://www.xbrl.org/2003/role/link\">\n"
+                : "  <link:labelLink xlink:type=\"extended\" xlink:role=\"http://www.xbrl.org/2003/role/link\">\n";
+            for (std::size_t i = 0; i < concepts; ++i) {
+                const std::string concept_name = numbered('C', i);
+                xml += "    <link:loc xlink:type=\"locator\" xlink:href=\"" + name + ".xsd#" + name + "_" + concept_name
+                    + "\" xlink:label=\"loc_" + concept_name + "\"/>\n";
+                if (presentation) {
+                    // Edges into the level below and into the IFRS taxonomy.
+                    const std::string parent = level > 0
+                        ? numbered('s', level - 1) + ".xsd#" + numbered('s', level - 1) + "_" + concept_name
+                        : "../../" + std::string(IFRS_SCHEMA) + "#ifrs_" + concept_name;
+                    xml += "    <link:loc xlink:type=\"locator\" xlink:href=\"" + parent + "\" xlink:label=\"parent_" + concept_name + "\"/>\n"
+                        "    <link:presentationArc xlink:type=\"arc\" xlink:arcrole=\"http://www.xbrl.org/2003/arcrole/parent-child\""
+                        " xlink:from=\"parent_" + concept_name + "\" xlink:to=\"loc_" + concept_name + "\" order=\"" + std::to_string(i + 1) + "\"/>\n";
+                }
+                else {
+                    xml += "    <link:label xlink:type=\"resource\" xlink:label=\"lab_" + concept_name + "\" xlink:role=\"http://www.xbrl.org/2003/role/label\""
+                        " xml:lang=\"en\">Concept " + concept_name + " of level " + name + "</link:label>\n"
+                        "    <link:labelArc xlink:type=\"arc\" xlink:arcrole=\"http://www.xbrl.org/2003/arcrole/concept-label\""
+                        " xlink:from=\"loc_" + concept_name + "\" xlink:to=\"lab_" + concept_name + "\"/>\n";
+                }
+            }
+            xml += presentation ? "  </link:presentationLink>\n" : "  </link:labelLink>\n";
+            return xml + "</link:linkbase>\n";
+        }
+
+    }  // namespace
+
+    /**
+     * @brief Writes a synthetic package; contents are kept in memory until the archive is closed.
+     */
+    std::size_t generate(const std::string& zip_path, const Options& options) {
+        const std::size_t depth = std::max<std::size_t>(options.depth, 1);
+        const std::string top = fs::path(zip_path).stem().generic_string();
+
+        int error = 0;
+        zip_t* zip = zip_open(zip_path.c_str(), ZIP_CREATE | ZIP_TRUNCATE, &error);
+        if (!zip) {
+            throw std::runtime_error("Failed to open zip file for writing: " + zip_path);
+        }
+
+        std::deque<std::string> contents;  // Must outlive zip_close().
+        std::size_t count = 0;
+        auto add = [&](const std::string& path, std::string content) {
+            contents.push_back(std::move(content));
+            zip_source_t* source = zip_source_buffer(zip, contents.back().data(), contents.back().size(), 0);
+            if (!source || zip_file_add(zip, (top + "/" + path).c_str(), source, ZIP_FL_OVERWRITE | ZIP_FL_ENC_UTF_8) < 0) {
+                zip_source_free(source);
+                std::string message = zip_strerror(zip);
+                zip_discard(zip);
+                throw std::runtime_error("Failed to add " + path + ": " + message);
+            }
+            ++count;
+        };
+
+        add("META-INF/catalog.xml", catalog_xml());
+        add("META-INF/taxonomyPackage.xml", taxonomy_package_xml(top));
+        add(IFRS_SCHEMA, ifrs_schema(options.concepts_per_schema));
+
+        for (std::size_t chain = 0; count < options.entries; ++chain) {
+            const std::string folder = "ent/" + numbered('c', chain) + "/";
+            for (std::size_t level = 0; level < depth && count < options.entries; ++level) {
+                const std::string name = folder + numbered('s', level);
+                add(name + ".xsd", level_schema(chain, level, options.concepts_per_schema));
+                add(name + "-lab.xml", level_linkbase(level, options.concepts_per_schema, false));
+                add(name + "-pre.xml", level_linkbase(level, options.concepts_per_schema, true));
+            }
+        }
+
+        if (zip_close(zip) < 0) {
+            std::string message = zip_strerror(zip);
+            zip_discard(zip);
+            throw std::runtime_error("Failed to write " + zip_path + ": " + message);
+        }
+        return count;
+    }
+
+}  // namespace synthetic
@@ -0,0 +1,54 @@
+#pragma once
+
+#ifndef SYNTHETIC_PACKAGE_HPP
+#define SYNTHETIC_PACKAGE_HPP
+
+#include <cstddef>
+#include <string>
+
+/**
+ * @brief Generator of large synthetic taxonomy packages for the benchmarks.
+ *
+ * The generated package is laid out like a CIPC package, so the CIPC fixer
+ * has real work to do on it:
+ *
+ * @code
+ * synthetic-10000/META-INF/catalog.xml
+ * synthetic-10000/META-INF/taxonomyPackage.xml
+ * synthetic-10000/def/ifrs/full_ifrs/full_ifrs-cor.xsd    (dropped by the fixer)
+ * synthetic-10000/ent/c0000/s0000.xsd                    (imports nothing)
+ * synthetic-10000/ent/c0000/s0000-lab.xml
+ * synthetic-10000/ent/c0000/s0000-pre.xml
+ * synthetic-10000/ent/c0000/s0001.xsd                    (imports s0000.xsd)
+ * ...
+ * @endcode
+ *
+ * Each chain is a deep linkbase graph: schema N imports schema N-1 and
+ * links its own label and presentation linkbases. The locators of the
+ * linkbases point into the schema of their level, the level below and the
+ * IFRS taxonomy, through "../../def/ifrs/full_ifrs" references.
+ */
+namespace synthetic {
+
+    /**
+     * @brief Shape of a synthetic package.
+     */
+    struct Options {
+        std::size_t entries = 10000;            ///< Number of file entries (rounded up to a whole level).
+        std::size_t depth = 20;                 ///< Levels per import chain.
+        std::size_t concepts_per_schema = 10;   ///< Concepts defined per schema (one locator each per linkbase).
+    };
+
+    /**
+     * @brief Writes a synthetic package.
+     *
+     * @param zip_path The zip file to create (overwritten if it exists); its stem is the top-level folder.
+     * @param options Shape of the package.
+     * @return The number of file entries written.
+     * @throws std::runtime_error if the zip cannot be written.
+     */
+    std::size_t generate(const std::string& zip_path, const Options& options);
+
+}  // namespace synthetic
+
+#endif // SYNTHETIC_PACKAGE_HPP
@@ -0,0 +1,160 @@
+// xml_streaming_benchmark.cpp : Compares DOM and streaming validation and reference scanning of a large linkbase.
+//
+// Usage: xml-streaming-benchmark [WORK_DIR] [SIZE_MIB] [SCHEMA_STORE]
+//
+// A definition linkbase of SIZE_MIB MiB (default: 40) is generated into
+// WORK_DIR (default: bench_work), shaped like the EBA dimension linkbases:
+// one link:loc and one link:definitionArc per member. It is then scanned
+// with ReferenceScanner, validated streaming and validated with a DOM
+// against the XBRL 2.1 linkbase schema from SCHEMA_STORE (default: schemas).
+// The wall time and the peak RSS of each phase are reported.
+//
+// The peak RSS is only reset between phases on Linux. Elsewhere it is the
+// peak of the process so far, so the phases run from the smallest expected
+// footprint to the largest and the DOM phase runs last.
+
+#include "../includes/CatalogResolver.hpp"
+#include "../includes/ReferenceScanner.hpp"
+#include "../includes/TPChecker.hpp"
+#include <chrono>
+#include <cstdint>
+#include <filesystem>
+#include <fstream>
+#include <functional>
+#include <iomanip>
+#include <iostream>
+#include <string>
+
+#if defined(__linux__)
+#include <sys/resource.h>
+#elif defined(_WIN32)
+#include <windows.h>
+#include <psapi.h>
+#ifdef _MSC_VER
+#pragma comment(lib, "psapi.lib")
+#endif
+#endif
+
+namespace fs = std::filesystem;
+
+namespace {
+
+    const char* LINKBASE_SCHEMA = "http://www.xbrl.org/2003/xbrl-linkbase-2003-12-31.xsd";
+
+    /**
+     * @brief Resets the peak RSS of the process, where the OS allows it.
+     */
+    void reset_peak_rss() {
+#if defined(__linux__)
+        std::ofstream clear_refs("/proc/self/clear_refs");
+        clear_refs << "5";  // Resets VmHWM (Linux 4.0+).
+#endif
+    }
+
+    /**
+     * @brief Get the peak RSS of the process since the last reset, in KiB.
+     */
+    std::uint64_t peak_rss_kib() {
+#if defined(__linux__)
+        std::ifstream status("/proc/self/status");
+        std::string line;
+        while (std::getline(status, line)) {
+            if (line.rfind("VmHWM:", 0) == 0) {
+                return std::stoull(line.substr(6));
+            }
+        }
+        rusage usage{};
+        getrusage(RUSAGE_SELF, &usage);
+        return static_cast<std::uint64_t>(usage.ru_maxrss);
+#elif defined(_WIN32)
+        PROCESS_MEMORY_COUNTERS counters{};
+        GetProcessMemoryInfo(GetCurrentProcess(), &counters, sizeof(counters));
+        return counters.PeakWorkingSetSize / 1024;
+#else
+        return 0;
+#endif
+    }
+
+    /**
+     * @brief Writes a definition linkbase of at least the given size.
+     *
+     * @return The number of xlink:href attributes written.
+     */
+    std::uint64_t write_linkbase(const fs::path& file, std::uint64_t bytes) {
+        std::ofstream out(file, std::ios::binary);
+        out << "<?xml version=\"1.0\" encoding=\"UTF-8\"?>\n"
+            << "<link:linkbase xmlns:link=\"http://www.xbrl.org/2003/linkbase\" xmlns:xlink=\"http://www.w3.org/1999/xlink\"\n"
+            << "    xmlns:xbrldt=\"http://xbrl.org/2005/xbrldt\" xmlns:xsi=\"http://www.w3.org/2001/XMLSchema-instance\"\n"
+            << "    xsi:schemaLocation=\"http://www.xbrl.org/2003/linkbase " << LINKBASE_SCHEMA << "\">\n";
+
+        std::uint64_t hrefs = 0;
+        for (std::uint64_t link = 0; static_cast<std::uint64_t>(out.tellp()) < bytes; ++link) {
+            out << "  <link:definitionLink xlink:type=\"extended\" xlink:role=\"http://www.eba.europa.eu/xbrl/crr/role/dict/dom/MC/"
+                << link << "\">\n"
+                << "    <link:loc xlink:type=\"locator\" xlink:href=\"http://www.eba.europa.eu/eu/fr/xbrl/crr/dict/dom/mc/mem.xsd#eba_MC"
+                << link << "\" xlink:label=\"loc_eba_MC" << link << "\"/>\n";
+            ++hrefs;
+            for (int member = 0; member < 1000 && static_cast<std::uint64_t>(out.tellp()) < bytes; ++member) {
+                out << "    <link:loc xlink:type=\"locator\" xlink:href=\"http://www.eba.europa.eu/eu/fr/xbrl/crr/dict/dom/mc/mem.xsd#eba_MC"
+                    << link << "_x" << member << "\" xlink:label=\"loc_eba_MC" << link << "_x" << member << "\"/>\n"
+                    << "    <link:definitionArc xlink:type=\"arc\" xlink:arcrole=\"http://xbrl.org/int/dim/arcrole/domain-member\""
+                    << " xlink:from=\"loc_eba_MC" << link << "\" xlink:to=\"loc_eba_MC" << link << "_x" << member
+                    << "\" order=\"" << member + 1 << ".0\"/>\n";
+                ++hrefs;
+            }
+            out << "  </link:definitionLink>\n";
+        }
+        out << "</link:linkbase>\n";
+        return hrefs;
+    }
+
+    /**
+     * @brief Runs a phase and prints its wall time and peak RSS.
+     */
+    void measure(const std::string& phase, const std::function<std::string()>& func) {
+        reset_peak_rss();
+        auto start = std::chrono::steady_clock::now();
+        const std::string result = func();
+        double seconds = std::chrono::duration<double>(std::chrono::steady_clock::now() - start).count();
+        std::cout << std::left << std::setw(22) << phase << std::right << std::fixed << std::setprecision(3)
+                  << std::setw(9) << seconds << " s" << std::setw(10) << peak_rss_kib() / 1024 << " MiB   " << result << std::endl;
+    }
+
+}  // namespace
+
+int main(int argc, char* argv[])
+{
+    const fs::path work_dir = argc > 1 ? argv[1] : "bench_work";
+    const std::uint64_t size_mib = argc > 2 ? std::stoull(argv[2]) : 40;
+    if (argc > 3) {
+        CatalogResolver::get_instance().set_schema_store(argv[3]);
+    }
+
+    fs::create_directories(work_dir);
+    const fs::path linkbase = work_dir / "definition-linkbase.xml";
+    const std::uint64_t hrefs = write_linkbase(linkbase, size_mib * 1024 * 1024);
+    std::cout << linkbase.string() << ": " << fs::file_size(linkbase) / (1024 * 1024) << " MiB, "
+              << hrefs << " xlink:href" << std::endl;
+    std::cout << "baseline " << peak_rss_kib() / 1024 << " MiB peak RSS" << std::endl;
+
+    measure("scan references", [&]() {
+        std::uint64_t found = 0;
+        const bool ok = ReferenceScanner::scan(linkbase.string(), [&](const ReferenceScanner::Reference& reference) {
+            found += reference.attribute == "xlink:href" ? 1 : 0;
+            return true;
+        });
+        return std::string(ok ? "" : "parse error, ") + std::to_string(found) + " xlink:href";
+    });
+
+    TPChecker checker;
+    measure("validate streaming", [&]() {
+        return std::string(checker.validate_xml_streaming(LINKBASE_SCHEMA, linkbase.string()) ? "valid" : "invalid");
+    });
+
+    // Above the size of the document, so validate_xml() builds the DOM.
+    checker.set_streaming_threshold(fs::file_size(linkbase) + 1);
+    measure("validate DOM", [&]() {
+        return std::string(checker.validate_xml(LINKBASE_SCHEMA, linkbase.string()) ? "valid" : "invalid");
+    });
+    return 0;
+}
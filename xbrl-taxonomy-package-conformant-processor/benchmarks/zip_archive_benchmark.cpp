@@ -0,0 +1,107 @@
+// zip_archive_benchmark.cpp : Compares recompressing and raw passthrough re-zipping.
+//
+// Usage: zip-archive-benchmark [INPUT_DIR] [WORK_DIR] [REPETITIONS] [LEVEL]
+//
+// Every .zip below INPUT_DIR (default: input) is extracted once into WORK_DIR
+// (default: bench_work) and re-zipped with utils::gen_zip_archive, first
+// recompressing every file, then reusing the compressed data of the source
+// archive. The best wall time of REPETITIONS runs (default: 3) is reported.
+// LEVEL (0-9, default: -1 = zlib's default) is the deflate level of the
+// recompressed files, e.g. 1 for intermediate artifacts, 9 for published ones.
+
+#include "../includes/utils.hpp"
+#include <algorithm>
+#include <chrono>
+#include <filesystem>
+#include <functional>
+#include <iomanip>
+#include <iostream>
+#include <string>
+#include <vector>
+
+namespace fs = std::filesystem;
+
+namespace {
+
+    /**
+     * @brief Runs a function several times and returns the best wall time in seconds.
+     */
+    double best_of(int repetitions, const std::function<void()>& func) {
+        double best = 0.0;
+        for (int i = 0; i < repetitions; ++i) {
+            auto start = std::chrono::steady_clock::now();
+            func();
+            double seconds = std::chrono::duration<double>(std::chrono::steady_clock::now() - start).count();
+            best = (i == 0) ? seconds : std::min(best, seconds);
+        }
+        return best;
+    }
+
+}  // namespace
+
+int main(int argc, char* argv[])
+{
+    const fs::path input_dir = argc > 1 ? argv[1] : "input";
+    const fs::path work_dir = argc > 2 ? argv[2] : "bench_work";
+    const int repetitions = argc > 3 ? std::max(1, std::stoi(argv[3])) : 3;
+    const int level = argc > 4 ? std::stoi(argv[4]) : -1;
+    utils::set_compression_level(level);
+
+    std::vector<fs::path> packages;
+    for (const auto& entry : fs::recursive_directory_iterator(input_dir)) {
+        if (entry.is_regular_file() && entry.path().extension() == ".zip") {
+            packages.push_back(entry.path());
+        }
+    }
+    std::sort(packages.begin(), packages.end());
+
+    struct Row {
+        std::string name;
+        double recompress;
+        double passthrough;
+        std::uintmax_t recompress_size;
+        std::uintmax_t passthrough_size;
+    };
+    std::vector<Row> rows;
+
+    for (const auto& package : packages) {
+        const fs::path package_dir = work_dir / package.stem();
+        const fs::path tree = package_dir / "tree";
+        const fs::path recompress_zip = package_dir / "recompress.zip";
+        const fs::path passthrough_zip = package_dir / "passthrough.zip";
+
+        fs::remove_all(package_dir);
+        utils::zip_dir_extractor(package.string(), tree.string());
+
+        Row row;
+        row.name = package.filename().string();
+        row.recompress = best_of(repetitions, [&] {
+            utils::gen_zip_archive(tree.string(), recompress_zip.string());
+        });
+        row.passthrough = best_of(repetitions, [&] {
+            utils::gen_zip_archive(tree.string(), passthrough_zip.string(), package.string());
+        });
+        row.recompress_size = fs::file_size(recompress_zip);
+        row.passthrough_size = fs::file_size(passthrough_zip);
+        rows.push_back(row);
+    }
+
+    std::cout << "\nRe-zip benchmark (best of " << repetitions << ", level " << level << "):\n"
+        << "-------------------------------\n"
+        << std::left << std::setw(42) << "Package"
+        << std::right << std::setw(15) << "recompress [s]"
+        << std::setw(16) << "passthrough [s]"
+        << std::setw(10) << "speedup"
+        << std::setw(16) << "recompress [B]"
+        << std::setw(17) << "passthrough [B]" << "\n";
+    for (const auto& row : rows) {
+        std::cout << std::left << std::setw(42) << row.name
+            << std::right << std::fixed << std::setprecision(3)
+            << std::setw(15) << row.recompress
+            << std::setw(16) << row.passthrough
+            << std::setw(9) << std::setprecision(1) << (row.passthrough > 0 ? row.recompress / row.passthrough : 0.0) << "x"
+            << std::setw(16) << row.recompress_size
+            << std::setw(17) << row.passthrough_size << "\n";
+    }
+    return 0;
+}
@@ -0,0 +1,161 @@
+#pragma once
+
+#ifndef ARCHIVEINDEX_HPP
+#define ARCHIVEINDEX_HPP
+
+#include <string>
+#include <vector>
+#include <set>
+#include <unordered_map>
+#include <unordered_set>
+#include <cstdint>
+
+class MappedZipReader;
+
+/**
+ * @class ArchiveIndex
+ * @brief In-memory index of the central directory of a ZIP archive.
+ *
+ * The central directory is read exactly once when the index is built. All
+ * structural checks of a taxonomy package (top-level directory, META-INF
+ * folder, taxonomyPackage.xml, catalog.xml) can then be answered from the
+ * index with hash lookups instead of re-opening and re-scanning the archive.
+ *
+ * Example usage:
+ * @code
+ * ArchiveIndex index("input/package.zip");
+ * TPChecker checker;
+ * bool ok = checker.has_top_level_single_dir(index) && checker.has_meta_inf_folder(index);
+ * @endcode
+ */
+class ArchiveIndex {
+public:
+    /**
+     * @brief Metadata of a single central directory entry.
+     */
+    struct Entry {
+        std::string name;           /**< Full entry name as stored in the archive */
+        std::uint64_t size;         /**< Uncompressed size in bytes */
+        std::uint64_t comp_size;    /**< Compressed size in bytes */
+        std::uint32_t crc;          /**< CRC-32 of the uncompressed data */
+        std::uint16_t comp_method;  /**< Compression method (0 = stored, 8 = deflate) */
+        bool is_dir;                /**< True if the entry is an explicit directory entry */
+    };
+
+    /**
+     * @brief Builds the index by reading the central directory of the archive once.
+     *
+     * If the archive cannot be opened, the index is empty and is_open() returns false.
+     *
+     * @param archive The path to the .zip archive.
+     */
+    explicit ArchiveIndex(const std::string& archive);
+
+    /**
+     * @brief Builds the index from an archive that is already mapped.
+     *
+     * @param zip The mapped archive.
+     */
+    explicit ArchiveIndex(const MappedZipReader& zip);
+
+    /**
+     * @brief Check whether the archive could be opened and indexed.
+     *
+     * @return True if the central directory was read successfully, otherwise False.
+     */
+    bool is_open() const;
+
+    /**
+     * @brief Get the path of the indexed archive.
+     *
+     * @return The archive path passed to the constructor.
+     */
+    const std::string& archive() const;
+
+    /**
+     * @brief Get all entries in central directory order.
+     *
+     * @return The list of indexed entries.
+     */
+    const std::vector<Entry>& entries() const;
+
+    /**
+     * @brief Get the set of top-level names (text before the first '/' of every entry).
+     *
+     * @return The sorted set of top-level prefixes.
+     */
+    const std::set<std::string>& top_level_prefixes() const;
+
+    /**
+     * @brief Look up an entry by its exact name.
+     *
+     * @param path The entry name, e.g. "pkg/META-INF/catalog.xml".
+     * @return Pointer to the entry or nullptr if the archive has no such entry.
+     */
+    const Entry* find(const std::string& path) const;
+
+    /**
+     * @brief Check whether a file entry with the exact name exists.
+     *
+     * @param path The entry name.
+     * @return True if the archive contains the file, otherwise False.
+     */
+    bool contains_file(const std::string& path) const;
+
+    /**
+     * @brief Check whether a directory exists, either as explicit entry or implied by a file path.
+     *
+     * @param path The directory path without trailing slash, e.g. "pkg/META-INF".
+     * @return True if the directory exists in the archive, otherwise False.
+     */
+    bool contains_dir(const std::string& path) const;
+
+    /**
+     * @brief Check whether a file exists inside META-INF, either below a top-level directory or at the root.
+     *
+     * @param file_name The name of the file inside META-INF, e.g. "taxonomyPackage.xml".
+     * @param meta_inf The name of the META-INF folder (default: "META-INF").
+     * @return True if such a file exists, otherwise False.
+     */
+    bool contains_meta_inf_file(const std::string& file_name, const std::string& meta_inf = "META-INF") const;
+
+    /**
+     * @brief Get the entry name of a file inside META-INF, either below a top-level directory or at the root.
+     *
+     * @param file_name The name of the file inside META-INF, e.g. "catalog.xml".
+     * @param meta_inf The name of the META-INF folder (default: "META-INF").
+     * @return The entry name, or an empty string if there is no such file.
+     */
+    std::string meta_inf_file(const std::string& file_name, const std::string& meta_inf = "META-INF") const;
+
+    /**
+     * @brief Get the number of indexed entries.
+     *
+     * @return The number of entries in the central directory.
+     */
+    std::size_t size() const;
+
+private:
+    /**
+     * @brief Indexes the central directory of a mapped archive.
+     *
+     * @param zip The mapped archive.
+     */
+    void build(const MappedZipReader& zip);
+
+    /**
+     * @brief Registers all parent directories implied by an entry name.
+     *
+     * @param name The entry name.
+     */
+    void add_parent_dirs(const std::string& name);
+
+    std::string archive_;                                   ///< Path to the indexed archive.
+    bool open_;                                             ///< True if the archive was indexed.
+    std::vector<Entry> entries_;                            ///< Entries in central directory order.
+    std::unordered_map<std::string, std::size_t> files_;    ///< File name -> position in entries_.
+    std::unordered_set<std::string> dirs_;                  ///< All directory paths without trailing slash.
+    std::set<std::string> top_level_;                       ///< Top-level prefixes.
+};
+
+#endif // ARCHIVEINDEX_HPP
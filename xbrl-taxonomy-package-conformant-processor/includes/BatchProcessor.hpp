@@ -0,0 +1,105 @@
+#pragma once
+
+#ifndef BATCHPROCESSOR_HPP
+#define BATCHPROCESSOR_HPP
+
+#include <string>
+#include <vector>
+#include <iostream>
+#include "Providers.hpp"
+#include "PackageProcessor.hpp"
+
+/**
+ * @brief One (provider, zip) pair of a batch run.
+ */
+struct BatchJob {
+    Provider provider;      /**< Provider of the package */
+    std::string package;    /**< Path to the package zip */
+};
+
+/**
+ * @class BatchProcessor
+ * @brief Checks and fixes many taxonomy packages concurrently on a bounded worker pool.
+ *
+ * Every package is processed in its own destination folder
+ * output_root/<PROVIDER>/<zip stem>, so fixers running in parallel never
+ * touch each other's files.
+ *
+ * Example usage:
+ * @code
+ * BatchProcessor batch("output", 8);
+ * auto results = batch.run(BatchProcessor::load_jobs("input/"));
+ * BatchProcessor::print_results_table(results);
+ * @endcode
+ */
+class BatchProcessor {
+public:
+    /**
+     * @brief Constructor for BatchProcessor.
+     *
+     * @param output_root The root folder for all destination folders.
+     * @param jobs The number of packages processed concurrently (0 selects the number of cores).
+     */
+    BatchProcessor(const std::string& output_root, std::size_t jobs);
+
+    /**
+     * @brief Loads the batch jobs from a directory or a manifest file.
+     *
+     * Directory: every .zip below the directory is a job. The provider is the
+     * first path component below the directory that names a provider
+     * (e.g. input/EBA/some/package.zip), otherwise default_provider.
+     *
+     * Manifest: a text file with one "PROVIDER PATH" pair per line. Empty
+     * lines and lines starting with '#' are ignored; relative paths are
+     * resolved against the folder of the manifest.
+     *
+     * Provider names are case-insensitive. Malformed lines and packages with
+     * an unknown provider are reported and skipped.
+     *
+     * The provider AUTO (as default_provider or in a manifest line) is
+     * detected from the central directory of each package (see
+     * ProviderDetector); packages detected with too little confidence are
+     * skipped.
+     *
+     * @param source The directory or manifest path.
+     * @param default_provider Provider for zips outside provider folders (empty = skip them, AUTO = detect it).
+     * @return The list of jobs.
+     * @throws std::invalid_argument if the source does not exist.
+     */
+    static std::vector<BatchJob> load_jobs(const std::string& source, const std::string& default_provider = "");
+
+    /**
+     * @brief Processes all jobs on the worker pool.
+     *
+     * The extractions of the workers share the cores (see utils::set_extraction_threads()).
+     *
+     * @param jobs The jobs to process.
+     * @return One result per job, in job order.
+     */
+    std::vector<PackageResult> run(const std::vector<BatchJob>& jobs);
+
+    /**
+     * @brief Prints a consolidated results table.
+     *
+     * @param results The results to print.
+     * @param out The output stream (default: std::cout).
+     */
+    static void print_results_table(const std::vector<PackageResult>& results, std::ostream& out = std::cout);
+
+private:
+    /**
+     * @brief Computes a unique destination folder for every job.
+     *
+     * Packages with the same stem get a "-N" suffix that differs, ignoring
+     * case, from the folder of every other package of the batch.
+     *
+     * @param jobs The jobs to process.
+     * @return One destination folder per job.
+     */
+    std::vector<std::string> destination_folders(const std::vector<BatchJob>& jobs) const;
+
+    std::string output_root_;   ///< Root folder for all destination folders.
+    std::size_t jobs_;          ///< Number of concurrent packages.
+};
+
+#endif // BATCHPROCESSOR_HPP
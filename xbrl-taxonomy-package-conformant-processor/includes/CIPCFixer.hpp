@@ -12,6 +12,7 @@
 #include <map>
 #include <set>
 #include <pugixml.hpp> // XML parsing library
+#include "VirtualPackage.hpp"
 
 /**
  * @brief Class CIPCTaxonomyPackage
@@ -34,6 +35,15 @@ public:
     void fixTaxonomyPackageXML();
     void fixCatalogXML();
     void restructureFolder();
+    void restructureFiles(const std::vector<std::string>& files);
+
+    /**
+     * @brief Drops the integrated IFRS taxonomy folder from a package tree, before extraction.
+     *
+     * @param package The tree of the source package.
+     * @return The number of files dropped.
+     */
+    static std::size_t dropIFRSTaxonomy(VirtualPackage& package);
 
 private:
     std::string destination_folder;
@@ -44,29 +54,8 @@ private:
     std::vector<std::string> getFullPathOfAllXSDFiles() const;
     std::vector<std::string> getFullPathToAllXMLFiles() const;
 
-    void replaceSubstringInPropertyValue(
-        const std::string& affected_xml_file,
-        int start_idx,
-        int end_idx,
-        const std::string& substring1,
-        const std::string& substring2,
-        pugi::xml_node& node,
-        const std::string& attribute,
-        const std::string& replace_with1,
-        const std::string& replace_with2,
-        pugi::xml_document& doc
-    ) const;
-
-    void replaceSubstringInSchemaFile(
-        const std::string& condition,
-        pugi::xml_node& node,
-        const std::string& attribute,
-        const std::string& replace_substr1,
-        const std::string& replace_substr2,
-        pugi::xml_document& doc
-    ) const;
-
     void removeIFRSTaxonomy();
+    void fixFiles(const std::vector<std::string>& files);
 };
 
 #endif // CIPCTAXONOMYPACKAGEFIXER_HPP
@@ -13,6 +13,7 @@
 #include <regex>
 #include <zip.h>
 #include "TPFixerInterface.hpp"
+#include "DocumentCache.hpp"
 
 class CMFCLCITaxonomyPackage {
 public:
@@ -32,19 +33,43 @@ public:
     void fix_taxonomy_package_xml(const std::string& source_folder);
     void fix_catalog_xml(const std::string& source_folder);
 
+    /**
+     * Writes the fixed package straight from the source zip, without extracting it.
+     *
+     * Applies the same restructuring as restructure_folder() and
+     * fix_top_level_single_dir() as path remapping (<stem>/files/...), and
+     * injects a generated META-INF/taxonomyPackage.xml if the package has none.
+     * Unchanged entries are copied as raw compressed bytes.
+     *
+     * @param output_zip Path of the fixed zip to create
+     */
+    void repackage(const std::string& output_zip);
+
 private:
     std::vector<std::string> entry_points;
+    DocumentCache documents;
     std::string full_path_to_zip;
     std::string destination_folder;
 
     /**
-     * Extracts necessary entry points from the specified folder.
+     * Extracts the entry points of the specified folder with DTS discovery.
+     *
+     * Every schema and linkbase is parsed once into the fixer's document
+     * cache; the entry points are the schemas not referenced by others.
      *
      * @param source_folder The folder to extract entry points from
      * @return A vector of entry point paths
      */
     std::vector<std::string> extract_entry_points(const std::string& source_folder);
 
+    /**
+     * Builds the taxonomyPackage.xml document.
+     *
+     * @param source_folder The folder (or zip path) whose name carries the package version
+     * @return The document, owned by the caller
+     */
+    xmlDocPtr build_taxonomy_package_xml(const std::string& source_folder);
+
     /**
      * Prints colored messages to the console.
      *
@@ -0,0 +1,132 @@
+#pragma once
+
+#ifndef CASECOLLISIONCHECKER_HPP
+#define CASECOLLISIONCHECKER_HPP
+
+#include <cstddef>
+#include <memory>
+#include <string>
+#include <string_view>
+#include <unordered_map>
+#include <unordered_set>
+#include <vector>
+#include "MappedZipReader.hpp"
+
+class XmlCatalog;
+
+/**
+ * @brief Finds paths of a package that only work on case-sensitive file systems.
+ *
+ * Packages built on Linux may contain "Foo.xsd" next to "foo.xsd", or refer
+ * to "Foo.xsd" when the file is "foo.xsd". Both break once the package is
+ * extracted on Windows (or macOS), where such names denote the same file.
+ *
+ * The entry paths of the central directory, and the directories they imply,
+ * are indexed in one pass under a case-folded, normalized key (see fold()).
+ * Paths that share a key collide. References (xlink:href, schemaLocation)
+ * of the schemas and linkbases are streamed from the mapped archive (see
+ * ReferenceScanner) on a thread pool; a reference whose target is missing
+ * but whose key is indexed only resolves when case is ignored. Every lookup
+ * is a hash lookup, so the cost grows linearly with the number of entries
+ * and references.
+ *
+ * Example usage:
+ * @code
+ * MappedZipReader zip("input/EBA/Reporting_Frameworks_3.3.0.0_errata.zip");
+ * CaseCollisionChecker checker(zip);
+ * for (const auto& collision : checker.collisions()) {
+ *     std::cout << collision.names.front() << " collides with " << collision.names.back() << std::endl;
+ * }
+ * @endcode
+ */
+class CaseCollisionChecker {
+public:
+    /**
+     * @brief Paths that differ only in case or Unicode normalization.
+     */
+    struct Collision {
+        std::string folded;                 ///< The common case-folded, normalized path.
+        std::vector<std::string> names;     ///< The paths as stored in the archive, sorted.
+    };
+
+    /**
+     * @brief A reference that only resolves when case is ignored.
+     */
+    struct CaseMismatch {
+        std::string file;       ///< Entry containing the reference.
+        int line = 0;           ///< Line of the element.
+        std::string attribute;  ///< "xlink:href" or "schemaLocation".
+        std::string value;      ///< Reference as written in the document.
+        std::string target;     ///< Entry the reference matches when case is ignored.
+    };
+
+    /**
+     * @brief Constructor for CaseCollisionChecker.
+     *
+     * Indexes the entry paths of the archive and reads its catalog, if any.
+     *
+     * @param archive The mapped archive; it must outlive the checker.
+     * @param num_threads Number of worker threads (0 selects ThreadPool::default_concurrency()).
+     */
+    explicit CaseCollisionChecker(const MappedZipReader& archive, std::size_t num_threads = 0);
+
+    /**
+     * @brief Destructor for CaseCollisionChecker.
+     */
+    ~CaseCollisionChecker();
+
+    CaseCollisionChecker(const CaseCollisionChecker&) = delete;
+    CaseCollisionChecker& operator=(const CaseCollisionChecker&) = delete;
+
+    /**
+     * @brief Get the paths that collide when case is ignored.
+     *
+     * @return The collisions, ordered by folded path.
+     */
+    std::vector<Collision> collisions() const;
+
+    /**
+     * @brief Checks the references of all .xsd and .xml entries (META-INF excluded) in parallel.
+     *
+     * @return The references that only resolve when case is ignored, ordered by file and line.
+     */
+    std::vector<CaseMismatch> check_references() const;
+
+    /**
+     * @brief Checks the references of one entry.
+     *
+     * @param entry An entry of the archive.
+     * @return The references that only resolve when case is ignored, in document order.
+     */
+    std::vector<CaseMismatch> check_entry(const MappedZipReader::Entry& entry) const;
+
+    /**
+     * @brief Case-folds and normalizes a UTF-8 path.
+     *
+     * Letters are case-folded (ASCII, Latin-1, Latin Extended-A, Greek,
+     * Cyrillic, full-width Latin) and the precomposed Latin letters are
+     * decomposed, so a path stored in NFC and one stored in NFD (as macOS
+     * does) get the same key. Bytes that are not valid UTF-8 are kept.
+     *
+     * @param path The path.
+     * @return The folded path.
+     */
+    static std::string fold(std::string_view path);
+
+private:
+    /**
+     * @brief Maps a resolved reference to an entry path, through the catalog for remote URLs.
+     *
+     * @param resolved The absolute URI.
+     * @return The entry path, or an empty string if the target is outside the package.
+     */
+    std::string to_entry(const std::string& resolved) const;
+
+    const MappedZipReader& archive_;                                                ///< The package.
+    std::size_t num_threads_;                                                       ///< Worker threads.
+    std::unordered_set<std::string_view> paths_;                                    ///< Files and directories, views into the mapping.
+    std::unordered_map<std::string, std::vector<std::string_view>> folded_;         ///< Folded path -> paths.
+    std::unique_ptr<XmlCatalog> catalog_;                                           ///< META-INF/catalog.xml, if any.
+};
+
+#endif // CASECOLLISIONCHECKER_HPP
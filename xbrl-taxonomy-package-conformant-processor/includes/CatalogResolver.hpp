@@ -0,0 +1,338 @@
+#pragma once
+
+#ifndef CATALOGRESOLVER_HPP
+#define CATALOGRESOLVER_HPP
+
+#include <cstddef>
+#include <cstdint>
+#include <filesystem>
+#include <list>
+#include <memory>
+#include <mutex>
+#include <optional>
+#include <shared_mutex>
+#include <string>
+#include <unordered_map>
+#include <vector>
+#include <libxml/parser.h>
+
+/**
+ * @brief The rewriteURI entries of a taxonomy package catalog (META-INF/catalog.xml).
+ *
+ * Example usage:
+ * @code
+ * XmlCatalog catalog("output/EBA/META-INF/catalog.xml");
+ * std::optional<std::string> file = catalog.rewrite("http://www.eba.europa.eu/eu/fr/xbrl/crr/dict/dom/dom.xsd");
+ * @endcode
+ */
+class XmlCatalog {
+public:
+    /**
+     * @brief A rewriteURI entry, with the rewrite prefix resolved against the catalog location.
+     */
+    struct RewriteRule {
+        std::string uri_start;          ///< The uriStartString attribute.
+        std::string rewrite_prefix;     ///< Local folder the matching URIs are mapped to.
+    };
+
+    /**
+     * @brief Reads the rewriteURI entries of a catalog file.
+     *
+     * @param catalog_file Path to the catalog.xml.
+     */
+    explicit XmlCatalog(const std::string& catalog_file);
+
+    /**
+     * @brief Reads the rewriteURI entries of a catalog that is already parsed.
+     *
+     * @param catalog_file Location of the catalog.xml, the rewrite prefixes are resolved against.
+     * @param doc The parsed catalog (not freed).
+     */
+    XmlCatalog(const std::string& catalog_file, xmlDocPtr doc);
+
+    /**
+     * @brief Check whether the catalog could be read.
+     *
+     * @return true if the catalog was parsed, false otherwise.
+     */
+    bool is_open() const;
+
+    /**
+     * @brief Get the path of the catalog file.
+     *
+     * @return The catalog file.
+     */
+    const std::string& catalog_file() const;
+
+    /**
+     * @brief Get the rewriteURI entries, longest uriStartString first.
+     *
+     * @return The rewrite rules.
+     */
+    const std::vector<RewriteRule>& rules() const;
+
+    /**
+     * @brief Map a URI to a local file with the longest matching rewriteURI entry.
+     *
+     * @param uri The absolute URI.
+     * @return The local file, or std::nullopt if no entry matches.
+     */
+    std::optional<std::string> rewrite(const std::string& uri) const;
+
+private:
+    /**
+     * @brief Reads the rewriteURI entries of the parsed catalog.
+     */
+    void load(xmlDocPtr doc);
+
+    std::string catalog_file_;
+    bool open_;
+    std::vector<RewriteRule> rules_;
+};
+
+/**
+ * @brief Offline resolver for remote URIs, installed as the libxml2 external entity loader.
+ *
+ * Every document libxml2 loads (schema imports and includes, external DTDs,
+ * the document itself) goes through this resolver. Remote URIs are mapped
+ * to local files in this order:
+ *
+ * 1. the rewriteURI entries of the package catalog active on the calling
+ *    thread (see Scope),
+ * 2. the bundled store of XBRL/W3C base schemas, laid out like the URLs
+ *    (http://www.xbrl.org/2003/xl-2003-12-31.xsd is read from
+ *    <store>/www.xbrl.org/2003/xl-2003-12-31.xsd). The store is the
+ *    "schemas" folder next to the executable unless set_schema_store()
+ *    names another.
+ *
+ * Remote URIs that cannot be mapped fail immediately unless network access
+ * is allowed, so a missing file never stalls on a connection timeout.
+ *
+ * Resolved URIs are memoized, and the content of resolved documents is kept
+ * in a bounded in-memory cache, so the base schemas imported by every
+ * taxonomy are read from disk once per process. Cached catalogs and
+ * documents are checked against the modification time and size of their
+ * file, so a package that is fixed or replaced is read again. A long-running
+ * process drops what it memoized for a package with forget() once the
+ * package is done.
+ *
+ * Example usage:
+ * @code
+ * CatalogResolver& resolver = CatalogResolver::get_instance();
+ * CatalogResolver::Scope scope(resolver.catalog_for("output/EBA/www.eba.europa.eu/eu/fr/xbrl/crr/fws/corep/mod/corep_con.xsd"));
+ * xmlDocPtr doc = xmlReadFile(file.c_str(), nullptr, 0);
+ * @endcode
+ */
+class CatalogResolver {
+public:
+    /// Shared handle to a loaded package catalog.
+    using CatalogPtr = std::shared_ptr<const XmlCatalog>;
+
+    /**
+     * @brief Activates a package catalog for the libxml2 parsers of the calling thread.
+     *
+     * Scopes nest; the previous catalog is restored on destruction.
+     */
+    class Scope {
+    public:
+        /**
+         * @brief Activates a catalog.
+         *
+         * @param catalog The catalog, or nullptr to resolve with the bundled store only.
+         */
+        explicit Scope(CatalogPtr catalog);
+        ~Scope();
+
+        Scope(const Scope&) = delete;
+        Scope& operator=(const Scope&) = delete;
+
+    private:
+        CatalogPtr catalog_;
+        const XmlCatalog* previous_;
+    };
+
+    /**
+     * @brief Get the singleton instance of the CatalogResolver.
+     *
+     * The first call installs the libxml2 external entity loader.
+     *
+     * @return The instance of the CatalogResolver.
+     */
+    static CatalogResolver& get_instance();
+
+    /**
+     * @brief Load a catalog file, again only if the file changed.
+     *
+     * @param catalog_file Path to the catalog.xml.
+     * @return The catalog, or nullptr if it could not be read.
+     */
+    CatalogPtr load_catalog(const std::string& catalog_file);
+
+    /**
+     * @brief Find the catalog of the package a file or folder belongs to.
+     *
+     * Walks up from the path to the first folder with a META-INF/catalog.xml.
+     * Folders without a catalog are not memoized, since a fixer may add one.
+     *
+     * @param path A file or folder inside an extracted package.
+     * @return The catalog, or nullptr if the package has none.
+     */
+    CatalogPtr catalog_for(const std::string& path);
+
+    /**
+     * @brief Map a URI to a local file.
+     *
+     * @param uri The URI or file path.
+     * @param catalog The package catalog to consult first (may be nullptr).
+     * @return The local file, or the URI unchanged if it cannot be mapped.
+     */
+    std::string resolve(const std::string& uri, const XmlCatalog* catalog) const;
+
+    /**
+     * @brief Map a URI to a local file, using the catalog active on the calling thread.
+     *
+     * @param uri The URI or file path.
+     * @return The local file, or the URI unchanged if it cannot be mapped.
+     */
+    std::string resolve(const std::string& uri) const;
+
+    /**
+     * @brief Get the content of a file from the document cache, reading it on first use or when it changed.
+     *
+     * @param path The local file.
+     * @return The content, or nullptr if the file cannot be read.
+     */
+    std::shared_ptr<const std::string> load_document(const std::string& path);
+
+    /**
+     * @brief Set the folder of the bundled base schemas.
+     *
+     * @param directory The schema store folder (default: the "schemas" folder next to the
+     *        executable, as copied on build, else "schemas" in the working directory).
+     */
+    void set_schema_store(const std::string& directory);
+
+    /**
+     * @brief Get the folder of the bundled base schemas.
+     *
+     * @return The schema store folder.
+     */
+    std::string schema_store() const;
+
+    /**
+     * @brief Allow or forbid fetching remote URIs that cannot be mapped to a local file.
+     *
+     * @param allow true to fall back to the network (default: false).
+     */
+    void set_allow_network(bool allow);
+
+    /**
+     * @brief Check whether remote URIs may be fetched over the network.
+     *
+     * @return true if network access is allowed, false otherwise.
+     */
+    bool allow_network() const;
+
+    /**
+     * @brief Set the maximum number of bytes kept in the document cache.
+     *
+     * @param bytes The limit (default: 64 MiB).
+     */
+    void set_document_cache_limit(std::size_t bytes);
+
+    /**
+     * @brief Get the number of bytes in the document cache.
+     *
+     * @return The cached bytes.
+     */
+    std::size_t document_cache_size() const;
+
+    /**
+     * @brief Drop the memoized catalogs, resolutions and documents of the packages below a folder.
+     *
+     * @param folder An extracted package, its destination folder, or a package archive.
+     */
+    void forget(const std::string& folder);
+
+    /**
+     * @brief Drop all memoized catalogs, resolutions and documents.
+     */
+    void clear();
+
+    /// Memoized resolutions kept before they are dropped all at once.
+    static constexpr std::size_t RESOLVED_LIMIT = 100000;
+
+private:
+    /// Private constructor (singleton pattern).
+    CatalogResolver();
+
+    /**
+     * @brief Map a remote URI to its copy in the schema store.
+     *
+     * @param uri The URI.
+     * @return The local file, or std::nullopt if the store has no copy or the path leaves the store.
+     */
+    std::optional<std::string> resolve_in_store(const std::string& uri) const;
+
+    /**
+     * @brief Evicts least recently used documents until the limit is respected. Caller holds documents_mutex_.
+     */
+    void evict_documents_locked();
+
+    /**
+     * @brief libxml2 external entity loader.
+     */
+    static xmlParserInputPtr entity_loader(const char* url, const char* id, xmlParserCtxtPtr ctxt);
+
+    /**
+     * @brief Modification time and size of a file, to tell whether a cached copy is current.
+     */
+    struct FileStamp {
+        std::filesystem::file_time_type mtime{};
+        std::uintmax_t size = 0;
+
+        bool operator==(const FileStamp& other) const = default;
+    };
+
+    /**
+     * @brief Get the stamp of a file.
+     *
+     * @return The stamp, or std::nullopt if the file does not exist.
+     */
+    static std::optional<FileStamp> stamp_of(const std::string& path);
+
+    /**
+     * @brief A cached catalog and the stamp of its file.
+     */
+    struct CachedCatalog {
+        CatalogPtr catalog;
+        FileStamp stamp;
+    };
+
+    /**
+     * @brief A cached document: local path, stamp and content.
+     */
+    struct Document {
+        std::string path;
+        FileStamp stamp;
+        std::shared_ptr<const std::string> content;
+    };
+
+    mutable std::shared_mutex mutex_;                                           ///< Guards the members below.
+    std::string store_;                                                         ///< Folder of the bundled base schemas.
+    bool allow_network_;                                                        ///< Fall back to the network.
+    std::unordered_map<std::string, CachedCatalog> catalogs_;                   ///< Catalog file -> catalog.
+    std::unordered_map<std::string, std::string> folder_catalogs_;              ///< Folder -> catalog file of its package.
+    mutable std::unordered_map<std::string, std::string> resolved_;             ///< Memoized resolutions (at most RESOLVED_LIMIT).
+
+    mutable std::mutex documents_mutex_;                                        ///< Guards the document cache.
+    std::list<Document> documents_;                                             ///< Documents, most recently used first.
+    std::unordered_map<std::string, std::list<Document>::iterator> document_slots_; ///< Path -> document.
+    std::size_t documents_size_;                                                ///< Bytes in the document cache.
+    std::size_t documents_limit_;                                               ///< Maximum bytes in the document cache.
+
+    static xmlExternalEntityLoader default_loader_;                             ///< Loader installed before ours.
+    static thread_local const XmlCatalog* current_catalog_;                     ///< Catalog of the active Scope.
+};
+
+#endif // CATALOGRESOLVER_HPP
@@ -0,0 +1,147 @@
+#pragma once
+
+#ifndef CONTENTSTORE_HPP
+#define CONTENTSTORE_HPP
+
+#include <atomic>
+#include <cstdint>
+#include <mutex>
+#include <set>
+#include <string>
+
+/**
+ * @brief Content-addressed store of extracted files, shared by all packages and runs.
+ *
+ * Identical files (the www.xbrl.org and www.eurofiling.info schemas embedded
+ * in many packages, unchanged files of consecutive releases) are written to
+ * disk once. Extraction looks every entry up by the CRC-32 and size from the
+ * central directory, confirms a candidate with a SHA-256 of the entry, and
+ * links the stored object into the destination folder instead of writing it
+ * again.
+ *
+ * Objects are stored as <root>/objects/<crc>-<size>/<sha256>. They are made
+ * read-only, because hardlinked copies share the object: code that modifies
+ * an extracted file must write a new file and rename it over the old one,
+ * as HrefRewriter::rewrite_file does, never write to it in place.
+ *
+ * The store is disabled until enable() is called; extraction then falls
+ * back to utils::zip_dir_extractor.
+ *
+ * Example usage:
+ * @code
+ * ContentStore& store = ContentStore::get_instance();
+ * store.enable("output/.store", ContentStore::LinkMode::Auto);
+ * store.extract("input/EBA/Reporting_Frameworks_3.3.0.0_errata.zip", "output/EBA/Reporting_Frameworks_3.3.0.0_errata");
+ * @endcode
+ */
+class ContentStore {
+public:
+    /**
+     * @brief How stored objects are placed into destination folders.
+     */
+    enum class LinkMode {
+        Auto,       ///< Reflink if the file system supports it, else hardlink, else copy.
+        Reflink,    ///< Copy-on-write clone (Btrfs, XFS); falls back to copy.
+        Hardlink,   ///< Hard link; falls back to copy (e.g. across file systems).
+        Copy        ///< Plain copy; only saves the decompression of known files.
+    };
+
+    /**
+     * @brief Extraction statistics.
+     */
+    struct Stats {
+        std::size_t files = 0;      ///< Extracted file entries.
+        std::size_t linked = 0;     ///< Files placed from an existing object.
+        std::size_t stored = 0;     ///< Files written to the store as new objects.
+        std::uint64_t bytes_saved = 0;  ///< Bytes not written thanks to existing objects.
+    };
+
+    /**
+     * @brief Get the singleton instance of the ContentStore.
+     *
+     * @return The instance of the ContentStore.
+     */
+    static ContentStore& get_instance();
+
+    /**
+     * @brief Enable the store.
+     *
+     * @param root The store folder (created if missing).
+     * @param mode How objects are placed into destination folders.
+     */
+    void enable(const std::string& root, LinkMode mode = LinkMode::Auto);
+
+    /**
+     * @brief Check whether the store is enabled.
+     *
+     * @return true if enable() was called, false otherwise.
+     */
+    bool is_enabled() const;
+
+    /**
+     * @brief Get the store folder.
+     *
+     * @return The store folder, empty if disabled.
+     */
+    std::string root() const;
+
+    /**
+     * @brief Extract a zip file through the store.
+     *
+     * Entries whose name fails utils::is_safe_entry_name() are reported and skipped.
+     *
+     * @param zip_path Path to the zip file.
+     * @param destination_folder Folder the entries are placed in.
+     * @param num_threads Number of worker threads (0 selects utils::extraction_threads()).
+     * @return The extraction statistics.
+     */
+    Stats extract(const std::string& zip_path, const std::string& destination_folder, unsigned int num_threads = 0);
+
+    /**
+     * @brief Extract selected entries of a zip file through the store.
+     *
+     * @param zip_path Path to the zip file.
+     * @param destination_folder Folder the entries are placed in.
+     * @param entry_names Names of the entries to extract.
+     * @param num_threads Number of worker threads (0 selects utils::extraction_threads()).
+     * @return The extraction statistics.
+     */
+    Stats extract(const std::string& zip_path, const std::string& destination_folder,
+        const std::set<std::string>& entry_names, unsigned int num_threads = 0);
+
+    /**
+     * @brief Parse a link mode name (auto, reflink, hardlink, copy).
+     *
+     * @param name The name.
+     * @return The link mode.
+     * @throws std::invalid_argument if the name is unknown.
+     */
+    static LinkMode parse_link_mode(const std::string& name);
+
+private:
+    /// Private constructor (singleton pattern).
+    ContentStore() = default;
+
+    /**
+     * @brief Extracts the entries of a zip file through the store.
+     *
+     * @param only Entry names to extract (nullptr: all entries).
+     */
+    Stats extract_entries(const std::string& zip_path, const std::string& destination_folder,
+        const std::set<std::string>* only, unsigned int num_threads);
+
+    /**
+     * @brief Place an object at a destination path according to the link mode.
+     *
+     * @return true if the object was linked or copied.
+     */
+    bool place(const std::string& object, const std::string& destination);
+
+    mutable std::mutex mutex_;                  ///< Guards root_ and mode_.
+    std::string root_;                          ///< Store folder, empty if disabled.
+    LinkMode mode_ = LinkMode::Auto;            ///< Configured link mode.
+    std::atomic<bool> reflink_supported_{ true };   ///< Cleared after the first failed reflink.
+    std::atomic<bool> hardlink_supported_{ true };  ///< Cleared after the first failed hard link.
+};
+
+#endif // CONTENTSTORE_HPP
@@ -0,0 +1,143 @@
+#pragma once
+
+#ifndef DTSDISCOVERY_HPP
+#define DTSDISCOVERY_HPP
+
+#include <cstddef>
+#include <string>
+#include <unordered_map>
+#include <vector>
+#include "DocumentCache.hpp"
+
+/**
+ * @brief Discovers the DTS (Discoverable Taxonomy Set) of the documents of a package.
+ *
+ * Discovery follows the edges defined by XBRL 2.1:
+ *  - xs:import, xs:include and xs:redefine (schemaLocation),
+ *  - link:linkbaseRef (xlink:href),
+ *  - every other xlink:href (link:loc, link:roleRef, link:arcroleRef, ...).
+ *
+ * Relative references resolve against xml:base and the document location,
+ * absolute URLs through the package catalog and the bundled schema store
+ * (see CatalogResolver). References that do not map to a local file are
+ * recorded as external and not followed.
+ *
+ * Every document is parsed once through the shared DocumentCache; documents
+ * are parsed in parallel, one discovery level at a time. The reference graph
+ * is built once, so finding the entry points is linear in the number of
+ * documents and references.
+ *
+ * Example usage:
+ * @code
+ * DocumentCache documents;
+ * DTSDiscovery dts(documents);
+ * dts.discover_folder("output/CIPC/cipc_2023-09-07");
+ * for (const auto& entry_point : dts.entry_points()) {
+ *     std::cout << entry_point << ": " << dts.reachable(entry_point).size() << " documents" << std::endl;
+ * }
+ * @endcode
+ */
+class DTSDiscovery {
+public:
+    /**
+     * @brief Kind of a reference between two documents.
+     */
+    enum class EdgeKind {
+        Import,         ///< xs:import, xs:include or xs:redefine.
+        LinkbaseRef,    ///< link:linkbaseRef.
+        Href            ///< Any other xlink:href.
+    };
+
+    /**
+     * @brief A reference to a local document.
+     */
+    struct Edge {
+        std::string target;     ///< Key of the referenced document (see DocumentCache::key).
+        EdgeKind kind;          ///< Kind of the reference.
+    };
+
+    /**
+     * @brief A discovered document and its references.
+     */
+    struct Node {
+        std::string path;                   ///< Key of the document.
+        bool parsed = false;                ///< false if the document is missing or not well-formed.
+        std::vector<Edge> edges;            ///< References to local documents, without duplicates.
+        std::vector<std::string> external;  ///< References that could not be mapped to a local file.
+    };
+
+    /**
+     * @brief Constructor for DTSDiscovery.
+     *
+     * @param documents The document cache shared with the other components of the package.
+     * @param num_threads Number of parsing threads (0 selects the number of cores).
+     */
+    explicit DTSDiscovery(DocumentCache& documents, std::size_t num_threads = 0);
+
+    /**
+     * @brief Discover the DTS of a set of documents, adding them and everything they reference.
+     *
+     * @param seeds Paths of the starting documents.
+     */
+    void discover(const std::vector<std::string>& seeds);
+
+    /**
+     * @brief Discover the DTS of all schemas and linkbases (.xsd, .xml) below a folder.
+     *
+     * META-INF (catalog.xml, taxonomyPackage.xml) is skipped.
+     *
+     * @param folder The folder of an extracted package.
+     */
+    void discover_folder(const std::string& folder);
+
+    /**
+     * @brief Get a discovered document.
+     *
+     * @param path Path to the document.
+     * @return The node, or nullptr if the document was not discovered.
+     */
+    const Node* node(const std::string& path) const;
+
+    /**
+     * @brief Get the DTS of an entry point: every document reachable from it, itself included.
+     *
+     * @param entry_point Path to the entry point.
+     * @return The keys of the reachable documents, in discovery order.
+     */
+    std::vector<std::string> reachable(const std::string& entry_point) const;
+
+    /**
+     * @brief Get the entry points: schemas that no document outside their own DTS references.
+     *
+     * Computed from the strongly connected components of the reference graph,
+     * so that a schema whose own linkbases point back into it still counts as
+     * a root. Within a component, schemas imported by another member are not
+     * entry points.
+     *
+     * @return The keys of the entry point schemas, sorted.
+     */
+    std::vector<std::string> entry_points() const;
+
+    /**
+     * @brief Get the number of discovered documents.
+     *
+     * @return The number of documents.
+     */
+    std::size_t size() const;
+
+private:
+    /**
+     * @brief Parses a document (through the cache) and collects its references.
+     *
+     * @param path Key of the document.
+     * @return The node.
+     */
+    Node extract(const std::string& path) const;
+
+    DocumentCache& documents_;                          ///< Shared parsed documents.
+    std::size_t num_threads_;                           ///< Number of parsing threads.
+    std::unordered_map<std::string, Node> nodes_;       ///< Key -> discovered document.
+    std::vector<std::string> order_;                    ///< Keys in discovery order.
+};
+
+#endif // DTSDISCOVERY_HPP
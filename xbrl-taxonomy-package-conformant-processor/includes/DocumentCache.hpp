@@ -0,0 +1,108 @@
+#pragma once
+
+#ifndef DOCUMENTCACHE_HPP
+#define DOCUMENTCACHE_HPP
+
+#include <cstddef>
+#include <future>
+#include <memory>
+#include <mutex>
+#include <string>
+#include <unordered_map>
+#include <libxml/tree.h>
+
+/**
+ * @brief A thread-safe cache of parsed XML documents of one package.
+ *
+ * Every document is parsed at most once, however many components ask for
+ * it (DTS discovery, checks, fixers). Concurrent requests for the same file
+ * wait for a single parse. Documents are keyed by their absolute, normalized
+ * path and stay in memory until they are invalidated or the cache is
+ * destroyed, so the cache should live as long as the processing of one
+ * package.
+ *
+ * Documents are parsed with the catalog of their package active (see
+ * CatalogResolver), without network access.
+ *
+ * Example usage:
+ * @code
+ * DocumentCache documents;
+ * DocumentCache::DocPtr doc = documents.get("output/EBA/.../mod/corep_con.xsd");
+ * xmlNodePtr root = xmlDocGetRootElement(doc.get());
+ * @endcode
+ */
+class DocumentCache {
+public:
+    /// Shared handle to a parsed document.
+    using DocPtr = std::shared_ptr<xmlDoc>;
+
+    DocumentCache() = default;
+
+    DocumentCache(const DocumentCache&) = delete;
+    DocumentCache& operator=(const DocumentCache&) = delete;
+
+    /**
+     * @brief Get the parsed document of a file, parsing it on first use.
+     *
+     * @param path Path to the XML file.
+     * @return The document, or nullptr if the file could not be parsed.
+     */
+    DocPtr get(const std::string& path);
+
+    /**
+     * @brief Check whether a file has been requested before.
+     *
+     * @param path Path to the XML file.
+     * @return true if the file is in the cache, false otherwise.
+     */
+    bool contains(const std::string& path) const;
+
+    /**
+     * @brief Drop a document, e.g. after the file has been rewritten.
+     *
+     * @param path Path to the XML file.
+     */
+    void invalidate(const std::string& path);
+
+    /**
+     * @brief Get the number of cached documents.
+     *
+     * @return The number of documents.
+     */
+    std::size_t size() const;
+
+    /**
+     * @brief Get the number of files parsed so far.
+     *
+     * @return The number of parses.
+     */
+    std::size_t parse_count() const;
+
+    /**
+     * @brief Drop all documents.
+     */
+    void clear();
+
+    /**
+     * @brief Get the key of a path: absolute, normalized, with '/' separators.
+     *
+     * @param path Path to a file.
+     * @return The key.
+     */
+    static std::string key(const std::string& path);
+
+private:
+    /**
+     * @brief Parses a file.
+     *
+     * @param path Path to the XML file.
+     * @return The document, or nullptr on error.
+     */
+    static DocPtr parse(const std::string& path);
+
+    mutable std::mutex mutex_;                                              ///< Guards the members below.
+    std::unordered_map<std::string, std::shared_future<DocPtr>> documents_; ///< Key -> (possibly pending) document.
+    std::size_t parse_count_ = 0;                                           ///< Number of parses.
+};
+
+#endif // DOCUMENTCACHE_HPP
@@ -30,8 +30,13 @@ class EBATaxonomyPackage : public TaxonomyPackageFixerInterface {
 public:
     /**
      * @brief Constructor for EBATaxonomyPackage.
+     *
+     * Nothing is copied or extracted yet.
+     *
+     * @param full_path_to_zip The full path to the ZIP file of the taxonomy package.
+     * @param destination_folder The folder where the taxonomy package is fixed.
      */
-    EBATaxonomyPackage();
+    EBATaxonomyPackage(const std::string& full_path_to_zip, const std::string& destination_folder);
 
     void convert_to_zip_archive() override;
     void fix_meta_inf_folder() override;
@@ -40,8 +45,23 @@ public:
     void fix_taxonomy_package_xml() override;
     void fix_catalog_xml() override;
 
+    /**
+     * @brief Get the full path to the ZIP file of the taxonomy package.
+     */
+    const std::string& get_full_path_to_zip() const {
+        return full_path_to_zip;
+    }
+
+    /**
+     * @brief Get the folder where the taxonomy package is fixed.
+     */
+    const std::string& get_destination_folder() const {
+        return destination_folder;
+    }
+
 private:
-    // Add private member variables if needed
+    std::string full_path_to_zip;      /**< Full path to the ZIP file of the taxonomy package */
+    std::string destination_folder;     /**< Destination folder for the taxonomy package */
 };
 
 #endif // EBATAXONOMYPACKAGEFIXER_HPP
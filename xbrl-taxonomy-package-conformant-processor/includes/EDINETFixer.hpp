@@ -9,25 +9,13 @@
 #include <iostream>
 #include <fstream>
 #include <memory>
+#include <set>
 #include <libxml/xmlmemory.h>
 #include <libxml/parser.h>
 #include <libxml/tree.h>
 #include <libxml/xmlschemas.h>
 #include "TPFixerInterface.hpp"
 
-/**
- * @brief Interface for taxonomy package fixer classes.
- */
-class TaxonomyPackageFixerInterface {
-public:
-    virtual void convert_to_zip_archive() = 0;
-    virtual void fix_meta_inf_folder() = 0;
-    virtual void fix_top_level_single_dir() = 0;
-    virtual void restructure_folder() = 0;
-    virtual void fix_taxonomy_package_xml(const std::string& source_folder) = 0;
-    virtual void fix_catalog_xml(const std::string& source_folder) = 0;
-};
-
 /**
  * @brief Class to fix an EDINET XBRL Taxonomy Package.
  *
@@ -42,16 +30,27 @@ public:
      */
     EDINETTaxonomyPackage(const std::string& destinationFolder, const std::string& fullPathToZip);
 
+    /**
+     * @brief Constructor for EDINETTaxonomyPackage that extracts only the given entries.
+     */
+    EDINETTaxonomyPackage(const std::string& destinationFolder, const std::string& fullPathToZip, const std::set<std::string>& entries);
+
     void convert_to_zip_archive() override;
-    void fix_meta_inf_folder();
-    void fix_top_level_single_dir();
-    void restructure_folder();
+    void fix_meta_inf_folder() override;
+    void fix_top_level_single_dir() override;
+    void restructure_folder() override;
+    void fix_taxonomy_package_xml() override;
+    void fix_catalog_xml() override;
     void fix_taxonomy_package_xml(const std::string& source_folder);
     void fix_catalog_xml(const std::string& source_folder);
 
 private:
-    std::string destination_folder; /**< Destination folder for the package */
-    std::string full_path_to_zip;   /**< Full path to the zip file */
+    /**
+     * @brief Get the top-level package folder inside the destination folder.
+     *
+     * @return The path destination_folder/<zip stem>.
+     */
+    std::string package_folder() const;
 
     /**
      * @brief Prints a color message to the console.
@@ -0,0 +1,80 @@
+#pragma once
+
+#ifndef HREFREWRITER_HPP
+#define HREFREWRITER_HPP
+
+#include <cstddef>
+#include <string>
+#include <vector>
+#include <pugixml.hpp>
+#include "UrlRewriteRules.hpp"
+
+/**
+ * @brief Rewrites reference attributes (xlink:href, schemaLocation, xml:base) of many documents in one pass.
+ *
+ * Each document is loaded once, every reference value is matched against
+ * all rules of a UrlRewriteRules table in a single scan, and the document is
+ * written once, only if something changed. Documents are processed in
+ * parallel on a thread pool.
+ *
+ * A modified document is written to a temporary file that then replaces the
+ * original, so files linked from the ContentStore are never modified in
+ * place.
+ *
+ * Example usage:
+ * @code
+ * HrefRewriter rewriter(UrlRewriteRules::for_provider(Provider::CIPC));
+ * for (const auto& result : rewriter.rewrite(files)) {
+ *     std::cout << result.file << ": " << result.rewrites << std::endl;
+ * }
+ * @endcode
+ */
+class HrefRewriter {
+public:
+    /**
+     * @brief Outcome for one document.
+     */
+    struct Result {
+        std::string file;           ///< Path to the document.
+        std::size_t rewrites = 0;   ///< Number of attribute values changed.
+        bool saved = false;         ///< Whether the document was written.
+        std::string error;          ///< Load or save error, empty on success.
+    };
+
+    /**
+     * @brief Constructor for HrefRewriter.
+     *
+     * @param rules The compiled substitutions; must outlive the rewriter.
+     * @param num_threads Number of worker threads (0 selects ThreadPool::default_concurrency()).
+     */
+    explicit HrefRewriter(const UrlRewriteRules& rules, std::size_t num_threads = 0);
+
+    /**
+     * @brief Rewrite a set of documents in parallel.
+     *
+     * @param files Paths to the documents.
+     * @return One result per document, in the order of files.
+     */
+    std::vector<Result> rewrite(const std::vector<std::string>& files) const;
+
+    /**
+     * @brief Rewrite a single document.
+     *
+     * @param file Path to the document.
+     * @return The result.
+     */
+    Result rewrite_file(const std::string& file) const;
+
+private:
+    /**
+     * @brief Applies the rules to all elements of a document.
+     *
+     * @return The number of attribute values changed.
+     */
+    std::size_t apply(pugi::xml_document& doc) const;
+
+    const UrlRewriteRules& rules_;  ///< Substitutions.
+    std::size_t num_threads_;       ///< Worker threads.
+};
+
+#endif // HREFREWRITER_HPP
@@ -0,0 +1,165 @@
+#pragma once
+
+#ifndef INSTRUMENTATION_HPP
+#define INSTRUMENTATION_HPP
+
+#include <array>
+#include <atomic>
+#include <chrono>
+#include <cstdint>
+#include <mutex>
+#include <string>
+#include <vector>
+
+/**
+ * @brief Per-phase timing and counters of a run.
+ *
+ * Phases (copying the package, extraction, checks, fixer methods, XML
+ * rewrites, re-zipping) are timed with a ScopedTimer; work is counted with
+ * add(). Both are no-ops until enable() is called: a disabled timer does not
+ * read the clock and a disabled counter is one relaxed atomic load.
+ *
+ * At the end of the run, write_summary() writes per-phase totals and the
+ * counters as JSON, and write_trace() writes every timed span in the Chrome
+ * trace event format (open with chrome://tracing or https://ui.perfetto.dev).
+ *
+ * Example usage:
+ * @code
+ * Instrumentation::get_instance().enable();
+ * {
+ *     Instrumentation::ScopedTimer timer("extract");
+ *     utils::zip_dir_extractor(package, destination_folder);
+ *     Instrumentation::add(Instrumentation::Counter::EntriesProcessed, entries);
+ * }
+ * Instrumentation::get_instance().write_summary("logs/summary.json");
+ * @endcode
+ */
+class Instrumentation {
+public:
+    /**
+     * @brief What is counted.
+     */
+    enum class Counter {
+        BytesRead,          ///< Bytes read from archives and files.
+        BytesWritten,       ///< Bytes written to files and archives.
+        EntriesProcessed,   ///< Archive entries extracted or written.
+        DocumentsParsed,    ///< XML documents parsed or streamed.
+        HrefsRewritten,     ///< References rewritten by the fixers.
+        Count               ///< Number of counters (not a counter).
+    };
+
+    /**
+     * @brief Times the enclosing scope as a span of the named phase.
+     */
+    class ScopedTimer {
+    public:
+        /**
+         * @brief Starts the span if instrumentation is enabled.
+         *
+         * @param name Name of the phase; must outlive the run (a string literal).
+         */
+        explicit ScopedTimer(const char* name);
+
+        /**
+         * @brief Records the span.
+         */
+        ~ScopedTimer();
+
+        ScopedTimer(const ScopedTimer&) = delete;
+        ScopedTimer& operator=(const ScopedTimer&) = delete;
+
+    private:
+        const char* name_;                                  ///< Phase name, nullptr if disabled.
+        std::chrono::steady_clock::time_point start_;       ///< Start of the span.
+    };
+
+    /**
+     * @brief Get the singleton instance of the Instrumentation.
+     *
+     * @return The instance of the Instrumentation.
+     */
+    static Instrumentation& get_instance();
+
+    /**
+     * @brief Enable timing and counting; the run's wall time starts here.
+     */
+    void enable();
+
+    /**
+     * @brief Check whether instrumentation is enabled.
+     *
+     * @return true if enable() was called, false otherwise.
+     */
+    bool is_enabled() const;
+
+    /**
+     * @brief Add to a counter (no-op if disabled).
+     *
+     * @param counter The counter.
+     * @param value The amount to add.
+     */
+    static void add(Counter counter, std::uint64_t value = 1);
+
+    /**
+     * @brief Get the value of a counter.
+     *
+     * @param counter The counter.
+     * @return The value.
+     */
+    std::uint64_t value(Counter counter) const;
+
+    /**
+     * @brief Get the summary of the run as JSON.
+     *
+     * @return {"wall_seconds": ..., "phases": {name: {"count", "total_seconds", "max_seconds"}}, "counters": {...}}
+     */
+    std::string summary_json() const;
+
+    /**
+     * @brief Write the summary of the run.
+     *
+     * @param file The JSON file to write.
+     * @return true if written, false otherwise.
+     */
+    bool write_summary(const std::string& file) const;
+
+    /**
+     * @brief Write all spans in the Chrome trace event format.
+     *
+     * @param file The JSON file to write.
+     * @return true if written, false otherwise.
+     */
+    bool write_trace(const std::string& file) const;
+
+    /**
+     * @brief Get the name of a counter as used in the summary.
+     *
+     * @param counter The counter.
+     * @return The name (e.g. "bytes_read").
+     */
+    static const char* counter_name(Counter counter);
+
+private:
+    /// A timed span.
+    struct Span {
+        const char* name;           ///< Phase name.
+        std::uint32_t thread;       ///< Small sequential id of the thread.
+        std::int64_t start_us;      ///< Start, in microseconds since enable().
+        std::int64_t duration_us;   ///< Duration in microseconds.
+    };
+
+    Instrumentation() = default;
+
+    /**
+     * @brief Record a finished span.
+     */
+    void record(const char* name, std::chrono::steady_clock::time_point start, std::chrono::steady_clock::time_point end);
+
+    std::atomic<bool> enabled_{ false };                                            ///< Set by enable().
+    std::chrono::steady_clock::time_point epoch_;                                   ///< Time of enable().
+    std::array<std::atomic<std::uint64_t>, static_cast<std::size_t>(Counter::Count)> counters_{};  ///< Counter values.
+    mutable std::mutex mutex_;                                                      ///< Guards spans_.
+    std::vector<Span> spans_;                                                       ///< Recorded spans.
+};
+
+#endif // INSTRUMENTATION_HPP
@@ -0,0 +1,159 @@
+#pragma once
+
+#ifndef JOBSERVER_HPP
+#define JOBSERVER_HPP
+
+#include <atomic>
+#include <condition_variable>
+#include <cstddef>
+#include <mutex>
+#include <set>
+#include <string>
+#include "ThreadPool.hpp"
+
+/**
+ * @class JobServer
+ * @brief Resident check/fix server listening on a Unix domain socket.
+ *
+ * The server stays in memory between packages, so the process-wide caches
+ * stay warm from one job to the next: the libxml2 initialisation, the
+ * compiled schemas (SchemaCache), the catalogs, resolved URIs and base
+ * schema documents (CatalogResolver), the provider rewrite rules
+ * (UrlRewriteRules), the content store and the open log file. What the
+ * CatalogResolver memoized for the files of a package is dropped when its
+ * FIX finishes.
+ *
+ * Protocol: one request per line, one JSON object per line in reply, in
+ * request order. A client may send several requests on one connection;
+ * jobs of different connections run concurrently.
+ *
+ * @code
+ * CHECK <package.zip>               -> {"ok": true, "package": ..., "conformant": ..., "checks": {...}, "seconds": ...}
+ * DETECT <package.zip>              -> {"ok": true, "package": ..., "provider": ..., "confidence": ..., "scores": {...}, "evidence": [...]}
+ * FIX <PROVIDER> <package.zip>      -> {"ok": true, "package": ..., "destination": ..., "fixed": ..., ...}
+ * FIX AUTO <package.zip>            -> the same, with the detected provider and its "confidence"
+ * STATS                             -> {"ok": true, "jobs_done": ..., "jobs_running": ..., ...}
+ * SHUTDOWN                          -> {"ok": true}, then the server finishes the running jobs and exits
+ * @endcode
+ *
+ * Failed requests get {"ok": false, "error": "..."}; a package that is not
+ * a regular file is rejected. Entries of a package whose names would leave
+ * the destination are skipped (see utils::is_safe_entry_name()). Fixed packages are
+ * written to output_root/<PROVIDER>/<zip stem>; a FIX whose destination is
+ * in use by a running job is rejected.
+ *
+ * Backpressure: at most `jobs` packages are processed at once and
+ * `2 * jobs` wait in the queue; further requests block their connection
+ * until a slot is free. At most `4 * jobs` connections are served, further
+ * clients wait in the listen backlog.
+ *
+ * Example usage:
+ * @code
+ * JobServer::warm_up();
+ * JobServer server("/run/xbrl-tp.sock", "output", 8);
+ * server.serve();  // until SHUTDOWN or stop()
+ * @endcode
+ */
+class JobServer {
+public:
+    /**
+     * @brief Constructor for JobServer. Binds the socket.
+     *
+     * @param socket_path Path of the Unix domain socket (a stale socket file is replaced).
+     * @param output_root The root folder for the fixed packages.
+     * @param jobs The number of packages processed concurrently (0 selects the number of cores).
+     * @throws std::runtime_error if the socket cannot be bound, or another server is listening on it.
+     */
+    JobServer(const std::string& socket_path, const std::string& output_root, std::size_t jobs);
+
+    /**
+     * @brief Destructor. Closes and removes the socket.
+     */
+    ~JobServer();
+
+    JobServer(const JobServer&) = delete;
+    JobServer& operator=(const JobServer&) = delete;
+
+    /**
+     * @brief Initialises libxml2 and loads the bundled base schemas into the caches.
+     *
+     * Call once from the main thread before serve(); the first jobs then
+     * start warm.
+     */
+    static void warm_up();
+
+    /**
+     * @brief Accepts connections and serves requests until SHUTDOWN or stop().
+     *
+     * Returns after the running jobs have finished.
+     */
+    void serve();
+
+    /**
+     * @brief Ask serve() to return. Only sets a flag, so it may be called from a signal handler.
+     */
+    void stop();
+
+    /**
+     * @brief Executes one request line.
+     *
+     * @param request The request, without the line break.
+     * @return The JSON reply, without the line break.
+     */
+    std::string handle(const std::string& request);
+
+private:
+    /**
+     * @brief Connection thread body: reads request lines and writes the replies.
+     *
+     * @param fd The connected socket, closed on return.
+     */
+    void serve_connection(int fd);
+
+    /**
+     * @brief Runs a CHECK request on the worker pool.
+     *
+     * @param package The package zip.
+     * @return The JSON reply.
+     */
+    std::string check(const std::string& package);
+
+    /**
+     * @brief Detects the provider of a package from its central directory (see ProviderDetector).
+     *
+     * @param package The package zip.
+     * @return The JSON reply.
+     */
+    std::string detect(const std::string& package) const;
+
+    /**
+     * @brief Runs a FIX request on the worker pool.
+     *
+     * @param provider_name The provider, or AUTO to detect it.
+     * @param package The package zip.
+     * @return The JSON reply.
+     */
+    std::string fix(const std::string& provider_name, const std::string& package);
+
+    /**
+     * @brief Get the server and cache statistics.
+     *
+     * @return The JSON reply.
+     */
+    std::string stats() const;
+
+    std::string socket_path_;                       ///< Path of the Unix domain socket.
+    std::string output_root_;                       ///< Root folder for the fixed packages.
+    std::size_t max_connections_;                   ///< Connections served at once.
+    int listen_fd_;                                 ///< Listening socket.
+    ThreadPool pool_;                               ///< Workers running the jobs.
+    std::atomic<bool> stopping_;                    ///< Set by SHUTDOWN and stop().
+    std::atomic<std::size_t> jobs_done_;            ///< Jobs finished since start.
+    std::atomic<std::size_t> jobs_running_;         ///< Jobs submitted and not finished.
+    mutable std::mutex mutex_;                      ///< Guards the members below.
+    std::condition_variable connection_closed_;     ///< Signalled when a connection thread ends.
+    std::size_t connections_;                       ///< Open connections.
+    std::set<std::string> destinations_;            ///< Destination folders of running FIX jobs.
+};
+
+#endif // JOBSERVER_HPP
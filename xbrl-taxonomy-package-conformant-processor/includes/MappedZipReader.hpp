@@ -0,0 +1,142 @@
+#pragma once
+
+#ifndef MAPPEDZIPREADER_HPP
+#define MAPPEDZIPREADER_HPP
+
+#include <cstddef>
+#include <cstdint>
+#include <string>
+#include <string_view>
+#include <unordered_map>
+#include <vector>
+#include <libxml/tree.h>
+
+/**
+ * @class MappedZipReader
+ * @brief Read-only, memory-mapped view of a ZIP archive.
+ *
+ * The archive is mapped once and its central directory (ZIP64 included) is
+ * parsed in place: entry names are views into the mapping and nothing is
+ * copied. Stored entries are returned as zero-copy views, deflated entries
+ * are inflated into a caller-owned buffer that can be reused from one
+ * entry to the next. No temporary files are written.
+ *
+ * The reader is immutable after construction, so one instance can be
+ * shared by threads that each use their own buffer.
+ *
+ * Example usage:
+ * @code
+ * MappedZipReader zip("input/package.zip");
+ * std::string buffer;
+ * for (const auto& entry : zip.entries()) {
+ *     std::string_view content = zip.read(entry, buffer);
+ * }
+ * @endcode
+ */
+class MappedZipReader {
+public:
+    /**
+     * @brief A central directory entry.
+     */
+    struct Entry {
+        std::string_view name;          /**< Entry name, a view into the mapping */
+        std::uint64_t size;             /**< Uncompressed size in bytes */
+        std::uint64_t comp_size;        /**< Compressed size in bytes */
+        std::uint64_t local_offset;     /**< Offset of the local file header */
+        std::uint32_t crc;              /**< CRC-32 of the uncompressed data */
+        std::uint32_t dos_time;         /**< Modification time, MS-DOS date << 16 | time */
+        std::uint16_t comp_method;      /**< Compression method (0 = stored, 8 = deflate) */
+        std::uint16_t flags;            /**< General purpose bit flags */
+        bool is_dir;                    /**< True if the name ends with '/' */
+    };
+
+    /**
+     * @brief Maps the archive and parses its central directory.
+     *
+     * @param archive The path to the .zip archive.
+     * @throws std::runtime_error if the file cannot be mapped or is not a valid ZIP archive.
+     */
+    explicit MappedZipReader(const std::string& archive);
+
+    /**
+     * @brief Unmaps the archive.
+     */
+    ~MappedZipReader();
+
+    MappedZipReader(const MappedZipReader&) = delete;
+    MappedZipReader& operator=(const MappedZipReader&) = delete;
+
+    /**
+     * @brief Get the path of the archive.
+     *
+     * @return The archive path passed to the constructor.
+     */
+    const std::string& archive() const;
+
+    /**
+     * @brief Get all entries in central directory order.
+     *
+     * @return The entries; the index of an entry is its libzip index.
+     */
+    const std::vector<Entry>& entries() const;
+
+    /**
+     * @brief Look up an entry by its exact name.
+     *
+     * @param name The entry name, e.g. "pkg/META-INF/catalog.xml".
+     * @return Pointer to the entry or nullptr if the archive has no such entry.
+     */
+    const Entry* find(std::string_view name) const;
+
+    /**
+     * @brief Get the compressed bytes of an entry.
+     *
+     * @param entry An entry of this archive.
+     * @return A view into the mapping.
+     * @throws std::runtime_error if the local header is corrupt.
+     */
+    std::string_view raw(const Entry& entry) const;
+
+    /**
+     * @brief Get the uncompressed content of an entry.
+     *
+     * Stored entries are returned as a view into the mapping and the buffer
+     * is left untouched. Deflated entries are inflated into the buffer; its
+     * capacity is kept, so reusing one buffer avoids reallocations. The CRC-32
+     * is verified in both cases.
+     *
+     * @param entry An entry of this archive.
+     * @param buffer Buffer for inflated content.
+     * @return The content, valid until the buffer is modified or the reader is destroyed.
+     * @throws std::runtime_error if the entry is corrupt or uses an unsupported compression method or encryption.
+     */
+    std::string_view read(const Entry& entry, std::string& buffer) const;
+
+    /**
+     * @brief Parses an XML entry with libxml2, without extracting it.
+     *
+     * The document URL is "<archive>/<entry name>", so relative references
+     * resolve against the location the entry would have once extracted.
+     *
+     * @param entry An entry of this archive.
+     * @param buffer Buffer for inflated content.
+     * @param options libxml2 parser options.
+     * @return The document (owned by the caller), or nullptr if it is not well-formed.
+     */
+    xmlDocPtr parse_xml(const Entry& entry, std::string& buffer, int options = 0) const;
+
+private:
+    /**
+     * @brief Finds the end of central directory record and parses the central directory.
+     */
+    void parse_central_directory();
+
+    std::string archive_;                                           ///< Path to the archive.
+    const unsigned char* data_;                                     ///< Start of the mapping.
+    std::size_t size_;                                              ///< Size of the mapping.
+    void* mapping_handle_;                                          ///< File mapping handle (Windows only).
+    std::vector<Entry> entries_;                                    ///< Entries in central directory order.
+    std::unordered_map<std::string_view, std::size_t> by_name_;     ///< Name -> position in entries_.
+};
+
+#endif // MAPPEDZIPREADER_HPP
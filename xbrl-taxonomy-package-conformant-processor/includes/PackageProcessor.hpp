@@ -0,0 +1,150 @@
+#pragma once
+
+#ifndef PACKAGEPROCESSOR_HPP
+#define PACKAGEPROCESSOR_HPP
+
+#include <string>
+#include "Providers.hpp"
+#include "TPChecker.hpp"
+#include "RunManifest.hpp"
+
+/**
+ * @brief Results of the TPChecker analysis of one package.
+ */
+struct PackageChecks {
+    bool zip_format = false;            /**< Package is a .zip archive */
+    bool top_level_single_dir = false;  /**< Package has a single top-level directory */
+    bool meta_inf_folder = false;       /**< Package has a META-INF folder */
+    bool catalog_xml = false;           /**< Package has a valid META-INF/catalog.xml */
+    bool taxonomy_package_xml = false;  /**< Package has a valid META-INF/taxonomyPackage.xml */
+
+    /**
+     * @brief Check if the package passed all checks.
+     *
+     * @return True if nothing needs fixing, otherwise False.
+     */
+    bool conformant() const {
+        return zip_format && top_level_single_dir && meta_inf_folder && catalog_xml && taxonomy_package_xml;
+    }
+};
+
+/**
+ * @brief Outcome of checking and fixing one package.
+ */
+struct PackageResult {
+    Provider provider = Provider::EBA;  /**< Provider of the package */
+    std::string package;                /**< Path to the source zip */
+    std::string destination;            /**< Isolated destination folder of the package */
+    PackageChecks checks;               /**< Check results before fixing */
+    bool fixed = false;                 /**< True if a fixed zip was written */
+    std::string error;                  /**< Error message, empty on success */
+    double seconds = 0.0;               /**< Wall time spent on the package */
+
+    /**
+     * @brief Check if the package was processed without error.
+     *
+     * @return True if no error occurred, otherwise False.
+     */
+    bool ok() const {
+        return error.empty();
+    }
+};
+
+/**
+ * @class PackageProcessor
+ * @brief Runs the check-and-fix pipeline for a single taxonomy package.
+ *
+ * The processor holds no shared mutable state, so one instance per thread
+ * can be used to process several packages concurrently as long as every
+ * package gets its own destination folder.
+ */
+class PackageProcessor {
+public:
+    /**
+     * @brief Runs all TPChecker checks on a package.
+     *
+     * The central directory is read once and shared by all structural checks.
+     * Apart from it, only META-INF/taxonomyPackage.xml and META-INF/catalog.xml
+     * are read, from memory, to validate them against their schemas. Nothing
+     * is extracted, so a conformant package costs no more than this.
+     *
+     * @param package The path to the package.
+     * @return The check results.
+     * @throws std::runtime_error if the package is not a valid ZIP archive, or a META-INF
+     *         file cannot be validated because its schema is missing from the schema store.
+     */
+    PackageChecks check_package(const std::string& package);
+
+    /**
+     * @brief Fixes a package with the fixer of the given provider.
+     *
+     * The CMFCLCI and CIPC fixers restructure the whole package whatever
+     * failed, and only the entries they keep are extracted. A manifest of the run
+     * is written next to the destination folder; if one from a previous run
+     * exists, only the entries that changed since are extracted, fixed and
+     * compressed again (CIPC), everything else is reused from the previous
+     * output.
+     *
+     * @param provider The provider of the package.
+     * @param package The path to the source zip.
+     * @param destination_folder The folder where the package is fixed.
+     * @param checks The results of the package checks (not used by the current fixers).
+     * @throws std::invalid_argument if the provider has no fixer (see has_fixer()).
+     */
+    void fix_package(Provider provider, const std::string& package, const std::string& destination_folder, const PackageChecks& checks);
+
+    /**
+     * @brief Checks a package and fixes it if any check failed.
+     *
+     * Exceptions are caught and reported through PackageResult::error.
+     * A package of a provider without a fixer is only checked, and
+     * PackageResult::fixed stays false.
+     *
+     * @param provider The provider of the package.
+     * @param package The path to the source zip.
+     * @param destination_folder The folder where the package is fixed.
+     * @return The processing result.
+     */
+    PackageResult process_package(Provider provider, const std::string& package, const std::string& destination_folder);
+
+    /**
+     * @brief Check whether a provider has a fixer that writes a fixed zip.
+     *
+     * The EBA and EDINET fixers are placeholders: they write no output yet.
+     *
+     * @param provider The provider.
+     * @return True for CMFCLCI and CIPC, otherwise False.
+     */
+    static bool has_fixer(Provider provider);
+
+private:
+    /**
+     * @brief Re-processes only the entries of a CIPC package that changed since the previous run.
+     *
+     * The CIPC fixes are local to each file, so unchanged files keep their
+     * fixed content from the previous run.
+     *
+     * @param package The path to the source zip.
+     * @param destination_folder The folder of the previous run.
+     * @param manifest The manifest of the package.
+     * @param previous The manifest of the previous run.
+     * @return false if the previous output is missing and a full run is needed.
+     * @throws std::runtime_error if the new output cannot be written; the previous output is kept.
+     */
+    bool fix_cipc_incrementally(const std::string& package, const std::string& destination_folder,
+        const RunManifest& manifest, const RunManifest& previous);
+
+    /**
+     * @brief Get the path of the fixed zip a provider's fixer produces.
+     *
+     * @param provider The provider of the package.
+     * @param package The path to the source zip.
+     * @param destination_folder The folder where the package is fixed.
+     * @return The fixed zip, or an empty string if the fixer writes none.
+     */
+    static std::string output_zip(Provider provider, const std::string& package, const std::string& destination_folder);
+
+    TPChecker checker_;  ///< Checker used for the analysis.
+};
+
+#endif // PACKAGEPROCESSOR_HPP
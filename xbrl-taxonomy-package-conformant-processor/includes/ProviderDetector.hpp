@@ -0,0 +1,85 @@
+#pragma once
+
+#ifndef PROVIDERDETECTOR_HPP
+#define PROVIDERDETECTOR_HPP
+
+#include <string>
+#include <utility>
+#include <vector>
+#include "MappedZipReader.hpp"
+#include "Providers.hpp"
+
+/**
+ * @brief Result of a provider detection.
+ */
+struct ProviderDetection {
+    Provider provider = Provider::EBA;                  /**< Provider with the highest score */
+    double confidence = 0.0;                            /**< 0 (no evidence) to 1 (conclusive, nothing points elsewhere) */
+    std::vector<std::pair<Provider, double>> scores;    /**< Score of every provider, highest first */
+    std::vector<std::string> evidence;                  /**< Signatures of the detected provider found in the package */
+};
+
+/**
+ * @class ProviderDetector
+ * @brief Detects the provider of a package from its central directory.
+ *
+ * Every provider has signatures: path segments and prefixes its packages
+ * use, e.g. "www.eba.europa.eu" for EBA, "samples" plus "taxonomy" for
+ * EDINET, "def/ifrs" for CIPC. Each signature has a weight; a weight of 1
+ * alone is conclusive. The entry names are scanned once, directories only
+ * the first time they are seen, and nothing is extracted, so a package
+ * with 100k entries is scored in milliseconds.
+ *
+ * The score of a provider is the sum of the weights of its signatures
+ * found in the package. The confidence is
+ * min(1, best score) * best score / sum of all scores: it drops when the
+ * evidence is weak or when signatures of other providers are found too.
+ *
+ * Example usage:
+ * @code
+ * MappedZipReader zip("input/cipc_2023-09-07/cipc_2023-09-07.zip");
+ * ProviderDetection detection = ProviderDetector().detect(zip);
+ * if (detection.confidence >= ProviderDetector::MIN_CONFIDENCE) {
+ *     std::cout << providerToString(detection.provider) << std::endl;  // CIPC
+ * }
+ * @endcode
+ */
+class ProviderDetector {
+public:
+    /// Provider name that selects detection instead of a fixed provider.
+    static constexpr const char* AUTO = "AUTO";
+
+    /// Confidence below which resolve() refuses to pick a provider.
+    static constexpr double MIN_CONFIDENCE = 0.5;
+
+    /**
+     * @brief Scores the entry names of a mapped archive.
+     *
+     * @param archive The package.
+     * @return The detected provider and its confidence.
+     */
+    ProviderDetection detect(const MappedZipReader& archive) const;
+
+    /**
+     * @brief Maps a package and scores its entry names.
+     *
+     * @param archive The path to the .zip archive.
+     * @return The detected provider and its confidence.
+     * @throws std::runtime_error if the file is not a valid ZIP archive.
+     */
+    ProviderDetection detect(const std::string& archive) const;
+
+    /**
+     * @brief Resolves a provider name given on the command line, in a batch manifest or a server request.
+     *
+     * @param provider_name A provider name (see stringToProvider()) or AUTO.
+     * @param package The package, only read for AUTO.
+     * @param detection Receives the detection for AUTO, if not nullptr.
+     * @return The named provider, or the detected one.
+     * @throws std::invalid_argument if the name is unknown.
+     * @throws std::runtime_error if the package cannot be read, or its provider is detected with less than MIN_CONFIDENCE.
+     */
+    static Provider resolve(const std::string& provider_name, const std::string& package, ProviderDetection* detection = nullptr);
+};
+
+#endif // PROVIDERDETECTOR_HPP
@@ -0,0 +1,71 @@
+#pragma once
+
+#ifndef REFERENCESCANNER_HPP
+#define REFERENCESCANNER_HPP
+
+#include <functional>
+#include <string>
+#include <string_view>
+
+/**
+ * @brief Streams the references (xlink:href, schemaLocation, xml:base) of an XML document.
+ *
+ * The document is read with libxml2's xmlTextReader, so no DOM is built and
+ * memory use does not grow with the document size: tens of MB of formula or
+ * label linkbase are scanned with a few KB of state. Only the xml:base of
+ * the ancestors of the current element is kept, to report the base URI each
+ * reference is resolved against.
+ *
+ * Example usage:
+ * @code
+ * ReferenceScanner::scan("output/EBA/.../val/vr-v0001_m-lab-en.xml", [](const ReferenceScanner::Reference& ref) {
+ *     std::cout << ref.line << ": " << ref.value << " (base " << ref.base << ")" << std::endl;
+ *     return true;  // continue
+ * });
+ * @endcode
+ */
+class ReferenceScanner {
+public:
+    /**
+     * @brief A reference found in a document.
+     */
+    struct Reference {
+        std::string element;    ///< Qualified name of the element (e.g. "link:loc").
+        std::string attribute;  ///< "xlink:href", "schemaLocation" or "xml:base".
+        std::string value;      ///< Attribute value as written in the document.
+        std::string base;       ///< Base URI of the element (document URI and in-scope xml:base).
+        int line = 0;           ///< Line of the element.
+    };
+
+    /**
+     * @brief Receives each reference; returning false stops the scan.
+     */
+    using Callback = std::function<bool(const Reference& reference)>;
+
+    /**
+     * @brief Scans a document.
+     *
+     * Remote URIs are resolved offline with the catalog of the package the
+     * document belongs to (see CatalogResolver).
+     *
+     * @param file Path to the XML document.
+     * @param callback Receives each reference in document order.
+     * @param document_base Base URI of the document (empty: the file path).
+     * @return true if the document was read to the end (or the callback stopped it), false on a parse error.
+     */
+    static bool scan(const std::string& file, const Callback& callback, const std::string& document_base = "");
+
+    /**
+     * @brief Scans a document held in memory, e.g. an entry read from an archive.
+     *
+     * The document is parsed offline and no catalog is applied.
+     *
+     * @param content The XML document.
+     * @param document_base Base URI of the document.
+     * @param callback Receives each reference in document order.
+     * @return true if the document was read to the end (or the callback stopped it), false on a parse error.
+     */
+    static bool scan_memory(std::string_view content, const std::string& document_base, const Callback& callback);
+};
+
+#endif // REFERENCESCANNER_HPP
@@ -0,0 +1,159 @@
+#pragma once
+
+#ifndef RUNMANIFEST_HPP
+#define RUNMANIFEST_HPP
+
+#include <cstdint>
+#include <string>
+#include <unordered_map>
+#include <vector>
+#include "ArchiveIndex.hpp"
+
+/**
+ * @brief Record of one processing run of a package, used to re-process only what changed.
+ *
+ * The manifest lists every file entry of the source package with the CRC-32
+ * and size from its central directory, and the action the run applied to it
+ * (see record_output()). It is stored as a tab-separated text file next to
+ * the output:
+ *
+ * @code
+ * # provider	CIPC
+ * # package	input/cipc_2023-09-07/cipc_2023-09-07.zip
+ * # output	output/CIPC/cipc_2023-09-07.zip
+ * cipc_2023-09-07/META-INF/catalog.xml	5d3c1a0e	2816	copied
+ * cipc_2023-09-07/xbrl.cipc.co.za/.../lab_cipc-en.xml	8a41f9b2	10240	rewritten
+ * @endcode
+ *
+ * On the next run, diff() compares the central directory of the new package
+ * against the previous manifest, so only added and changed entries need to
+ * be extracted, fixed and compressed again.
+ */
+class RunManifest {
+public:
+    /**
+     * @brief A file entry of the source package.
+     */
+    struct Entry {
+        std::string path;           ///< Entry name in the source package.
+        std::uint32_t crc = 0;      ///< CRC-32 from the central directory.
+        std::uint64_t size = 0;     ///< Uncompressed size.
+        std::string action;         ///< What the run did with the entry (empty: not recorded).
+    };
+
+    /**
+     * @brief Differences between a package and a previous manifest.
+     */
+    struct Diff {
+        std::vector<std::string> added;       ///< Entries new in the package.
+        std::vector<std::string> changed;     ///< Entries whose CRC or size differ.
+        std::vector<std::string> removed;     ///< Entries of the previous run missing from the package.
+        std::vector<std::string> unchanged;   ///< Entries identical to the previous run.
+
+        /**
+         * @brief Check whether the package is identical to the previous run.
+         *
+         * @return true if nothing was added, changed or removed.
+         */
+        bool empty() const {
+            return added.empty() && changed.empty() && removed.empty();
+        }
+    };
+
+    /// Entry copied into the output with unchanged content.
+    static constexpr const char* COPIED = "copied";
+    /// Entry copied into the output under another name.
+    static constexpr const char* MOVED = "moved";
+    /// Entry whose content was modified by a fixer.
+    static constexpr const char* REWRITTEN = "rewritten";
+    /// Entry not present in the output.
+    static constexpr const char* REMOVED = "removed";
+
+    RunManifest() = default;
+
+    /**
+     * @brief Builds the manifest of a package from its central directory.
+     *
+     * @param index The index of the source package.
+     * @param provider The provider of the package.
+     */
+    RunManifest(const ArchiveIndex& index, const std::string& provider);
+
+    /**
+     * @brief Get the path of the manifest belonging to a destination folder.
+     *
+     * @param destination_folder The destination folder of the package.
+     * @return The manifest file (<destination_folder>.manifest.tsv).
+     */
+    static std::string manifest_path(const std::string& destination_folder);
+
+    /**
+     * @brief Reads a manifest file.
+     *
+     * @param manifest_file Path to the manifest.
+     * @return true if the manifest was read, false if it is missing or malformed.
+     */
+    bool load(const std::string& manifest_file);
+
+    /**
+     * @brief Writes the manifest, replacing the previous one atomically.
+     *
+     * @param manifest_file Path to the manifest.
+     * @return true on success, false otherwise.
+     */
+    bool save(const std::string& manifest_file) const;
+
+    /**
+     * @brief Compares this manifest (the new package) with the one of a previous run.
+     *
+     * @param previous The manifest of the previous run.
+     * @return The added, changed, removed and unchanged entries.
+     */
+    Diff diff(const RunManifest& previous) const;
+
+    /**
+     * @brief Records the action applied to every entry by comparing with the fixed package.
+     *
+     * An entry is "copied" if the output has it under the same name with the
+     * same CRC, "rewritten" if the content differs, "moved" if the same content
+     * is found under another name, and "removed" otherwise.
+     *
+     * @param output The index of the fixed package.
+     */
+    void record_output(const ArchiveIndex& output);
+
+    /**
+     * @brief Get an entry by its path.
+     *
+     * @param path The entry name in the source package.
+     * @return The entry, or nullptr if not found.
+     */
+    const Entry* find(const std::string& path) const;
+
+    /**
+     * @brief Get the entries, in central directory order.
+     *
+     * @return The entries.
+     */
+    const std::vector<Entry>& entries() const;
+
+    const std::string& provider() const;
+    const std::string& package() const;
+    const std::string& output() const;
+
+    /**
+     * @brief Set the path of the fixed package.
+     *
+     * @param output_zip The fixed zip.
+     */
+    void set_output(const std::string& output_zip);
+
+private:
+    std::string provider_;                                  ///< Provider of the package.
+    std::string package_;                                   ///< Path to the source package.
+    std::string output_;                                    ///< Path to the fixed package.
+    std::vector<Entry> entries_;                            ///< File entries.
+    std::unordered_map<std::string, std::size_t> lookup_;   ///< Path -> position in entries_.
+};
+
+#endif // RUNMANIFEST_HPP
@@ -0,0 +1,109 @@
+#pragma once
+
+#ifndef SCHEMACACHE_HPP
+#define SCHEMACACHE_HPP
+
+#include <cstdint>
+#include <future>
+#include <list>
+#include <memory>
+#include <mutex>
+#include <string>
+#include <unordered_map>
+#include <libxml/xmlschemas.h>
+
+/**
+ * @brief A process-wide, thread-safe cache of compiled XML schemas.
+ *
+ * Schemas are compiled once per schema location and shared by all threads
+ * (a compiled xmlSchema is read-only; every validation creates its own
+ * validation context). The cache is bounded and evicts the least recently
+ * used schema. Schemas still in use by a validation stay alive until the
+ * validation releases them.
+ *
+ * Schema locations and imports are resolved by the CatalogResolver, so
+ * remote spec schemas are read from the bundled schema store (or the
+ * package catalog) and never fetched over the network. Schemas are cached
+ * by their resolved location.
+ *
+ * Example usage:
+ * @code
+ * SchemaCache::SchemaPtr schema = SchemaCache::get_instance().get("http://www.xbrl.org/2016/taxonomy-package.xsd");
+ * xmlSchemaValidCtxtPtr valid_ctxt = xmlSchemaNewValidCtxt(schema.get());
+ * @endcode
+ */
+class SchemaCache {
+public:
+    /// Shared handle to a compiled schema.
+    using SchemaPtr = std::shared_ptr<xmlSchema>;
+
+    /**
+     * @brief Get the singleton instance of the SchemaCache.
+     *
+     * @return The instance of the SchemaCache.
+     */
+    static SchemaCache& get_instance();
+
+    /**
+     * @brief Get the compiled schema for a schema location, compiling it on first use.
+     *
+     * Concurrent requests for the same location wait for a single compilation.
+     *
+     * @param requested_location The schema URL or file path.
+     * @return The compiled schema, or nullptr if it could not be parsed.
+     */
+    SchemaPtr get(const std::string& requested_location);
+
+    /**
+     * @brief Set the maximum number of cached schemas.
+     *
+     * @param capacity The maximum number of schemas (at least 1).
+     */
+    void set_capacity(std::size_t capacity);
+
+    /**
+     * @brief Get the number of cached schemas.
+     *
+     * @return The number of cached schemas.
+     */
+    std::size_t size() const;
+
+    /**
+     * @brief Drop all cached schemas.
+     */
+    void clear();
+
+private:
+    /// Private constructor (singleton pattern).
+    SchemaCache();
+
+    /**
+     * @brief Parses and compiles a schema.
+     *
+     * @param schema_location The schema URL or file path.
+     * @return The compiled schema, or nullptr on error.
+     */
+    SchemaPtr compile(const std::string& schema_location) const;
+
+    /**
+     * @brief Evicts least recently used schemas until the capacity is respected. Caller holds mutex_.
+     */
+    void evict_locked();
+
+    /**
+     * @brief A cache slot: schema location and the (possibly pending) compiled schema.
+     */
+    struct Slot {
+        std::string location;
+        std::shared_future<SchemaPtr> schema;
+        std::uint64_t id;   ///< Unique per slot, so a failed compile only removes its own slot.
+    };
+
+    mutable std::mutex mutex_;                                              ///< Guards all members below.
+    std::list<Slot> lru_;                                                   ///< Slots, most recently used first.
+    std::unordered_map<std::string, std::list<Slot>::iterator> slots_;      ///< Location -> slot.
+    std::size_t capacity_;                                                  ///< Maximum number of cached schemas.
+    std::uint64_t next_id_;                                                 ///< Id of the next slot.
+};
+
+#endif // SCHEMACACHE_HPP
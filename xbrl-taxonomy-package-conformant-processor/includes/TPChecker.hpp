@@ -3,10 +3,13 @@
 #ifndef TPCHECKER_H
 #define TPCHECKER_H
 
+#include <cstdint>
 #include <string>
 #include <set>
 #include <libxml/parser.h>
 #include <libxml/tree.h>
+#include "ArchiveIndex.hpp"
+#include "MappedZipReader.hpp"
 
 /**
  * @class TPChecker
@@ -40,15 +43,62 @@ public:
      */
     bool has_top_level_single_dir(const std::string &archive);
 
+    /**
+     * @brief Check if the indexed archive contains a single top-level directory.
+     * 
+     * @param index The central directory index of the .zip archive.
+     * @return True if there is only one top-level directory, otherwise False.
+     */
+    bool has_top_level_single_dir(const ArchiveIndex &index);
+
     /**
      * @brief Validate an XML file against an XML schema.
      * 
+     * The schema is compiled once per process and taken from the SchemaCache
+     * afterwards. Remote URIs are resolved offline, with the catalog of the
+     * package the document belongs to and the bundled schema store. Documents
+     * at or above the streaming threshold are validated with
+     * validate_xml_streaming().
+     * 
      * @param schemafile The path to the XML schema file (.xsd).
      * @param example The path to the XML document to validate.
      * @return True if the XML document is valid according to the schema, otherwise False.
      */
     bool validate_xml(const std::string &schemafile, const std::string &example);
 
+    /**
+     * @brief Validate an XML file against an XML schema without building a DOM.
+     * 
+     * The document is read with an xmlTextReader that has the compiled schema
+     * attached, so memory use stays constant whatever the document size.
+     * 
+     * @param schemafile The path to the XML schema file (.xsd).
+     * @param example The path to the XML document to validate.
+     * @return True if the XML document is valid according to the schema, otherwise False.
+     */
+    bool validate_xml_streaming(const std::string &schemafile, const std::string &example);
+
+    /**
+     * @brief Validate an XML entry of an archive against an XML schema, without extracting it.
+     * 
+     * The entry is read from the memory-mapped archive (inflated into memory
+     * if it is compressed) and validated with an xmlTextReader, so no file is
+     * written. Remote URIs are resolved offline with the bundled schema store.
+     * 
+     * @param schemafile The path to the XML schema file (.xsd).
+     * @param archive The archive.
+     * @param entry The name of the entry, e.g. "pkg/META-INF/taxonomyPackage.xml".
+     * @return True if the entry exists and is valid according to the schema, otherwise False.
+     */
+    bool validate_xml(const std::string &schemafile, const MappedZipReader &archive, const std::string &entry);
+
+    /**
+     * @brief Set the document size from which validate_xml() streams.
+     * 
+     * @param bytes The size in bytes (0: always stream).
+     */
+    void set_streaming_threshold(std::uintmax_t bytes);
+
     /**
      * @brief Check if the archive contains a folder named "META-INF".
      * 
@@ -58,6 +108,18 @@ public:
      */
     bool has_meta_inf_folder(const std::string &archive, const std::string &folder_name = "META-INF");
 
+    /**
+     * @brief Check if the indexed archive contains a folder named "META-INF".
+     * 
+     * The folder must be a path component of its own, either directly below the
+     * top-level directory or at the root of the archive.
+     * 
+     * @param index The central directory index of the .zip archive.
+     * @param folder_name The name of the folder to check for (default: "META-INF").
+     * @return True if the folder is present, otherwise False.
+     */
+    bool has_meta_inf_folder(const ArchiveIndex &index, const std::string &folder_name = "META-INF");
+
     /**
      * @brief Check if the archive contains a taxonomyPackage.xml file.
      * 
@@ -68,28 +130,74 @@ public:
     bool has_taxonomy_package_xml(const std::string &archive, const std::string &tp_file = "taxonomyPackage.xml");
 
     /**
-     * @brief Resolve XML base URIs in an XML document according to a given base URL.
+     * @brief Check if the indexed archive contains a META-INF/taxonomyPackage.xml file.
+     * 
+     * @param index The central directory index of the .zip archive.
+     * @param tp_file The name of the file to check for (default: "taxonomyPackage.xml").
+     * @return True if the file is present, otherwise False.
+     */
+    bool has_taxonomy_package_xml(const ArchiveIndex &index, const std::string &tp_file = "taxonomyPackage.xml");
+
+    /**
+     * @brief Check if the archive contains a catalog.xml file.
+     * 
+     * @param archive The path to the .zip archive.
+     * @param catalog_file The name of the file to check for (default: "catalog.xml").
+     * @return True if the file is present, otherwise False.
+     */
+    bool has_catalog_xml(const std::string &archive, const std::string &catalog_file = "catalog.xml");
+
+    /**
+     * @brief Check if the indexed archive contains a META-INF/catalog.xml file.
      * 
-     * The method searches for `xlink:href` or `xml:base` attributes and resolves them 
-     * relative to the provided base URL.
+     * @param index The central directory index of the .zip archive.
+     * @param catalog_file The name of the file to check for (default: "catalog.xml").
+     * @return True if the file is present, otherwise False.
+     */
+    bool has_catalog_xml(const ArchiveIndex &index, const std::string &catalog_file = "catalog.xml");
+
+    /**
+     * @brief Check that the references of an XML document resolve.
+     * 
+     * Every `xlink:href`, `schemaLocation` and `xml:base` is resolved per RFC 3986
+     * against its base URI (the document base and nested `xml:base`), and the
+     * target must exist, locally or through the package catalog. Broken
+     * references are printed, one line each; the document itself is not
+     * re-serialized.
      * 
      * @param file The path to the XML document.
-     * @param base_url The base URL to use for resolving relative URIs.
-     * @return True if the resolution was successful, otherwise False.
+     * @param base_url The base URI of the document (empty: its location).
+     * @return True if all references resolve, otherwise False.
      */
     bool check_rel_url_base_resolution(const std::string &file, const std::string &base_url);
 
-private:
     /**
-     * @brief Helper method to resolve XML base URIs in a given node recursively.
+     * @brief Check that the references of all schemas and linkbases of an extracted package resolve.
+     * 
+     * Documents are checked in parallel (see UrlResolutionChecker). Broken
+     * references are printed, one line each, followed by a summary.
+     * 
+     * @param package_folder The extracted package.
+     * @return True if all references resolve, otherwise False.
+     */
+    bool check_url_resolution(const std::string &package_folder);
+
+    /**
+     * @brief Check that the package also works on case-insensitive file systems.
      * 
-     * This method is called internally by `check_rel_url_base_resolution()` to update 
-     * the `xlink:href` and `xml:base` attributes of each XML element.
+     * Reports entry paths that differ only in case or Unicode normalization
+     * (e.g. "Foo.xsd" and "foo.xsd"), and `xlink:href` and `schemaLocation`
+     * references that only resolve when case is ignored (see
+     * CaseCollisionChecker). The archive is read from memory, nothing is
+     * extracted. Problems are printed, one line each, followed by a summary.
      * 
-     * @param node The XML node to resolve URIs for.
-     * @param base_url The base URL to use for resolving URIs.
+     * @param archive The path to the .zip archive.
+     * @return True if no paths collide and all references match the case of their target, otherwise False.
      */
-    void resolve_xml_base(xmlNode *node, const std::string &base_url);
+    bool check_case_sensitivity(const std::string &archive);
+
+private:
+    std::uintmax_t streaming_threshold_ = 8 * 1024 * 1024;  ///< Documents from this size are validated streaming.
 };
 
 #endif // TPCHECKER_H
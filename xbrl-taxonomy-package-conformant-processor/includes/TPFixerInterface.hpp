@@ -4,6 +4,7 @@
 #define TPFIXERINTERFACE_HPP
 
 #include <string>
+#include <set>
 #include <filesystem>
 #include <iostream>
 #include <zip.h>
@@ -27,6 +28,19 @@ public:
      */
     TPFixerInterface(const std::string& full_path_to_zip, const std::string& destination_folder);
 
+    /**
+     * @brief Constructor for TaxonomyPackageFixerInterface that extracts only some entries.
+     *
+     * Unlike the full constructor, the package is not copied to the output
+     * folder and only the given entries are extracted. Used once the checks
+     * have shown which entries the fixer needs.
+     *
+     * @param full_path_to_zip The full path to the ZIP file of the taxonomy package.
+     * @param destination_folder The folder where the entries will be extracted.
+     * @param entries Names of the entries to extract.
+     */
+    TPFixerInterface(const std::string& full_path_to_zip, const std::string& destination_folder, const std::set<std::string>& entries);
+
     /**
      * @brief Converts the taxonomy package to a ZIP archive.
      *
@@ -80,6 +94,15 @@ public:
      */
     virtual void fix_catalog_xml() = 0;
 
+    /**
+     * @brief Get the folder the taxonomy package is extracted to.
+     *
+     * @return The destination folder.
+     */
+    const std::string& get_destination_folder() const {
+        return destination_folder;
+    }
+
 protected:
     std::string full_path_to_zip;      /**< Full path to the ZIP file of the taxonomy package */
     std::string destination_folder;     /**< Destination folder for the taxonomy package */
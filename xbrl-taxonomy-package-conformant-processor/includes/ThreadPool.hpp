@@ -0,0 +1,142 @@
+#pragma once
+
+#ifndef THREADPOOL_HPP
+#define THREADPOOL_HPP
+
+#include <algorithm>
+#include <condition_variable>
+#include <cstddef>
+#include <functional>
+#include <future>
+#include <memory>
+#include <mutex>
+#include <queue>
+#include <thread>
+#include <type_traits>
+#include <vector>
+
+/**
+ * @brief A fixed-size worker pool with an optionally bounded task queue.
+ *
+ * Tasks are executed in submission order by the first free worker. When the
+ * queue is bounded, submit() blocks the caller until a slot is free, which
+ * keeps memory usage flat when many packages are queued at once.
+ *
+ * Example usage:
+ * @code
+ * ThreadPool pool(4);
+ * auto result = pool.submit([] { return 42; });
+ * int value = result.get();
+ * @endcode
+ */
+class ThreadPool {
+public:
+    /**
+     * @brief Constructor for ThreadPool.
+     *
+     * @param num_threads Number of worker threads (0 selects default_concurrency()).
+     * @param max_queue Maximum number of pending tasks (0 means unbounded).
+     */
+    explicit ThreadPool(std::size_t num_threads, std::size_t max_queue = 0)
+        : max_queue_(max_queue), stopping_(false) {
+        if (num_threads == 0) {
+            num_threads = default_concurrency();
+        }
+        workers_.reserve(num_threads);
+        for (std::size_t i = 0; i < num_threads; ++i) {
+            workers_.emplace_back([this] { worker_loop(); });
+        }
+    }
+
+    /**
+     * @brief Destructor. Finishes all queued tasks and joins the workers.
+     */
+    ~ThreadPool() {
+        {
+            std::lock_guard<std::mutex> lock(mutex_);
+            stopping_ = true;
+        }
+        task_available_.notify_all();
+        slot_available_.notify_all();
+        for (auto& worker : workers_) {
+            worker.join();
+        }
+    }
+
+    ThreadPool(const ThreadPool&) = delete;
+    ThreadPool& operator=(const ThreadPool&) = delete;
+
+    /**
+     * @brief Submits a task to the pool.
+     *
+     * Blocks while the queue is full. Exceptions thrown by the task are
+     * delivered through the returned future.
+     *
+     * @param func The callable to execute.
+     * @return A future holding the result of the callable.
+     */
+    template <typename Func>
+    auto submit(Func func) -> std::future<std::invoke_result_t<Func>> {
+        using Result = std::invoke_result_t<Func>;
+        auto task = std::make_shared<std::packaged_task<Result()>>(std::move(func));
+        std::future<Result> future = task->get_future();
+        {
+            std::unique_lock<std::mutex> lock(mutex_);
+            slot_available_.wait(lock, [this] {
+                return stopping_ || max_queue_ == 0 || tasks_.size() < max_queue_;
+            });
+            tasks_.emplace([task] { (*task)(); });
+        }
+        task_available_.notify_one();
+        return future;
+    }
+
+    /**
+     * @brief Get the number of worker threads.
+     *
+     * @return The number of workers.
+     */
+    std::size_t size() const {
+        return workers_.size();
+    }
+
+    /**
+     * @brief Get the default number of workers for this machine.
+     *
+     * @return The hardware concurrency, at least 1.
+     */
+    static std::size_t default_concurrency() {
+        return std::max<std::size_t>(1, std::thread::hardware_concurrency());
+    }
+
+private:
+    /**
+     * @brief Worker thread body: pops and runs tasks until the pool is stopped and drained.
+     */
+    void worker_loop() {
+        for (;;) {
+            std::function<void()> task;
+            {
+                std::unique_lock<std::mutex> lock(mutex_);
+                task_available_.wait(lock, [this] { return stopping_ || !tasks_.empty(); });
+                if (tasks_.empty()) {
+                    return;
+                }
+                task = std::move(tasks_.front());
+                tasks_.pop();
+            }
+            slot_available_.notify_one();
+            task();
+        }
+    }
+
+    std::vector<std::thread> workers_;              ///< Worker threads.
+    std::queue<std::function<void()>> tasks_;       ///< Pending tasks.
+    std::size_t max_queue_;                         ///< Queue bound (0 = unbounded).
+    bool stopping_;                                 ///< Set once the pool is shutting down.
+    std::mutex mutex_;                              ///< Guards tasks_ and stopping_.
+    std::condition_variable task_available_;        ///< Signals workers that a task is queued.
+    std::condition_variable slot_available_;        ///< Signals producers that the queue has room.
+};
+
+#endif // THREADPOOL_HPP
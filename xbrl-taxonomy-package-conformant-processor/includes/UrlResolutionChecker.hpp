@@ -0,0 +1,130 @@
+#pragma once
+
+#ifndef URLRESOLUTIONCHECKER_HPP
+#define URLRESOLUTIONCHECKER_HPP
+
+#include <cstddef>
+#include <mutex>
+#include <string>
+#include <unordered_map>
+#include <unordered_set>
+#include <vector>
+
+/**
+ * @brief Checks that every reference of a package resolves to an existing document.
+ *
+ * Every xlink:href, schemaLocation and xml:base of the schemas and linkbases
+ * of an extracted package is resolved per RFC 3986 against its base URI
+ * (document location and nested xml:base). Local targets are looked up in an
+ * index of the package files; remote targets must be mapped by the package
+ * catalog (or the bundled schema store) to an existing file.
+ *
+ * Documents are streamed (see ReferenceScanner) on a thread pool. Resolved
+ * (base, relative) pairs are memoized: the locators of a linkbase mostly
+ * point to the same few schemas.
+ *
+ * Example usage:
+ * @code
+ * UrlResolutionChecker checker("output/EBA/Reporting_Frameworks_3.3.0.0_errata");
+ * for (const auto& broken : checker.check()) {
+ *     std::cout << broken.file << ":" << broken.line << ": " << broken.value << std::endl;
+ * }
+ * @endcode
+ */
+class UrlResolutionChecker {
+public:
+    /**
+     * @brief Why a reference is broken.
+     */
+    enum class Problem {
+        Missing,    ///< The target file does not exist.
+        Unmapped,   ///< Remote URL that neither the catalog nor the schema store maps to a file.
+        Invalid,    ///< The reference is not a valid URI, or the document could not be read.
+    };
+
+    /**
+     * @brief A reference that does not resolve.
+     */
+    struct BrokenReference {
+        std::string file;       ///< Document containing the reference.
+        int line = 0;           ///< Line of the element.
+        std::string attribute;  ///< "xlink:href", "schemaLocation" or "xml:base".
+        std::string value;      ///< Reference as written in the document.
+        std::string resolved;   ///< Absolute URI or path the reference resolves to.
+        Problem problem = Problem::Missing;
+    };
+
+    /**
+     * @brief Constructor for UrlResolutionChecker.
+     *
+     * Indexes the files of the package folder.
+     *
+     * @param package_folder The extracted package.
+     * @param num_threads Number of worker threads (0 selects ThreadPool::default_concurrency()).
+     */
+    explicit UrlResolutionChecker(const std::string& package_folder, std::size_t num_threads = 0);
+
+    /**
+     * @brief Checks all .xsd and .xml documents of the package (META-INF excluded).
+     *
+     * @return The broken references, ordered by file and line.
+     */
+    std::vector<BrokenReference> check();
+
+    /**
+     * @brief Checks the given documents in parallel.
+     *
+     * @param files Paths to the documents.
+     * @return The broken references, ordered by file and line.
+     */
+    std::vector<BrokenReference> check(const std::vector<std::string>& files);
+
+    /**
+     * @brief Checks one document.
+     *
+     * @param file Path to the document.
+     * @param document_base Base URI of the document (empty: the file path).
+     * @return The broken references, in document order.
+     */
+    std::vector<BrokenReference> check_file(const std::string& file, const std::string& document_base = "");
+
+    /**
+     * @brief Resolves a reference against a base URI (RFC 3986), memoized.
+     *
+     * @param base The base URI.
+     * @param relative The reference, without fragment.
+     * @return The absolute URI, or an empty string if the reference is invalid.
+     */
+    std::string resolve(const std::string& base, const std::string& relative);
+
+    /**
+     * @brief Get the number of resolutions answered from the memo.
+     *
+     * @return The number of memo hits.
+     */
+    std::size_t memo_hits() const;
+
+    /**
+     * @brief Get a short name of a problem.
+     *
+     * @param problem The problem.
+     * @return "missing", "unmapped" or "invalid".
+     */
+    static std::string to_string(Problem problem);
+
+private:
+    /**
+     * @brief Check whether a local file exists, using the package index first.
+     */
+    bool exists(const std::string& path);
+
+    std::string package_folder_;                                    ///< Absolute, normalized package folder.
+    std::size_t num_threads_;                                       ///< Worker threads.
+    std::unordered_set<std::string> files_;                         ///< Files of the package (absolute, generic).
+    mutable std::mutex mutex_;                                      ///< Guards the memos.
+    std::unordered_map<std::string, std::string> resolved_;         ///< base '\n' relative -> absolute URI.
+    std::unordered_map<std::string, bool> outside_;                 ///< Existence of files outside the package.
+    std::size_t memo_hits_ = 0;                                     ///< Resolutions answered from resolved_.
+};
+
+#endif // URLRESOLUTIONCHECKER_HPP
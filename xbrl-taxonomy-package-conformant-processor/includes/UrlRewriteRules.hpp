@@ -0,0 +1,96 @@
+#pragma once
+
+#ifndef URLREWRITERULES_HPP
+#define URLREWRITERULES_HPP
+
+#include <array>
+#include <cstdint>
+#include <string>
+#include <vector>
+#include "Providers.hpp"
+
+/**
+ * @brief A table of URL substitutions compiled into one Aho-Corasick automaton.
+ *
+ * Every reference value (xlink:href, schemaLocation, xml:base) is scanned
+ * once against all patterns, whatever the number of rules, instead of once
+ * per rule with std::string::find. Matches are replaced leftmost first; of
+ * matches starting at the same position the longest pattern wins, and of
+ * identical patterns the first rule.
+ *
+ * The rules of each provider are declared in UrlRewriteRules.cpp and compiled
+ * on first use by for_provider().
+ *
+ * Example usage:
+ * @code
+ * const UrlRewriteRules& rules = UrlRewriteRules::for_provider(Provider::CIPC);
+ * std::string rewritten;
+ * if (rules.rewrite("../../../def/ifrs/full_ifrs/full_ifrs-cor_2022-03-24.xsd", rewritten)) {
+ *     // rewritten == "https://xbrl.ifrs.org/taxonomy//full_ifrs/full_ifrs-cor_2022-03-24.xsd"
+ * }
+ * @endcode
+ */
+class UrlRewriteRules {
+public:
+    /**
+     * @brief A substitution of a substring of a URL.
+     */
+    struct Rule {
+        std::string pattern;        ///< Substring to find (not empty).
+        std::string replacement;    ///< Replacement.
+    };
+
+    UrlRewriteRules() = default;
+
+    /**
+     * @brief Compiles a rule table.
+     *
+     * @param rules The substitutions.
+     * @throws std::invalid_argument if a pattern is empty.
+     */
+    explicit UrlRewriteRules(std::vector<Rule> rules);
+
+    /**
+     * @brief Get the compiled rules of a provider.
+     *
+     * @param provider The provider.
+     * @return The rules, compiled once per process.
+     */
+    static const UrlRewriteRules& for_provider(Provider provider);
+
+    /**
+     * @brief Apply all rules to a value in a single pass.
+     *
+     * @param value The URL or path.
+     * @param result Receives the rewritten value if a rule matched.
+     * @return true if the value was rewritten, false otherwise.
+     */
+    bool rewrite(const std::string& value, std::string& result) const;
+
+    /**
+     * @brief Check whether the table has no rules.
+     *
+     * @return true if there are no rules.
+     */
+    bool empty() const;
+
+    /**
+     * @brief Get the rules.
+     *
+     * @return The rules, in declaration order.
+     */
+    const std::vector<Rule>& rules() const;
+
+private:
+    /**
+     * @brief Builds the trie, the failure links and the full transition table.
+     */
+    void compile();
+
+    std::vector<Rule> rules_;                                   ///< Substitutions.
+    std::vector<std::array<std::int32_t, 256>> transitions_;    ///< State x byte -> state.
+    std::vector<std::int32_t> output_;                          ///< Rule ending in a state (-1: none).
+    std::vector<std::int32_t> dictionary_;                      ///< Next state on the suffix chain with an output (-1: none).
+};
+
+#endif // URLREWRITERULES_HPP
@@ -0,0 +1,190 @@
+#pragma once
+
+#ifndef VIRTUALPACKAGE_HPP
+#define VIRTUALPACKAGE_HPP
+
+#include <cstdint>
+#include <memory>
+#include <string>
+#include <vector>
+
+class MappedZipReader;
+
+/**
+ * @brief In-memory file tree of a taxonomy package.
+ *
+ * The tree is a path trie built from the central directory of a zip (or from
+ * a folder). Restructuring happens on the trie: move() re-parents a node and
+ * remove() drops a subtree in one operation, whatever the number of files
+ * below it, and add() inserts generated documents. File content is only read
+ * when it is needed (read(), materialization), straight from the source
+ * archive or file; the source archive is memory-mapped (see MappedZipReader).
+ *
+ * The final tree is materialized once, either into a zip, where entries that
+ * still hold their original archive content are copied as raw compressed
+ * bytes, or into a folder, where only the kept files are extracted.
+ *
+ * Example usage:
+ * @code
+ * VirtualPackage package = VirtualPackage::from_zip("input/CIPC/cipc_2023-09-07.zip");
+ * package.remove("cipc_2023-09-07/def/ifrs");
+ * package.move("cipc_2023-09-07/META-INF/catalog.xml", "cipc_2023-09-07/META-INF/catalog-old.xml");
+ * package.add("cipc_2023-09-07/META-INF/catalog.xml", catalog_content);
+ * package.materialize_zip("output/CIPC/cipc_2023-09-07.zip");
+ * @endcode
+ */
+class VirtualPackage {
+public:
+    /**
+     * @brief A node of the tree, as returned by entries().
+     */
+    struct Entry {
+        std::string path;           ///< Path inside the package ('/' separated, no trailing slash).
+        bool is_dir = false;        ///< Whether the node is a directory.
+        std::uint64_t size = 0;     ///< Uncompressed size (0 for directories and generated files before read).
+        std::uint32_t crc = 0;      ///< CRC-32 from the central directory (0 if unknown).
+    };
+
+    VirtualPackage();
+    ~VirtualPackage();
+    VirtualPackage(VirtualPackage&&) noexcept;
+    VirtualPackage& operator=(VirtualPackage&&) noexcept;
+
+    /**
+     * @brief Builds the tree of a zip file from its central directory.
+     *
+     * Entries whose name fails utils::is_safe_entry_name() are reported and skipped.
+     *
+     * @param zip_path Path to the zip file.
+     * @return The tree; no content is read.
+     * @throws std::runtime_error if the zip cannot be opened.
+     */
+    static VirtualPackage from_zip(const std::string& zip_path);
+
+    /**
+     * @brief Builds the tree of a folder.
+     *
+     * @param folder Path to the folder.
+     * @return The tree; no content is read.
+     */
+    static VirtualPackage from_folder(const std::string& folder);
+
+    /**
+     * @brief Check whether a path exists.
+     *
+     * @param path Path inside the package.
+     * @return true if a file or directory exists at the path.
+     */
+    bool exists(const std::string& path) const;
+
+    /**
+     * @brief Check whether a path is a directory.
+     *
+     * @param path Path inside the package.
+     * @return true if a directory exists at the path.
+     */
+    bool is_directory(const std::string& path) const;
+
+    /**
+     * @brief Moves a file or directory (with everything below it).
+     *
+     * Missing parent directories of the target are created.
+     *
+     * @param from Current path.
+     * @param to New path; must not exist.
+     * @return true if moved, false if from is missing, to exists or to is below from.
+     */
+    bool move(const std::string& from, const std::string& to);
+
+    /**
+     * @brief Removes a file or directory (with everything below it).
+     *
+     * @param path Path inside the package.
+     * @return The number of files removed.
+     */
+    std::size_t remove(const std::string& path);
+
+    /**
+     * @brief Adds a generated file, replacing an existing file at the path.
+     *
+     * @param path Path inside the package.
+     * @param content The content.
+     */
+    void add(const std::string& path, std::string content);
+
+    /**
+     * @brief Adds a directory (and missing parents).
+     *
+     * @param path Path inside the package.
+     */
+    void add_directory(const std::string& path);
+
+    /**
+     * @brief Reads the content of a file.
+     *
+     * @param path Path inside the package.
+     * @return The content.
+     * @throws std::runtime_error if the path is not a file or cannot be read.
+     */
+    std::string read(const std::string& path) const;
+
+    /**
+     * @brief Get all nodes in pre-order, children sorted by name.
+     *
+     * @return The nodes, root excluded.
+     */
+    std::vector<Entry> entries() const;
+
+    /**
+     * @brief Get the number of files.
+     *
+     * @return The number of files in the tree.
+     */
+    std::size_t file_count() const;
+
+    /**
+     * @brief Writes the tree into a zip file.
+     *
+     * Files still holding their original archive content are copied as raw
+     * compressed bytes; other files are compressed.
+     *
+     * @param output_zip The zip file to create (overwritten if it exists).
+     * @return The number of entries written.
+     * @throws std::runtime_error if an archive cannot be opened or written.
+     */
+    std::size_t materialize_zip(const std::string& output_zip) const;
+
+    /**
+     * @brief Writes the tree into a folder.
+     *
+     * Archive files that were not moved are extracted in parallel (through
+     * the ContentStore if it is enabled); all other files are written one by one.
+     *
+     * @param folder The destination folder.
+     * @param num_threads Number of extraction threads (0 selects the number of cores).
+     * @return The number of files written.
+     * @throws std::runtime_error if a path has a ".." component, or a file cannot be written.
+     */
+    std::size_t materialize_folder(const std::string& folder, unsigned int num_threads = 0) const;
+
+private:
+    struct Node;
+
+    /**
+     * @brief Get the node at a path, or nullptr.
+     */
+    Node* find(const std::string& path) const;
+
+    /**
+     * @brief Get the directory at a path, creating it and missing parents.
+     *
+     * @return The directory, or nullptr if a file is in the way.
+     */
+    Node* make_directories(const std::vector<std::string>& components, std::size_t count);
+
+    std::unique_ptr<Node> root_;    ///< Root directory.
+    std::string archive_;           ///< Source zip, empty if built from a folder.
+    std::shared_ptr<const MappedZipReader> reader_;    ///< Mapping of the source zip.
+};
+
+#endif // VIRTUALPACKAGE_HPP
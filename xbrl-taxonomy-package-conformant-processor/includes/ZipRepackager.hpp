@@ -0,0 +1,142 @@
+#pragma once
+
+#ifndef ZIPREPACKAGER_HPP
+#define ZIPREPACKAGER_HPP
+
+#include <functional>
+#include <map>
+#include <optional>
+#include <string>
+#include <vector>
+#include <libxml/tree.h>
+
+/**
+ * @class ZipRepackager
+ * @brief Rewrites a taxonomy package zip into a fixed zip without extracting it to disk.
+ *
+ * Entries are read from the source archive, renamed by path rules and written
+ * straight into the output archive. Entries whose content does not change are
+ * copied as raw compressed bytes (no inflate/deflate). Only entries with a
+ * registered rewriter are inflated, and generated documents such as
+ * META-INF/taxonomyPackage.xml are injected from memory.
+ *
+ * Example usage:
+ * @code
+ * ZipRepackager repackager("input/pkg.zip");
+ * repackager.set_top_level_dir("pkg");
+ * repackager.add_move_rule("", "files/");
+ * repackager.inject_xml("pkg/META-INF/taxonomyPackage.xml", doc);
+ * repackager.write("output/pkg.zip");
+ * @endcode
+ */
+class ZipRepackager {
+public:
+    /**
+     * @brief Transforms the content of one entry.
+     *
+     * Receives the source entry name and its uncompressed content and returns the new content.
+     */
+    using ContentRewriter = std::function<std::string(const std::string& name, const std::string& content)>;
+
+    /**
+     * @brief Constructor for ZipRepackager.
+     *
+     * @param source_zip The path to the source zip archive.
+     */
+    explicit ZipRepackager(const std::string& source_zip);
+
+    /**
+     * @brief Places every output entry below a single top-level directory.
+     *
+     * The prefix is applied after the move rules.
+     *
+     * @param top_level_dir The name of the top-level directory.
+     */
+    void set_top_level_dir(const std::string& top_level_dir);
+
+    /**
+     * @brief Adds a rule that replaces the path prefix `from` by `to`.
+     *
+     * Rules are tried in the order they were added and the first matching
+     * rule (move or drop) wins. An empty `from` matches every entry.
+     *
+     * @param from The source path prefix.
+     * @param to The replacement prefix.
+     */
+    void add_move_rule(const std::string& from, const std::string& to);
+
+    /**
+     * @brief Adds a rule that leaves entries with the given prefix where they are.
+     *
+     * Useful to exclude a folder (e.g. "META-INF/") from a catch-all move rule.
+     *
+     * @param prefix The source path prefix.
+     */
+    void add_keep_rule(const std::string& prefix);
+
+    /**
+     * @brief Adds a rule that drops all entries with the given prefix.
+     *
+     * @param prefix The source path prefix.
+     */
+    void add_drop_rule(const std::string& prefix);
+
+    /**
+     * @brief Registers a content rewriter for one source entry.
+     *
+     * @param source_path The entry name in the source archive.
+     * @param rewriter The content transformation.
+     */
+    void add_rewriter(const std::string& source_path, ContentRewriter rewriter);
+
+    /**
+     * @brief Adds a generated entry. It replaces a source entry mapped to the same path.
+     *
+     * @param path The entry name in the output archive (including the top-level dir).
+     * @param content The uncompressed content.
+     */
+    void inject(const std::string& path, std::string content);
+
+    /**
+     * @brief Serializes an XML document and adds it as generated entry.
+     *
+     * @param path The entry name in the output archive (including the top-level dir).
+     * @param doc The document to serialize (ownership stays with the caller).
+     */
+    void inject_xml(const std::string& path, xmlDocPtr doc);
+
+    /**
+     * @brief Computes the output path of a source entry.
+     *
+     * @param source_path The entry name in the source archive.
+     * @return The output entry name, or std::nullopt if the entry is dropped.
+     */
+    std::optional<std::string> map_path(const std::string& source_path) const;
+
+    /**
+     * @brief Writes the output archive.
+     *
+     * @param output_zip The path of the zip archive to create (overwritten if it exists).
+     * @return The number of entries written.
+     * @throws std::runtime_error if an archive cannot be opened or written.
+     */
+    std::size_t write(const std::string& output_zip);
+
+private:
+    /**
+     * @brief A path rule: kind, source prefix and replacement prefix.
+     */
+    struct Rule {
+        enum class Kind { Move, Keep, Drop } kind;
+        std::string from;
+        std::string to;
+    };
+
+    std::string source_zip_;                                ///< Path to the source archive.
+    std::string top_level_dir_;                             ///< Prefix for all output entries.
+    std::vector<Rule> rules_;                               ///< Path rules in priority order.
+    std::map<std::string, ContentRewriter> rewriters_;      ///< Source entry -> content rewriter.
+    std::map<std::string, std::string> injected_;           ///< Output entry -> generated content.
+};
+
+#endif // ZIPREPACKAGER_HPP
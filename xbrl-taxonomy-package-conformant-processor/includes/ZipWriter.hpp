@@ -0,0 +1,208 @@
+#pragma once
+
+#ifndef ZIPWRITER_HPP
+#define ZIPWRITER_HPP
+
+#include <cstddef>
+#include <cstdint>
+#include <deque>
+#include <fstream>
+#include <future>
+#include <memory>
+#include <string>
+#include <string_view>
+#include <vector>
+#include "MappedZipReader.hpp"
+#include "ThreadPool.hpp"
+
+/**
+ * @class ZipWriter
+ * @brief Writes a ZIP archive, deflating the entries in parallel.
+ *
+ * Entries are compressed on a thread pool and written to the archive in the
+ * order they were added. Entries larger than CHUNK_SIZE are split into
+ * chunks that are deflated independently, pigz-style: every chunk is primed
+ * with the last 32 KiB of the previous one and all but the last end with a
+ * sync flush, so the concatenated chunks form one standard deflate stream
+ * that every unzip tool reads. Entries copied from another archive keep
+ * their compressed data (see add_raw()). ZIP64 records are written when
+ * sizes, offsets or the entry count require them.
+ *
+ * At most MAX_PENDING_BYTES of uncompressed data wait to be written; adding
+ * further entries blocks until the oldest ones are written. A file that
+ * cannot be read is left out and reported by failed().
+ *
+ * Example usage:
+ * @code
+ * ZipWriter writer("output/package.zip", 9);
+ * writer.add_file("package/META-INF/catalog.xml", "work/package/META-INF/catalog.xml");
+ * writer.add_buffer("package/README.txt", "generated");
+ * writer.close();
+ * @endcode
+ */
+class ZipWriter {
+public:
+    /// Size of the independently deflated chunks of large entries.
+    static constexpr std::size_t CHUNK_SIZE = 128 * 1024;
+
+    /// Uncompressed bytes that may wait to be written.
+    static constexpr std::size_t MAX_PENDING_BYTES = 64 * 1024 * 1024;
+
+    /**
+     * @brief Creates (or truncates) the archive.
+     *
+     * @param path The path of the .zip archive.
+     * @param level The deflate level: 0 stores the entries, 1 (fastest) to 9 (smallest), -1 selects zlib's default (6).
+     * @param num_threads Number of compression threads (0 selects ThreadPool::default_concurrency()).
+     * @throws std::runtime_error if the archive cannot be created.
+     * @throws std::invalid_argument if the level is out of range.
+     */
+    explicit ZipWriter(const std::string& path, int level = -1, std::size_t num_threads = 0);
+
+    /**
+     * @brief Finishes the archive if close() was not called; errors are ignored.
+     */
+    ~ZipWriter();
+
+    ZipWriter(const ZipWriter&) = delete;
+    ZipWriter& operator=(const ZipWriter&) = delete;
+
+    /**
+     * @brief Adds a file from disk, compressed with the level of the writer.
+     *
+     * @param name The entry name, with '/' separators.
+     * @param file_path The file to add.
+     * @throws std::runtime_error if the archive cannot be written.
+     */
+    void add_file(const std::string& name, const std::string& file_path);
+
+    /**
+     * @brief Adds content from memory, compressed with the level of the writer.
+     *
+     * @param name The entry name, with '/' separators.
+     * @param content The content of the entry.
+     * @throws std::runtime_error if the archive cannot be written.
+     */
+    void add_buffer(const std::string& name, std::string content);
+
+    /**
+     * @brief Adds an entry of another archive with its compressed data, without recompressing it.
+     *
+     * The source archive must stay open until close() returns.
+     *
+     * @param name The entry name in this archive.
+     * @param archive The source archive.
+     * @param entry An entry of the source archive.
+     * @throws std::runtime_error if the entry is encrypted or corrupt, or the archive cannot be written.
+     */
+    void add_raw(const std::string& name, const MappedZipReader& archive, const MappedZipReader::Entry& entry);
+
+    /**
+     * @brief Writes the pending entries and the central directory, and closes the archive.
+     *
+     * @throws std::runtime_error if the archive cannot be written.
+     */
+    void close();
+
+    /**
+     * @brief Get the number of entries added.
+     *
+     * @return The number of entries.
+     */
+    std::size_t size() const;
+
+    /**
+     * @brief Get the entries that could not be read and were left out of the archive.
+     *
+     * @return One message per entry, with the entry name and the reason.
+     */
+    const std::vector<std::string>& failed() const;
+
+private:
+    /**
+     * @brief A compressed chunk of an entry.
+     */
+    struct Chunk {
+        std::string data;           ///< Compressed (or stored) bytes.
+        std::uint32_t crc = 0;      ///< CRC-32 of the uncompressed bytes.
+        std::uint64_t size = 0;     ///< Uncompressed size.
+    };
+
+    /**
+     * @brief An entry waiting to be written.
+     */
+    struct Pending {
+        std::string name;                               ///< Entry name.
+        std::uint32_t dos_time = 0;                     ///< Modification time (MS-DOS format).
+        std::uint16_t method = 8;                       ///< Compression method.
+        std::uint16_t flags = 0;                        ///< General purpose bit flags.
+        std::uint64_t pending_bytes = 0;                ///< Uncompressed bytes counted against MAX_PENDING_BYTES.
+        std::vector<std::future<Chunk>> chunks;         ///< Compressed chunks, in order.
+        std::string_view raw;                           ///< Compressed data copied from another archive.
+        std::uint32_t raw_crc = 0;                      ///< CRC-32 of the raw entry.
+        std::uint64_t raw_size = 0;                     ///< Uncompressed size of the raw entry.
+    };
+
+    /**
+     * @brief A central directory record of a written entry.
+     */
+    struct Record {
+        std::string name;
+        std::uint32_t dos_time;
+        std::uint16_t method;
+        std::uint16_t flags;
+        std::uint32_t crc;
+        std::uint64_t comp_size;
+        std::uint64_t size;
+        std::uint64_t offset;
+    };
+
+    /**
+     * @brief Queues an entry and writes the finished ones at the front of the queue.
+     */
+    void enqueue(Pending pending);
+
+    /**
+     * @brief Submits the chunks of shared content to the thread pool.
+     */
+    void submit_chunks(Pending& pending, std::shared_ptr<const std::string> content);
+
+    /**
+     * @brief Writes the finished entries at the front of the queue.
+     *
+     * Then waits for the entry at the front while more than MAX_PENDING_BYTES
+     * are queued, or until the queue is empty if all is set.
+     *
+     * @param all Write all entries.
+     */
+    void flush(bool all);
+
+    /**
+     * @brief Writes the local header and the data of an entry.
+     */
+    void write_entry(Pending& pending);
+
+    /**
+     * @brief Writes the central directory and the end of central directory records.
+     */
+    void write_central_directory();
+
+    /**
+     * @brief Writes bytes and keeps track of the offset.
+     */
+    void write(const void* data, std::size_t size);
+
+    std::string path_;                  ///< Path of the archive.
+    std::ofstream out_;                 ///< The archive.
+    int level_;                         ///< Deflate level (0: store).
+    std::uint64_t offset_;              ///< Bytes written so far.
+    std::size_t added_;                 ///< Entries added.
+    std::uint64_t pending_bytes_;       ///< Uncompressed bytes of the queued entries.
+    bool closed_;                       ///< Set by close().
+    std::deque<Pending> pending_;       ///< Entries waiting to be written, in order.
+    std::vector<Record> records_;       ///< Written entries.
+    std::vector<std::string> failed_;   ///< Entries left out.
+    ThreadPool pool_;                   ///< Compression workers.
+};
+
+#endif // ZIPWRITER_HPP
@@ -4,18 +4,33 @@
 #define LOGGER_HPP
 
 #include <string>
-#include <memory>
+#include <atomic>
+#include <condition_variable>
+#include <cstdint>
+#include <ctime>
 #include <fstream>
 #include <iostream>
+#include <mutex>
+#include <thread>
+#include <vector>
 
 /**
  * @brief A simple logger class that provides logging functionality with rotating file handling and console output.
  *
+ * Logging is asynchronous: info(), error() and debug() only append the
+ * message to an in-memory queue (a short critical section, no I/O, no time
+ * formatting). A background writer thread swaps the queue out, formats the
+ * whole batch (timestamps are formatted once per second), writes it with a
+ * single call and flushes once, and rotates the file when needed. Messages
+ * from one thread keep their order. The logger is safe to use from several
+ * threads; the queue is drained when the program exits or on flush().
+ *
  * Example usage:
  * @code
- * Logger logger = Logger::get_instance("logs/app.log", Logger::LogLevel::INFO);
+ * Logger& logger = Logger::get_instance("logs/app.log", Logger::LogLevel::INFO);
  * logger.info("This is an info message.");
  * logger.error("This is an error message.");
+ * logger.flush();  // e.g. before printing to the console directly
  * @endcode
  */
 class Logger {
@@ -27,6 +42,12 @@ public:
         DEBUG
     };
 
+    /// Format of the log file lines.
+    enum class Format {
+        TEXT,   ///< "2024-01-31 12:00:00 - INFO - message"
+        JSON    ///< One JSON object per line: {"time": ..., "level": ..., "thread": ..., "message": ...}
+    };
+
     /**
      * @brief Get the singleton instance of the Logger.
      *
@@ -38,6 +59,14 @@ public:
      */
     static Logger& get_instance(const std::string& log_file, LogLevel level = LogLevel::INFO, size_t max_bytes = 1'000'000, int backup_count = 5);
 
+    /**
+     * @brief Drains the queue and stops the writer thread.
+     */
+    ~Logger();
+
+    Logger(const Logger&) = delete;
+    Logger& operator=(const Logger&) = delete;
+
     /**
      * @brief Log an info-level message.
      *
@@ -59,7 +88,38 @@ public:
      */
     void debug(const std::string& message);
 
+    /**
+     * @brief Block until all messages logged so far are written and flushed.
+     */
+    void flush();
+
+    /**
+     * @brief Set the format of the log file lines (console output is always text).
+     *
+     * @param format The format.
+     */
+    void set_format(Format format);
+
+    /**
+     * @brief Parse a format name ("text", "json").
+     *
+     * @param name The name.
+     * @return The format.
+     * @throws std::invalid_argument if the name is unknown.
+     */
+    static Format parse_format(const std::string& name);
+
 private:
+    /// A queued message.
+    struct Record {
+        std::time_t time;           ///< When the message was logged.
+        LogLevel level;             ///< Log level.
+        bool to_file;               ///< Passes the log level filter.
+        bool console;               ///< Also print to std::cerr.
+        std::uint64_t thread;       ///< Hash of the id of the logging thread.
+        std::string message;        ///< The message.
+    };
+
     /// Private constructor (singleton pattern).
     Logger(const std::string& log_file, LogLevel level, size_t max_bytes, int backup_count);
 
@@ -69,12 +129,26 @@ private:
     void rotate_log();
 
     /**
-     * @brief Write a message to the log file.
+     * @brief Queue a message for the writer thread.
      *
      * @param level The log level of the message.
      * @param message The message to log.
+     * @param console Whether to also print the message to std::cerr.
+     */
+    void log(LogLevel level, const std::string& message, bool console = false);
+
+    /**
+     * @brief Writer thread: writes queued batches until stopped.
+     */
+    void run();
+
+    /**
+     * @brief Append a formatted record to a buffer.
+     *
+     * @param record The record.
+     * @param out The buffer.
      */
-    void log(LogLevel level, const std::string& message);
+    void format_record(const Record& record, std::string& out);
 
     /**
      * @brief Get the log level as a string.
@@ -82,15 +156,30 @@ private:
      * @param level The log level.
      * @return The log level as a string.
      */
-    std::string level_to_string(LogLevel level);
+    static const char* level_to_string(LogLevel level);
 
-    std::ofstream log_stream_;  ///< Stream to the log file.
-    LogLevel log_level_;        ///< Current logging level.
+    std::string log_file_;      ///< Log file path.
+    std::atomic<LogLevel> log_level_;   ///< Current logging level.
     size_t max_bytes_;          ///< Maximum log file size before rotating.
     int backup_count_;          ///< Number of backup log files to keep.
-    std::string log_file_;      ///< Log file path.
+    std::atomic<Format> format_{ Format::TEXT };  ///< Format of the log file lines.
+
+    // Writer thread only.
+    std::ofstream log_stream_;  ///< Stream to the log file.
+    std::uintmax_t written_bytes_ = 0;  ///< Size of the current log file.
+    std::time_t cached_time_ = -1;      ///< Second of cached_time_str_.
+    char cached_time_str_[20] = {};     ///< Formatted cached_time_.
+
+    // Shared, guarded by mutex_.
+    std::mutex mutex_;
+    std::condition_variable wake_writer_;   ///< Signaled when records are queued or on stop.
+    std::condition_variable wake_callers_;  ///< Signaled when a batch is written.
+    std::vector<Record> queue_;             ///< Records not yet taken by the writer.
+    std::uint64_t queued_ = 0;              ///< Number of records ever queued.
+    std::uint64_t done_ = 0;                ///< Number of records written.
+    bool stop_ = false;                     ///< Writer should exit once the queue is empty.
 
-    static std::unique_ptr<Logger> instance_;  ///< Singleton instance.
+    std::thread writer_;        ///< Background writer.
 };
 
 #endif // LOGGER_HPP
@@ -4,19 +4,82 @@
 #define UTILS_HPP
 
 #include <string>
+#include <cstdint>
+#include <set>
 
 /**
  * @brief Utility functions for the XBRL Taxonomy Package checking and fixing process.
  */
 namespace utils {
 
+	/**
+	 * @brief Sets the deflate level of the archives written by gen_zip_archive.
+	 *
+	 * Entries copied from the source or previous archive keep their compressed data.
+	 *
+	 * @param level 0 stores the entries, 1 (fastest) to 9 (smallest), -1 selects zlib's default (6).
+	 * @throws std::invalid_argument if the level is out of range.
+	 */
+	void set_compression_level(int level);
+
+	/**
+	 * @brief Get the deflate level of the archives written by gen_zip_archive.
+	 *
+	 * @return The level set by set_compression_level(), -1 by default.
+	 */
+	int compression_level();
+
 	/**
 	 * @brief Generates a zip archive out of a root input folder.
 	 *
 	 * @param folder_path The path to the folder to zip.
 	 * @param zip_filename The name of the output zip file.
+	 * @return false if the archive could not be written completely (nothing is left at zip_filename).
+	 */
+	bool gen_zip_archive(const std::string& folder_path, const std::string& zip_filename);
+
+	/**
+	 * @brief Generates a zip archive out of a root input folder, reusing compressed data of unchanged files.
+	 *
+	 * Every file whose size and CRC-32 match an entry of the source archive (the
+	 * archive the folder was extracted from) is copied into the new archive with
+	 * its original compressed data and CRC, without recompression. Files at the
+	 * same relative path are matched first. Moved files are found by size and CRC,
+	 * and only copied if their bytes equal the entry, since two files can share a CRC-32.
+	 * Only modified or generated files are deflated, in parallel and with the
+	 * level set by set_compression_level() (see ZipWriter).
+	 *
+	 * @param folder_path The path to the folder to zip.
+	 * @param zip_filename The name of the output zip file.
+	 * @param source_zip The zip archive the folder was extracted from (empty: recompress everything).
+	 * @return false if the archive could not be written completely (nothing is left at zip_filename).
+	 */
+	bool gen_zip_archive(const std::string& folder_path, const std::string& zip_filename, const std::string& source_zip);
+
+	/**
+	 * @brief Generates a zip archive out of a root input folder, reusing the previous output for unchanged files.
+	 *
+	 * Files listed in unchanged_paths are copied with their compressed data from
+	 * the archive of the previous run, without reading them from disk. All other
+	 * files are handled like in the overload above.
+	 *
+	 * @param folder_path The path to the folder to zip.
+	 * @param zip_filename The name of the output zip file (must differ from previous_zip).
+	 * @param source_zip The zip archive the folder was extracted from (empty: recompress everything).
+	 * @param previous_zip The zip archive generated by the previous run.
+	 * @param unchanged_paths Relative paths (with '/') of the files unchanged since the previous run.
+	 * @return false if the archive could not be written completely (nothing is left at zip_filename).
+	 */
+	bool gen_zip_archive(const std::string& folder_path, const std::string& zip_filename, const std::string& source_zip,
+		const std::string& previous_zip, const std::set<std::string>& unchanged_paths);
+
+	/**
+	 * @brief Computes the CRC-32 of a file, as stored in zip central directories.
+	 *
+	 * @param file_path The path to the file.
+	 * @return The CRC-32 of the file content.
 	 */
-	void gen_zip_archive(const std::string& folder_path, const std::string& zip_filename);
+	std::uint32_t file_crc32(const std::string& file_path);
 
 	/**
 	 * @brief Moves a folder recursively from one destination to another.
@@ -49,12 +112,58 @@ namespace utils {
 	void delete_non_zip_files_and_folders_recursive(const std::string& folder_path);
 
 	/**
-	 * @brief Extracts a zip file to a specified destination folder.
+	 * @brief Check whether a zip entry name stays inside the folder it is extracted to.
+	 *
+	 * Entry names come from the package, so they must not be joined onto a
+	 * destination folder unchecked: an absolute name would replace the folder
+	 * and a ".." segment would leave it.
+	 *
+	 * @param name The entry name.
+	 * @return False for empty and absolute names (including drive letters) and names with a ".." segment.
+	 */
+	bool is_safe_entry_name(const std::string& name);
+
+	/**
+	 * @brief Sets the number of threads used by an extraction called with num_threads = 0.
+	 *
+	 * Processors running several packages at once divide the cores among
+	 * their workers, so the extractions do not oversubscribe the machine.
+	 *
+	 * @param num_threads Number of threads (0 selects the number of cores).
+	 */
+	void set_extraction_threads(unsigned int num_threads);
+
+	/**
+	 * @brief Get the number of threads used by an extraction called with num_threads = 0.
+	 *
+	 * @return The number set by set_extraction_threads(), or the number of cores.
+	 */
+	unsigned int extraction_threads();
+
+	/**
+	 * @brief Extracts a zip file to a specified destination folder using several threads.
+	 *
+	 * All directories are created in one pass up front. The file entries are then
+	 * inflated by worker threads, each with its own libzip handle (libzip handles
+	 * are not thread-safe), into files pre-sized to their uncompressed length.
+	 * Entries whose name fails is_safe_entry_name() are reported and skipped.
 	 *
 	 * @param zip_path Path to the zip file to be extracted.
 	 * @param destination_folder Path to the folder where the contents will be extracted.
+	 * @param num_threads Number of worker threads (0 selects extraction_threads()).
+	 */
+	void zip_dir_extractor(const std::string& zip_path, const std::string& destination_folder, unsigned int num_threads = 0);
+
+	/**
+	 * @brief Extracts selected entries of a zip file to a specified destination folder using several threads.
+	 *
+	 * @param zip_path Path to the zip file to be extracted.
+	 * @param destination_folder Path to the folder where the entries will be extracted.
+	 * @param entry_names Names of the entries to extract; other entries are skipped.
+	 * @param num_threads Number of worker threads (0 selects extraction_threads()).
 	 */
-	void zip_dir_extractor(const std::string& zip_path, const std::string& destination_folder);
+	void zip_dir_extractor(const std::string& zip_path, const std::string& destination_folder,
+		const std::set<std::string>& entry_names, unsigned int num_threads = 0);
 
 }  // namespace utils
 
@@ -22,51 +22,77 @@
 #include "../includes/CIPCFixer.hpp"
 #include "../includes/utils.hpp"
 #include "../includes/Providers.hpp"
+#include "../includes/PackageProcessor.hpp"
+#include "../includes/BatchProcessor.hpp"
 
 /**
  * @brief The main application class for fixing XBRL Taxonomy Packages.
+ *
+ * Usage:
+ * @code
+ * app PROVIDER PATH/TO/PKG.zip
+ * app --batch DIR_OR_MANIFEST [--jobs N] [--output DIR]
+ * app --serve SOCKET [--jobs N] [--output DIR]
+ * @endcode
  */
 class App {
 public:
     /**
      * @brief Main entry point for the application.
      *
-     * Initializes logging, parses arguments, and processes the XBRL package.
+     * Initializes logging, parses arguments, and processes one XBRL package
+     * or, in batch mode, a whole directory or manifest of packages, or, in
+     * server mode, the jobs submitted on a socket.
+     *
+     * @param argc Number of command-line arguments.
+     * @param argv Command-line arguments.
+     * @return The process exit code.
      */
-    void run();
+    int run(int argc, char* argv[]);
 
 private:
     /**
      * @brief Parses command-line arguments.
      *
-     * @return A tuple containing the provider and package path.
+     * @param argc Number of command-line arguments.
+     * @param argv Command-line arguments.
      * @throws std::invalid_argument if arguments are not valid.
      */
-    std::pair<std::string, std::string> parse_arguments();
+    void parse_arguments(int argc, char* argv[]);
 
     /**
-     * @brief Performs all package checks.
+     * @brief Processes a single package and prints the analysis and the output result.
      *
-     * @param tp_checker The TPChecker instance for checking the package.
+     * @param provider_name The name of the provider.
      * @param package The path to the package.
-     * @return A tuple of check results.
+     * @return The process exit code.
      */
-    std::tuple<bool, bool, bool> check_package(TPChecker& tp_checker, const std::string& package);
+    int run_single(const std::string& provider_name, const std::string& package);
 
     /**
-     * @brief Fixes the package by applying necessary corrections based on the provider.
+     * @brief Processes all packages of a directory or manifest on a worker pool.
+     *
+     * @param source The directory or manifest path.
+     * @return The process exit code.
+     */
+    int run_batch(const std::string& source);
+
+    /**
+     * @brief Serves check and fix jobs on a Unix domain socket until SHUTDOWN or SIGINT/SIGTERM.
+     *
+     * @param socket_path The path of the socket.
+     * @return The process exit code.
+     */
+    int run_server(const std::string& socket_path);
+
+    /**
+     * @brief Prints the analysis results of a package.
      *
-     * @param provider_name The name of the provider.
-     * @param package_class The class responsible for fixing the package.
-     * @param source_zip_path The path to the source zip file.
-     * @param destination_folder The folder where the package will be fixed.
      * @param checks The results of the package checks.
      */
-    void fix_package(const std::string& provider_name,
-        const std::unique_ptr<TaxonomyPackageFixerInterface>& package_class,
-        const std::filesystem::path& source_zip_path,
-        const std::filesystem::path& destination_folder,
-        const std::tuple<bool, bool, bool>& checks);
+    void print_checks(const PackageChecks& checks);
+
+    argparse::ArgumentParser program_{ "xbrl-taxonomy-package-conformant-processor" };  ///< Command-line parser.
 };
 
 #endif // APP_HPP
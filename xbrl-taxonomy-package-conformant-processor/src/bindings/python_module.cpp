@@ -0,0 +1,262 @@
+// python_module.cpp : Python extension module (xbrl_tp) exposing the checker, the fixers and the package processor.
+//
+// Method names are the ones of the C++ classes, which the pytest suite under
+// tests/ also uses. Every call releases the GIL while it works on zips and
+// XML, so packages can be checked and fixed in parallel from a Python
+// ThreadPoolExecutor:
+//
+//   from concurrent.futures import ThreadPoolExecutor
+//   import xbrl_tp
+//
+//   def check(package):
+//       return xbrl_tp.PackageProcessor().check_package(package)
+//
+//   with ThreadPoolExecutor() as pool:
+//       results = list(pool.map(check, packages))
+//
+// Objects must not be shared between threads; create one per task (they are cheap).
+
+#include "../../includes/CaseCollisionChecker.hpp"
+#include "../../includes/CatalogResolver.hpp"
+#include "../../includes/CIPCFixer.hpp"
+#include "../../includes/CMFCLCIFixer.hpp"
+#include "../../includes/EBAFixer.hpp"
+#include "../../includes/EDINETFixer.hpp"
+#include "../../includes/MappedZipReader.hpp"
+#include "../../includes/PackageProcessor.hpp"
+#include "../../includes/ProviderDetector.hpp"
+#include "../../includes/Providers.hpp"
+#include "../../includes/TPChecker.hpp"
+#include "../../includes/UrlRewriteRules.hpp"
+#include "../../includes/ZipWriter.hpp"
+#include <memory>
+#include <optional>
+#include <utility>
+#include <vector>
+#include <libxml/parser.h>
+#include <pybind11/pybind11.h>
+#include <pybind11/stl.h>
+
+namespace py = pybind11;
+
+using release_gil = py::call_guard<py::gil_scoped_release>;
+
+namespace {
+
+    /**
+     * @brief Get an entry of an archive by name, as a Python KeyError if it has none.
+     */
+    const MappedZipReader::Entry& entry_of(const MappedZipReader& archive, const std::string& name) {
+        const MappedZipReader::Entry* entry = archive.find(name);
+        if (entry == nullptr) {
+            throw py::key_error("No entry " + name + " in " + archive.archive());
+        }
+        return *entry;
+    }
+
+}  // namespace
+
+PYBIND11_MODULE(xbrl_tp, m) {
+    m.doc() = "XBRL Taxonomy Package checker and fixers (C++), with the GIL released during zip and XML work";
+
+    // libxml2 must be initialised, and the offline entity loader installed,
+    // before the first call from a worker thread.
+    xmlInitParser();
+    CatalogResolver::get_instance();
+
+    m.def("set_allow_network", [](bool allow) { CatalogResolver::get_instance().set_allow_network(allow); },
+        py::arg("allow"), "Fetch remote schemas that are neither in the package catalog nor in the schema store.");
+    m.def("set_schema_store", [](const std::string& directory) { CatalogResolver::get_instance().set_schema_store(directory); },
+        py::arg("directory"), "Folder of the bundled XBRL/W3C base schemas (default: schemas/ in the working directory).");
+
+    py::enum_<Provider>(m, "Provider")
+        .value("EBA", Provider::EBA)
+        .value("EDINET", Provider::EDINET)
+        .value("CMFCLCI", Provider::CMFCLCI)
+        .value("CIPC", Provider::CIPC);
+
+    py::class_<ProviderDetection>(m, "ProviderDetection")
+        .def_readonly("provider", &ProviderDetection::provider)
+        .def_readonly("confidence", &ProviderDetection::confidence)
+        .def_readonly("scores", &ProviderDetection::scores)
+        .def_readonly("evidence", &ProviderDetection::evidence);
+
+    py::class_<ProviderDetector>(m, "ProviderDetector")
+        .def(py::init<>())
+        .def("detect", py::overload_cast<const std::string&>(&ProviderDetector::detect, py::const_),
+            py::arg("archive"), release_gil())
+        .def_property_readonly_static("MIN_CONFIDENCE", [](py::object) { return ProviderDetector::MIN_CONFIDENCE; });
+
+    // Entries are views into the mapping of their reader, which they keep alive.
+    py::class_<MappedZipReader::Entry>(m, "ZipEntry")
+        .def_property_readonly("name", [](const MappedZipReader::Entry& entry) { return std::string(entry.name); })
+        .def_readonly("size", &MappedZipReader::Entry::size)
+        .def_readonly("comp_size", &MappedZipReader::Entry::comp_size)
+        .def_readonly("crc", &MappedZipReader::Entry::crc)
+        .def_readonly("comp_method", &MappedZipReader::Entry::comp_method)
+        .def_readonly("is_dir", &MappedZipReader::Entry::is_dir);
+
+    py::class_<MappedZipReader>(m, "MappedZipReader")
+        .def(py::init<const std::string&>(), py::arg("archive"), release_gil())
+        .def_property_readonly("archive", &MappedZipReader::archive)
+        .def("entries", [](py::object self) {
+            py::list entries;
+            for (const auto& entry : self.cast<const MappedZipReader&>().entries()) {
+                entries.append(py::cast(&entry, py::return_value_policy::reference_internal, self));
+            }
+            return entries;
+        })
+        .def("find", [](const MappedZipReader& archive, const std::string& name) { return archive.find(name); },
+            py::arg("name"), py::return_value_policy::reference_internal)
+        .def("read", [](const MappedZipReader& archive, const std::string& name) {
+            const MappedZipReader::Entry& entry = entry_of(archive, name);
+            std::string buffer;
+            std::string content;
+            {
+                py::gil_scoped_release release;
+                content = std::string(archive.read(entry, buffer));
+            }
+            return py::bytes(content);
+        }, py::arg("name"));
+
+    py::class_<ZipWriter>(m, "ZipWriter")
+        .def(py::init<const std::string&, int, std::size_t>(), py::arg("path"), py::arg("level") = -1, py::arg("num_threads") = 0)
+        .def("add_file", &ZipWriter::add_file, py::arg("name"), py::arg("file_path"), release_gil())
+        .def("add_buffer", [](ZipWriter& writer, const std::string& name, py::bytes content) {
+            std::string data = content;
+            py::gil_scoped_release release;
+            writer.add_buffer(name, std::move(data));
+        }, py::arg("name"), py::arg("content"))
+        .def("add_raw", [](ZipWriter& writer, const std::string& name, const MappedZipReader& archive, const std::string& entry) {
+            const MappedZipReader::Entry& source = entry_of(archive, entry);
+            py::gil_scoped_release release;
+            writer.add_raw(name, archive, source);
+        }, py::arg("name"), py::arg("archive"), py::arg("entry"))
+        .def("close", &ZipWriter::close, release_gil())
+        .def("size", &ZipWriter::size)
+        .def_property_readonly("failed", &ZipWriter::failed)
+        .def_property_readonly_static("CHUNK_SIZE", [](py::object) { return ZipWriter::CHUNK_SIZE; });
+
+    py::class_<UrlRewriteRules>(m, "UrlRewriteRules")
+        .def(py::init([](const std::vector<std::pair<std::string, std::string>>& rules) {
+            std::vector<UrlRewriteRules::Rule> table;
+            for (const auto& [pattern, replacement] : rules) {
+                table.push_back({ pattern, replacement });
+            }
+            return UrlRewriteRules(std::move(table));
+        }), py::arg("rules"))
+        .def_static("for_provider", &UrlRewriteRules::for_provider, py::arg("provider"), py::return_value_policy::reference)
+        .def("rewrite", [](const UrlRewriteRules& rules, const std::string& value) -> std::optional<std::string> {
+            std::string result;
+            if (rules.rewrite(value, result)) {
+                return result;
+            }
+            return std::nullopt;
+        }, py::arg("value"))
+        .def("empty", &UrlRewriteRules::empty)
+        .def("rules", [](const UrlRewriteRules& rules) {
+            std::vector<std::pair<std::string, std::string>> table;
+            for (const auto& rule : rules.rules()) {
+                table.emplace_back(rule.pattern, rule.replacement);
+            }
+            return table;
+        });
+
+    py::class_<CaseCollisionChecker>(m, "CaseCollisionChecker")
+        .def_static("fold", [](const std::string& path) { return CaseCollisionChecker::fold(path); }, py::arg("path"));
+
+    py::class_<TPChecker>(m, "TPChecker")
+        .def(py::init<>())
+        .def("has_zip_format", &TPChecker::has_zip_format, py::arg("archive"), release_gil())
+        .def("has_top_level_single_dir", py::overload_cast<const std::string&>(&TPChecker::has_top_level_single_dir),
+            py::arg("archive"), release_gil())
+        .def("validate_xml", py::overload_cast<const std::string&, const std::string&>(&TPChecker::validate_xml),
+            py::arg("schemafile"), py::arg("example"), release_gil())
+        .def("validate_xml_streaming", &TPChecker::validate_xml_streaming, py::arg("schemafile"), py::arg("example"), release_gil())
+        .def("set_streaming_threshold", &TPChecker::set_streaming_threshold, py::arg("bytes"))
+        .def("has_meta_inf_folder", py::overload_cast<const std::string&, const std::string&>(&TPChecker::has_meta_inf_folder),
+            py::arg("archive"), py::arg("folder_name") = "META-INF", release_gil())
+        .def("has_taxonomy_package_xml", py::overload_cast<const std::string&, const std::string&>(&TPChecker::has_taxonomy_package_xml),
+            py::arg("archive"), py::arg("tp_file") = "taxonomyPackage.xml", release_gil())
+        .def("has_catalog_xml", py::overload_cast<const std::string&, const std::string&>(&TPChecker::has_catalog_xml),
+            py::arg("archive"), py::arg("catalog_file") = "catalog.xml", release_gil())
+        .def("check_rel_url_base_resolution", &TPChecker::check_rel_url_base_resolution,
+            py::arg("file"), py::arg("base_url"), release_gil())
+        .def("check_url_resolution", &TPChecker::check_url_resolution, py::arg("package_folder"), release_gil())
+        .def("check_case_sensitivity", &TPChecker::check_case_sensitivity, py::arg("archive"), release_gil());
+
+    // Same argument order as the Python fixer: (zip, destination).
+    py::class_<EBATaxonomyPackage>(m, "EBATaxonomyPackage")
+        .def(py::init<const std::string&, const std::string&>(), py::arg("full_path_to_zip"), py::arg("destination_folder"))
+        .def_property_readonly("full_path_to_zip", &EBATaxonomyPackage::get_full_path_to_zip)
+        .def_property_readonly("destination_folder", &EBATaxonomyPackage::get_destination_folder)
+        .def("convert_to_zip_archive", &EBATaxonomyPackage::convert_to_zip_archive, release_gil())
+        .def("fix_meta_inf_folder", &EBATaxonomyPackage::fix_meta_inf_folder, release_gil())
+        .def("fix_top_level_single_dir", &EBATaxonomyPackage::fix_top_level_single_dir, release_gil())
+        .def("restructure_folder", &EBATaxonomyPackage::restructure_folder, release_gil())
+        .def("fix_taxonomy_package_xml", &EBATaxonomyPackage::fix_taxonomy_package_xml, release_gil())
+        .def("fix_catalog_xml", &EBATaxonomyPackage::fix_catalog_xml, release_gil());
+
+    // Same argument order as the Python fixer: (zip, destination). Construction copies and extracts the package.
+    py::class_<EDINETTaxonomyPackage>(m, "EDINETTaxonomyPackage")
+        .def(py::init([](const std::string& full_path_to_zip, const std::string& destination_folder) {
+            py::gil_scoped_release release;
+            return std::make_unique<EDINETTaxonomyPackage>(destination_folder, full_path_to_zip);
+        }), py::arg("full_path_to_zip"), py::arg("destination_folder"))
+        .def_property_readonly("destination_folder", &EDINETTaxonomyPackage::get_destination_folder)
+        // The C++ method is a placeholder that would truncate full_path_to_zip, so it is not exposed.
+        .def("convert_to_zip_archive", [](const EDINETTaxonomyPackage&) {
+            PyErr_SetString(PyExc_NotImplementedError, "The EDINET fixer writes no zip yet");
+            throw py::error_already_set();
+        })
+        .def("fix_meta_inf_folder", &EDINETTaxonomyPackage::fix_meta_inf_folder, release_gil())
+        .def("fix_top_level_single_dir", &EDINETTaxonomyPackage::fix_top_level_single_dir, release_gil())
+        .def("restructure_folder", &EDINETTaxonomyPackage::restructure_folder, release_gil())
+        .def("fix_taxonomy_package_xml", py::overload_cast<>(&EDINETTaxonomyPackage::fix_taxonomy_package_xml), release_gil())
+        .def("fix_taxonomy_package_xml", py::overload_cast<const std::string&>(&EDINETTaxonomyPackage::fix_taxonomy_package_xml),
+            py::arg("source_folder"), release_gil())
+        .def("fix_catalog_xml", py::overload_cast<>(&EDINETTaxonomyPackage::fix_catalog_xml), release_gil())
+        .def("fix_catalog_xml", py::overload_cast<const std::string&>(&EDINETTaxonomyPackage::fix_catalog_xml),
+            py::arg("source_folder"), release_gil());
+
+    py::class_<CMFCLCITaxonomyPackage>(m, "CMFCLCITaxonomyPackage")
+        .def(py::init<const std::string&, const std::string&>(), py::arg("full_path_to_zip"), py::arg("destination_folder"))
+        .def("restructure_folder", &CMFCLCITaxonomyPackage::restructure_folder, release_gil())
+        .def("fix_meta_inf_folder", &CMFCLCITaxonomyPackage::fix_meta_inf_folder, release_gil())
+        .def("convert_to_zip_archive", &CMFCLCITaxonomyPackage::convert_to_zip_archive, release_gil())
+        .def("fix_top_level_single_dir", &CMFCLCITaxonomyPackage::fix_top_level_single_dir, release_gil())
+        .def("fix_taxonomy_package_xml", &CMFCLCITaxonomyPackage::fix_taxonomy_package_xml, py::arg("source_folder"), release_gil())
+        .def("fix_catalog_xml", &CMFCLCITaxonomyPackage::fix_catalog_xml, py::arg("source_folder"), release_gil())
+        .def("repackage", &CMFCLCITaxonomyPackage::repackage, py::arg("output_zip"), release_gil());
+
+    py::class_<CIPCTaxonomyPackage>(m, "CIPCTaxonomyPackage")
+        .def(py::init<const std::string&>(), py::arg("destination_folder"))
+        .def("restructureFolder", &CIPCTaxonomyPackage::restructureFolder, release_gil())
+        .def("restructureFiles", &CIPCTaxonomyPackage::restructureFiles, py::arg("files"), release_gil());
+
+    py::class_<PackageChecks>(m, "PackageChecks")
+        .def_readonly("zip_format", &PackageChecks::zip_format)
+        .def_readonly("top_level_single_dir", &PackageChecks::top_level_single_dir)
+        .def_readonly("meta_inf_folder", &PackageChecks::meta_inf_folder)
+        .def_readonly("catalog_xml", &PackageChecks::catalog_xml)
+        .def_readonly("taxonomy_package_xml", &PackageChecks::taxonomy_package_xml)
+        .def("conformant", &PackageChecks::conformant);
+
+    py::class_<PackageResult>(m, "PackageResult")
+        .def_readonly("provider", &PackageResult::provider)
+        .def_readonly("package", &PackageResult::package)
+        .def_readonly("destination", &PackageResult::destination)
+        .def_readonly("checks", &PackageResult::checks)
+        .def_readonly("fixed", &PackageResult::fixed)
+        .def_readonly("error", &PackageResult::error)
+        .def_readonly("seconds", &PackageResult::seconds)
+        .def("ok", &PackageResult::ok);
+
+    py::class_<PackageProcessor>(m, "PackageProcessor")
+        .def(py::init<>())
+        .def("check_package", &PackageProcessor::check_package, py::arg("package"), release_gil())
+        .def("fix_package", &PackageProcessor::fix_package,
+            py::arg("provider"), py::arg("package"), py::arg("destination_folder"), py::arg("checks"), release_gil())
+        .def("process_package", &PackageProcessor::process_package,
+            py::arg("provider"), py::arg("package"), py::arg("destination_folder"), release_gil());
+}
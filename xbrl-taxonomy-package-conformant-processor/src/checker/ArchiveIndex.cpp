@@ -0,0 +1,151 @@
+#include "../../includes/ArchiveIndex.hpp"
+#include "../../includes/MappedZipReader.hpp"
+#include <iostream>
+#include <memory>
+
+/**
+ * @brief Builds the index by reading the central directory of the archive once.
+ *
+ * The central directory is parsed in place from a memory mapping of the
+ * archive (see MappedZipReader); no entry content is read.
+ *
+ * @param archive The path to the .zip archive.
+ */
+ArchiveIndex::ArchiveIndex(const std::string& archive)
+    : archive_(archive), open_(false) {
+    std::unique_ptr<MappedZipReader> zip;
+    try {
+        zip = std::make_unique<MappedZipReader>(archive);
+    }
+    catch (const std::exception& e) {
+        std::cerr << "Error opening zip file: " << e.what() << std::endl;
+        return;
+    }
+    build(*zip);
+}
+
+/**
+ * @brief Builds the index from an archive that is already mapped.
+ *
+ * @param zip The mapped archive.
+ */
+ArchiveIndex::ArchiveIndex(const MappedZipReader& zip)
+    : archive_(zip.archive()), open_(false) {
+    build(zip);
+}
+
+/**
+ * @brief Indexes the central directory of a mapped archive.
+ *
+ * @param zip The mapped archive.
+ */
+void ArchiveIndex::build(const MappedZipReader& zip) {
+    const auto& zip_entries = zip.entries();
+    entries_.reserve(zip_entries.size());
+    files_.reserve(zip_entries.size());
+
+    for (const auto& zip_entry : zip_entries) {
+        Entry entry;
+        entry.name = std::string(zip_entry.name);
+        entry.size = zip_entry.size;
+        entry.comp_size = zip_entry.comp_size;
+        entry.crc = zip_entry.crc;
+        entry.comp_method = zip_entry.comp_method;
+        entry.is_dir = zip_entry.is_dir;
+
+        top_level_.insert(entry.name.substr(0, entry.name.find('/')));
+        add_parent_dirs(entry.name);
+
+        if (entry.is_dir) {
+            dirs_.insert(entry.name.substr(0, entry.name.size() - 1));
+        }
+        else {
+            files_.emplace(entry.name, entries_.size());
+        }
+        entries_.push_back(std::move(entry));
+    }
+
+    open_ = true;
+}
+
+/**
+ * @brief Registers all parent directories implied by an entry name.
+ *
+ * For "a/b/c.xml" the directories "a/b" and "a" are added. Parents are walked
+ * from the deepest one upwards and the walk stops at the first known parent,
+ * because all of its ancestors have been registered already.
+ *
+ * @param name The entry name.
+ */
+void ArchiveIndex::add_parent_dirs(const std::string& name) {
+    if (name.size() < 2) {
+        return;
+    }
+    std::size_t pos = name.rfind('/', name.size() - 2);
+    while (pos != std::string::npos && pos > 0) {
+        if (!dirs_.insert(name.substr(0, pos)).second) {
+            break;
+        }
+        pos = name.rfind('/', pos - 1);
+    }
+}
+
+bool ArchiveIndex::is_open() const {
+    return open_;
+}
+
+const std::string& ArchiveIndex::archive() const {
+    return archive_;
+}
+
+const std::vector<ArchiveIndex::Entry>& ArchiveIndex::entries() const {
+    return entries_;
+}
+
+const std::set<std::string>& ArchiveIndex::top_level_prefixes() const {
+    return top_level_;
+}
+
+const ArchiveIndex::Entry* ArchiveIndex::find(const std::string& path) const {
+    auto it = files_.find(path);
+    if (it != files_.end()) {
+        return &entries_[it->second];
+    }
+    return nullptr;
+}
+
+bool ArchiveIndex::contains_file(const std::string& path) const {
+    return files_.count(path) != 0;
+}
+
+bool ArchiveIndex::contains_dir(const std::string& path) const {
+    return dirs_.count(path) != 0;
+}
+
+/**
+ * @brief Check whether a file exists inside META-INF, either below a top-level directory or at the root.
+ *
+ * Only the top-level prefixes are probed, so the cost is proportional to the
+ * number of top-level names (one for a conformant package), not to the number of entries.
+ */
+bool ArchiveIndex::contains_meta_inf_file(const std::string& file_name, const std::string& meta_inf) const {
+    return !meta_inf_file(file_name, meta_inf).empty();
+}
+
+std::string ArchiveIndex::meta_inf_file(const std::string& file_name, const std::string& meta_inf) const {
+    const std::string root_file = meta_inf + "/" + file_name;
+    if (contains_file(root_file)) {
+        return root_file;
+    }
+    for (const auto& top_dir : top_level_) {
+        std::string path = top_dir + "/" + root_file;
+        if (contains_file(path)) {
+            return path;
+        }
+    }
+    return "";
+}
+
+std::size_t ArchiveIndex::size() const {
+    return entries_.size();
+}
@@ -0,0 +1,383 @@
+#include "../../includes/CaseCollisionChecker.hpp"
+#include "../../includes/CatalogResolver.hpp"
+#include "../../includes/Instrumentation.hpp"
+#include "../../includes/ReferenceScanner.hpp"
+#include "../../includes/ThreadPool.hpp"
+#include <algorithm>
+#include <future>
+#include <optional>
+#include <libxml/uri.h>
+
+namespace {
+
+    /**
+     * @brief Case-folded, decomposed form of U+00C0 to U+017F (second code point 0 if there is none).
+     *
+     * Generated with Python: unicodedata.normalize("NFD", chr(cp).casefold()).
+     */
+    constexpr char32_t LATIN_FOLD[][2] = {
+        { 0x061, 0x300 }, { 0x061, 0x301 }, { 0x061, 0x302 }, { 0x061, 0x303 }, { 0x061, 0x308 }, { 0x061, 0x30A },  // U+00C0
+        { 0x0E6, 0x000 }, { 0x063, 0x327 }, { 0x065, 0x300 }, { 0x065, 0x301 }, { 0x065, 0x302 }, { 0x065, 0x308 },  // U+00C6
+        { 0x069, 0x300 }, { 0x069, 0x301 }, { 0x069, 0x302 }, { 0x069, 0x308 }, { 0x0F0, 0x000 }, { 0x06E, 0x303 },  // U+00CC
+        { 0x06F, 0x300 }, { 0x06F, 0x301 }, { 0x06F, 0x302 }, { 0x06F, 0x303 }, { 0x06F, 0x308 }, { 0x0D7, 0x000 },  // U+00D2
+        { 0x0F8, 0x000 }, { 0x075, 0x300 }, { 0x075, 0x301 }, { 0x075, 0x302 }, { 0x075, 0x308 }, { 0x079, 0x301 },  // U+00D8
+        { 0x0FE, 0x000 }, { 0x073, 0x073 }, { 0x061, 0x300 }, { 0x061, 0x301 }, { 0x061, 0x302 }, { 0x061, 0x303 },  // U+00DE
+        { 0x061, 0x308 }, { 0x061, 0x30A }, { 0x0E6, 0x000 }, { 0x063, 0x327 }, { 0x065, 0x300 }, { 0x065, 0x301 },  // U+00E4
+        { 0x065, 0x302 }, { 0x065, 0x308 }, { 0x069, 0x300 }, { 0x069, 0x301 }, { 0x069, 0x302 }, { 0x069, 0x308 },  // U+00EA
+        { 0x0F0, 0x000 }, { 0x06E, 0x303 }, { 0x06F, 0x300 }, { 0x06F, 0x301 }, { 0x06F, 0x302 }, { 0x06F, 0x303 },  // U+00F0
+        { 0x06F, 0x308 }, { 0x0F7, 0x000 }, { 0x0F8, 0x000 }, { 0x075, 0x300 }, { 0x075, 0x301 }, { 0x075, 0x302 },  // U+00F6
+        { 0x075, 0x308 }, { 0x079, 0x301 }, { 0x0FE, 0x000 }, { 0x079, 0x308 }, { 0x061, 0x304 }, { 0x061, 0x304 },  // U+00FC
+        { 0x061, 0x306 }, { 0x061, 0x306 }, { 0x061, 0x328 }, { 0x061, 0x328 }, { 0x063, 0x301 }, { 0x063, 0x301 },  // U+0102
+        { 0x063, 0x302 }, { 0x063, 0x302 }, { 0x063, 0x307 }, { 0x063, 0x307 }, { 0x063, 0x30C }, { 0x063, 0x30C },  // U+0108
+        { 0x064, 0x30C }, { 0x064, 0x30C }, { 0x111, 0x000 }, { 0x111, 0x000 }, { 0x065, 0x304 }, { 0x065, 0x304 },  // U+010E
+        { 0x065, 0x306 }, { 0x065, 0x306 }, { 0x065, 0x307 }, { 0x065, 0x307 }, { 0x065, 0x328 }, { 0x065, 0x328 },  // U+0114
+        { 0x065, 0x30C }, { 0x065, 0x30C }, { 0x067, 0x302 }, { 0x067, 0x302 }, { 0x067, 0x306 }, { 0x067, 0x306 },  // U+011A
+        { 0x067, 0x307 }, { 0x067, 0x307 }, { 0x067, 0x327 }, { 0x067, 0x327 }, { 0x068, 0x302 }, { 0x068, 0x302 },  // U+0120
+        { 0x127, 0x000 }, { 0x127, 0x000 }, { 0x069, 0x303 }, { 0x069, 0x303 }, { 0x069, 0x304 }, { 0x069, 0x304 },  // U+0126
+        { 0x069, 0x306 }, { 0x069, 0x306 }, { 0x069, 0x328 }, { 0x069, 0x328 }, { 0x069, 0x307 }, { 0x131, 0x000 },  // U+012C
+        { 0x133, 0x000 }, { 0x133, 0x000 }, { 0x06A, 0x302 }, { 0x06A, 0x302 }, { 0x06B, 0x327 }, { 0x06B, 0x327 },  // U+0132
+        { 0x138, 0x000 }, { 0x06C, 0x301 }, { 0x06C, 0x301 }, { 0x06C, 0x327 }, { 0x06C, 0x327 }, { 0x06C, 0x30C },  // U+0138
+        { 0x06C, 0x30C }, { 0x140, 0x000 }, { 0x140, 0x000 }, { 0x142, 0x000 }, { 0x142, 0x000 }, { 0x06E, 0x301 },  // U+013E
+        { 0x06E, 0x301 }, { 0x06E, 0x327 }, { 0x06E, 0x327 }, { 0x06E, 0x30C }, { 0x06E, 0x30C }, { 0x2BC, 0x06E },  // U+0144
+        { 0x14B, 0x000 }, { 0x14B, 0x000 }, { 0x06F, 0x304 }, { 0x06F, 0x304 }, { 0x06F, 0x306 }, { 0x06F, 0x306 },  // U+014A
+        { 0x06F, 0x30B }, { 0x06F, 0x30B }, { 0x153, 0x000 }, { 0x153, 0x000 }, { 0x072, 0x301 }, { 0x072, 0x301 },  // U+0150
+        { 0x072, 0x327 }, { 0x072, 0x327 }, { 0x072, 0x30C }, { 0x072, 0x30C }, { 0x073, 0x301 }, { 0x073, 0x301 },  // U+0156
+        { 0x073, 0x302 }, { 0x073, 0x302 }, { 0x073, 0x327 }, { 0x073, 0x327 }, { 0x073, 0x30C }, { 0x073, 0x30C },  // U+015C
+        { 0x074, 0x327 }, { 0x074, 0x327 }, { 0x074, 0x30C }, { 0x074, 0x30C }, { 0x167, 0x000 }, { 0x167, 0x000 },  // U+0162
+        { 0x075, 0x303 }, { 0x075, 0x303 }, { 0x075, 0x304 }, { 0x075, 0x304 }, { 0x075, 0x306 }, { 0x075, 0x306 },  // U+0168
+        { 0x075, 0x30A }, { 0x075, 0x30A }, { 0x075, 0x30B }, { 0x075, 0x30B }, { 0x075, 0x328 }, { 0x075, 0x328 },  // U+016E
+        { 0x077, 0x302 }, { 0x077, 0x302 }, { 0x079, 0x302 }, { 0x079, 0x302 }, { 0x079, 0x308 }, { 0x07A, 0x301 },  // U+0174
+        { 0x07A, 0x301 }, { 0x07A, 0x307 }, { 0x07A, 0x307 }, { 0x07A, 0x30C }, { 0x07A, 0x30C }, { 0x073, 0x000 },  // U+017A
+    };
+
+    bool is_remote(const std::string& uri) {
+        return uri.rfind("http://", 0) == 0 || uri.rfind("https://", 0) == 0;
+    }
+
+    /**
+     * @brief Decodes the UTF-8 sequence at pos.
+     *
+     * @return The length of the sequence, or 0 if it is not valid UTF-8.
+     */
+    std::size_t decode_utf8(std::string_view text, std::size_t pos, char32_t& cp) {
+        const unsigned char lead = static_cast<unsigned char>(text[pos]);
+        std::size_t length;
+        if (lead >= 0xC2 && lead <= 0xDF) {
+            length = 2;
+            cp = lead & 0x1F;
+        }
+        else if (lead >= 0xE0 && lead <= 0xEF) {
+            length = 3;
+            cp = lead & 0x0F;
+        }
+        else if (lead >= 0xF0 && lead <= 0xF4) {
+            length = 4;
+            cp = lead & 0x07;
+        }
+        else {
+            return 0;
+        }
+        if (pos + length > text.size()) {
+            return 0;
+        }
+        for (std::size_t i = 1; i < length; ++i) {
+            const unsigned char next = static_cast<unsigned char>(text[pos + i]);
+            if ((next & 0xC0) != 0x80) {
+                return 0;
+            }
+            cp = (cp << 6) | (next & 0x3F);
+        }
+        // Overlong forms and surrogates.
+        if ((length == 3 && cp < 0x800) || (length == 4 && (cp < 0x10000 || cp > 0x10FFFF)) || (cp >= 0xD800 && cp <= 0xDFFF)) {
+            return 0;
+        }
+        return length;
+    }
+
+    void append_utf8(std::string& out, char32_t cp) {
+        if (cp < 0x80) {
+            out += static_cast<char>(cp);
+        }
+        else if (cp < 0x800) {
+            out += static_cast<char>(0xC0 | (cp >> 6));
+            out += static_cast<char>(0x80 | (cp & 0x3F));
+        }
+        else if (cp < 0x10000) {
+            out += static_cast<char>(0xE0 | (cp >> 12));
+            out += static_cast<char>(0x80 | ((cp >> 6) & 0x3F));
+            out += static_cast<char>(0x80 | (cp & 0x3F));
+        }
+        else {
+            out += static_cast<char>(0xF0 | (cp >> 18));
+            out += static_cast<char>(0x80 | ((cp >> 12) & 0x3F));
+            out += static_cast<char>(0x80 | ((cp >> 6) & 0x3F));
+            out += static_cast<char>(0x80 | (cp & 0x3F));
+        }
+    }
+
+    bool ends_with(std::string_view text, std::string_view suffix) {
+        return text.size() >= suffix.size() && text.compare(text.size() - suffix.size(), suffix.size(), suffix) == 0;
+    }
+
+    /**
+     * @brief Check whether an entry is the package catalog (META-INF/catalog.xml below the top-level directory or at the root).
+     */
+    bool is_catalog(std::string_view name) {
+        return ends_with(name, "META-INF/catalog.xml") && std::count(name.begin(), name.end(), '/') <= 2
+            && (name.size() == 20 || name[name.size() - 21] == '/');
+    }
+
+    /**
+     * @brief Check whether an entry is a schema or linkbase to scan (META-INF excluded).
+     */
+    bool is_document(std::string_view name) {
+        if (name.find("META-INF/") != std::string_view::npos) {
+            return false;
+        }
+        return ends_with(name, ".xsd") || ends_with(name, ".xml");
+    }
+
+    /**
+     * @brief Get the base URI of an entry: its path below a virtual root, URI-escaped.
+     */
+    std::string entry_uri(const std::string& name) {
+        std::string uri = "/";
+        xmlChar* escaped = xmlURIEscapeStr(BAD_CAST name.c_str(), BAD_CAST "/");
+        if (escaped != nullptr) {
+            uri += reinterpret_cast<const char*>(escaped);
+            xmlFree(escaped);
+        }
+        else {
+            uri += name;
+        }
+        return uri;
+    }
+
+}  // namespace
+
+/**
+ * @brief Constructor for CaseCollisionChecker.
+ */
+CaseCollisionChecker::CaseCollisionChecker(const MappedZipReader& archive, std::size_t num_threads)
+    : archive_(archive), num_threads_(num_threads == 0 ? ThreadPool::default_concurrency() : num_threads) {
+    Instrumentation::ScopedTimer timer("index_folded_paths");
+    const auto& entries = archive_.entries();
+    paths_.reserve(entries.size());
+    folded_.reserve(entries.size());
+
+    const MappedZipReader::Entry* catalog = nullptr;
+    for (const auto& entry : entries) {
+        std::string_view path = entry.name;
+        if (entry.is_dir) {
+            path.remove_suffix(1);
+        }
+        // Parents are walked upwards until one is known: its ancestors are then known, too.
+        while (!path.empty() && paths_.insert(path).second) {
+            folded_[fold(path)].push_back(path);
+            const std::size_t slash = path.rfind('/');
+            if (slash == std::string_view::npos) {
+                break;
+            }
+            path = path.substr(0, slash);
+        }
+        if (!entry.is_dir && is_catalog(entry.name)) {
+            catalog = &entry;
+        }
+    }
+
+    if (catalog != nullptr) {
+        std::string buffer;
+        xmlDocPtr doc = nullptr;
+        try {
+            doc = archive_.parse_xml(*catalog, buffer, XML_PARSE_NONET);
+        }
+        catch (const std::exception&) {
+            // A corrupt catalog leaves remote references unchecked.
+        }
+        if (doc != nullptr) {
+            catalog_ = std::make_unique<XmlCatalog>(entry_uri(std::string(catalog->name)), doc);
+            xmlFreeDoc(doc);
+        }
+    }
+}
+
+CaseCollisionChecker::~CaseCollisionChecker() = default;
+
+/**
+ * @brief Get the paths that collide when case is ignored.
+ */
+std::vector<CaseCollisionChecker::Collision> CaseCollisionChecker::collisions() const {
+    std::vector<Collision> collisions;
+    for (const auto& [folded, names] : folded_) {
+        if (names.size() < 2) {
+            continue;
+        }
+        Collision collision;
+        collision.folded = folded;
+        collision.names.assign(names.begin(), names.end());
+        std::sort(collision.names.begin(), collision.names.end());
+        collisions.push_back(std::move(collision));
+    }
+    std::sort(collisions.begin(), collisions.end(), [](const Collision& a, const Collision& b) {
+        return a.folded < b.folded;
+    });
+    return collisions;
+}
+
+/**
+ * @brief Checks the references of all .xsd and .xml entries (META-INF excluded) in parallel.
+ */
+std::vector<CaseCollisionChecker::CaseMismatch> CaseCollisionChecker::check_references() const {
+    Instrumentation::ScopedTimer timer("check_case_references");
+    std::vector<const MappedZipReader::Entry*> documents;
+    for (const auto& entry : archive_.entries()) {
+        if (!entry.is_dir && is_document(entry.name)) {
+            documents.push_back(&entry);
+        }
+    }
+    std::sort(documents.begin(), documents.end(), [](const MappedZipReader::Entry* a, const MappedZipReader::Entry* b) {
+        return a->name < b->name;
+    });
+
+    std::vector<CaseMismatch> mismatches;
+    ThreadPool pool(std::min(num_threads_, std::max<std::size_t>(documents.size(), 1)));
+    std::vector<std::future<std::vector<CaseMismatch>>> futures;
+    futures.reserve(documents.size());
+    for (const auto* entry : documents) {
+        futures.push_back(pool.submit([this, entry] { return check_entry(*entry); }));
+    }
+    for (auto& future : futures) {
+        std::vector<CaseMismatch> entry_mismatches = future.get();
+        mismatches.insert(mismatches.end(), std::make_move_iterator(entry_mismatches.begin()), std::make_move_iterator(entry_mismatches.end()));
+    }
+    return mismatches;
+}
+
+/**
+ * @brief Checks the references of one entry.
+ */
+std::vector<CaseCollisionChecker::CaseMismatch> CaseCollisionChecker::check_entry(const MappedZipReader::Entry& entry) const {
+    std::vector<CaseMismatch> mismatches;
+    std::string buffer;
+    std::string_view content;
+    try {
+        content = archive_.read(entry, buffer);
+    }
+    catch (const std::exception&) {
+        return mismatches;
+    }
+
+    const std::string file(entry.name);
+    // The locators of a linkbase mostly point to the same few schemas.
+    std::unordered_map<std::string, std::string> targets;
+    ReferenceScanner::scan_memory(content, entry_uri(file), [&](const ReferenceScanner::Reference& reference) {
+        if (reference.attribute == "xml:base") {
+            return true;
+        }
+        std::string relative = reference.value;
+        const std::size_t fragment = relative.find('#');
+        if (fragment != std::string::npos) {
+            relative.erase(fragment);
+        }
+        if (relative.empty()) {
+            return true;
+        }
+
+        std::string key;
+        key.reserve(reference.base.size() + relative.size() + 1);
+        key.append(reference.base).append(1, '\n').append(relative);
+        auto it = targets.find(key);
+        if (it == targets.end()) {
+            std::string target;
+            xmlChar* uri = xmlBuildURI(BAD_CAST relative.c_str(), BAD_CAST reference.base.c_str());
+            if (uri != nullptr) {
+                const std::string path = to_entry(reinterpret_cast<const char*>(uri));
+                xmlFree(uri);
+                if (!path.empty() && paths_.count(path) == 0) {
+                    auto folded = folded_.find(fold(path));
+                    if (folded != folded_.end()) {
+                        target = std::string(folded->second.front());
+                    }
+                }
+            }
+            it = targets.emplace(std::move(key), std::move(target)).first;
+        }
+        if (!it->second.empty()) {
+            mismatches.push_back({ file, reference.line, reference.attribute, reference.value, it->second });
+        }
+        return true;
+    });
+    Instrumentation::add(Instrumentation::Counter::DocumentsParsed);
+    return mismatches;
+}
+
+/**
+ * @brief Maps a resolved reference to an entry path, through the catalog for remote URLs.
+ */
+std::string CaseCollisionChecker::to_entry(const std::string& resolved) const {
+    std::string uri = resolved;
+    if (is_remote(uri)) {
+        std::optional<std::string> local = catalog_ ? catalog_->rewrite(uri) : std::nullopt;
+        if (!local) {
+            return "";
+        }
+        uri = *local;
+    }
+    if (uri.size() < 2 || uri[0] != '/') {
+        return "";
+    }
+
+    char* unescaped = xmlURIUnescapeString(uri.c_str() + 1, 0, nullptr);
+    if (unescaped == nullptr) {
+        return uri.substr(1);
+    }
+    std::string path(unescaped);
+    xmlFree(unescaped);
+    return path;
+}
+
+/**
+ * @brief Case-folds and normalizes a UTF-8 path.
+ */
+std::string CaseCollisionChecker::fold(std::string_view path) {
+    std::string folded;
+    folded.reserve(path.size());
+    std::size_t pos = 0;
+    while (pos < path.size()) {
+        const unsigned char c = static_cast<unsigned char>(path[pos]);
+        if (c < 0x80) {
+            folded += (c >= 'A' && c <= 'Z') ? static_cast<char>(c + ('a' - 'A')) : static_cast<char>(c);
+            ++pos;
+            continue;
+        }
+
+        char32_t cp = 0;
+        const std::size_t length = decode_utf8(path, pos, cp);
+        if (length == 0) {
+            folded += static_cast<char>(c);
+            ++pos;
+            continue;
+        }
+        pos += length;
+
+        if (cp >= 0xC0 && cp < 0x180) {
+            const char32_t* mapped = LATIN_FOLD[cp - 0xC0];
+            append_utf8(folded, mapped[0]);
+            if (mapped[1] != 0) {
+                append_utf8(folded, mapped[1]);
+            }
+            continue;
+        }
+        if ((cp >= 0x391 && cp <= 0x3A9 && cp != 0x3A2) || (cp >= 0x410 && cp <= 0x42F) || (cp >= 0xFF21 && cp <= 0xFF3A)) {
+            cp += 0x20;  // Greek, Cyrillic and full-width Latin capitals.
+        }
+        else if (cp >= 0x400 && cp <= 0x40F) {
+            cp += 0x50;
+        }
+        else if (cp == 0x3C2) {
+            cp = 0x3C3;  // Final sigma.
+        }
+        append_utf8(folded, cp);
+    }
+    return folded;
+}
@@ -0,0 +1,529 @@
+#include "../../includes/CatalogResolver.hpp"
+#include <algorithm>
+#include <filesystem>
+#include <fstream>
+#include <iostream>
+#include <sstream>
+#include <libxml/parserInternals.h>
+#include <libxml/tree.h>
+#include <libxml/uri.h>
+#ifdef _WIN32
+#define NOMINMAX
+#include <windows.h>
+#endif
+
+namespace fs = std::filesystem;
+
+namespace {
+
+    /**
+     * @brief Check whether a URI is an http or https URL.
+     */
+    bool is_remote(const std::string& uri) {
+        return uri.rfind("http://", 0) == 0 || uri.rfind("https://", 0) == 0;
+    }
+
+    /**
+     * @brief Get an attribute value of a node, or an empty string.
+     */
+    std::string get_attribute(xmlNodePtr node, const char* name) {
+        xmlChar* value = xmlGetProp(node, BAD_CAST name);
+        if (value == nullptr) {
+            return "";
+        }
+        std::string result(reinterpret_cast<const char*>(value));
+        xmlFree(value);
+        return result;
+    }
+
+    /**
+     * @brief Get the schemas folder next to the executable, where the build copies it.
+     *
+     * Falls back to "schemas" in the working directory, e.g. in the Python module.
+     */
+    std::string default_schema_store() {
+        fs::path executable;
+        std::error_code ec;
+#if defined(_WIN32)
+        std::wstring buffer(MAX_PATH, L'\0');
+        DWORD length;
+        while ((length = GetModuleFileNameW(nullptr, buffer.data(), static_cast<DWORD>(buffer.size()))) == buffer.size()) {
+            buffer.resize(buffer.size() * 2);
+        }
+        buffer.resize(length);
+        executable = buffer;
+#elif defined(__linux__)
+        executable = fs::read_symlink("/proc/self/exe", ec);
+#endif
+        if (!executable.empty()) {
+            const fs::path store = executable.parent_path() / "schemas";
+            if (fs::is_directory(store, ec)) {
+                return store.string();
+            }
+        }
+        return "schemas";
+    }
+
+    /**
+     * @brief Check whether a path is a folder or lies below it; both in the same notation.
+     */
+    bool is_below(const std::string& path, const std::string& folder) {
+        return !folder.empty() && path.compare(0, folder.size(), folder) == 0
+            && (path.size() == folder.size() || path[folder.size()] == '/' || path[folder.size()] == '\\'
+                || folder.back() == '/' || folder.back() == '\\');
+    }
+
+}  // namespace
+
+XmlCatalog::XmlCatalog(const std::string& catalog_file)
+    : catalog_file_(catalog_file), open_(false) {
+    xmlDocPtr doc = xmlReadFile(catalog_file.c_str(), nullptr, XML_PARSE_NONET);
+    if (doc == nullptr) {
+        return;
+    }
+    load(doc);
+    xmlFreeDoc(doc);
+}
+
+XmlCatalog::XmlCatalog(const std::string& catalog_file, xmlDocPtr doc)
+    : catalog_file_(catalog_file), open_(false) {
+    if (doc != nullptr) {
+        load(doc);
+    }
+}
+
+void XmlCatalog::load(xmlDocPtr doc) {
+    open_ = true;
+
+    fs::path base = fs::path(catalog_file_).parent_path();
+    xmlNodePtr root = xmlDocGetRootElement(doc);
+    if (root != nullptr) {
+        const std::string xml_base = get_attribute(root, "base");
+        if (!xml_base.empty() && !is_remote(xml_base)) {
+            base /= xml_base;
+        }
+        for (xmlNodePtr node = root->children; node != nullptr; node = node->next) {
+            if (node->type != XML_ELEMENT_NODE || xmlStrcmp(node->name, BAD_CAST "rewriteURI") != 0) {
+                continue;
+            }
+            RewriteRule rule;
+            rule.uri_start = get_attribute(node, "uriStartString");
+            const std::string prefix = get_attribute(node, "rewritePrefix");
+            if (rule.uri_start.empty()) {
+                continue;
+            }
+            rule.rewrite_prefix = (base / prefix).lexically_normal().generic_string();
+            if (!prefix.empty() && prefix.back() == '/' && rule.rewrite_prefix.back() != '/') {
+                rule.rewrite_prefix += '/';
+            }
+            rules_.push_back(rule);
+        }
+    }
+
+    // The longest matching uriStartString wins.
+    std::stable_sort(rules_.begin(), rules_.end(), [](const RewriteRule& a, const RewriteRule& b) {
+        return a.uri_start.size() > b.uri_start.size();
+    });
+}
+
+bool XmlCatalog::is_open() const {
+    return open_;
+}
+
+const std::string& XmlCatalog::catalog_file() const {
+    return catalog_file_;
+}
+
+const std::vector<XmlCatalog::RewriteRule>& XmlCatalog::rules() const {
+    return rules_;
+}
+
+std::optional<std::string> XmlCatalog::rewrite(const std::string& uri) const {
+    for (const auto& rule : rules_) {
+        if (uri.compare(0, rule.uri_start.size(), rule.uri_start) == 0) {
+            return rule.rewrite_prefix + uri.substr(rule.uri_start.size());
+        }
+    }
+    return std::nullopt;
+}
+
+xmlExternalEntityLoader CatalogResolver::default_loader_ = nullptr;
+thread_local const XmlCatalog* CatalogResolver::current_catalog_ = nullptr;
+
+CatalogResolver::Scope::Scope(CatalogPtr catalog)
+    : catalog_(std::move(catalog)), previous_(current_catalog_) {
+    current_catalog_ = catalog_.get();
+}
+
+CatalogResolver::Scope::~Scope() {
+    current_catalog_ = previous_;
+}
+
+/**
+ * @brief Get the singleton instance of the CatalogResolver.
+ */
+CatalogResolver& CatalogResolver::get_instance() {
+    static CatalogResolver instance;
+    return instance;
+}
+
+/**
+ * @brief CatalogResolver constructor.
+ *
+ * Runs once, from get_instance(), which C++ guarantees to be thread-safe.
+ */
+CatalogResolver::CatalogResolver()
+    : store_(default_schema_store()), allow_network_(false), documents_size_(0), documents_limit_(64 * 1024 * 1024) {
+    xmlInitParser();
+    default_loader_ = xmlGetExternalEntityLoader();
+    xmlSetExternalEntityLoader(&CatalogResolver::entity_loader);
+}
+
+/**
+ * @brief Get the modification time and size of a file.
+ */
+std::optional<CatalogResolver::FileStamp> CatalogResolver::stamp_of(const std::string& path) {
+    std::error_code ec;
+    FileStamp stamp;
+    stamp.mtime = fs::last_write_time(path, ec);
+    if (ec) {
+        return std::nullopt;
+    }
+    stamp.size = fs::file_size(path, ec);
+    if (ec) {
+        return std::nullopt;
+    }
+    return stamp;
+}
+
+/**
+ * @brief Load a catalog file, again only if the file changed.
+ */
+CatalogResolver::CatalogPtr CatalogResolver::load_catalog(const std::string& catalog_file) {
+    const std::optional<FileStamp> stamp = stamp_of(catalog_file);
+    {
+        std::shared_lock<std::shared_mutex> lock(mutex_);
+        auto it = catalogs_.find(catalog_file);
+        if (it != catalogs_.end() && stamp && it->second.stamp == *stamp) {
+            return it->second.catalog;
+        }
+    }
+
+    auto catalog = std::make_shared<const XmlCatalog>(catalog_file);
+    CatalogPtr result = catalog->is_open() ? catalog : nullptr;
+    if (!result) {
+        std::cerr << "Error parsing catalog " << catalog_file << std::endl;
+    }
+
+    std::unique_lock<std::shared_mutex> lock(mutex_);
+    auto it = catalogs_.find(catalog_file);
+    if (it != catalogs_.end()) {
+        // The catalog changed: so may every resolution made with it.
+        const std::string prefix = catalog_file + '\n';
+        for (auto resolved = resolved_.begin(); resolved != resolved_.end();) {
+            resolved = resolved->first.compare(0, prefix.size(), prefix) == 0 ? resolved_.erase(resolved) : std::next(resolved);
+        }
+    }
+    if (!stamp) {
+        if (it != catalogs_.end()) {
+            catalogs_.erase(it);
+        }
+        return result;
+    }
+    catalogs_[catalog_file] = { result, *stamp };
+    return result;
+}
+
+/**
+ * @brief Find the catalog of the package a file or folder belongs to.
+ */
+CatalogResolver::CatalogPtr CatalogResolver::catalog_for(const std::string& path) {
+    std::error_code ec;
+    fs::path folder = fs::absolute(path, ec).lexically_normal();
+    if (!fs::is_directory(folder, ec)) {
+        folder = folder.parent_path();
+    }
+
+    std::vector<std::string> visited;
+    std::string catalog_file;
+    for (; !folder.empty(); folder = folder.parent_path()) {
+        const std::string key = folder.string();
+        {
+            std::shared_lock<std::shared_mutex> lock(mutex_);
+            auto it = folder_catalogs_.find(key);
+            if (it != folder_catalogs_.end()) {
+                catalog_file = it->second;
+            }
+        }
+        // A memoized catalog that has been deleted since is looked up again.
+        if (!catalog_file.empty() && fs::is_regular_file(catalog_file, ec)) {
+            break;
+        }
+        catalog_file.clear();
+        visited.push_back(key);
+
+        const fs::path candidate = folder / "META-INF" / "catalog.xml";
+        if (fs::is_regular_file(candidate, ec)) {
+            catalog_file = candidate.string();
+            break;
+        }
+        if (folder == folder.root_path()) {
+            break;
+        }
+    }
+    if (catalog_file.empty()) {
+        return nullptr;
+    }
+
+    {
+        std::unique_lock<std::shared_mutex> lock(mutex_);
+        for (const auto& key : visited) {
+            folder_catalogs_[key] = catalog_file;
+        }
+    }
+    return load_catalog(catalog_file);
+}
+
+/**
+ * @brief Map a URI to a local file.
+ */
+std::string CatalogResolver::resolve(const std::string& uri, const XmlCatalog* catalog) const {
+    if (!is_remote(uri)) {
+        return uri;
+    }
+
+    const std::string key = (catalog ? catalog->catalog_file() : std::string()) + '\n' + uri;
+    {
+        std::shared_lock<std::shared_mutex> lock(mutex_);
+        auto it = resolved_.find(key);
+        if (it != resolved_.end()) {
+            return it->second;
+        }
+    }
+
+    std::string result = uri;
+    std::error_code ec;
+    std::optional<std::string> local = catalog ? catalog->rewrite(uri) : std::nullopt;
+    if (local && fs::is_regular_file(*local, ec)) {
+        result = *local;
+    }
+    else if ((local = resolve_in_store(uri))) {
+        result = *local;
+    }
+
+    std::unique_lock<std::shared_mutex> lock(mutex_);
+    if (resolved_.size() >= RESOLVED_LIMIT) {
+        resolved_.clear();
+    }
+    resolved_.emplace(key, result);
+    return result;
+}
+
+std::string CatalogResolver::resolve(const std::string& uri) const {
+    return resolve(uri, current_catalog_);
+}
+
+/**
+ * @brief Map a remote URI to its copy in the schema store.
+ */
+std::optional<std::string> CatalogResolver::resolve_in_store(const std::string& uri) const {
+    const std::size_t scheme_end = uri.find("://");
+    std::string relative = uri.substr(scheme_end + 3);
+    const std::size_t query = relative.find_first_of("?#");
+    if (query != std::string::npos) {
+        relative.erase(query);
+    }
+
+    // The path comes from a document, so "/.." or an absolute path must not leave the store.
+    const fs::path store = fs::path(schema_store()).lexically_normal();
+    const fs::path local = (store / relative).lexically_normal();
+    const fs::path inside = local.lexically_relative(store);
+    if (inside.empty() || *inside.begin() == "..") {
+        return std::nullopt;
+    }
+    std::error_code ec;
+    if (fs::is_regular_file(local, ec)) {
+        return local.string();
+    }
+    return std::nullopt;
+}
+
+/**
+ * @brief Get the content of a file from the document cache, reading it on first use or when it changed.
+ */
+std::shared_ptr<const std::string> CatalogResolver::load_document(const std::string& path) {
+    const std::optional<FileStamp> stamp = stamp_of(path);
+    {
+        std::lock_guard<std::mutex> lock(documents_mutex_);
+        auto it = document_slots_.find(path);
+        if (it != document_slots_.end()) {
+            if (stamp && it->second->stamp == *stamp) {
+                documents_.splice(documents_.begin(), documents_, it->second);
+                return it->second->content;
+            }
+            documents_size_ -= it->second->content->size();
+            documents_.erase(it->second);
+            document_slots_.erase(it);
+        }
+    }
+    if (!stamp) {
+        return nullptr;
+    }
+
+    // Read outside the lock; a concurrent first read of the same file is harmless.
+    std::ifstream file(path, std::ios::binary);
+    if (!file) {
+        return nullptr;
+    }
+    std::ostringstream buffer;
+    buffer << file.rdbuf();
+    auto content = std::make_shared<const std::string>(buffer.str());
+
+    std::lock_guard<std::mutex> lock(documents_mutex_);
+    if (document_slots_.find(path) == document_slots_.end()) {
+        documents_.push_front({ path, *stamp, content });
+        document_slots_[path] = documents_.begin();
+        documents_size_ += content->size();
+        evict_documents_locked();
+    }
+    return content;
+}
+
+/**
+ * @brief Evicts least recently used documents until the limit is respected.
+ */
+void CatalogResolver::evict_documents_locked() {
+    while (documents_size_ > documents_limit_ && !documents_.empty()) {
+        documents_size_ -= documents_.back().content->size();
+        document_slots_.erase(documents_.back().path);
+        documents_.pop_back();
+    }
+}
+
+void CatalogResolver::set_schema_store(const std::string& directory) {
+    std::unique_lock<std::shared_mutex> lock(mutex_);
+    store_ = directory;
+    resolved_.clear();
+}
+
+std::string CatalogResolver::schema_store() const {
+    std::shared_lock<std::shared_mutex> lock(mutex_);
+    return store_;
+}
+
+void CatalogResolver::set_allow_network(bool allow) {
+    std::unique_lock<std::shared_mutex> lock(mutex_);
+    allow_network_ = allow;
+}
+
+bool CatalogResolver::allow_network() const {
+    std::shared_lock<std::shared_mutex> lock(mutex_);
+    return allow_network_;
+}
+
+void CatalogResolver::set_document_cache_limit(std::size_t bytes) {
+    std::lock_guard<std::mutex> lock(documents_mutex_);
+    documents_limit_ = bytes;
+    evict_documents_locked();
+}
+
+std::size_t CatalogResolver::document_cache_size() const {
+    std::lock_guard<std::mutex> lock(documents_mutex_);
+    return documents_size_;
+}
+
+/**
+ * @brief Drop the memoized catalogs, resolutions and documents of the packages below a folder.
+ */
+void CatalogResolver::forget(const std::string& folder) {
+    std::error_code ec;
+    const fs::path absolute = fs::absolute(folder, ec).lexically_normal();
+    // Folders are memoized in native notation, rewritten URIs in generic notation.
+    const std::string native = absolute.string();
+    const std::string generic = absolute.generic_string();
+    auto below = [&](const std::string& path) {
+        return is_below(path, native) || is_below(path, generic);
+    };
+
+    {
+        std::unique_lock<std::shared_mutex> lock(mutex_);
+        for (auto it = folder_catalogs_.begin(); it != folder_catalogs_.end();) {
+            it = below(it->first) || below(it->second) ? folder_catalogs_.erase(it) : std::next(it);
+        }
+        for (auto it = catalogs_.begin(); it != catalogs_.end();) {
+            it = below(it->first) ? catalogs_.erase(it) : std::next(it);
+        }
+        for (auto it = resolved_.begin(); it != resolved_.end();) {
+            it = below(it->first) || below(it->second) ? resolved_.erase(it) : std::next(it);
+        }
+    }
+
+    std::lock_guard<std::mutex> lock(documents_mutex_);
+    for (auto it = documents_.begin(); it != documents_.end();) {
+        if (below(it->path)) {
+            documents_size_ -= it->content->size();
+            document_slots_.erase(it->path);
+            it = documents_.erase(it);
+        }
+        else {
+            ++it;
+        }
+    }
+}
+
+void CatalogResolver::clear() {
+    {
+        std::unique_lock<std::shared_mutex> lock(mutex_);
+        catalogs_.clear();
+        folder_catalogs_.clear();
+        resolved_.clear();
+    }
+    std::lock_guard<std::mutex> lock(documents_mutex_);
+    documents_.clear();
+    document_slots_.clear();
+    documents_size_ = 0;
+}
+
+/**
+ * @brief libxml2 external entity loader that serves remote URIs from local files.
+ *
+ * Mapped documents are parsed from the document cache. Local paths go to the
+ * previously installed loader; unmapped remote URIs only when network access
+ * is allowed.
+ */
+xmlParserInputPtr CatalogResolver::entity_loader(const char* url, const char* id, xmlParserCtxtPtr ctxt) {
+    if (url == nullptr || !is_remote(url)) {
+        return default_loader_ ? default_loader_(url, id, ctxt) : nullptr;
+    }
+
+    CatalogResolver& resolver = get_instance();
+    const std::string location = resolver.resolve(url);
+    if (location == url) {
+        if (resolver.allow_network() && default_loader_) {
+            return default_loader_(url, id, ctxt);
+        }
+        std::cerr << "Cannot resolve " << url << " offline (not in the package catalog or the schema store)" << std::endl;
+        return nullptr;
+    }
+
+    std::shared_ptr<const std::string> content = resolver.load_document(location);
+    if (!content) {
+        std::cerr << "Error reading " << location << " (resolved from " << url << ")" << std::endl;
+        return nullptr;
+    }
+    xmlParserInputBufferPtr buffer = xmlParserInputBufferCreateMem(content->data(), static_cast<int>(content->size()), XML_CHAR_ENCODING_NONE);
+    if (buffer == nullptr) {
+        return nullptr;
+    }
+    xmlParserInputPtr input = xmlNewIOInputStream(ctxt, buffer, XML_CHAR_ENCODING_NONE);
+    if (input == nullptr) {
+        xmlFreeParserInputBuffer(buffer);
+        return nullptr;
+    }
+    // Relative imports of the document resolve against its local path.
+    input->filename = reinterpret_cast<char*>(xmlCanonicPath(BAD_CAST location.c_str()));
+    if (ctxt != nullptr && ctxt->directory == nullptr) {
+        ctxt->directory = xmlParserGetDirectory(location.c_str());
+    }
+    return input;
+}
@@ -0,0 +1,352 @@
+#include "../../includes/DTSDiscovery.hpp"
+#include "../../includes/CatalogResolver.hpp"
+#include "../../includes/ThreadPool.hpp"
+#include <algorithm>
+#include <filesystem>
+#include <future>
+#include <unordered_set>
+#include <libxml/uri.h>
+
+namespace fs = std::filesystem;
+
+namespace {
+
+    const xmlChar* XSD_NS = BAD_CAST "http://www.w3.org/2001/XMLSchema";
+    const xmlChar* XLINK_NS = BAD_CAST "http://www.w3.org/1999/xlink";
+    const xmlChar* LINK_NS = BAD_CAST "http://www.xbrl.org/2003/linkbase";
+
+    /**
+     * @brief Check whether a node is an element of the given namespace.
+     */
+    bool in_namespace(xmlNodePtr node, const xmlChar* ns) {
+        return node->ns != nullptr && xmlStrEqual(node->ns->href, ns);
+    }
+
+    /**
+     * @brief Resolve a reference of a node to an absolute URI or file path, without fragment.
+     */
+    std::string resolve_reference(xmlDocPtr doc, xmlNodePtr node, const xmlChar* reference) {
+        std::string ref(reinterpret_cast<const char*>(reference));
+        const std::size_t fragment = ref.find('#');
+        if (fragment != std::string::npos) {
+            ref.erase(fragment);
+        }
+        if (ref.empty()) {
+            return "";  // Reference into the document itself.
+        }
+
+        xmlChar* base = xmlNodeGetBase(doc, node);
+        xmlChar* uri = xmlBuildURI(BAD_CAST ref.c_str(), base);
+        xmlFree(base);
+        if (uri == nullptr) {
+            return "";
+        }
+        std::string result(reinterpret_cast<const char*>(uri));
+        xmlFree(uri);
+
+        if (result.rfind("http://", 0) == 0 || result.rfind("https://", 0) == 0) {
+            return result;
+        }
+        if (result.rfind("file://", 0) == 0) {
+            result.erase(0, 7);
+        }
+        char* unescaped = xmlURIUnescapeString(result.c_str(), 0, nullptr);
+        if (unescaped != nullptr) {
+            result = unescaped;
+            xmlFree(unescaped);
+        }
+        return result;
+    }
+
+}  // namespace
+
+/**
+ * @brief Constructor for DTSDiscovery.
+ */
+DTSDiscovery::DTSDiscovery(DocumentCache& documents, std::size_t num_threads)
+    : documents_(documents), num_threads_(num_threads == 0 ? ThreadPool::default_concurrency() : num_threads) {}
+
+/**
+ * @brief Parses a document (through the cache) and collects its references.
+ */
+DTSDiscovery::Node DTSDiscovery::extract(const std::string& path) const {
+    Node node;
+    node.path = path;
+
+    DocumentCache::DocPtr doc = documents_.get(path);
+    if (!doc) {
+        return node;
+    }
+    node.parsed = true;
+
+    CatalogResolver& resolver = CatalogResolver::get_instance();
+    CatalogResolver::CatalogPtr catalog = resolver.catalog_for(path);
+    std::unordered_set<std::string> seen;
+
+    auto add_reference = [&](xmlNodePtr element, const xmlChar* reference, EdgeKind kind) {
+        std::string target = resolve_reference(doc.get(), element, reference);
+        if (target.empty()) {
+            return;
+        }
+        target = resolver.resolve(target, catalog.get());
+        if (target.rfind("http://", 0) == 0 || target.rfind("https://", 0) == 0) {
+            if (seen.insert(target).second) {
+                node.external.push_back(target);
+            }
+            return;
+        }
+        target = DocumentCache::key(target);
+        if (target != path && seen.insert(target).second) {
+            node.edges.push_back({ target, kind });
+        }
+    };
+
+    // Iterative pre-order walk over the elements.
+    xmlNodePtr element = xmlDocGetRootElement(doc.get());
+    while (element != nullptr) {
+        if (element->type == XML_ELEMENT_NODE) {
+            if (in_namespace(element, XSD_NS)
+                && (xmlStrEqual(element->name, BAD_CAST "import") || xmlStrEqual(element->name, BAD_CAST "include")
+                    || xmlStrEqual(element->name, BAD_CAST "redefine"))) {
+                xmlChar* location = xmlGetNoNsProp(element, BAD_CAST "schemaLocation");
+                if (location != nullptr) {
+                    add_reference(element, location, EdgeKind::Import);
+                    xmlFree(location);
+                }
+            }
+            else {
+                xmlChar* href = xmlGetNsProp(element, BAD_CAST "href", XLINK_NS);
+                if (href != nullptr) {
+                    const bool linkbase_ref = in_namespace(element, LINK_NS) && xmlStrEqual(element->name, BAD_CAST "linkbaseRef");
+                    add_reference(element, href, linkbase_ref ? EdgeKind::LinkbaseRef : EdgeKind::Href);
+                    xmlFree(href);
+                }
+            }
+        }
+
+        if (element->type == XML_ELEMENT_NODE && element->children != nullptr) {
+            element = element->children;
+            continue;
+        }
+        while (element != nullptr && element->next == nullptr) {
+            element = element->parent;
+            if (element == nullptr || element->type == XML_DOCUMENT_NODE) {
+                element = nullptr;
+            }
+        }
+        if (element != nullptr) {
+            element = element->next;
+        }
+    }
+    return node;
+}
+
+/**
+ * @brief Discover the DTS of a set of documents, adding them and everything they reference.
+ */
+void DTSDiscovery::discover(const std::vector<std::string>& seeds) {
+    std::vector<std::string> frontier;
+    std::unordered_set<std::string> queued;
+    for (const auto& seed : seeds) {
+        const std::string key = DocumentCache::key(seed);
+        if (nodes_.count(key) == 0 && queued.insert(key).second) {
+            frontier.push_back(key);
+        }
+    }
+
+    ThreadPool pool(num_threads_);
+    while (!frontier.empty()) {
+        // Parse one level in parallel; the graph itself is only touched on this thread.
+        std::vector<std::future<Node>> futures;
+        futures.reserve(frontier.size());
+        for (const auto& path : frontier) {
+            futures.push_back(pool.submit([this, path] { return extract(path); }));
+        }
+
+        std::vector<std::string> next;
+        for (auto& future : futures) {
+            Node node = future.get();
+            for (const auto& edge : node.edges) {
+                if (nodes_.count(edge.target) == 0 && queued.insert(edge.target).second) {
+                    next.push_back(edge.target);
+                }
+            }
+            order_.push_back(node.path);
+            nodes_.emplace(node.path, std::move(node));
+        }
+        frontier = std::move(next);
+    }
+}
+
+/**
+ * @brief Discover the DTS of all schemas and linkbases below a folder.
+ */
+void DTSDiscovery::discover_folder(const std::string& folder) {
+    std::vector<std::string> seeds;
+    for (const auto& entry : fs::recursive_directory_iterator(folder)) {
+        if (!entry.is_regular_file()) {
+            continue;
+        }
+        const fs::path& path = entry.path();
+        if (path.parent_path().filename() == "META-INF") {
+            continue;
+        }
+        if (path.extension() == ".xsd" || path.extension() == ".xml") {
+            seeds.push_back(path.string());
+        }
+    }
+    // Deterministic discovery order, independent of the file system.
+    std::sort(seeds.begin(), seeds.end());
+    discover(seeds);
+}
+
+const DTSDiscovery::Node* DTSDiscovery::node(const std::string& path) const {
+    auto it = nodes_.find(DocumentCache::key(path));
+    return it != nodes_.end() ? &it->second : nullptr;
+}
+
+/**
+ * @brief Get the DTS of an entry point: every document reachable from it, itself included.
+ */
+std::vector<std::string> DTSDiscovery::reachable(const std::string& entry_point) const {
+    const std::string start = DocumentCache::key(entry_point);
+    std::vector<std::string> result;
+    if (nodes_.count(start) == 0) {
+        return result;
+    }
+
+    std::unordered_set<std::string> visited{ start };
+    result.push_back(start);
+    for (std::size_t i = 0; i < result.size(); ++i) {
+        const Node& current = nodes_.at(result[i]);
+        for (const auto& edge : current.edges) {
+            if (nodes_.count(edge.target) != 0 && visited.insert(edge.target).second) {
+                result.push_back(edge.target);
+            }
+        }
+    }
+    return result;
+}
+
+/**
+ * @brief Get the entry points: schemas that no document outside their own DTS references.
+ */
+std::vector<std::string> DTSDiscovery::entry_points() const {
+    // Index the nodes, then run an iterative Tarjan over the reference graph.
+    const std::size_t count = order_.size();
+    std::unordered_map<std::string, std::size_t> index_of;
+    index_of.reserve(count);
+    for (std::size_t i = 0; i < count; ++i) {
+        index_of.emplace(order_[i], i);
+    }
+    std::vector<std::vector<std::size_t>> successors(count);
+    for (std::size_t i = 0; i < count; ++i) {
+        for (const auto& edge : nodes_.at(order_[i]).edges) {
+            auto it = index_of.find(edge.target);
+            if (it != index_of.end()) {
+                successors[i].push_back(it->second);
+            }
+        }
+    }
+
+    constexpr std::size_t unvisited = static_cast<std::size_t>(-1);
+    std::vector<std::size_t> index(count, unvisited), lowlink(count, 0), component(count, unvisited);
+    std::vector<bool> on_stack(count, false);
+    std::vector<std::size_t> stack;
+    std::size_t next_index = 0, components = 0;
+
+    for (std::size_t root = 0; root < count; ++root) {
+        if (index[root] != unvisited) {
+            continue;
+        }
+        std::vector<std::pair<std::size_t, std::size_t>> calls{ { root, 0 } };
+        index[root] = lowlink[root] = next_index++;
+        stack.push_back(root);
+        on_stack[root] = true;
+
+        while (!calls.empty()) {
+            auto& [v, child] = calls.back();
+            if (child < successors[v].size()) {
+                const std::size_t w = successors[v][child++];
+                if (index[w] == unvisited) {
+                    index[w] = lowlink[w] = next_index++;
+                    stack.push_back(w);
+                    on_stack[w] = true;
+                    calls.push_back({ w, 0 });
+                }
+                else if (on_stack[w]) {
+                    lowlink[v] = std::min(lowlink[v], index[w]);
+                }
+                continue;
+            }
+            if (lowlink[v] == index[v]) {
+                std::size_t w;
+                do {
+                    w = stack.back();
+                    stack.pop_back();
+                    on_stack[w] = false;
+                    component[w] = components;
+                } while (w != v);
+                ++components;
+            }
+            const std::size_t finished = v;
+            calls.pop_back();
+            if (!calls.empty()) {
+                lowlink[calls.back().first] = std::min(lowlink[calls.back().first], lowlink[finished]);
+            }
+        }
+    }
+
+    // A component is a root if no other component references it. Inside a
+    // root component, schemas imported by another member are not entry points.
+    std::vector<bool> referenced(components, false);
+    std::vector<bool> imported(count, false);
+    for (std::size_t v = 0; v < count; ++v) {
+        for (const auto& edge : nodes_.at(order_[v]).edges) {
+            auto it = index_of.find(edge.target);
+            if (it == index_of.end()) {
+                continue;
+            }
+            const std::size_t w = it->second;
+            if (component[w] != component[v]) {
+                referenced[component[w]] = true;
+            }
+            else if (edge.kind == EdgeKind::Import) {
+                imported[w] = true;
+            }
+        }
+    }
+
+    auto is_schema = [](const std::string& path) {
+        return fs::path(path).extension() == ".xsd";
+    };
+    std::vector<std::vector<std::size_t>> candidates(components);
+    for (std::size_t v = 0; v < count; ++v) {
+        if (!referenced[component[v]] && nodes_.at(order_[v]).parsed && is_schema(order_[v])) {
+            candidates[component[v]].push_back(v);
+        }
+    }
+
+    std::vector<std::string> result;
+    for (const auto& members : candidates) {
+        std::size_t added = 0;
+        for (std::size_t v : members) {
+            if (!imported[v]) {
+                result.push_back(order_[v]);
+                ++added;
+            }
+        }
+        if (added == 0) {
+            // Every schema of the cycle is imported by another one; all of them are roots.
+            for (std::size_t v : members) {
+                result.push_back(order_[v]);
+            }
+        }
+    }
+    std::sort(result.begin(), result.end());
+    return result;
+}
+
+std::size_t DTSDiscovery::size() const {
+    return nodes_.size();
+}
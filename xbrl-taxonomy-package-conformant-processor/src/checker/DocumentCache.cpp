@@ -0,0 +1,88 @@
+#include "../../includes/DocumentCache.hpp"
+#include "../../includes/CatalogResolver.hpp"
+#include <filesystem>
+#include <libxml/parser.h>
+
+namespace fs = std::filesystem;
+
+/**
+ * @brief Get the parsed document of a file, parsing it on first use.
+ */
+DocumentCache::DocPtr DocumentCache::get(const std::string& path) {
+    const std::string doc_key = key(path);
+    std::promise<DocPtr> promise;
+    std::shared_future<DocPtr> document;
+    bool owner = false;
+
+    {
+        std::lock_guard<std::mutex> lock(mutex_);
+        auto it = documents_.find(doc_key);
+        if (it != documents_.end()) {
+            document = it->second;
+        }
+        else {
+            document = promise.get_future().share();
+            documents_.emplace(doc_key, document);
+            ++parse_count_;
+            owner = true;
+        }
+    }
+
+    if (owner) {
+        // Parse outside the lock; other files can be parsed meanwhile.
+        promise.set_value(parse(doc_key));
+    }
+    return document.get();
+}
+
+/**
+ * @brief Parses a file under the catalog of its package.
+ */
+DocumentCache::DocPtr DocumentCache::parse(const std::string& path) {
+    std::error_code ec;
+    if (!fs::is_regular_file(path, ec)) {
+        return nullptr;  // Broken references are reported by the checks, not by the parser.
+    }
+    CatalogResolver& resolver = CatalogResolver::get_instance();
+    CatalogResolver::Scope scope(resolver.catalog_for(path));
+
+    xmlDocPtr doc = xmlReadFile(path.c_str(), nullptr, XML_PARSE_NONET);
+    if (doc == nullptr) {
+        return nullptr;
+    }
+    return DocPtr(doc, xmlFreeDoc);
+}
+
+bool DocumentCache::contains(const std::string& path) const {
+    std::lock_guard<std::mutex> lock(mutex_);
+    return documents_.count(key(path)) > 0;
+}
+
+void DocumentCache::invalidate(const std::string& path) {
+    std::lock_guard<std::mutex> lock(mutex_);
+    documents_.erase(key(path));
+}
+
+std::size_t DocumentCache::size() const {
+    std::lock_guard<std::mutex> lock(mutex_);
+    return documents_.size();
+}
+
+std::size_t DocumentCache::parse_count() const {
+    std::lock_guard<std::mutex> lock(mutex_);
+    return parse_count_;
+}
+
+void DocumentCache::clear() {
+    std::lock_guard<std::mutex> lock(mutex_);
+    documents_.clear();
+}
+
+/**
+ * @brief Get the key of a path: absolute, normalized, with '/' separators.
+ */
+std::string DocumentCache::key(const std::string& path) {
+    std::error_code ec;
+    fs::path absolute = fs::absolute(path, ec);
+    return (ec ? fs::path(path) : absolute).lexically_normal().generic_string();
+}
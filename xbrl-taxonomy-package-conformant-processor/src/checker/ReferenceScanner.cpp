@@ -0,0 +1,128 @@
+#include "../../includes/ReferenceScanner.hpp"
+#include "../../includes/CatalogResolver.hpp"
+#include <climits>
+#include <vector>
+#include <libxml/uri.h>
+#include <libxml/xmlreader.h>
+
+namespace {
+
+    const xmlChar* XLINK_NS = BAD_CAST "http://www.w3.org/1999/xlink";
+
+    /**
+     * @brief Copies a libxml2 string owned by the reader.
+     */
+    std::string to_string(const xmlChar* value) {
+        return value != nullptr ? reinterpret_cast<const char*>(value) : "";
+    }
+
+    /**
+     * @brief Resolves an xml:base value against the base of the parent element.
+     */
+    std::string resolve_base(const xmlChar* xml_base, const std::string& parent_base) {
+        xmlChar* uri = xmlBuildURI(xml_base, BAD_CAST parent_base.c_str());
+        if (uri == nullptr) {
+            return parent_base;
+        }
+        std::string result(reinterpret_cast<const char*>(uri));
+        xmlFree(uri);
+        return result;
+    }
+
+    /**
+     * @brief Reads a document to the end and reports its references; frees the reader.
+     */
+    bool scan_reader(xmlTextReaderPtr reader, const std::string& root_base, const ReferenceScanner::Callback& callback) {
+        // bases[d] is the base URI of the open element at depth d.
+        std::vector<std::string> bases;
+        int ret;
+        while ((ret = xmlTextReaderRead(reader)) == 1) {
+            if (xmlTextReaderNodeType(reader) != XML_READER_TYPE_ELEMENT) {
+                continue;
+            }
+
+            const int depth = xmlTextReaderDepth(reader);
+            const std::string parent_base = depth > 0 ? bases[depth - 1] : root_base;
+            bases.resize(static_cast<std::size_t>(depth) + 1);
+            xmlChar* xml_base = xmlTextReaderGetAttributeNs(reader, BAD_CAST "base", XML_XML_NAMESPACE);
+            if (xml_base != nullptr) {
+                bases[depth] = resolve_base(xml_base, parent_base);
+                xmlFree(xml_base);
+            }
+            else {
+                bases[depth] = parent_base;
+            }
+
+            if (xmlTextReaderHasAttributes(reader) != 1) {
+                continue;
+            }
+            ReferenceScanner::Reference reference;
+            reference.element = to_string(xmlTextReaderConstName(reader));
+            reference.line = static_cast<int>(xmlGetLineNo(xmlTextReaderCurrentNode(reader)));
+            // References on an element with xml:base resolve against that base,
+            // xml:base itself against the parent's.
+            const std::string element_base = bases[depth];
+
+            bool keep_going = true;
+            for (int more = xmlTextReaderMoveToFirstAttribute(reader); more == 1 && keep_going;
+                more = xmlTextReaderMoveToNextAttribute(reader)) {
+                const xmlChar* ns = xmlTextReaderConstNamespaceUri(reader);
+                const xmlChar* local = xmlTextReaderConstLocalName(reader);
+                if (ns != nullptr && xmlStrEqual(ns, XLINK_NS) && xmlStrEqual(local, BAD_CAST "href")) {
+                    reference.attribute = "xlink:href";
+                    reference.base = element_base;
+                }
+                else if (ns != nullptr && xmlStrEqual(ns, XML_XML_NAMESPACE) && xmlStrEqual(local, BAD_CAST "base")) {
+                    reference.attribute = "xml:base";
+                    reference.base = parent_base;
+                }
+                else if (ns == nullptr && xmlStrEqual(local, BAD_CAST "schemaLocation")) {
+                    reference.attribute = "schemaLocation";
+                    reference.base = element_base;
+                }
+                else {
+                    continue;
+                }
+                reference.value = to_string(xmlTextReaderConstValue(reader));
+                keep_going = callback(reference);
+            }
+            xmlTextReaderMoveToElement(reader);
+            if (!keep_going) {
+                xmlFreeTextReader(reader);
+                return true;
+            }
+        }
+
+        xmlFreeTextReader(reader);
+        return ret == 0;
+    }
+
+}  // namespace
+
+/**
+ * @brief Scans a document with an xmlTextReader, without building a DOM.
+ */
+bool ReferenceScanner::scan(const std::string& file, const Callback& callback, const std::string& document_base) {
+    CatalogResolver::Scope scope(CatalogResolver::get_instance().catalog_for(file));
+
+    xmlTextReaderPtr reader = xmlReaderForFile(file.c_str(), nullptr, XML_PARSE_NONET);
+    if (reader == nullptr) {
+        return false;
+    }
+    return scan_reader(reader, document_base.empty() ? file : document_base, callback);
+}
+
+/**
+ * @brief Scans a document held in memory, without building a DOM.
+ */
+bool ReferenceScanner::scan_memory(std::string_view content, const std::string& document_base, const Callback& callback) {
+    if (content.size() > static_cast<std::size_t>(INT_MAX)) {
+        return false;
+    }
+    xmlTextReaderPtr reader = xmlReaderForMemory(content.data(), static_cast<int>(content.size()),
+        document_base.c_str(), nullptr, XML_PARSE_NONET);
+    if (reader == nullptr) {
+        return false;
+    }
+    return scan_reader(reader, document_base, callback);
+}
@@ -0,0 +1,116 @@
+#include "../../includes/SchemaCache.hpp"
+#include "../../includes/CatalogResolver.hpp"
+#include <iostream>
+
+/**
+ * @brief Get the singleton instance of the SchemaCache.
+ */
+SchemaCache& SchemaCache::get_instance() {
+    static SchemaCache instance;
+    return instance;
+}
+
+/**
+ * @brief SchemaCache constructor.
+ *
+ * Runs once, from get_instance(), which C++ guarantees to be thread-safe.
+ */
+SchemaCache::SchemaCache()
+    : capacity_(32), next_id_(0) {
+    // Installs the offline entity loader before the first schema is parsed.
+    CatalogResolver::get_instance();
+}
+
+/**
+ * @brief Get the compiled schema for a schema location, compiling it on first use.
+ */
+SchemaCache::SchemaPtr SchemaCache::get(const std::string& requested_location) {
+    // Keyed by the local file, so the same URL mapped by two package catalogs gives two schemas.
+    const std::string schema_location = CatalogResolver::get_instance().resolve(requested_location);
+
+    std::promise<SchemaPtr> promise;
+    std::shared_future<SchemaPtr> schema;
+    bool owner = false;
+    std::uint64_t id = 0;
+
+    {
+        std::lock_guard<std::mutex> lock(mutex_);
+        auto it = slots_.find(schema_location);
+        if (it != slots_.end()) {
+            lru_.splice(lru_.begin(), lru_, it->second);
+            schema = it->second->schema;
+        }
+        else {
+            schema = promise.get_future().share();
+            id = next_id_++;
+            lru_.push_front({ schema_location, schema, id });
+            slots_[schema_location] = lru_.begin();
+            evict_locked();
+            owner = true;
+        }
+    }
+
+    if (owner) {
+        // Compile outside the lock so other schemas stay available meanwhile.
+        SchemaPtr compiled = compile(schema_location);
+        promise.set_value(compiled);
+        if (!compiled) {
+            // Do not cache failures, a later call may succeed (e.g. once the store is populated).
+            // The slot may have been evicted and replaced by a newer one meanwhile; keep that one.
+            std::lock_guard<std::mutex> lock(mutex_);
+            auto it = slots_.find(schema_location);
+            if (it != slots_.end() && it->second->id == id) {
+                lru_.erase(it->second);
+                slots_.erase(it);
+            }
+        }
+        return compiled;
+    }
+    return schema.get();
+}
+
+/**
+ * @brief Parses and compiles a schema.
+ */
+SchemaCache::SchemaPtr SchemaCache::compile(const std::string& schema_location) const {
+    xmlSchemaParserCtxtPtr schema_ctxt = xmlSchemaNewParserCtxt(schema_location.c_str());
+    if (schema_ctxt == nullptr) {
+        std::cerr << "Error creating schema parser for " << schema_location << std::endl;
+        return nullptr;
+    }
+    xmlSchemaPtr schema = xmlSchemaParse(schema_ctxt);
+    xmlSchemaFreeParserCtxt(schema_ctxt);
+
+    if (schema == nullptr) {
+        std::cerr << "Error parsing XML schema " << schema_location << std::endl;
+        return nullptr;
+    }
+    return SchemaPtr(schema, xmlSchemaFree);
+}
+
+/**
+ * @brief Evicts least recently used schemas until the capacity is respected.
+ */
+void SchemaCache::evict_locked() {
+    while (lru_.size() > capacity_) {
+        slots_.erase(lru_.back().location);
+        lru_.pop_back();
+    }
+}
+
+void SchemaCache::set_capacity(std::size_t capacity) {
+    std::lock_guard<std::mutex> lock(mutex_);
+    capacity_ = capacity > 0 ? capacity : 1;
+    evict_locked();
+}
+
+std::size_t SchemaCache::size() const {
+    std::lock_guard<std::mutex> lock(mutex_);
+    return lru_.size();
+}
+
+void SchemaCache::clear() {
+    std::lock_guard<std::mutex> lock(mutex_);
+    slots_.clear();
+    lru_.clear();
+}
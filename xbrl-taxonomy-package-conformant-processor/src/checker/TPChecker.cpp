@@ -1,147 +1,271 @@
+#include <algorithm>
+#include <climits>
 #include <iostream>
 #include <fstream>
 #include <string>
 #include <set>
-#include <zip.h>
 #include <libxml/parser.h>
 #include <libxml/tree.h>
+#include <libxml/xmlreader.h>
 #include <libxml/xmlschemas.h>
 #include <libxml/xpath.h>
 #include <boost/filesystem.hpp>
 #include <boost/algorithm/string.hpp>
 #include "../../includes/TPChecker.hpp"
+#include "../../includes/SchemaCache.hpp"
+#include "../../includes/CaseCollisionChecker.hpp"
+#include "../../includes/CatalogResolver.hpp"
+#include "../../includes/Instrumentation.hpp"
+#include "../../includes/UrlResolutionChecker.hpp"
 
-class TPChecker {
-public:
-    TPChecker() {}
+TPChecker::TPChecker() {}
 
-    bool has_zip_format(const std::string& archive) {
-        return boost::algorithm::iends_with(archive, ".zip");
+bool TPChecker::has_zip_format(const std::string& archive) {
+    return boost::algorithm::iends_with(archive, ".zip");
+}
+
+bool TPChecker::has_top_level_single_dir(const std::string& archive) {
+    return has_top_level_single_dir(ArchiveIndex(archive));
+}
+
+bool TPChecker::has_top_level_single_dir(const ArchiveIndex& index) {
+    if (!index.is_open()) {
+        return false;
     }
+    const auto& top_dirs = index.top_level_prefixes();
+    // A single top-level file (no '/' in its name) is not a directory.
+    return top_dirs.size() == 1 && index.contains_dir(*top_dirs.begin());
+}
 
-    bool has_top_level_single_dir(const std::string& archive) {
-        int err = 0;
-        zip* zip_file = zip_open(archive.c_str(), 0, &err);
-        if (zip_file == nullptr) {
-            std::cerr << "Error opening zip file: " << err << std::endl;
-            return false;
-        }
+bool TPChecker::validate_xml(const std::string& schemafile, const std::string& example) {
+    Instrumentation::ScopedTimer timer("validate_xml");
+    // Remote imports resolve through the catalog of the package the document belongs to.
+    CatalogResolver::Scope scope(CatalogResolver::get_instance().catalog_for(example));
 
-        std::set<std::string> top_dirs;
-        zip_int64_t num_files = zip_get_num_entries(zip_file, 0);
+    // Compiled once per process and shared; bundled spec schemas are read from the store.
+    SchemaCache::SchemaPtr schema = SchemaCache::get_instance().get(schemafile);
+    if (!schema) {
+        std::cerr << "Error parsing XML schema." << std::endl;
+        return false;
+    }
 
-        for (zip_int64_t i = 0; i < num_files; i++) {
-            const char* file_name = zip_get_name(zip_file, i, 0);
-            if (file_name) {
-                std::string top_dir = std::string(file_name).substr(0, std::string(file_name).find('/'));
-                top_dirs.insert(top_dir);
-            }
-        }
+    boost::system::error_code ec;
+    const boost::uintmax_t size = boost::filesystem::file_size(example, ec);
+    if (!ec && size >= streaming_threshold_) {
+        return validate_xml_streaming(schemafile, example);
+    }
 
-        zip_close(zip_file);
-        return top_dirs.size() == 1;
+    xmlDocPtr doc = xmlReadFile(example.c_str(), nullptr, 0);
+    if (doc == nullptr) {
+        std::cerr << "Error parsing XML document." << std::endl;
+        return false;
     }
+    Instrumentation::add(Instrumentation::Counter::DocumentsParsed);
+    Instrumentation::add(Instrumentation::Counter::BytesRead, ec ? 0 : size);
 
-    bool validate_xml(const std::string& schemafile, const std::string& example) {
-        xmlDocPtr doc = xmlReadFile(example.c_str(), nullptr, 0);
-        if (doc == nullptr) {
-            std::cerr << "Error parsing XML document." << std::endl;
-            return false;
-        }
+    xmlSchemaValidCtxtPtr valid_ctxt = xmlSchemaNewValidCtxt(schema.get());
+    int ret = xmlSchemaValidateDoc(valid_ctxt, doc);
+    xmlSchemaFreeValidCtxt(valid_ctxt);
+    xmlFreeDoc(doc);
+
+    if (ret != 0) {
+        std::cerr << "XML document is invalid." << std::endl;
+        return false;
+    }
+    return true;
+}
 
-        xmlSchemaParserCtxtPtr schema_ctxt = xmlSchemaNewParserCtxt(schemafile.c_str());
-        xmlSchemaPtr schema = xmlSchemaParse(schema_ctxt);
-        xmlSchemaValidCtxtPtr valid_ctxt = xmlSchemaNewValidCtxt(schema);
+bool TPChecker::validate_xml_streaming(const std::string& schemafile, const std::string& example) {
+    Instrumentation::ScopedTimer timer("validate_xml_streaming");
+    CatalogResolver::Scope scope(CatalogResolver::get_instance().catalog_for(example));
 
-        int ret = xmlSchemaValidateDoc(valid_ctxt, doc);
-        if (ret == 0) {
-            xmlSchemaFree(schema);
-            xmlSchemaFreeValidCtxt(valid_ctxt);
-            xmlFreeDoc(doc);
-            return true;
-        }
-        else {
-            std::cerr << "XML document is invalid." << std::endl;
-            xmlSchemaFree(schema);
-            xmlSchemaFreeValidCtxt(valid_ctxt);
-            xmlFreeDoc(doc);
-            return false;
-        }
+    SchemaCache::SchemaPtr schema = SchemaCache::get_instance().get(schemafile);
+    if (!schema) {
+        std::cerr << "Error parsing XML schema." << std::endl;
+        return false;
     }
 
-    bool has_meta_inf_folder(const std::string& archive, const std::string& folder_name = "META-INF") {
-        int err = 0;
-        zip* zip_file = zip_open(archive.c_str(), 0, &err);
-        if (zip_file == nullptr) {
-            std::cerr << "Error opening zip file: " << err << std::endl;
-            return false;
-        }
+    xmlTextReaderPtr reader = xmlReaderForFile(example.c_str(), nullptr, 0);
+    if (reader == nullptr) {
+        std::cerr << "Error parsing XML document." << std::endl;
+        return false;
+    }
+    // The compiled schema is only read; each reader gets its own validation context.
+    if (xmlTextReaderSetSchema(reader, schema.get()) != 0) {
+        xmlFreeTextReader(reader);
+        std::cerr << "Error attaching XML schema." << std::endl;
+        return false;
+    }
 
-        zip_int64_t num_files = zip_get_num_entries(zip_file, 0);
+    int ret;
+    while ((ret = xmlTextReaderRead(reader)) == 1) {
+    }
+    const bool valid = ret == 0 && xmlTextReaderIsValid(reader) == 1;
+    Instrumentation::add(Instrumentation::Counter::DocumentsParsed);
+    Instrumentation::add(Instrumentation::Counter::BytesRead, static_cast<std::uint64_t>(std::max(0L, xmlTextReaderByteConsumed(reader))));
+    xmlFreeTextReader(reader);
 
-        for (zip_int64_t i = 0; i < num_files; i++) {
-            const char* file_name = zip_get_name(zip_file, i, 0);
-            if (file_name && std::string(file_name).find(folder_name) != std::string::npos) {
-                zip_close(zip_file);
-                return true;
-            }
-        }
+    if (!valid) {
+        std::cerr << "XML document is invalid." << std::endl;
+        return false;
+    }
+    return true;
+}
 
-        zip_close(zip_file);
+bool TPChecker::validate_xml(const std::string& schemafile, const MappedZipReader& archive, const std::string& entry) {
+    Instrumentation::ScopedTimer timer("validate_xml_archive");
+    const MappedZipReader::Entry* zip_entry = archive.find(entry);
+    if (zip_entry == nullptr) {
+        std::cerr << "No entry " << entry << " in " << archive.archive() << std::endl;
         return false;
     }
 
-    bool has_taxonomy_package_xml(const std::string& archive, const std::string& tp_file = "taxonomyPackage.xml") {
-        int err = 0;
-        zip* zip_file = zip_open(archive.c_str(), 0, &err);
-        if (zip_file == nullptr) {
-            std::cerr << "Error opening zip file: " << err << std::endl;
-            return false;
-        }
+    SchemaCache::SchemaPtr schema = SchemaCache::get_instance().get(schemafile);
+    if (!schema) {
+        std::cerr << "Error parsing XML schema." << std::endl;
+        return false;
+    }
+
+    std::string buffer;
+    std::string_view content;
+    try {
+        content = archive.read(*zip_entry, buffer);
+    }
+    catch (const std::exception& e) {
+        std::cerr << e.what() << std::endl;
+        return false;
+    }
+    if (content.size() > static_cast<std::size_t>(INT_MAX)) {
+        std::cerr << "XML document is too large: " << entry << std::endl;
+        return false;
+    }
 
-        zip_int64_t num_files = zip_get_num_entries(zip_file, 0);
+    // The URL is the location the entry would have once extracted, for relative references.
+    const std::string url = archive.archive() + "/" + entry;
+    xmlTextReaderPtr reader = xmlReaderForMemory(content.data(), static_cast<int>(content.size()), url.c_str(), nullptr, 0);
+    if (reader == nullptr) {
+        std::cerr << "Error parsing XML document." << std::endl;
+        return false;
+    }
+    if (xmlTextReaderSetSchema(reader, schema.get()) != 0) {
+        xmlFreeTextReader(reader);
+        std::cerr << "Error attaching XML schema." << std::endl;
+        return false;
+    }
 
-        for (zip_int64_t i = 0; i < num_files; i++) {
-            const char* file_name = zip_get_name(zip_file, i, 0);
-            if (file_name && std::string(file_name).find(tp_file) != std::string::npos) {
-                zip_close(zip_file);
-                return true;
-            }
-        }
+    int ret;
+    while ((ret = xmlTextReaderRead(reader)) == 1) {
+    }
+    const bool valid = ret == 0 && xmlTextReaderIsValid(reader) == 1;
+    Instrumentation::add(Instrumentation::Counter::DocumentsParsed);
+    xmlFreeTextReader(reader);
 
-        zip_close(zip_file);
+    if (!valid) {
+        std::cerr << "XML document is invalid." << std::endl;
         return false;
     }
+    return true;
+}
 
-    bool check_rel_url_base_resolution(const std::string& file, const std::string& base_url) {
-        xmlDocPtr doc = xmlReadFile(file.c_str(), nullptr, 0);
-        if (doc == nullptr) {
-            std::cerr << "Error parsing XML document." << std::endl;
-            return false;
-        }
+void TPChecker::set_streaming_threshold(std::uintmax_t bytes) {
+    streaming_threshold_ = bytes;
+}
+
+bool TPChecker::has_meta_inf_folder(const std::string& archive, const std::string& folder_name) {
+    return has_meta_inf_folder(ArchiveIndex(archive), folder_name);
+}
 
-        xmlNode* root_element = xmlDocGetRootElement(doc);
-        resolve_xml_base(root_element, base_url);
-        xmlSaveFormatFileEnc("-", doc, "UTF-8", 1);
-        xmlFreeDoc(doc);
+bool TPChecker::has_meta_inf_folder(const ArchiveIndex& index, const std::string& folder_name) {
+    if (index.contains_dir(folder_name)) {
         return true;
     }
+    for (const auto& top_dir : index.top_level_prefixes()) {
+        if (index.contains_dir(top_dir + "/" + folder_name)) {
+            return true;
+        }
+    }
+    return false;
+}
+
+bool TPChecker::has_taxonomy_package_xml(const std::string& archive, const std::string& tp_file) {
+    return has_taxonomy_package_xml(ArchiveIndex(archive), tp_file);
+}
 
-    void resolve_xml_base(xmlNode* node, const std::string& base_url) {
-        xmlAttr* attr = node->properties;
-        while (attr) {
-            if (xmlStrcmp(attr->name, BAD_CAST "xlink:href") == 0 || xmlStrcmp(attr->name, BAD_CAST "xml:base") == 0) {
-                // Manual URI resolution
-                std::string resolved = base_url + "/" + reinterpret_cast<const char*>(attr->children->content);
-                xmlSetProp(node, attr->name, BAD_CAST resolved.c_str());
+bool TPChecker::has_taxonomy_package_xml(const ArchiveIndex& index, const std::string& tp_file) {
+    return index.contains_meta_inf_file(tp_file);
+}
+
+bool TPChecker::has_catalog_xml(const std::string& archive, const std::string& catalog_file) {
+    return has_catalog_xml(ArchiveIndex(archive), catalog_file);
+}
+
+bool TPChecker::has_catalog_xml(const ArchiveIndex& index, const std::string& catalog_file) {
+    return index.contains_meta_inf_file(catalog_file);
+}
+
+namespace {
+
+    /**
+     * @brief Prints broken references, one line each, and a summary.
+     */
+    bool report_broken_references(const std::vector<UrlResolutionChecker::BrokenReference>& broken) {
+        std::size_t unmapped = 0;
+        for (const auto& reference : broken) {
+            if (reference.problem == UrlResolutionChecker::Problem::Unmapped) {
+                ++unmapped;
             }
-            attr = attr->next;
+            std::cerr << reference.file << ":" << reference.line << ": " << UrlResolutionChecker::to_string(reference.problem)
+                << " " << reference.attribute << "=\"" << reference.value << "\" -> " << reference.resolved << std::endl;
         }
+        if (!broken.empty()) {
+            std::cerr << broken.size() << " broken reference(s), " << unmapped << " of them to unmapped remote URLs." << std::endl;
+        }
+        return broken.empty();
+    }
 
-        xmlNode* child = node->children;
-        while (child) {
-            resolve_xml_base(child, base_url);
-            child = child->next;
+    /**
+     * @brief Prints colliding paths and case-mismatched references, one line each, and a summary.
+     */
+    bool report_case_problems(const std::vector<CaseCollisionChecker::Collision>& collisions,
+        const std::vector<CaseCollisionChecker::CaseMismatch>& mismatches) {
+        for (const auto& collision : collisions) {
+            std::cerr << "case collision:";
+            for (const auto& name : collision.names) {
+                std::cerr << " " << name;
+            }
+            std::cerr << std::endl;
+        }
+        for (const auto& mismatch : mismatches) {
+            std::cerr << mismatch.file << ":" << mismatch.line << ": case mismatch " << mismatch.attribute
+                << "=\"" << mismatch.value << "\" -> " << mismatch.target << std::endl;
         }
+        if (!collisions.empty() || !mismatches.empty()) {
+            std::cerr << collisions.size() << " case collision(s), " << mismatches.size()
+                << " reference(s) that only resolve when case is ignored." << std::endl;
+        }
+        return collisions.empty() && mismatches.empty();
+    }
+
+}  // namespace
+
+bool TPChecker::check_rel_url_base_resolution(const std::string& file, const std::string& base_url) {
+    UrlResolutionChecker checker(boost::filesystem::path(file).parent_path().string(), 1);
+    return report_broken_references(checker.check_file(file, base_url));
+}
+
+bool TPChecker::check_url_resolution(const std::string& package_folder) {
+    UrlResolutionChecker checker(package_folder);
+    return report_broken_references(checker.check());
+}
+
+bool TPChecker::check_case_sensitivity(const std::string& archive) {
+    try {
+        MappedZipReader zip(archive);
+        CaseCollisionChecker checker(zip);
+        return report_case_problems(checker.collisions(), checker.check_references());
+    }
+    catch (const std::exception& e) {
+        std::cerr << "Error: " << e.what() << std::endl;
+        return false;
     }
-};
+}
@@ -0,0 +1,11 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""TPChecker.py
+
+Re-exports the C++ TPChecker from the native xbrl_tp module (build with -DBUILD_PYTHON_MODULE=ON).
+"""
+
+from xbrl_tp import TPChecker
+
+__all__ = ["TPChecker"]
@@ -0,0 +1,213 @@
+#include "../../includes/UrlResolutionChecker.hpp"
+#include "../../includes/CatalogResolver.hpp"
+#include "../../includes/DocumentCache.hpp"
+#include "../../includes/Instrumentation.hpp"
+#include "../../includes/ReferenceScanner.hpp"
+#include "../../includes/ThreadPool.hpp"
+#include <algorithm>
+#include <filesystem>
+#include <future>
+#include <optional>
+#include <libxml/uri.h>
+
+namespace fs = std::filesystem;
+
+namespace {
+
+    bool is_remote(const std::string& uri) {
+        return uri.rfind("http://", 0) == 0 || uri.rfind("https://", 0) == 0;
+    }
+
+    /**
+     * @brief Turns a resolved local URI into a file path.
+     */
+    std::string to_path(std::string uri) {
+        if (uri.rfind("file://", 0) == 0) {
+            uri.erase(0, 7);
+        }
+        char* unescaped = xmlURIUnescapeString(uri.c_str(), 0, nullptr);
+        if (unescaped != nullptr) {
+            uri = unescaped;
+            xmlFree(unescaped);
+        }
+        return DocumentCache::key(uri);
+    }
+
+}  // namespace
+
+/**
+ * @brief Constructor for UrlResolutionChecker.
+ */
+UrlResolutionChecker::UrlResolutionChecker(const std::string& package_folder, std::size_t num_threads)
+    : package_folder_(DocumentCache::key(package_folder)),
+      num_threads_(num_threads == 0 ? ThreadPool::default_concurrency() : num_threads) {
+    for (const auto& entry : fs::recursive_directory_iterator(package_folder_)) {
+        if (entry.is_regular_file()) {
+            files_.insert(DocumentCache::key(entry.path().string()));
+        }
+    }
+}
+
+/**
+ * @brief Checks all .xsd and .xml documents of the package (META-INF excluded).
+ */
+std::vector<UrlResolutionChecker::BrokenReference> UrlResolutionChecker::check() {
+    std::vector<std::string> documents;
+    for (const auto& file : files_) {
+        const fs::path path(file);
+        if (path.parent_path().filename() == "META-INF") {
+            continue;
+        }
+        if (path.extension() == ".xsd" || path.extension() == ".xml") {
+            documents.push_back(file);
+        }
+    }
+    std::sort(documents.begin(), documents.end());
+    return check(documents);
+}
+
+/**
+ * @brief Checks the given documents in parallel.
+ */
+std::vector<UrlResolutionChecker::BrokenReference> UrlResolutionChecker::check(const std::vector<std::string>& files) {
+    Instrumentation::ScopedTimer timer("check_url_resolution");
+    std::vector<BrokenReference> broken;
+    ThreadPool pool(std::min(num_threads_, std::max<std::size_t>(files.size(), 1)));
+    std::vector<std::future<std::vector<BrokenReference>>> futures;
+    futures.reserve(files.size());
+    for (const auto& file : files) {
+        futures.push_back(pool.submit([this, file] { return check_file(file); }));
+    }
+    for (auto& future : futures) {
+        std::vector<BrokenReference> file_broken = future.get();
+        broken.insert(broken.end(), std::make_move_iterator(file_broken.begin()), std::make_move_iterator(file_broken.end()));
+    }
+    return broken;
+}
+
+/**
+ * @brief Checks one document.
+ */
+std::vector<UrlResolutionChecker::BrokenReference> UrlResolutionChecker::check_file(const std::string& file, const std::string& document_base) {
+    std::vector<BrokenReference> broken;
+    CatalogResolver& resolver = CatalogResolver::get_instance();
+    CatalogResolver::CatalogPtr catalog = resolver.catalog_for(file);
+
+    auto report = [&](const ReferenceScanner::Reference& reference, const std::string& resolved, Problem problem) {
+        broken.push_back({ file, reference.line, reference.attribute, reference.value, resolved, problem });
+    };
+
+    const bool parsed = ReferenceScanner::scan(file, [&](const ReferenceScanner::Reference& reference) {
+        std::string relative = reference.value;
+        const std::size_t fragment = relative.find('#');
+        if (fragment != std::string::npos) {
+            relative.erase(fragment);
+        }
+        if (relative.empty()) {
+            return true;  // Reference into the document itself.
+        }
+
+        const std::string resolved = resolve(reference.base, relative);
+        if (resolved.empty()) {
+            report(reference, relative, Problem::Invalid);
+            return true;
+        }
+        if (reference.attribute == "xml:base") {
+            return true;  // A base need not name an existing document.
+        }
+
+        if (is_remote(resolved)) {
+            // A catalog rewrite must point to a file of the package; otherwise the schema store may have it.
+            std::optional<std::string> local = catalog ? catalog->rewrite(resolved) : std::nullopt;
+            if (local) {
+                if (!exists(DocumentCache::key(*local))) {
+                    report(reference, *local, Problem::Missing);
+                }
+            }
+            else if (is_remote(resolver.resolve(resolved, catalog.get()))) {
+                report(reference, resolved, Problem::Unmapped);
+            }
+            return true;
+        }
+        const std::string path = to_path(resolved);
+        if (!exists(path)) {
+            report(reference, path, Problem::Missing);
+        }
+        return true;
+    }, document_base);
+
+    Instrumentation::add(Instrumentation::Counter::DocumentsParsed);
+    if (!parsed) {
+        broken.push_back({ file, 0, "", "", file, Problem::Invalid });
+    }
+    return broken;
+}
+
+/**
+ * @brief Resolves a reference against a base URI (RFC 3986), memoized.
+ */
+std::string UrlResolutionChecker::resolve(const std::string& base, const std::string& relative) {
+    std::string key;
+    key.reserve(base.size() + relative.size() + 1);
+    key.append(base).append(1, '\n').append(relative);
+    {
+        std::lock_guard<std::mutex> lock(mutex_);
+        auto it = resolved_.find(key);
+        if (it != resolved_.end()) {
+            ++memo_hits_;
+            return it->second;
+        }
+    }
+
+    std::string result;
+    xmlChar* uri = xmlBuildURI(BAD_CAST relative.c_str(), BAD_CAST base.c_str());
+    if (uri != nullptr) {
+        result = reinterpret_cast<const char*>(uri);
+        xmlFree(uri);
+    }
+
+    std::lock_guard<std::mutex> lock(mutex_);
+    resolved_.emplace(std::move(key), result);
+    return result;
+}
+
+/**
+ * @brief Check whether a local file exists, using the package index first.
+ */
+bool UrlResolutionChecker::exists(const std::string& path) {
+    if (files_.count(path) > 0) {
+        return true;
+    }
+    if (path.rfind(package_folder_ + "/", 0) == 0) {
+        return false;  // Inside the package, the index is complete.
+    }
+
+    {
+        std::lock_guard<std::mutex> lock(mutex_);
+        auto it = outside_.find(path);
+        if (it != outside_.end()) {
+            return it->second;
+        }
+    }
+    std::error_code ec;
+    const bool found = fs::is_regular_file(path, ec);
+    std::lock_guard<std::mutex> lock(mutex_);
+    outside_.emplace(path, found);
+    return found;
+}
+
+std::size_t UrlResolutionChecker::memo_hits() const {
+    std::lock_guard<std::mutex> lock(mutex_);
+    return memo_hits_;
+}
+
+std::string UrlResolutionChecker::to_string(Problem problem) {
+    switch (problem) {
+    case Problem::Missing:
+        return "missing";
+    case Problem::Unmapped:
+        return "unmapped";
+    default:
+        return "invalid";
+    }
+}
@@ -0,0 +1,4 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""__init__.py"""
@@ -1,4 +1,8 @@
 #include "../../includes/CIPCFixer.hpp"
+#include "../../includes/HrefRewriter.hpp"
+#include "../../includes/Instrumentation.hpp"
+#include "../../includes/Providers.hpp"
+#include "../../includes/utils.hpp"
 #include <iostream>
 #include <regex>
 #include <fstream>
@@ -56,112 +60,99 @@ std::vector<std::string> CIPCTaxonomyPackage::getFullPathToAllXMLFiles() const {
 }
 
 /**
- * @brief Helper method to replace substrings in an XML node attribute.
+ * @brief Removes the integrated IFRS taxonomy folder.
  *
- * @param affected_xml_file The affected XML file name.
- * @param start_idx Starting index for the substring.
- * @param end_idx Ending index for the substring.
- * @param substring1 First substring to find.
- * @param substring2 Second substring to find.
- * @param node XML node to modify.
- * @param attribute Attribute to modify.
- * @param replace_with1 Replacement string 1.
- * @param replace_with2 Replacement string 2.
- * @param doc XML document to write back.
+ * Deletes the folder containing 'def/ifrs' if found.
  */
-void CIPCTaxonomyPackage::replaceSubstringInPropertyValue(
-    const std::string& affected_xml_file,
-    int start_idx,
-    int end_idx,
-    const std::string& substring1,
-    const std::string& substring2,
-    pugi::xml_node& node,
-    const std::string& attribute,
-    const std::string& replace_with1,
-    const std::string& replace_with2,
-    pugi::xml_document& doc
-) const {
-    std::string attr_value = node.attribute(attribute.c_str()).value();
-    if (attr_value.substr(start_idx, end_idx) == substring1 &&
-        attr_value.find(substring2) != std::string::npos) {
-        std::string fixed_value = attr_value.replace(attr_value.find(replace_with1), replace_with1.length(), replace_with2);
-        node.attribute(attribute.c_str()).set_value(fixed_value.c_str());
-        doc.save_file(affected_xml_file.c_str());
+void CIPCTaxonomyPackage::removeIFRSTaxonomy() {
+    Instrumentation::ScopedTimer timer("CIPC.removeIFRSTaxonomy");
+    for (const auto& entry : fs::recursive_directory_iterator(destination_folder)) {
+        if (entry.is_directory() && entry.path().string().find("def/ifrs") != std::string::npos) {
+            fs::remove_all(entry.path());
+            break;
+        }
     }
 }
 
 /**
- * @brief Helper method to replace substrings in schema files.
+ * @brief Drops the integrated IFRS taxonomy folder from a package tree, before extraction.
  *
- * @param condition Condition to check for in schema files.
- * @param node XML node to modify.
- * @param attribute Attribute to modify.
- * @param replace_substr1 Substring to replace.
- * @param replace_substr2 Replacement string for replace_substr1.
- * @param doc XML document to write back.
+ * Same rule as removeIFRSTaxonomy(): the first folder whose path contains 'def/ifrs'.
  */
-void CIPCTaxonomyPackage::replaceSubstringInSchemaFile(
-    const std::string& condition,
-    pugi::xml_node& node,
-    const std::string& attribute,
-    const std::string& replace_substr1,
-    const std::string& replace_substr2,
-    pugi::xml_document& doc
-) const {
-    std::string attr_value = node.attribute(attribute.c_str()).value();
-    if (attr_value.find(condition) != std::string::npos) {
-        std::string fixed_value = attr_value.replace(attr_value.find(replace_substr1), replace_substr1.length(), replace_substr2);
-        node.attribute(attribute.c_str()).set_value(fixed_value.c_str());
-        doc.save_file(doc.c_str());
+std::size_t CIPCTaxonomyPackage::dropIFRSTaxonomy(VirtualPackage& package) {
+    Instrumentation::ScopedTimer timer("CIPC.dropIFRSTaxonomy");
+    for (const auto& entry : package.entries()) {
+        if (entry.is_dir && entry.path.find("def/ifrs") != std::string::npos) {
+            return package.remove(entry.path);
+        }
     }
+    return 0;
 }
 
 /**
- * @brief Removes the integrated IFRS taxonomy folder.
+ * @brief Fixes the taxonomy package by updating URLs and removing redundant taxonomy files.
+ */
+void CIPCTaxonomyPackage::restructureFolder() {
+    Instrumentation::ScopedTimer timer("CIPC.restructureFolder");
+    removeIFRSTaxonomy();
+
+    std::vector<std::string> files = getFullPathToAllXMLFiles();
+    std::vector<std::string> xsd_files = getFullPathOfAllXSDFiles();
+    files.insert(files.end(), xsd_files.begin(), xsd_files.end());
+    fixFiles(files);
+}
+
+/**
+ * @brief Applies the restructuring to the given files only.
  *
- * Deletes the folder containing 'def/ifrs' if found.
+ * The folder is not walked: the IFRS taxonomy must already have been dropped
+ * from the files, see dropIFRSTaxonomy().
+ *
+ * @param files Full paths of the (re-)extracted files.
  */
-void CIPCTaxonomyPackage::removeIFRSTaxonomy() {
-    for (const auto& entry : fs::recursive_directory_iterator(destination_folder)) {
-        if (entry.is_directory() && entry.path().string().find("def/ifrs") != std::string::npos) {
-            fs::remove_all(entry.path());
-            break;
+void CIPCTaxonomyPackage::restructureFiles(const std::vector<std::string>& files) {
+    Instrumentation::ScopedTimer timer("CIPC.restructureFiles");
+    std::vector<std::string> remaining;
+    for (const auto& file : files) {
+        if (fs::exists(file)) {
+            remaining.push_back(file);
         }
     }
+    fixFiles(remaining);
 }
 
 /**
- * @brief Fixes the taxonomy package by updating URLs and removing redundant taxonomy files.
+ * @brief Fixes the references to the integrated IFRS taxonomy in the given files.
+ *
+ * @param files Full paths of XML and XSD files.
  */
-void CIPCTaxonomyPackage::restructureFolder() {
-    removeIFRSTaxonomy();
-
-    // Example of fixing XML files
-    for (const auto& xml_f : getFullPathToAllXMLFiles()) {
-        pugi::xml_document doc;
-        doc.load_file(xml_f.c_str());
-        for (pugi::xml_node loc : doc.children("loc")) {
-            std::string href = loc.attribute("xlink:href").value();
-            // Example logic: Fix href if it matches certain patterns.
-            if (href.find("/def/ifrs/full_ifrs") != std::string::npos) {
-                replaceSubstringInPropertyValue(
-                    xml_f, 0, 8, "../../..", "/def/ifrs/full_ifrs", loc, "xlink:href",
-                    "../../../def/ifrs", "https://xbrl.ifrs.org/taxonomy/", doc);
-            }
+void CIPCTaxonomyPackage::fixFiles(const std::vector<std::string>& files) {
+    Instrumentation::ScopedTimer timer("CIPC.fixFiles");
+    std::vector<std::string> targets;
+    for (const auto& file : files) {
+        const fs::path path(file);
+        const std::string file_name = path.filename().string();
+        if (file_name.find("catalog") != std::string::npos || file_name.find("taxonomyPackage") != std::string::npos) {
+            continue;
+        }
+        if (path.extension() == ".xml" || path.extension() == ".xsd") {
+            targets.push_back(file);
         }
     }
 
-    // Example of fixing XSD files
-    for (const auto& xsd_f : getFullPathOfAllXSDFiles()) {
-        pugi::xml_document doc;
-        doc.load_file(xsd_f.c_str());
-        for (pugi::xml_node loc : doc.children("import")) {
-            std::string schema_loc = loc.attribute("schemaLocation").value();
-            if (schema_loc.find("../../def/ifrs/full_ifrs") != std::string::npos) {
-                replaceSubstringInSchemaFile(
-                    "../../def/ifrs/full_ifrs", loc, "schemaLocation",
-                    "../../def/ifrs/full_ifrs", "https://xbrl.ifrs.org/taxonomy/", doc);
-            }
+    // References into the removed IFRS folder now point to the published IFRS taxonomy.
+    HrefRewriter rewriter(UrlRewriteRules::for_provider(Provider::CIPC));
+
+    std::size_t total = 0, modified = 0;
+    for (const auto& result : rewriter.rewrite(targets)) {
+        if (!result.error.empty()) {
+            utils::print_color_msg("    " + result.file + ": " + result.error, "\033[31m");
+        }
+        else if (result.saved) {
+            utils::print_color_msg("    " + std::to_string(result.rewrites) + " reference(s) rewritten in " + result.file, "\033[33m");
+            total += result.rewrites;
+            ++modified;
         }
     }
+    utils::print_color_msg("    " + std::to_string(total) + " reference(s) rewritten in " + std::to_string(modified) + " file(s)", "\033[33m");
 }
@@ -1,4 +1,7 @@
 #include "../../includes/CMFCLCIFixer.hpp"
+#include "../../includes/Instrumentation.hpp"
+#include "../../includes/ZipRepackager.hpp"
+#include "../../includes/DTSDiscovery.hpp"
 #include <iostream>
 #include <fstream>
 #include <filesystem>
@@ -7,12 +10,13 @@
 #include <libxml/tree.h>
 #include <regex>
 #include <sstream>
+#include <boost/algorithm/string/replace.hpp>
 
 namespace fs = std::filesystem;
 
 void CMFCLCITaxonomyPackage::restructure_folder() {
     fs::path destination_path = fs::path(destination_folder);
-    fs::path output_file = destination_path / fs::path(fs::path(full_path_to_zip).filename().string().replace("input", "output"));
+    fs::path output_file = destination_path / boost::algorithm::replace_all_copy(fs::path(full_path_to_zip).filename().string(), "input", "output");
 
     if (fs::exists(output_file)) {
         fs::remove(output_file);
@@ -43,27 +47,15 @@ void CMFCLCITaxonomyPackage::fix_top_level_single_dir() {
 }
 
 std::vector<std::string> CMFCLCITaxonomyPackage::extract_entry_points(const std::string& source_folder) {
-    entry_points.clear();
-    std::regex ns_regex("http://www\\.w3\\.org/2001/XMLSchema");
-    for (const auto& taxonomy_schema : fs::recursive_directory_iterator(source_folder)) {
-        if (taxonomy_schema.path().extension() == ".xsd") {
-            // Load XML and check for entry points
-            xmlDocPtr doc = xmlReadFile(taxonomy_schema.path().string().c_str(), NULL, 0);
-            if (doc == NULL) {
-                continue;
-            }
-            xmlNodePtr root = xmlDocGetRootElement(doc);
-            // Check for entry points here (using XPath or manual traversal)
-            // Simplified: Assume we find the entry points based on some logic
-            std::string rel_entrypoint_path = taxonomy_schema.path().string();
-            entry_points.push_back(rel_entrypoint_path);
-            xmlFreeDoc(doc);
-        }
-    }
+    // Entry points are the schemas no other document of the package references.
+    DTSDiscovery dts(documents);
+    dts.discover_folder(source_folder);
+    entry_points = dts.entry_points();
     return entry_points;
 }
 
-void CMFCLCITaxonomyPackage::fix_taxonomy_package_xml(const std::string& source_folder) {
+xmlDocPtr CMFCLCITaxonomyPackage::build_taxonomy_package_xml(const std::string& source_folder) {
+    Instrumentation::ScopedTimer timer("CMFCLCI.build_taxonomy_package_xml");
     std::string tpVersion;
 
     std::smatch match;
@@ -89,6 +81,12 @@ void CMFCLCITaxonomyPackage::fix_taxonomy_package_xml(const std::string& source_
 
     // More XML element creation omitted for brevity...
 
+    return doc;
+}
+
+void CMFCLCITaxonomyPackage::fix_taxonomy_package_xml(const std::string& source_folder) {
+    xmlDocPtr doc = build_taxonomy_package_xml(source_folder);
+
     // Output XML to file
     fs::path output_file = fs::path(source_folder) / "META-INF" / "taxonomyPackage.xml";
     if (!fs::exists(output_file)) {
@@ -101,6 +99,32 @@ void CMFCLCITaxonomyPackage::fix_catalog_xml(const std::string& source_folder) {
     // Placeholder for catalog XML fixing logic
 }
 
+void CMFCLCITaxonomyPackage::repackage(const std::string& output_zip) {
+    Instrumentation::ScopedTimer timer("CMFCLCI.repackage");
+    const std::string top_level_dir = fs::path(full_path_to_zip).stem().string();
+
+    ZipRepackager repackager(full_path_to_zip);
+    repackager.set_top_level_dir(top_level_dir);
+    repackager.add_keep_rule("META-INF/");
+    repackager.add_move_rule("", "files/");
+
+    int err = 0;
+    zip_t* zip = zip_open(full_path_to_zip.c_str(), ZIP_RDONLY, &err);
+    bool has_taxonomy_package_xml = zip && zip_name_locate(zip, "META-INF/taxonomyPackage.xml", 0) >= 0;
+    if (zip) {
+        zip_close(zip);
+    }
+
+    if (!has_taxonomy_package_xml) {
+        xmlDocPtr doc = build_taxonomy_package_xml(full_path_to_zip);
+        repackager.inject_xml(top_level_dir + "/META-INF/taxonomyPackage.xml", doc);
+        xmlFreeDoc(doc);
+    }
+
+    fs::create_directories(fs::path(output_zip).parent_path());
+    repackager.write(output_zip);
+}
+
 void CMFCLCITaxonomyPackage::print_color_msg(const std::string& message, const std::string& color) {
     std::cout << color << message << "\033[0m" << std::endl; // Reset color
 }
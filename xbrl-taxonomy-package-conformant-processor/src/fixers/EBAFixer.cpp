@@ -2,11 +2,10 @@
 #include <iostream>
 
 /**
- * @brief Default constructor for EBATaxonomyPackage.
+ * @brief Constructor for EBATaxonomyPackage.
  */
-EBATaxonomyPackage::EBATaxonomyPackage() {
-    // Constructor implementation (if needed)
-}
+EBATaxonomyPackage::EBATaxonomyPackage(const std::string& full_path_to_zip, const std::string& destination_folder)
+    : full_path_to_zip(full_path_to_zip), destination_folder(destination_folder) {}
 
 void EBATaxonomyPackage::convert_to_zip_archive() {
     // Placeholder for converting to a zip archive
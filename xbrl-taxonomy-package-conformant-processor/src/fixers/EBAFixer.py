@@ -0,0 +1,11 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""EBAFixer.py
+
+Re-exports the C++ EBA fixer from the native xbrl_tp module (build with -DBUILD_PYTHON_MODULE=ON).
+"""
+
+from xbrl_tp import EBATaxonomyPackage
+
+__all__ = ["EBATaxonomyPackage"]
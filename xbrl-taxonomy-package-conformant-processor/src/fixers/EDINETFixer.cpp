@@ -1,4 +1,5 @@
 #include "../../includes/EDINETFixer.hpp"
+#include "../../includes/Instrumentation.hpp"
 #include <filesystem>
 #include <iostream>
 #include <sstream>
@@ -15,12 +16,30 @@
  * @param fullPathToZip The full path to the zip file.
  */
 EDINETTaxonomyPackage::EDINETTaxonomyPackage(const std::string& destinationFolder, const std::string& fullPathToZip)
-    : destination_folder(destinationFolder), full_path_to_zip(fullPathToZip) {}
+    : TPFixerInterface(fullPathToZip, destinationFolder) {}
+
+/**
+ * @brief Constructor for EDINETTaxonomyPackage that extracts only the given entries.
+ *
+ * @param destinationFolder The folder where the package will be processed.
+ * @param fullPathToZip The full path to the zip file.
+ * @param entries The entries to extract.
+ */
+EDINETTaxonomyPackage::EDINETTaxonomyPackage(const std::string& destinationFolder, const std::string& fullPathToZip, const std::set<std::string>& entries)
+    : TPFixerInterface(fullPathToZip, destinationFolder, entries) {}
+
+/**
+ * @brief Get the top-level package folder inside the destination folder.
+ */
+std::string EDINETTaxonomyPackage::package_folder() const {
+    return destination_folder + "/" + std::filesystem::path(full_path_to_zip).stem().string();
+}
 
 /**
  * @brief Converts the taxonomy package to a zip archive.
  */
 void EDINETTaxonomyPackage::convert_to_zip_archive() {
+    Instrumentation::ScopedTimer timer("EDINET.convert_to_zip_archive");
     // Use zlib to create a zip archive
     // Note: This is a simplified example. You'll need a proper ZIP library
     // for creating ZIP files. This function should use a library that
@@ -44,6 +63,7 @@ void EDINETTaxonomyPackage::convert_to_zip_archive() {
  * @brief Fixes the top-level single directory.
  */
 void EDINETTaxonomyPackage::fix_top_level_single_dir() {
+    Instrumentation::ScopedTimer timer("EDINET.fix_top_level_single_dir");
     std::string newDir = destination_folder + "/" + std::filesystem::path(full_path_to_zip).stem().string();
     std::filesystem::create_directory(newDir);
     print_color_msg("    Top level directory generated", "yellow");
@@ -53,6 +73,7 @@ void EDINETTaxonomyPackage::fix_top_level_single_dir() {
  * @brief Fixes the META-INF folder.
  */
 void EDINETTaxonomyPackage::fix_meta_inf_folder() {
+    Instrumentation::ScopedTimer timer("EDINET.fix_meta_inf_folder");
     std::filesystem::create_directory(destination_folder + "/META-INF");
     print_color_msg("    META-INF directory generated", "yellow");
 }
@@ -61,6 +82,7 @@ void EDINETTaxonomyPackage::fix_meta_inf_folder() {
  * @brief Restructures the folder.
  */
 void EDINETTaxonomyPackage::restructure_folder() {
+    Instrumentation::ScopedTimer timer("EDINET.restructure_folder");
     for (const auto& entry : std::filesystem::directory_iterator(destination_folder)) {
         if (entry.path().extension() == ".zip") {
             std::filesystem::remove(entry.path());
@@ -82,6 +104,7 @@ void EDINETTaxonomyPackage::restructure_folder() {
  * @param source_folder The source folder for the XML file.
  */
 void EDINETTaxonomyPackage::fix_taxonomy_package_xml(const std::string& source_folder) {
+    Instrumentation::ScopedTimer timer("EDINET.fix_taxonomy_package_xml");
     xmlDocPtr doc = xmlNewDoc(BAD_CAST "1.0");
     xmlNodePtr root_node = xmlNewNode(NULL, BAD_CAST "taxonomyPackage");
 
@@ -93,7 +116,7 @@ void EDINETTaxonomyPackage::fix_taxonomy_package_xml(const std::string& source_f
     xmlNodePtr commentNode = xmlNewComment(BAD_CAST "This file and its content has been generated and is not part of the original ZIP.");
     xmlAddChild(root_node, commentNode);
 
-    xmlAddChild(doc, root_node);
+    xmlDocSetRootElement(doc, root_node);
 
     // Add identifier
     xmlNodePtr identifierNode = xmlNewChild(root_node, NULL, BAD_CAST "identifier", BAD_CAST "full/official/path/to/the/package.zip");
@@ -121,12 +144,27 @@ void EDINETTaxonomyPackage::fix_taxonomy_package_xml(const std::string& source_f
     print_color_msg("    taxonomyPackage.xml file generated", "yellow");
 }
 
+/**
+ * @brief Fixes the taxonomy package XML file inside the top-level package folder.
+ */
+void EDINETTaxonomyPackage::fix_taxonomy_package_xml() {
+    fix_taxonomy_package_xml(package_folder());
+}
+
+/**
+ * @brief Fixes the catalog XML file inside the top-level package folder.
+ */
+void EDINETTaxonomyPackage::fix_catalog_xml() {
+    fix_catalog_xml(package_folder());
+}
+
 /**
  * @brief Fixes the catalog XML file.
  *
  * @param source_folder The source folder for the XML file.
  */
 void EDINETTaxonomyPackage::fix_catalog_xml(const std::string& source_folder) {
+    Instrumentation::ScopedTimer timer("EDINET.fix_catalog_xml");
     xmlDocPtr doc = xmlNewDoc(BAD_CAST "1.0");
     xmlNodePtr root_node = xmlNewNode(NULL, BAD_CAST "catalog");
 
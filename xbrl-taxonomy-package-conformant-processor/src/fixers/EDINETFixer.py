@@ -0,0 +1,11 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""EDINETFixer.py
+
+Re-exports the C++ EDINET fixer from the native xbrl_tp module (build with -DBUILD_PYTHON_MODULE=ON).
+"""
+
+from xbrl_tp import EDINETTaxonomyPackage
+
+__all__ = ["EDINETTaxonomyPackage"]
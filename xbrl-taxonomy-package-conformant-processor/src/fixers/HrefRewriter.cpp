@@ -0,0 +1,131 @@
+#include "../../includes/HrefRewriter.hpp"
+#include "../../includes/Instrumentation.hpp"
+#include "../../includes/ThreadPool.hpp"
+#include <algorithm>
+#include <cstring>
+#include <filesystem>
+#include <future>
+
+namespace fs = std::filesystem;
+
+namespace {
+
+    /**
+     * @brief Check whether an attribute holds a reference (xlink:href, schemaLocation, xml:base).
+     */
+    bool is_reference(const char* name) {
+        if (std::strcmp(name, "xml:base") == 0) {
+            return true;
+        }
+        const char* colon = std::strrchr(name, ':');
+        const char* local = colon != nullptr ? colon + 1 : name;
+        return std::strcmp(local, "href") == 0 || std::strcmp(local, "schemaLocation") == 0;
+    }
+
+}  // namespace
+
+/**
+ * @brief Constructor for HrefRewriter.
+ */
+HrefRewriter::HrefRewriter(const UrlRewriteRules& rules, std::size_t num_threads)
+    : rules_(rules), num_threads_(num_threads == 0 ? ThreadPool::default_concurrency() : num_threads) {}
+
+/**
+ * @brief Rewrite a set of documents in parallel.
+ */
+std::vector<HrefRewriter::Result> HrefRewriter::rewrite(const std::vector<std::string>& files) const {
+    Instrumentation::ScopedTimer timer("rewrite_hrefs");
+    std::vector<Result> results;
+    results.reserve(files.size());
+    if (files.size() <= 1 || num_threads_ <= 1) {
+        for (const auto& file : files) {
+            results.push_back(rewrite_file(file));
+        }
+        return results;
+    }
+
+    ThreadPool pool(std::min(num_threads_, files.size()));
+    std::vector<std::future<Result>> futures;
+    futures.reserve(files.size());
+    for (const auto& file : files) {
+        futures.push_back(pool.submit([this, file] { return rewrite_file(file); }));
+    }
+    for (auto& future : futures) {
+        results.push_back(future.get());
+    }
+    return results;
+}
+
+/**
+ * @brief Rewrite a single document: load once, apply all rules, save once.
+ */
+HrefRewriter::Result HrefRewriter::rewrite_file(const std::string& file) const {
+    Result result;
+    result.file = file;
+    if (rules_.empty()) {
+        return result;
+    }
+
+    pugi::xml_document doc;
+    pugi::xml_parse_result parsed = doc.load_file(file.c_str());
+    if (!parsed) {
+        result.error = parsed.description();
+        return result;
+    }
+
+    Instrumentation::add(Instrumentation::Counter::DocumentsParsed);
+    result.rewrites = apply(doc);
+    Instrumentation::add(Instrumentation::Counter::HrefsRewritten, result.rewrites);
+    if (result.rewrites == 0) {
+        return result;
+    }
+
+    // Replace by rename: the original may be a hard link into the content store.
+    const std::string temp_file = file + ".tmp";
+    if (!doc.save_file(temp_file.c_str())) {
+        result.error = "Failed to write " + temp_file;
+        return result;
+    }
+    std::error_code ec;
+    fs::rename(temp_file, file, ec);
+    if (ec) {
+        fs::remove(temp_file, ec);
+        result.error = "Failed to replace " + file;
+        return result;
+    }
+    result.saved = true;
+    return result;
+}
+
+/**
+ * @brief Applies the rules to all elements of a document.
+ */
+std::size_t HrefRewriter::apply(pugi::xml_document& doc) const {
+    std::size_t rewrites = 0;
+    std::string rewritten;
+
+    // Iterative pre-order walk over the elements.
+    pugi::xml_node node = doc.first_child();
+    while (node) {
+        if (node.type() == pugi::node_element) {
+            for (pugi::xml_attribute attribute = node.first_attribute(); attribute; attribute = attribute.next_attribute()) {
+                if (is_reference(attribute.name()) && rules_.rewrite(attribute.value(), rewritten)) {
+                    attribute.set_value(rewritten.c_str());
+                    ++rewrites;
+                }
+            }
+        }
+
+        if (node.first_child()) {
+            node = node.first_child();
+            continue;
+        }
+        while (node && !node.next_sibling()) {
+            node = node.parent();
+        }
+        if (node) {
+            node = node.next_sibling();
+        }
+    }
+    return rewrites;
+}
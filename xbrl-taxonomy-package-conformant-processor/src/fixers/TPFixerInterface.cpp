@@ -1,5 +1,7 @@
 #include "../../includes/TPFixerInterface.hpp"
 #include "../../includes/utils.hpp"
+#include "../../includes/ContentStore.hpp"
+#include "../../includes/Instrumentation.hpp"
 
 /**
  * @brief Constructor for TaxonomyPackageFixerInterface.
@@ -14,16 +16,29 @@ TPFixerInterface::TPFixerInterface(const std::string& full_path_to_zip, const st
     std::filesystem::create_directories(destination_folder);
 
     // Move the taxonomy package to the destination folder
-    std::filesystem::copy(full_path_to_zip, destination_folder, std::filesystem::copy_options::overwrite_existing);
+    {
+        Instrumentation::ScopedTimer timer("copy_package");
+        std::filesystem::copy(full_path_to_zip, destination_folder, std::filesystem::copy_options::overwrite_existing);
+        std::error_code ec;
+        const std::uintmax_t size = std::filesystem::file_size(full_path_to_zip, ec);
+        Instrumentation::add(Instrumentation::Counter::BytesRead, ec ? 0 : size);
+        Instrumentation::add(Instrumentation::Counter::BytesWritten, ec ? 0 : size);
+    }
 
     // Extract the ZIP file at the destination
     try {
         int err = 0;
-        zip_t* zip = zip_open(full_path_to_zip.c_str(), 0, &err);
+        zip_t* zip = zip_open(full_path_to_zip.c_str(), ZIP_RDONLY, &err);
 
         if (zip) {
-            utils::zip_dir_extractor(zip, destination_folder);
             zip_close(zip);
+            ContentStore& store = ContentStore::get_instance();
+            if (store.is_enabled()) {
+                store.extract(full_path_to_zip, destination_folder);
+            }
+            else {
+                utils::zip_dir_extractor(full_path_to_zip, destination_folder);
+            }
             std::cout << "Extracted " << full_path_to_zip << " to " << destination_folder << std::endl;
         }
         else {
@@ -37,3 +52,33 @@ TPFixerInterface::TPFixerInterface(const std::string& full_path_to_zip, const st
         std::cerr << "An error occurred: " << e.what() << std::endl;
     }
 }
+
+/**
+ * @brief Constructor for TaxonomyPackageFixerInterface that extracts only some entries.
+ *
+ * @param full_path_to_zip The full path to the ZIP file of the taxonomy package.
+ * @param destination_folder The folder where the entries will be extracted.
+ * @param entries Names of the entries to extract.
+ */
+TPFixerInterface::TPFixerInterface(const std::string& full_path_to_zip, const std::string& destination_folder, const std::set<std::string>& entries)
+    : full_path_to_zip(full_path_to_zip), destination_folder(destination_folder) {
+
+    std::filesystem::create_directories(destination_folder);
+
+    try {
+        ContentStore& store = ContentStore::get_instance();
+        if (store.is_enabled()) {
+            store.extract(full_path_to_zip, destination_folder, entries);
+        }
+        else {
+            utils::zip_dir_extractor(full_path_to_zip, destination_folder, entries);
+        }
+        std::cout << "Extracted " << entries.size() << " entries of " << full_path_to_zip << " to " << destination_folder << std::endl;
+    }
+    catch (const std::filesystem::filesystem_error& e) {
+        std::cerr << "Error: " << e.what() << std::endl;
+    }
+    catch (const std::exception& e) {
+        std::cerr << "An error occurred: " << e.what() << std::endl;
+    }
+}
@@ -0,0 +1,183 @@
+#include "../../includes/UrlRewriteRules.hpp"
+#include <algorithm>
+#include <stdexcept>
+
+namespace {
+
+    /**
+     * @brief The rule table of a provider.
+     *
+     * Add a rule here rather than another pass in a fixer; all rules of a
+     * provider are matched in the same scan of every reference.
+     */
+    std::vector<UrlRewriteRules::Rule> provider_rules(Provider provider) {
+        switch (provider) {
+        case Provider::CIPC:
+            // The embedded IFRS taxonomy is removed; reference the published one.
+            // Only references into full_ifrs are rewritten, with the output of the
+            // original loc href and xs:import fixes. They now apply to every
+            // reference attribute, not only to those two.
+            return {
+                { "../../../def/ifrs/full_ifrs", "https://xbrl.ifrs.org/taxonomy//full_ifrs" },
+                { "../../def/ifrs/full_ifrs", "https://xbrl.ifrs.org/taxonomy/" },
+            };
+        case Provider::EBA:
+        case Provider::EDINET:
+        case Provider::CMFCLCI:
+            return {};
+        default:
+            throw std::invalid_argument("Unknown provider");
+        }
+    }
+
+    /**
+     * @brief A pattern occurrence in a value.
+     */
+    struct Match {
+        std::size_t start;
+        std::size_t length;
+        std::int32_t rule;
+    };
+
+}  // namespace
+
+/**
+ * @brief Compiles a rule table.
+ */
+UrlRewriteRules::UrlRewriteRules(std::vector<Rule> rules)
+    : rules_(std::move(rules)) {
+    for (const auto& rule : rules_) {
+        if (rule.pattern.empty()) {
+            throw std::invalid_argument("URL rewrite rule with an empty pattern");
+        }
+    }
+    compile();
+}
+
+/**
+ * @brief Get the compiled rules of a provider.
+ */
+const UrlRewriteRules& UrlRewriteRules::for_provider(Provider provider) {
+    static const UrlRewriteRules eba(provider_rules(Provider::EBA));
+    static const UrlRewriteRules edinet(provider_rules(Provider::EDINET));
+    static const UrlRewriteRules cmfclci(provider_rules(Provider::CMFCLCI));
+    static const UrlRewriteRules cipc(provider_rules(Provider::CIPC));
+    switch (provider) {
+    case Provider::EBA:
+        return eba;
+    case Provider::EDINET:
+        return edinet;
+    case Provider::CMFCLCI:
+        return cmfclci;
+    case Provider::CIPC:
+        return cipc;
+    default:
+        throw std::invalid_argument("Unknown provider");
+    }
+}
+
+/**
+ * @brief Builds the trie, the failure links and the full transition table.
+ */
+void UrlRewriteRules::compile() {
+    transitions_.assign(1, {});
+    transitions_[0].fill(-1);
+    output_.assign(1, -1);
+    dictionary_.assign(1, -1);
+
+    // Trie of the patterns; for identical patterns the first rule is kept.
+    for (std::size_t r = 0; r < rules_.size(); ++r) {
+        std::int32_t state = 0;
+        for (unsigned char c : rules_[r].pattern) {
+            if (transitions_[state][c] < 0) {
+                transitions_[state][c] = static_cast<std::int32_t>(transitions_.size());
+                transitions_.emplace_back();
+                transitions_.back().fill(-1);
+                output_.push_back(-1);
+                dictionary_.push_back(-1);
+            }
+            state = transitions_[state][c];
+        }
+        if (output_[state] < 0) {
+            output_[state] = static_cast<std::int32_t>(r);
+        }
+    }
+
+    // Breadth-first: failure links, then missing transitions are taken from the failure state.
+    std::vector<std::int32_t> failure(transitions_.size(), 0);
+    std::vector<std::int32_t> queue;
+    for (int c = 0; c < 256; ++c) {
+        std::int32_t& next = transitions_[0][c];
+        if (next < 0) {
+            next = 0;
+        }
+        else {
+            queue.push_back(next);
+        }
+    }
+    for (std::size_t i = 0; i < queue.size(); ++i) {
+        const std::int32_t state = queue[i];
+        const std::int32_t fail = failure[state];
+        dictionary_[state] = output_[fail] >= 0 ? fail : dictionary_[fail];
+        for (int c = 0; c < 256; ++c) {
+            std::int32_t& next = transitions_[state][c];
+            if (next < 0) {
+                next = transitions_[fail][c];
+            }
+            else {
+                failure[next] = transitions_[fail][c];
+                queue.push_back(next);
+            }
+        }
+    }
+}
+
+/**
+ * @brief Apply all rules to a value in a single pass.
+ */
+bool UrlRewriteRules::rewrite(const std::string& value, std::string& result) const {
+    if (rules_.empty()) {
+        return false;
+    }
+
+    std::vector<Match> matches;
+    std::int32_t state = 0;
+    for (std::size_t i = 0; i < value.size(); ++i) {
+        state = transitions_[state][static_cast<unsigned char>(value[i])];
+        for (std::int32_t s = output_[state] >= 0 ? state : dictionary_[state]; s >= 0; s = dictionary_[s]) {
+            const std::size_t length = rules_[output_[s]].pattern.size();
+            matches.push_back({ i + 1 - length, length, output_[s] });
+        }
+    }
+    if (matches.empty()) {
+        return false;
+    }
+
+    // Leftmost first, then longest, then earliest rule; overlapping matches are skipped.
+    std::sort(matches.begin(), matches.end(), [](const Match& a, const Match& b) {
+        if (a.start != b.start) return a.start < b.start;
+        if (a.length != b.length) return a.length > b.length;
+        return a.rule < b.rule;
+    });
+
+    result.clear();
+    std::size_t position = 0;
+    for (const auto& match : matches) {
+        if (match.start < position) {
+            continue;
+        }
+        result.append(value, position, match.start - position);
+        result += rules_[match.rule].replacement;
+        position = match.start + match.length;
+    }
+    result.append(value, position, std::string::npos);
+    return true;
+}
+
+bool UrlRewriteRules::empty() const {
+    return rules_.empty();
+}
+
+const std::vector<UrlRewriteRules::Rule>& UrlRewriteRules::rules() const {
+    return rules_;
+}
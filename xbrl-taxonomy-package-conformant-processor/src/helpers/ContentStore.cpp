@@ -0,0 +1,437 @@
+#include "../../includes/ContentStore.hpp"
+#include "../../includes/Instrumentation.hpp"
+#include "../../includes/utils.hpp"
+#include <algorithm>
+#include <array>
+#include <cstdio>
+#include <filesystem>
+#include <fstream>
+#include <random>
+#include <stdexcept>
+#include <thread>
+#include <vector>
+#include <zip.h>
+#ifdef __linux__
+#include <fcntl.h>
+#include <sys/ioctl.h>
+#include <unistd.h>
+#include <linux/fs.h>
+#endif
+
+namespace fs = std::filesystem;
+
+namespace {
+
+    constexpr std::size_t STORE_BUFFER_SIZE = 1 << 20;  ///< Read buffer per extraction worker.
+
+    /**
+     * @brief Incremental SHA-256 (FIPS 180-4), used to confirm CRC and size matches.
+     */
+    class Sha256 {
+    public:
+        Sha256() {
+            state_ = { 0x6a09e667, 0xbb67ae85, 0x3c6ef372, 0xa54ff53a, 0x510e527f, 0x9b05688c, 0x1f83d9ab, 0x5be0cd19 };
+        }
+
+        void update(const unsigned char* data, std::size_t length) {
+            length_ += length;
+            while (length > 0) {
+                const std::size_t take = std::min(length, block_.size() - block_used_);
+                std::copy(data, data + take, block_.begin() + block_used_);
+                block_used_ += take;
+                data += take;
+                length -= take;
+                if (block_used_ == block_.size()) {
+                    transform(block_.data());
+                    block_used_ = 0;
+                }
+            }
+        }
+
+        std::string hex_digest() {
+            const std::uint64_t bit_length = length_ * 8;
+            const unsigned char pad = 0x80;
+            update(&pad, 1);
+            const unsigned char zero = 0;
+            while (block_used_ != 56) {
+                update(&zero, 1);
+            }
+            unsigned char length_bytes[8];
+            for (int i = 0; i < 8; ++i) {
+                length_bytes[i] = static_cast<unsigned char>(bit_length >> (56 - 8 * i));
+            }
+            update(length_bytes, 8);
+
+            std::string result;
+            char hex[9];
+            for (std::uint32_t word : state_) {
+                std::snprintf(hex, sizeof(hex), "%08x", word);
+                result += hex;
+            }
+            return result;
+        }
+
+    private:
+        static std::uint32_t rotr(std::uint32_t x, int n) {
+            return (x >> n) | (x << (32 - n));
+        }
+
+        void transform(const unsigned char* chunk) {
+            static const std::uint32_t k[64] = {
+                0x428a2f98, 0x71374491, 0xb5c0fbcf, 0xe9b5dba5, 0x3956c25b, 0x59f111f1, 0x923f82a4, 0xab1c5ed5,
+                0xd807aa98, 0x12835b01, 0x243185be, 0x550c7dc3, 0x72be5d74, 0x80deb1fe, 0x9bdc06a7, 0xc19bf174,
+                0xe49b69c1, 0xefbe4786, 0x0fc19dc6, 0x240ca1cc, 0x2de92c6f, 0x4a7484aa, 0x5cb0a9dc, 0x76f988da,
+                0x983e5152, 0xa831c66d, 0xb00327c8, 0xbf597fc7, 0xc6e00bf3, 0xd5a79147, 0x06ca6351, 0x14292967,
+                0x27b70a85, 0x2e1b2138, 0x4d2c6dfc, 0x53380d13, 0x650a7354, 0x766a0abb, 0x81c2c92e, 0x92722c85,
+                0xa2bfe8a1, 0xa81a664b, 0xc24b8b70, 0xc76c51a3, 0xd192e819, 0xd6990624, 0xf40e3585, 0x106aa070,
+                0x19a4c116, 0x1e376c08, 0x2748774c, 0x34b0bcb5, 0x391c0cb3, 0x4ed8aa4a, 0x5b9cca4f, 0x682e6ff3,
+                0x748f82ee, 0x78a5636f, 0x84c87814, 0x8cc70208, 0x90befffa, 0xa4506ceb, 0xbef9a3f7, 0xc67178f2
+            };
+            std::uint32_t w[64];
+            for (int i = 0; i < 16; ++i) {
+                w[i] = (std::uint32_t(chunk[4 * i]) << 24) | (std::uint32_t(chunk[4 * i + 1]) << 16)
+                    | (std::uint32_t(chunk[4 * i + 2]) << 8) | std::uint32_t(chunk[4 * i + 3]);
+            }
+            for (int i = 16; i < 64; ++i) {
+                const std::uint32_t s0 = rotr(w[i - 15], 7) ^ rotr(w[i - 15], 18) ^ (w[i - 15] >> 3);
+                const std::uint32_t s1 = rotr(w[i - 2], 17) ^ rotr(w[i - 2], 19) ^ (w[i - 2] >> 10);
+                w[i] = w[i - 16] + s0 + w[i - 7] + s1;
+            }
+
+            std::uint32_t a = state_[0], b = state_[1], c = state_[2], d = state_[3];
+            std::uint32_t e = state_[4], f = state_[5], g = state_[6], h = state_[7];
+            for (int i = 0; i < 64; ++i) {
+                const std::uint32_t s1 = rotr(e, 6) ^ rotr(e, 11) ^ rotr(e, 25);
+                const std::uint32_t ch = (e & f) ^ (~e & g);
+                const std::uint32_t t1 = h + s1 + ch + k[i] + w[i];
+                const std::uint32_t s0 = rotr(a, 2) ^ rotr(a, 13) ^ rotr(a, 22);
+                const std::uint32_t maj = (a & b) ^ (a & c) ^ (b & c);
+                const std::uint32_t t2 = s0 + maj;
+                h = g; g = f; f = e; e = d + t1;
+                d = c; c = b; b = a; a = t1 + t2;
+            }
+            state_[0] += a; state_[1] += b; state_[2] += c; state_[3] += d;
+            state_[4] += e; state_[5] += f; state_[6] += g; state_[7] += h;
+        }
+
+        std::array<std::uint32_t, 8> state_;
+        std::array<unsigned char, 64> block_{};
+        std::size_t block_used_ = 0;
+        std::uint64_t length_ = 0;
+    };
+
+    /**
+     * @brief A file entry to extract.
+     */
+    struct StoreEntry {
+        zip_uint64_t index;     ///< Index in the archive.
+        zip_uint64_t size;      ///< Uncompressed size.
+        std::uint32_t crc;      ///< CRC-32 from the central directory.
+        fs::path output_path;   ///< Target file.
+    };
+
+    /**
+     * @brief Inflates an entry, hashing it and optionally writing it to a file.
+     *
+     * @return The SHA-256 of the entry, or an empty string on error.
+     */
+    std::string inflate_entry(zip_t* zip, const StoreEntry& entry, std::vector<char>& buffer, const fs::path* output) {
+        zip_file_t* zf = zip_fopen_index(zip, entry.index, 0);
+        if (!zf) {
+            return "";
+        }
+        std::ofstream out;
+        if (output) {
+            out.open(*output, std::ios::binary | std::ios::trunc);
+        }
+
+        Sha256 sha;
+        zip_uint64_t total = 0;
+        zip_int64_t bytes_read;
+        while ((bytes_read = zip_fread(zf, buffer.data(), buffer.size())) > 0) {
+            sha.update(reinterpret_cast<const unsigned char*>(buffer.data()), static_cast<std::size_t>(bytes_read));
+            if (output) {
+                out.write(buffer.data(), bytes_read);
+            }
+            total += static_cast<zip_uint64_t>(bytes_read);
+        }
+        zip_fclose(zf);
+        if (bytes_read < 0 || total != entry.size || (output && !out)) {
+            return "";
+        }
+        return sha.hex_digest();
+    }
+
+    /**
+     * @brief Clone a file with the FICLONE ioctl (copy-on-write).
+     */
+    bool reflink(const fs::path& source, const fs::path& destination) {
+#if defined(__linux__) && defined(FICLONE)
+        int src = ::open(source.c_str(), O_RDONLY);
+        if (src < 0) {
+            return false;
+        }
+        int dst = ::open(destination.c_str(), O_WRONLY | O_CREAT | O_TRUNC, 0644);
+        if (dst < 0) {
+            ::close(src);
+            return false;
+        }
+        const bool ok = ::ioctl(dst, FICLONE, src) == 0;
+        ::close(src);
+        ::close(dst);
+        if (!ok) {
+            ::unlink(destination.c_str());
+        }
+        return ok;
+#else
+        (void)source;
+        (void)destination;
+        return false;
+#endif
+    }
+
+    /**
+     * @brief Make a file writable by its owner.
+     */
+    void make_writable(const fs::path& path) {
+        std::error_code ec;
+        fs::permissions(path, fs::perms::owner_write, fs::perm_options::add, ec);
+    }
+
+}  // namespace
+
+/**
+ * @brief Get the singleton instance of the ContentStore.
+ */
+ContentStore& ContentStore::get_instance() {
+    static ContentStore instance;
+    return instance;
+}
+
+void ContentStore::enable(const std::string& root, LinkMode mode) {
+    fs::create_directories(fs::path(root) / "objects");
+    fs::create_directories(fs::path(root) / "tmp");
+    std::lock_guard<std::mutex> lock(mutex_);
+    root_ = root;
+    mode_ = mode;
+}
+
+bool ContentStore::is_enabled() const {
+    std::lock_guard<std::mutex> lock(mutex_);
+    return !root_.empty();
+}
+
+std::string ContentStore::root() const {
+    std::lock_guard<std::mutex> lock(mutex_);
+    return root_;
+}
+
+ContentStore::Stats ContentStore::extract(const std::string& zip_path, const std::string& destination_folder, unsigned int num_threads) {
+    return extract_entries(zip_path, destination_folder, nullptr, num_threads);
+}
+
+ContentStore::Stats ContentStore::extract(const std::string& zip_path, const std::string& destination_folder,
+    const std::set<std::string>& entry_names, unsigned int num_threads) {
+    if (entry_names.empty()) {
+        return Stats();
+    }
+    return extract_entries(zip_path, destination_folder, &entry_names, num_threads);
+}
+
+/**
+ * @brief Extracts the entries of a zip file through the store.
+ */
+ContentStore::Stats ContentStore::extract_entries(const std::string& zip_path, const std::string& destination_folder,
+    const std::set<std::string>* only, unsigned int num_threads) {
+    Instrumentation::ScopedTimer timer("extract");
+    Stats stats;
+    const fs::path store = root();
+    if (store.empty()) {
+        utils::print_color_msg("    Content store is not enabled", "\033[31m");
+        return stats;
+    }
+    fs::create_directories(destination_folder);
+
+    int error = 0;
+    zip_t* zip = zip_open(zip_path.c_str(), ZIP_RDONLY, &error);
+    if (!zip) {
+        utils::print_color_msg("    Failed to open zip file for extraction", "\033[31m");
+        return stats;
+    }
+
+    // Collect file entries and the unique set of directories in one pass
+    std::vector<StoreEntry> files;
+    std::set<fs::path> directories;
+    zip_int64_t num_entries = zip_get_num_entries(zip, 0);
+    for (zip_int64_t i = 0; i < num_entries; ++i) {
+        zip_stat_t st;
+        zip_stat_init(&st);
+        if (zip_stat_index(zip, static_cast<zip_uint64_t>(i), 0, &st) != 0 || !st.name) {
+            continue;
+        }
+        const std::string name = st.name;
+        if (only != nullptr && only->count(name) == 0) {
+            continue;
+        }
+        if (!utils::is_safe_entry_name(name)) {
+            utils::print_color_msg("    Skipped entry outside the destination folder: " + name, "\033[31m");
+            continue;
+        }
+        fs::path output_path = fs::path(destination_folder) / name;
+        if (!name.empty() && name.back() == '/') {
+            directories.insert(output_path);
+        }
+        else {
+            directories.insert(output_path.parent_path());
+            files.push_back({ static_cast<zip_uint64_t>(i), (st.valid & ZIP_STAT_SIZE) ? st.size : 0,
+                (st.valid & ZIP_STAT_CRC) ? st.crc : 0, output_path });
+        }
+    }
+    zip_close(zip);
+
+    for (const auto& directory : directories) {
+        fs::create_directories(directory);
+    }
+    std::sort(files.begin(), files.end(), [](const StoreEntry& a, const StoreEntry& b) {
+        return a.size > b.size;
+    });
+
+    if (num_threads == 0) {
+        num_threads = utils::extraction_threads();
+    }
+    num_threads = static_cast<unsigned int>(std::min<std::size_t>(num_threads, std::max<std::size_t>(files.size(), 1)));
+
+    std::atomic<std::size_t> next(0);
+    std::mutex results_mutex;
+    std::vector<std::string> errors;
+
+    auto worker = [&] {
+        int worker_error = 0;
+        zip_t* worker_zip = zip_open(zip_path.c_str(), ZIP_RDONLY, &worker_error);
+        if (!worker_zip) {
+            std::lock_guard<std::mutex> lock(results_mutex);
+            errors.push_back("Failed to open zip file for extraction");
+            return;
+        }
+        std::vector<char> buffer(STORE_BUFFER_SIZE);
+        std::mt19937_64 random(std::random_device{}());
+        Stats local;
+
+        for (std::size_t i = next++; i < files.size(); i = next++) {
+            const StoreEntry& entry = files[i];
+            std::error_code ec;
+            fs::remove(entry.output_path, ec);
+
+            char bucket_name[32];
+            std::snprintf(bucket_name, sizeof(bucket_name), "%08x-", entry.crc);
+            const fs::path bucket = store / "objects" / (bucket_name + std::to_string(entry.size));
+
+            // Known CRC and size: confirm with the SHA-256 before linking.
+            if (fs::is_directory(bucket, ec)) {
+                const std::string sha = inflate_entry(worker_zip, entry, buffer, nullptr);
+                if (!sha.empty() && fs::exists(bucket / sha, ec) && place((bucket / sha).string(), entry.output_path.string())) {
+                    Instrumentation::add(Instrumentation::Counter::EntriesProcessed);
+                    ++local.files;
+                    ++local.linked;
+                    local.bytes_saved += entry.size;
+                    continue;
+                }
+            }
+
+            // New content: write it once into the store, then link it.
+            const fs::path temp = store / "tmp" / std::to_string(random());
+            const std::string sha = inflate_entry(worker_zip, entry, buffer, &temp);
+            if (sha.empty()) {
+                fs::remove(temp, ec);
+                std::lock_guard<std::mutex> lock(results_mutex);
+                errors.push_back("Failed to extract " + entry.output_path.string());
+                continue;
+            }
+            const fs::path object = bucket / sha;
+            fs::create_directories(bucket, ec);
+            fs::permissions(temp, fs::perms::owner_read | fs::perms::group_read | fs::perms::others_read, ec);
+            fs::rename(temp, object, ec);
+            if (ec) {
+                fs::remove(temp, ec);  // Stored concurrently by another worker.
+            }
+            if (!place(object.string(), entry.output_path.string())) {
+                std::lock_guard<std::mutex> lock(results_mutex);
+                errors.push_back("Failed to write file to output path: " + entry.output_path.string());
+                continue;
+            }
+            Instrumentation::add(Instrumentation::Counter::EntriesProcessed);
+            Instrumentation::add(Instrumentation::Counter::BytesWritten, entry.size);
+            ++local.files;
+            ++local.stored;
+        }
+        zip_close(worker_zip);
+
+        std::lock_guard<std::mutex> lock(results_mutex);
+        stats.files += local.files;
+        stats.linked += local.linked;
+        stats.stored += local.stored;
+        stats.bytes_saved += local.bytes_saved;
+    };
+
+    std::vector<std::thread> workers;
+    for (unsigned int i = 1; i < num_threads; ++i) {
+        workers.emplace_back(worker);
+    }
+    worker();
+    for (auto& thread : workers) {
+        thread.join();
+    }
+
+    for (const auto& message : errors) {
+        utils::print_color_msg("    " + message, "\033[31m");
+    }
+    utils::print_color_msg("    Zip extracted through content store: " + std::to_string(stats.linked) + " file(s) linked, "
+        + std::to_string(stats.stored) + " stored, " + std::to_string(stats.bytes_saved / (1024 * 1024)) + " MiB not written", "\033[33m");
+    return stats;
+}
+
+/**
+ * @brief Place an object at a destination path according to the link mode.
+ */
+bool ContentStore::place(const std::string& object, const std::string& destination) {
+    LinkMode mode;
+    {
+        std::lock_guard<std::mutex> lock(mutex_);
+        mode = mode_;
+    }
+    std::error_code ec;
+
+    if ((mode == LinkMode::Auto || mode == LinkMode::Reflink) && reflink_supported_) {
+        if (reflink(object, destination)) {
+            return true;
+        }
+        reflink_supported_ = false;
+    }
+    if ((mode == LinkMode::Auto || mode == LinkMode::Hardlink) && hardlink_supported_) {
+        fs::create_hard_link(object, destination, ec);
+        if (!ec) {
+            return true;
+        }
+        if (ec != std::errc::too_many_links) {
+            hardlink_supported_ = false;
+        }
+    }
+
+    fs::copy_file(object, destination, fs::copy_options::overwrite_existing, ec);
+    if (ec) {
+        return false;
+    }
+    make_writable(destination);
+    return true;
+}
+
+/**
+ * @brief Parse a link mode name (auto, reflink, hardlink, copy).
+ */
+ContentStore::LinkMode ContentStore::parse_link_mode(const std::string& name) {
+    if (name == "auto") return LinkMode::Auto;
+    if (name == "reflink") return LinkMode::Reflink;
+    if (name == "hardlink") return LinkMode::Hardlink;
+    if (name == "copy") return LinkMode::Copy;
+    throw std::invalid_argument("Unknown link mode: " + name + " (expected auto, reflink, hardlink or copy)");
+}
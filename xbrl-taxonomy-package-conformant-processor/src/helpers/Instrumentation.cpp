@@ -0,0 +1,182 @@
+#include "../../includes/Instrumentation.hpp"
+#include <algorithm>
+#include <fstream>
+#include <map>
+#include <sstream>
+
+namespace {
+
+    /**
+     * @brief Small sequential id of the calling thread (stable for the thread's lifetime).
+     */
+    std::uint32_t thread_number() {
+        static std::atomic<std::uint32_t> next(1);
+        thread_local const std::uint32_t number = next++;
+        return number;
+    }
+
+    /**
+     * @brief Writes a string as a JSON string literal (phase names are plain ASCII).
+     */
+    void write_json_string(std::ostream& out, const char* value) {
+        out << '"';
+        for (const char* c = value; *c != '\0'; ++c) {
+            if (*c == '"' || *c == '\\') {
+                out << '\\';
+            }
+            out << *c;
+        }
+        out << '"';
+    }
+
+    bool write_file(const std::string& file, const std::string& content) {
+        std::ofstream out(file, std::ios::binary | std::ios::trunc);
+        out << content;
+        return static_cast<bool>(out);
+    }
+
+}  // namespace
+
+/**
+ * @brief Starts the span if instrumentation is enabled.
+ */
+Instrumentation::ScopedTimer::ScopedTimer(const char* name)
+    : name_(Instrumentation::get_instance().is_enabled() ? name : nullptr) {
+    if (name_ != nullptr) {
+        start_ = std::chrono::steady_clock::now();
+    }
+}
+
+/**
+ * @brief Records the span.
+ */
+Instrumentation::ScopedTimer::~ScopedTimer() {
+    if (name_ != nullptr) {
+        Instrumentation::get_instance().record(name_, start_, std::chrono::steady_clock::now());
+    }
+}
+
+/**
+ * @brief Get the singleton instance of the Instrumentation.
+ */
+Instrumentation& Instrumentation::get_instance() {
+    static Instrumentation instance;
+    return instance;
+}
+
+void Instrumentation::enable() {
+    epoch_ = std::chrono::steady_clock::now();
+    enabled_.store(true, std::memory_order_release);
+}
+
+bool Instrumentation::is_enabled() const {
+    return enabled_.load(std::memory_order_acquire);
+}
+
+/**
+ * @brief Add to a counter (no-op if disabled).
+ */
+void Instrumentation::add(Counter counter, std::uint64_t value) {
+    Instrumentation& instance = get_instance();
+    if (instance.enabled_.load(std::memory_order_relaxed)) {
+        instance.counters_[static_cast<std::size_t>(counter)].fetch_add(value, std::memory_order_relaxed);
+    }
+}
+
+std::uint64_t Instrumentation::value(Counter counter) const {
+    return counters_[static_cast<std::size_t>(counter)].load(std::memory_order_relaxed);
+}
+
+/**
+ * @brief Record a finished span.
+ */
+void Instrumentation::record(const char* name, std::chrono::steady_clock::time_point start, std::chrono::steady_clock::time_point end) {
+    using std::chrono::duration_cast;
+    using std::chrono::microseconds;
+    Span span{ name, thread_number(), duration_cast<microseconds>(start - epoch_).count(), duration_cast<microseconds>(end - start).count() };
+    std::lock_guard<std::mutex> lock(mutex_);
+    spans_.push_back(span);
+}
+
+/**
+ * @brief Aggregates the spans per phase name.
+ */
+std::string Instrumentation::summary_json() const {
+    struct Phase {
+        std::size_t count = 0;
+        std::int64_t total_us = 0;
+        std::int64_t max_us = 0;
+    };
+    std::map<std::string, Phase> phases;
+    {
+        std::lock_guard<std::mutex> lock(mutex_);
+        for (const Span& span : spans_) {
+            Phase& phase = phases[span.name];
+            ++phase.count;
+            phase.total_us += span.duration_us;
+            phase.max_us = std::max(phase.max_us, span.duration_us);
+        }
+    }
+    const double wall = std::chrono::duration<double>(std::chrono::steady_clock::now() - epoch_).count();
+
+    std::ostringstream out;
+    out << "{\n  \"wall_seconds\": " << wall << ",\n  \"phases\": {";
+    bool first = true;
+    for (const auto& [name, phase] : phases) {
+        out << (first ? "\n    " : ",\n    ");
+        write_json_string(out, name.c_str());
+        out << ": {\"count\": " << phase.count << ", \"total_seconds\": " << phase.total_us / 1e6
+            << ", \"max_seconds\": " << phase.max_us / 1e6 << "}";
+        first = false;
+    }
+    out << (phases.empty() ? "},\n" : "\n  },\n") << "  \"counters\": {";
+    for (std::size_t i = 0; i < counters_.size(); ++i) {
+        out << (i == 0 ? "\n    " : ",\n    ");
+        write_json_string(out, counter_name(static_cast<Counter>(i)));
+        out << ": " << counters_[i].load(std::memory_order_relaxed);
+    }
+    out << "\n  }\n}\n";
+    return out.str();
+}
+
+bool Instrumentation::write_summary(const std::string& file) const {
+    return write_file(file, summary_json());
+}
+
+/**
+ * @brief Writes the spans as complete ("X") events, one process, one track per thread.
+ */
+bool Instrumentation::write_trace(const std::string& file) const {
+    std::ostringstream out;
+    out << "{\"displayTimeUnit\": \"ms\", \"traceEvents\": [";
+    {
+        std::lock_guard<std::mutex> lock(mutex_);
+        bool first = true;
+        for (const Span& span : spans_) {
+            out << (first ? "\n" : ",\n") << "{\"name\": ";
+            write_json_string(out, span.name);
+            out << ", \"ph\": \"X\", \"pid\": 1, \"tid\": " << span.thread << ", \"ts\": " << span.start_us
+                << ", \"dur\": " << span.duration_us << "}";
+            first = false;
+        }
+    }
+    out << "\n]}\n";
+    return write_file(file, out.str());
+}
+
+const char* Instrumentation::counter_name(Counter counter) {
+    switch (counter) {
+    case Counter::BytesRead:
+        return "bytes_read";
+    case Counter::BytesWritten:
+        return "bytes_written";
+    case Counter::EntriesProcessed:
+        return "entries_processed";
+    case Counter::DocumentsParsed:
+        return "documents_parsed";
+    case Counter::HrefsRewritten:
+        return "hrefs_rewritten";
+    default:
+        return "unknown";
+    }
+}
@@ -0,0 +1,359 @@
+#include "../../includes/MappedZipReader.hpp"
+#include "../../includes/Instrumentation.hpp"
+#include <algorithm>
+#include <climits>
+#include <stdexcept>
+#include <libxml/parser.h>
+#include <zlib.h>
+#ifdef _WIN32
+#include <windows.h>
+#else
+#include <fcntl.h>
+#include <sys/mman.h>
+#include <sys/stat.h>
+#include <unistd.h>
+#endif
+
+namespace {
+
+    constexpr std::uint32_t LOCAL_HEADER_SIGNATURE = 0x04034b50;
+    constexpr std::uint32_t CENTRAL_HEADER_SIGNATURE = 0x02014b50;
+    constexpr std::uint32_t EOCD_SIGNATURE = 0x06054b50;
+    constexpr std::uint32_t ZIP64_EOCD_SIGNATURE = 0x06064b50;
+    constexpr std::uint32_t ZIP64_LOCATOR_SIGNATURE = 0x07064b50;
+    constexpr std::uint16_t ZIP64_EXTRA_ID = 0x0001;
+
+    constexpr std::size_t LOCAL_HEADER_SIZE = 30;
+    constexpr std::size_t CENTRAL_HEADER_SIZE = 46;
+    constexpr std::size_t EOCD_SIZE = 22;
+    constexpr std::size_t ZIP64_EOCD_SIZE = 56;
+    constexpr std::size_t ZIP64_LOCATOR_SIZE = 20;
+    constexpr std::size_t MAX_COMMENT = 0xFFFF;
+
+    /// zlib takes lengths as uInt; larger entries are processed in chunks.
+    constexpr std::size_t ZLIB_CHUNK = 1u << 30;
+
+    /// Deflate expands at most 1032:1 (a 258-byte match per 2 bits), larger declared sizes are corrupt.
+    constexpr std::uint64_t MAX_DEFLATE_RATIO = 1032;
+
+    /// Entries declared to expand more than this are not given their declared size upfront.
+    constexpr std::uint64_t TRUSTED_DEFLATE_RATIO = 64;
+
+    std::uint16_t read_u16(const unsigned char* p) {
+        return static_cast<std::uint16_t>(p[0] | (p[1] << 8));
+    }
+
+    std::uint32_t read_u32(const unsigned char* p) {
+        return static_cast<std::uint32_t>(p[0]) | (static_cast<std::uint32_t>(p[1]) << 8)
+            | (static_cast<std::uint32_t>(p[2]) << 16) | (static_cast<std::uint32_t>(p[3]) << 24);
+    }
+
+    std::uint64_t read_u64(const unsigned char* p) {
+        return static_cast<std::uint64_t>(read_u32(p)) | (static_cast<std::uint64_t>(read_u32(p + 4)) << 32);
+    }
+
+    std::uint32_t crc32_of(std::string_view data) {
+        uLong crc = crc32(0L, Z_NULL, 0);
+        for (std::size_t offset = 0; offset < data.size(); offset += ZLIB_CHUNK) {
+            const std::size_t length = std::min(ZLIB_CHUNK, data.size() - offset);
+            crc = crc32(crc, reinterpret_cast<const Bytef*>(data.data() + offset), static_cast<uInt>(length));
+        }
+        return static_cast<std::uint32_t>(crc);
+    }
+
+    /**
+     * @brief Inflates raw deflate data into exactly `size` bytes of out.
+     *
+     * The size comes from the central directory. It is allocated upfront
+     * only if it is plausible for the compressed size; otherwise the buffer
+     * doubles as the inflated data comes in, so a crafted size cannot force
+     * a huge allocation.
+     */
+    void inflate_raw(std::string_view compressed, std::uint64_t size, std::string& out, std::string_view name) {
+        if (size > (static_cast<std::uint64_t>(compressed.size()) + 1) * MAX_DEFLATE_RATIO) {
+            throw std::runtime_error("Corrupt deflate data in " + std::string(name) + ": the declared size cannot be reached");
+        }
+        const std::uint64_t trusted = (static_cast<std::uint64_t>(compressed.size()) + 1) * TRUSTED_DEFLATE_RATIO;
+        out.resize(static_cast<std::size_t>(std::min(size, trusted)));
+        z_stream stream{};
+        if (inflateInit2(&stream, -MAX_WBITS) != Z_OK) {
+            throw std::runtime_error("Failed to initialise inflate for " + std::string(name));
+        }
+        std::size_t in_offset = 0;
+        std::size_t out_offset = 0;
+        // zlib rejects a null output buffer; an empty entry inflates into a one-byte sink.
+        Bytef sink;
+        if (out.empty()) {
+            stream.next_out = &sink;
+            stream.avail_out = 1;
+        }
+        int status;
+        do {
+            if (stream.avail_in == 0 && in_offset < compressed.size()) {
+                const std::size_t length = std::min(ZLIB_CHUNK, compressed.size() - in_offset);
+                stream.next_in = reinterpret_cast<Bytef*>(const_cast<char*>(compressed.data() + in_offset));
+                stream.avail_in = static_cast<uInt>(length);
+                in_offset += length;
+            }
+            if (stream.avail_out == 0 && out_offset < size) {
+                if (out_offset == out.size()) {
+                    out.resize(static_cast<std::size_t>(std::min<std::uint64_t>(size, static_cast<std::uint64_t>(out.size()) * 2)));
+                }
+                const std::size_t length = std::min(ZLIB_CHUNK, out.size() - out_offset);
+                stream.next_out = reinterpret_cast<Bytef*>(out.data() + out_offset);
+                stream.avail_out = static_cast<uInt>(length);
+                out_offset += length;
+            }
+            // Z_BUF_ERROR: no progress possible, the input is truncated or inflates to more than `size`.
+            status = inflate(&stream, Z_NO_FLUSH);
+        } while (status == Z_OK);
+        const bool complete = status == Z_STREAM_END && stream.total_out == size;
+        inflateEnd(&stream);
+        if (!complete) {
+            throw std::runtime_error("Corrupt deflate data in " + std::string(name));
+        }
+    }
+
+    void unmap(const unsigned char* data, std::size_t size, void* mapping_handle) {
+#ifdef _WIN32
+        (void)size;
+        UnmapViewOfFile(data);
+        CloseHandle(static_cast<HANDLE>(mapping_handle));
+#else
+        (void)mapping_handle;
+        ::munmap(const_cast<unsigned char*>(data), size);
+#endif
+    }
+
+}  // namespace
+
+/**
+ * @brief Maps the archive and parses its central directory.
+ */
+MappedZipReader::MappedZipReader(const std::string& archive)
+    : archive_(archive), data_(nullptr), size_(0), mapping_handle_(nullptr) {
+#ifdef _WIN32
+    HANDLE file = CreateFileA(archive.c_str(), GENERIC_READ, FILE_SHARE_READ, nullptr, OPEN_EXISTING, FILE_FLAG_SEQUENTIAL_SCAN, nullptr);
+    if (file == INVALID_HANDLE_VALUE) {
+        throw std::runtime_error("Failed to open zip file: " + archive);
+    }
+    LARGE_INTEGER file_size;
+    if (!GetFileSizeEx(file, &file_size) || file_size.QuadPart == 0) {
+        CloseHandle(file);
+        throw std::runtime_error("Not a valid ZIP archive: " + archive);
+    }
+    HANDLE mapping = CreateFileMappingA(file, nullptr, PAGE_READONLY, 0, 0, nullptr);
+    CloseHandle(file);
+    if (mapping == nullptr) {
+        throw std::runtime_error("Failed to map zip file: " + archive);
+    }
+    const void* view = MapViewOfFile(mapping, FILE_MAP_READ, 0, 0, 0);
+    if (view == nullptr) {
+        CloseHandle(mapping);
+        throw std::runtime_error("Failed to map zip file: " + archive);
+    }
+    mapping_handle_ = mapping;
+    data_ = static_cast<const unsigned char*>(view);
+    size_ = static_cast<std::size_t>(file_size.QuadPart);
+#else
+    const int fd = ::open(archive.c_str(), O_RDONLY);
+    if (fd < 0) {
+        throw std::runtime_error("Failed to open zip file: " + archive);
+    }
+    struct stat st;
+    if (::fstat(fd, &st) != 0 || st.st_size == 0) {
+        ::close(fd);
+        throw std::runtime_error("Not a valid ZIP archive: " + archive);
+    }
+    void* view = ::mmap(nullptr, static_cast<std::size_t>(st.st_size), PROT_READ, MAP_PRIVATE, fd, 0);
+    ::close(fd);
+    if (view == MAP_FAILED) {
+        throw std::runtime_error("Failed to map zip file: " + archive);
+    }
+    data_ = static_cast<const unsigned char*>(view);
+    size_ = static_cast<std::size_t>(st.st_size);
+#endif
+
+    try {
+        parse_central_directory();
+    }
+    catch (...) {
+        unmap(data_, size_, mapping_handle_);
+        throw;
+    }
+}
+
+/**
+ * @brief Unmaps the archive.
+ */
+MappedZipReader::~MappedZipReader() {
+    unmap(data_, size_, mapping_handle_);
+}
+
+/**
+ * @brief Finds the end of central directory record and parses the central directory.
+ *
+ * The record is searched backwards from the end, over at most the maximum
+ * archive comment. ZIP64 values replace the 16/32-bit fields that are
+ * saturated (0xFFFF / 0xFFFFFFFF).
+ */
+void MappedZipReader::parse_central_directory() {
+    const std::runtime_error invalid("Not a valid ZIP archive: " + archive_);
+    if (size_ < EOCD_SIZE) {
+        throw invalid;
+    }
+
+    std::size_t eocd = size_ - EOCD_SIZE;
+    const std::size_t lowest = size_ - EOCD_SIZE > MAX_COMMENT ? size_ - EOCD_SIZE - MAX_COMMENT : 0;
+    while (read_u32(data_ + eocd) != EOCD_SIGNATURE) {
+        if (eocd == lowest) {
+            throw invalid;
+        }
+        --eocd;
+    }
+
+    std::uint64_t count = read_u16(data_ + eocd + 10);
+    std::uint64_t cd_size = read_u32(data_ + eocd + 12);
+    std::uint64_t cd_offset = read_u32(data_ + eocd + 16);
+
+    if (eocd >= ZIP64_LOCATOR_SIZE && read_u32(data_ + eocd - ZIP64_LOCATOR_SIZE) == ZIP64_LOCATOR_SIGNATURE) {
+        const std::uint64_t zip64_eocd = read_u64(data_ + eocd - ZIP64_LOCATOR_SIZE + 8);
+        if (size_ < ZIP64_EOCD_SIZE || zip64_eocd > size_ - ZIP64_EOCD_SIZE || read_u32(data_ + zip64_eocd) != ZIP64_EOCD_SIGNATURE) {
+            throw invalid;
+        }
+        count = read_u64(data_ + zip64_eocd + 32);
+        cd_size = read_u64(data_ + zip64_eocd + 40);
+        cd_offset = read_u64(data_ + zip64_eocd + 48);
+    }
+    if (cd_offset > size_ || cd_size > size_ - cd_offset) {
+        throw invalid;
+    }
+
+    // Every entry takes at least CENTRAL_HEADER_SIZE bytes, which bounds a bogus count.
+    entries_.reserve(static_cast<std::size_t>(std::min<std::uint64_t>(count, cd_size / CENTRAL_HEADER_SIZE)));
+    by_name_.reserve(entries_.capacity());
+
+    const unsigned char* p = data_ + cd_offset;
+    const unsigned char* const end = p + cd_size;
+    for (std::uint64_t i = 0; i < count; ++i) {
+        if (end - p < static_cast<std::ptrdiff_t>(CENTRAL_HEADER_SIZE) || read_u32(p) != CENTRAL_HEADER_SIGNATURE) {
+            throw invalid;
+        }
+        const std::size_t name_length = read_u16(p + 28);
+        const std::size_t extra_length = read_u16(p + 30);
+        const std::size_t comment_length = read_u16(p + 32);
+        const std::size_t record_size = CENTRAL_HEADER_SIZE + name_length + extra_length + comment_length;
+        if (static_cast<std::size_t>(end - p) < record_size) {
+            throw invalid;
+        }
+
+        Entry entry;
+        entry.name = std::string_view(reinterpret_cast<const char*>(p + CENTRAL_HEADER_SIZE), name_length);
+        entry.flags = read_u16(p + 8);
+        entry.comp_method = read_u16(p + 10);
+        entry.dos_time = read_u32(p + 12);
+        entry.crc = read_u32(p + 16);
+        entry.comp_size = read_u32(p + 20);
+        entry.size = read_u32(p + 24);
+        entry.local_offset = read_u32(p + 42);
+        entry.is_dir = !entry.name.empty() && entry.name.back() == '/';
+
+        // ZIP64 extended information: only the saturated fields are present, in this order.
+        const unsigned char* extra = p + CENTRAL_HEADER_SIZE + name_length;
+        const unsigned char* const extra_end = extra + extra_length;
+        while (extra_end - extra >= 4) {
+            const std::uint16_t id = read_u16(extra);
+            const std::size_t length = read_u16(extra + 2);
+            const unsigned char* field = extra + 4;
+            if (static_cast<std::size_t>(extra_end - field) < length) {
+                break;
+            }
+            if (id == ZIP64_EXTRA_ID) {
+                const unsigned char* const field_end = field + length;
+                for (std::uint64_t* value : { &entry.size, &entry.comp_size, &entry.local_offset }) {
+                    if (*value == 0xFFFFFFFF && field_end - field >= 8) {
+                        *value = read_u64(field);
+                        field += 8;
+                    }
+                }
+            }
+            extra += 4 + length;
+        }
+
+        by_name_.emplace(entry.name, entries_.size());  // First entry wins, like libzip.
+        entries_.push_back(entry);
+        p += record_size;
+    }
+}
+
+const std::string& MappedZipReader::archive() const {
+    return archive_;
+}
+
+const std::vector<MappedZipReader::Entry>& MappedZipReader::entries() const {
+    return entries_;
+}
+
+const MappedZipReader::Entry* MappedZipReader::find(std::string_view name) const {
+    auto it = by_name_.find(name);
+    return it != by_name_.end() ? &entries_[it->second] : nullptr;
+}
+
+/**
+ * @brief Get the compressed bytes of an entry, behind its local header.
+ */
+std::string_view MappedZipReader::raw(const Entry& entry) const {
+    if (entry.local_offset > size_ - LOCAL_HEADER_SIZE || read_u32(data_ + entry.local_offset) != LOCAL_HEADER_SIGNATURE) {
+        throw std::runtime_error("Corrupt local header of " + std::string(entry.name) + " in " + archive_);
+    }
+    const unsigned char* header = data_ + entry.local_offset;
+    const std::uint64_t start = entry.local_offset + LOCAL_HEADER_SIZE + read_u16(header + 26) + read_u16(header + 28);
+    if (start > size_ || entry.comp_size > size_ - start) {
+        throw std::runtime_error("Truncated entry " + std::string(entry.name) + " in " + archive_);
+    }
+    return std::string_view(reinterpret_cast<const char*>(data_ + start), static_cast<std::size_t>(entry.comp_size));
+}
+
+/**
+ * @brief Get the uncompressed content of an entry (zero-copy for stored entries).
+ */
+std::string_view MappedZipReader::read(const Entry& entry, std::string& buffer) const {
+    if (entry.flags & 0x1) {
+        throw std::runtime_error("Encrypted entries are not supported: " + std::string(entry.name));
+    }
+    const std::string_view compressed = raw(entry);
+    Instrumentation::add(Instrumentation::Counter::BytesRead, compressed.size());
+
+    std::string_view content;
+    if (entry.comp_method == 0) {
+        if (entry.comp_size != entry.size) {
+            throw std::runtime_error("Corrupt stored entry " + std::string(entry.name) + " in " + archive_);
+        }
+        content = compressed;
+    }
+    else if (entry.comp_method == 8) {
+        inflate_raw(compressed, entry.size, buffer, entry.name);
+        content = buffer;
+    }
+    else {
+        throw std::runtime_error("Unsupported compression method " + std::to_string(entry.comp_method) + " of " + std::string(entry.name));
+    }
+
+    if (crc32_of(content) != entry.crc) {
+        throw std::runtime_error("CRC mismatch in " + std::string(entry.name) + " of " + archive_);
+    }
+    return content;
+}
+
+/**
+ * @brief Parses an XML entry from memory; the document URL is its extracted location.
+ */
+xmlDocPtr MappedZipReader::parse_xml(const Entry& entry, std::string& buffer, int options) const {
+    const std::string_view content = read(entry, buffer);
+    if (content.size() > static_cast<std::size_t>(INT_MAX)) {
+        return nullptr;
+    }
+    Instrumentation::add(Instrumentation::Counter::DocumentsParsed);
+    const std::string url = archive_ + "/" + std::string(entry.name);
+    return xmlReadMemory(content.data(), static_cast<int>(content.size()), url.c_str(), nullptr, options);
+}
@@ -0,0 +1,479 @@
+#include "../../includes/VirtualPackage.hpp"
+#include "../../includes/ContentStore.hpp"
+#include "../../includes/Instrumentation.hpp"
+#include "../../includes/MappedZipReader.hpp"
+#include "../../includes/utils.hpp"
+#include <filesystem>
+#include <fstream>
+#include <map>
+#include <set>
+#include <sstream>
+#include <stdexcept>
+#include <zip.h>
+
+namespace fs = std::filesystem;
+
+/**
+ * @brief A file or directory of the tree.
+ */
+struct VirtualPackage::Node {
+    enum class Origin { Directory, Archive, Disk, Memory };
+
+    std::string name;                                       ///< Path component.
+    Node* parent = nullptr;                                 ///< Parent directory (nullptr for the root).
+    Origin origin = Origin::Directory;                      ///< Where the content comes from.
+    std::string source;                                     ///< Archive entry name or file path.
+    std::uint64_t index = 0;                                ///< Archive entry index.
+    std::uint64_t size = 0;                                 ///< Uncompressed size.
+    std::uint32_t crc = 0;                                  ///< CRC-32 from the central directory.
+    std::string content;                                    ///< Content of generated files.
+    std::map<std::string, std::unique_ptr<Node>> children;  ///< Children by name.
+
+    bool is_dir() const {
+        return origin == Origin::Directory;
+    }
+
+    std::size_t file_count() const {
+        if (!is_dir()) {
+            return 1;
+        }
+        std::size_t count = 0;
+        for (const auto& [child_name, child] : children) {
+            count += child->file_count();
+        }
+        return count;
+    }
+
+    std::string path() const {
+        std::string result;
+        for (const Node* node = this; node->parent != nullptr; node = node->parent) {
+            result = result.empty() ? node->name : node->name + "/" + result;
+        }
+        return result;
+    }
+};
+
+namespace {
+
+    /**
+     * @brief Splits a package path into its components, ignoring empty and "." components.
+     */
+    std::vector<std::string> split_path(const std::string& path) {
+        std::vector<std::string> components;
+        std::string component;
+        std::stringstream stream(path);
+        while (std::getline(stream, component, '/')) {
+            if (!component.empty() && component != ".") {
+                components.push_back(component);
+            }
+        }
+        return components;
+    }
+
+}  // namespace
+
+VirtualPackage::VirtualPackage()
+    : root_(std::make_unique<Node>()) {}
+
+VirtualPackage::~VirtualPackage() = default;
+VirtualPackage::VirtualPackage(VirtualPackage&&) noexcept = default;
+VirtualPackage& VirtualPackage::operator=(VirtualPackage&&) noexcept = default;
+
+/**
+ * @brief Builds the tree of a zip file from its central directory.
+ */
+VirtualPackage VirtualPackage::from_zip(const std::string& zip_path) {
+    VirtualPackage package;
+    package.archive_ = zip_path;
+    package.reader_ = std::make_shared<const MappedZipReader>(zip_path);
+
+    const auto& zip_entries = package.reader_->entries();
+    for (std::size_t i = 0; i < zip_entries.size(); ++i) {
+        const std::string name(zip_entries[i].name);
+        if (!utils::is_safe_entry_name(name)) {
+            utils::print_color_msg("    Skipped entry outside the package: " + name, "\033[31m");
+            continue;
+        }
+        std::vector<std::string> components = split_path(name);
+        if (components.empty()) {
+            continue;
+        }
+        if (name.back() == '/') {
+            package.make_directories(components, components.size());
+            continue;
+        }
+
+        Node* parent = package.make_directories(components, components.size() - 1);
+        if (parent == nullptr) {
+            continue;  // A file is in the way; keep the first entry.
+        }
+        auto node = std::make_unique<Node>();
+        node->name = components.back();
+        node->parent = parent;
+        node->origin = Node::Origin::Archive;
+        node->source = name;
+        node->index = static_cast<std::uint64_t>(i);
+        node->size = zip_entries[i].size;
+        node->crc = zip_entries[i].crc;
+        parent->children.emplace(node->name, std::move(node));
+    }
+    return package;
+}
+
+/**
+ * @brief Builds the tree of a folder.
+ */
+VirtualPackage VirtualPackage::from_folder(const std::string& folder) {
+    VirtualPackage package;
+    for (const auto& entry : fs::recursive_directory_iterator(folder)) {
+        const std::string relative = fs::relative(entry.path(), folder).generic_string();
+        std::vector<std::string> components = split_path(relative);
+        if (entry.is_directory()) {
+            package.make_directories(components, components.size());
+            continue;
+        }
+        Node* parent = package.make_directories(components, components.size() - 1);
+        if (parent == nullptr) {
+            continue;
+        }
+        auto node = std::make_unique<Node>();
+        node->name = components.back();
+        node->parent = parent;
+        node->origin = Node::Origin::Disk;
+        node->source = entry.path().string();
+        node->size = entry.file_size();
+        parent->children[node->name] = std::move(node);
+    }
+    return package;
+}
+
+/**
+ * @brief Get the node at a path, or nullptr.
+ */
+VirtualPackage::Node* VirtualPackage::find(const std::string& path) const {
+    Node* node = root_.get();
+    for (const auto& component : split_path(path)) {
+        auto it = node->children.find(component);
+        if (it == node->children.end()) {
+            return nullptr;
+        }
+        node = it->second.get();
+    }
+    return node;
+}
+
+/**
+ * @brief Get the directory at a path, creating it and missing parents.
+ */
+VirtualPackage::Node* VirtualPackage::make_directories(const std::vector<std::string>& components, std::size_t count) {
+    Node* node = root_.get();
+    for (std::size_t i = 0; i < count; ++i) {
+        auto it = node->children.find(components[i]);
+        if (it == node->children.end()) {
+            auto child = std::make_unique<Node>();
+            child->name = components[i];
+            child->parent = node;
+            it = node->children.emplace(components[i], std::move(child)).first;
+        }
+        if (!it->second->is_dir()) {
+            return nullptr;
+        }
+        node = it->second.get();
+    }
+    return node;
+}
+
+bool VirtualPackage::exists(const std::string& path) const {
+    return find(path) != nullptr;
+}
+
+bool VirtualPackage::is_directory(const std::string& path) const {
+    const Node* node = find(path);
+    return node != nullptr && node->is_dir();
+}
+
+/**
+ * @brief Moves a file or directory (with everything below it) by re-parenting its node.
+ */
+bool VirtualPackage::move(const std::string& from, const std::string& to) {
+    Node* node = find(from);
+    std::vector<std::string> target = split_path(to);
+    if (node == nullptr || node == root_.get() || target.empty() || find(to) != nullptr) {
+        return false;
+    }
+    Node* parent = make_directories(target, target.size() - 1);
+    if (parent == nullptr) {
+        return false;
+    }
+    for (const Node* ancestor = parent; ancestor != nullptr; ancestor = ancestor->parent) {
+        if (ancestor == node) {
+            return false;  // Cannot move a directory below itself.
+        }
+    }
+
+    auto owned = std::move(node->parent->children.at(node->name));
+    node->parent->children.erase(node->name);
+    owned->name = target.back();
+    owned->parent = parent;
+    parent->children.emplace(owned->name, std::move(owned));
+    return true;
+}
+
+/**
+ * @brief Removes a file or directory (with everything below it).
+ */
+std::size_t VirtualPackage::remove(const std::string& path) {
+    Node* node = find(path);
+    if (node == nullptr || node == root_.get()) {
+        return 0;
+    }
+    const std::size_t removed = node->file_count();
+    node->parent->children.erase(node->name);
+    return removed;
+}
+
+void VirtualPackage::add(const std::string& path, std::string content) {
+    std::vector<std::string> components = split_path(path);
+    if (components.empty()) {
+        throw std::invalid_argument("Invalid package path: " + path);
+    }
+    Node* parent = make_directories(components, components.size() - 1);
+    if (parent == nullptr) {
+        throw std::invalid_argument("A file is in the way of " + path);
+    }
+    auto it = parent->children.find(components.back());
+    if (it != parent->children.end() && it->second->is_dir()) {
+        throw std::invalid_argument("A directory exists at " + path);
+    }
+
+    auto node = std::make_unique<Node>();
+    node->name = components.back();
+    node->parent = parent;
+    node->origin = Node::Origin::Memory;
+    node->size = content.size();
+    node->content = std::move(content);
+    parent->children[node->name] = std::move(node);
+}
+
+void VirtualPackage::add_directory(const std::string& path) {
+    std::vector<std::string> components = split_path(path);
+    if (make_directories(components, components.size()) == nullptr) {
+        throw std::invalid_argument("A file is in the way of " + path);
+    }
+}
+
+/**
+ * @brief Reads the content of a file from its origin.
+ */
+std::string VirtualPackage::read(const std::string& path) const {
+    const Node* node = find(path);
+    if (node == nullptr || node->is_dir()) {
+        throw std::runtime_error("Not a file in the package: " + path);
+    }
+
+    switch (node->origin) {
+    case Node::Origin::Memory:
+        return node->content;
+    case Node::Origin::Disk: {
+        std::ifstream in(node->source, std::ios::binary);
+        if (!in) {
+            throw std::runtime_error("Failed to read " + node->source);
+        }
+        std::ostringstream content;
+        content << in.rdbuf();
+        return content.str();
+    }
+    case Node::Origin::Archive: {
+        std::string buffer;
+        const std::string_view content = reader_->read(reader_->entries()[node->index], buffer);
+        if (content.data() != buffer.data()) {
+            buffer.assign(content);  // Stored entry: copy out of the mapping.
+        }
+        return buffer;
+    }
+    default:
+        throw std::runtime_error("Not a file in the package: " + path);
+    }
+}
+
+/**
+ * @brief Get all nodes in pre-order, children sorted by name.
+ */
+std::vector<VirtualPackage::Entry> VirtualPackage::entries() const {
+    std::vector<Entry> result;
+    std::vector<std::pair<const Node*, std::string>> stack;
+    for (auto it = root_->children.rbegin(); it != root_->children.rend(); ++it) {
+        stack.push_back({ it->second.get(), it->first });
+    }
+    while (!stack.empty()) {
+        auto [node, path] = stack.back();
+        stack.pop_back();
+        result.push_back({ path, node->is_dir(), node->size, node->crc });
+        for (auto it = node->children.rbegin(); it != node->children.rend(); ++it) {
+            stack.push_back({ it->second.get(), path + "/" + it->first });
+        }
+    }
+    return result;
+}
+
+std::size_t VirtualPackage::file_count() const {
+    return root_->file_count();
+}
+
+/**
+ * @brief Writes the tree into a zip file.
+ *
+ * Archive files are added with zip_source_zip() and ZIP_FL_COMPRESSED, so
+ * libzip copies their compressed bytes and CRC verbatim, whatever path they
+ * were moved to. Files from disk and memory are compressed with
+ * utils::compression_level().
+ */
+std::size_t VirtualPackage::materialize_zip(const std::string& output_zip) const {
+    Instrumentation::ScopedTimer timer("materialize_zip");
+    int error = 0;
+    zip_t* source = nullptr;
+    if (!archive_.empty()) {
+        source = zip_open(archive_.c_str(), ZIP_RDONLY, &error);
+        if (!source) {
+            throw std::runtime_error("Failed to open zip file for reading: " + archive_);
+        }
+    }
+    zip_t* output = zip_open(output_zip.c_str(), ZIP_CREATE | ZIP_TRUNCATE, &error);
+    if (!output) {
+        if (source) zip_close(source);
+        throw std::runtime_error("Failed to open zip file for writing: " + output_zip);
+    }
+
+    const int level = utils::compression_level();
+    std::size_t count = 0;
+    try {
+        std::vector<const Node*> stack;
+        for (auto it = root_->children.rbegin(); it != root_->children.rend(); ++it) {
+            stack.push_back(it->second.get());
+        }
+        while (!stack.empty()) {
+            const Node* node = stack.back();
+            stack.pop_back();
+            const std::string path = node->path();
+
+            zip_source_t* src = nullptr;
+            switch (node->origin) {
+            case Node::Origin::Directory:
+                if (zip_dir_add(output, (path + "/").c_str(), ZIP_FL_ENC_UTF_8) < 0) {
+                    throw std::runtime_error("Failed to add directory " + path + ": " + zip_strerror(output));
+                }
+                for (auto it = node->children.rbegin(); it != node->children.rend(); ++it) {
+                    stack.push_back(it->second.get());
+                }
+                ++count;
+                continue;
+            case Node::Origin::Archive:
+                src = zip_source_zip(output, source, node->index, ZIP_FL_COMPRESSED, 0, -1);
+                break;
+            case Node::Origin::Disk:
+                src = zip_source_file(output, node->source.c_str(), 0, -1);
+                break;
+            case Node::Origin::Memory:
+                // The tree outlives zip_close(output), so the buffer stays valid.
+                src = zip_source_buffer(output, node->content.data(), node->content.size(), 0);
+                break;
+            }
+            const zip_int64_t index = src ? zip_file_add(output, path.c_str(), src, ZIP_FL_OVERWRITE | ZIP_FL_ENC_UTF_8) : -1;
+            if (index < 0) {
+                zip_source_free(src);
+                throw std::runtime_error("Failed to add " + path + ": " + zip_strerror(output));
+            }
+            // Archive entries keep their compressed data, the others use the configured level.
+            if (node->origin != Node::Origin::Archive && level >= 0 && zip_set_file_compression(output, static_cast<zip_uint64_t>(index),
+                level == 0 ? ZIP_CM_STORE : ZIP_CM_DEFLATE, static_cast<zip_uint32_t>(level)) < 0) {
+                throw std::runtime_error("Failed to set compression of " + path + ": " + zip_strerror(output));
+            }
+            ++count;
+        }
+    }
+    catch (...) {
+        zip_discard(output);
+        if (source) zip_close(source);
+        throw;
+    }
+
+    if (zip_close(output) < 0) {
+        std::string message = zip_strerror(output);
+        zip_discard(output);
+        if (source) zip_close(source);
+        throw std::runtime_error("Failed to write " + output_zip + ": " + message);
+    }
+    if (source) zip_close(source);
+
+    std::error_code ec;
+    const std::uintmax_t zip_size = fs::file_size(output_zip, ec);
+    Instrumentation::add(Instrumentation::Counter::EntriesProcessed, count);
+    Instrumentation::add(Instrumentation::Counter::BytesWritten, ec ? 0 : zip_size);
+    return count;
+}
+
+/**
+ * @brief Writes the tree into a folder.
+ */
+std::size_t VirtualPackage::materialize_folder(const std::string& folder, unsigned int num_threads) const {
+    Instrumentation::ScopedTimer timer("materialize_folder");
+    std::set<std::string> in_place;     // Archive entries at their original path.
+    std::vector<const Node*> others;    // Moved, disk and generated files.
+
+    std::vector<const Node*> stack{ root_.get() };
+    while (!stack.empty()) {
+        const Node* node = stack.back();
+        stack.pop_back();
+        // Paths moved or added by a fixer are checked too, not only the entry names.
+        if (node != root_.get() && !utils::is_safe_entry_name(node->path())) {
+            throw std::runtime_error("Path outside the destination folder: " + node->path());
+        }
+        if (node->is_dir()) {
+            fs::create_directories(fs::path(folder) / node->path());
+            for (const auto& [name, child] : node->children) {
+                stack.push_back(child.get());
+            }
+        }
+        else if (node->origin == Node::Origin::Archive && node->source == node->path()) {
+            in_place.insert(node->source);
+        }
+        else {
+            others.push_back(node);
+        }
+    }
+
+    if (!in_place.empty()) {
+        ContentStore& store = ContentStore::get_instance();
+        if (store.is_enabled()) {
+            store.extract(archive_, folder, in_place, num_threads);
+        }
+        else {
+            utils::zip_dir_extractor(archive_, folder, in_place, num_threads);
+        }
+    }
+
+    std::string buffer;
+    for (const Node* node : others) {
+        const fs::path target = fs::path(folder) / node->path();
+        std::error_code ec;
+        fs::remove(target, ec);
+        if (node->origin == Node::Origin::Disk) {
+            fs::copy_file(node->source, target, fs::copy_options::overwrite_existing);
+            continue;
+        }
+
+        // Archive content is written from the mapping (stored) or from the reused inflate buffer.
+        const std::string_view content = node->origin == Node::Origin::Memory
+            ? std::string_view(node->content)
+            : reader_->read(reader_->entries()[node->index], buffer);
+        std::ofstream out(target, std::ios::binary | std::ios::trunc);
+        out.write(content.data(), static_cast<std::streamsize>(content.size()));
+        if (!out) {
+            throw std::runtime_error("Failed to write " + target.string());
+        }
+        Instrumentation::add(Instrumentation::Counter::EntriesProcessed);
+        Instrumentation::add(Instrumentation::Counter::BytesWritten, content.size());
+    }
+
+    return in_place.size() + others.size();
+}
@@ -0,0 +1,185 @@
+#include "../../includes/ZipRepackager.hpp"
+#include "../../includes/Instrumentation.hpp"
+#include "../../includes/utils.hpp"
+#include <deque>
+#include <filesystem>
+#include <set>
+#include <stdexcept>
+#include <zip.h>
+
+/**
+ * @brief Constructor for ZipRepackager.
+ */
+ZipRepackager::ZipRepackager(const std::string& source_zip)
+    : source_zip_(source_zip) {}
+
+void ZipRepackager::set_top_level_dir(const std::string& top_level_dir) {
+    top_level_dir_ = top_level_dir;
+    if (!top_level_dir_.empty() && top_level_dir_.back() != '/') {
+        top_level_dir_ += '/';
+    }
+}
+
+void ZipRepackager::add_move_rule(const std::string& from, const std::string& to) {
+    rules_.push_back({ Rule::Kind::Move, from, to });
+}
+
+void ZipRepackager::add_keep_rule(const std::string& prefix) {
+    rules_.push_back({ Rule::Kind::Keep, prefix, prefix });
+}
+
+void ZipRepackager::add_drop_rule(const std::string& prefix) {
+    rules_.push_back({ Rule::Kind::Drop, prefix, "" });
+}
+
+void ZipRepackager::add_rewriter(const std::string& source_path, ContentRewriter rewriter) {
+    rewriters_[source_path] = std::move(rewriter);
+}
+
+void ZipRepackager::inject(const std::string& path, std::string content) {
+    injected_[path] = std::move(content);
+}
+
+/**
+ * @brief Serializes an XML document and adds it as generated entry.
+ *
+ * The document is dumped to memory, so no temporary file is written.
+ */
+void ZipRepackager::inject_xml(const std::string& path, xmlDocPtr doc) {
+    xmlChar* buffer = nullptr;
+    int size = 0;
+    xmlDocDumpFormatMemoryEnc(doc, &buffer, &size, "UTF-8", 1);
+    if (buffer == nullptr) {
+        throw std::runtime_error("Failed to serialize XML document for " + path);
+    }
+    inject(path, std::string(reinterpret_cast<const char*>(buffer), static_cast<std::size_t>(size)));
+    xmlFree(buffer);
+}
+
+/**
+ * @brief Computes the output path of a source entry.
+ */
+std::optional<std::string> ZipRepackager::map_path(const std::string& source_path) const {
+    std::string target = source_path;
+    for (const auto& rule : rules_) {
+        if (source_path.compare(0, rule.from.size(), rule.from) != 0) {
+            continue;
+        }
+        if (rule.kind == Rule::Kind::Drop) {
+            return std::nullopt;
+        }
+        target = rule.to + source_path.substr(rule.from.size());
+        break;
+    }
+    return top_level_dir_ + target;
+}
+
+/**
+ * @brief Writes the output archive.
+ *
+ * Unchanged entries are added with zip_source_zip() and ZIP_FL_COMPRESSED, so
+ * libzip copies their compressed bytes and CRC verbatim. Rewritten and
+ * injected entries are compressed from memory buffers that are kept alive
+ * until the archive is closed, with utils::compression_level().
+ */
+std::size_t ZipRepackager::write(const std::string& output_zip) {
+    Instrumentation::ScopedTimer timer("repackage");
+    int error = 0;
+    zip_t* source = zip_open(source_zip_.c_str(), ZIP_RDONLY, &error);
+    if (!source) {
+        throw std::runtime_error("Failed to open zip file for reading: " + source_zip_);
+    }
+    zip_t* output = zip_open(output_zip.c_str(), ZIP_CREATE | ZIP_TRUNCATE, &error);
+    if (!output) {
+        zip_close(source);
+        throw std::runtime_error("Failed to open zip file for writing: " + output_zip);
+    }
+
+    std::deque<std::string> buffers;  // Rewritten contents, must outlive zip_close(output).
+    std::set<std::string> written;
+    std::size_t count = 0;
+
+    auto add_buffer = [&](const std::string& name, const std::string& content) {
+        zip_source_t* src = zip_source_buffer(output, content.data(), content.size(), 0);
+        const zip_int64_t index = src ? zip_file_add(output, name.c_str(), src, ZIP_FL_OVERWRITE | ZIP_FL_ENC_UTF_8) : -1;
+        if (index < 0) {
+            zip_source_free(src);
+            throw std::runtime_error("Failed to add " + name + ": " + zip_strerror(output));
+        }
+        const int level = utils::compression_level();
+        if (level >= 0 && zip_set_file_compression(output, static_cast<zip_uint64_t>(index),
+            level == 0 ? ZIP_CM_STORE : ZIP_CM_DEFLATE, static_cast<zip_uint32_t>(level)) < 0) {
+            throw std::runtime_error("Failed to set compression of " + name + ": " + zip_strerror(output));
+        }
+    };
+
+    try {
+        zip_int64_t num_entries = zip_get_num_entries(source, 0);
+        for (zip_int64_t i = 0; i < num_entries; ++i) {
+            const char* name = zip_get_name(source, i, 0);
+            if (!name) {
+                continue;
+            }
+            const std::string source_name(name);
+            std::optional<std::string> target = map_path(source_name);
+            if (!target || injected_.count(*target) || !written.insert(*target).second) {
+                continue;
+            }
+
+            if (!source_name.empty() && source_name.back() == '/') {
+                if (zip_dir_add(output, target->c_str(), ZIP_FL_ENC_UTF_8) < 0) {
+                    throw std::runtime_error("Failed to add directory " + *target + ": " + zip_strerror(output));
+                }
+            }
+            else if (auto rewriter = rewriters_.find(source_name); rewriter != rewriters_.end()) {
+                zip_file_t* zf = zip_fopen_index(source, i, 0);
+                if (!zf) {
+                    throw std::runtime_error("Failed to open " + source_name + " in " + source_zip_);
+                }
+                std::string content;
+                char buffer[65536];
+                zip_int64_t bytes_read;
+                while ((bytes_read = zip_fread(zf, buffer, sizeof(buffer))) > 0) {
+                    content.append(buffer, static_cast<std::size_t>(bytes_read));
+                }
+                zip_fclose(zf);
+
+                buffers.push_back(rewriter->second(source_name, content));
+                add_buffer(*target, buffers.back());
+            }
+            else {
+                zip_source_t* src = zip_source_zip(output, source, i, ZIP_FL_COMPRESSED, 0, -1);
+                if (!src || zip_file_add(output, target->c_str(), src, ZIP_FL_OVERWRITE | ZIP_FL_ENC_UTF_8) < 0) {
+                    zip_source_free(src);
+                    throw std::runtime_error("Failed to copy " + source_name + ": " + zip_strerror(output));
+                }
+            }
+            ++count;
+        }
+
+        for (const auto& [path, content] : injected_) {
+            add_buffer(path, content);
+            ++count;
+        }
+    }
+    catch (...) {
+        zip_discard(output);
+        zip_close(source);
+        throw;
+    }
+
+    if (zip_close(output) < 0) {
+        std::string message = zip_strerror(output);
+        zip_discard(output);
+        zip_close(source);
+        throw std::runtime_error("Failed to write " + output_zip + ": " + message);
+    }
+    zip_close(source);
+
+    std::error_code ec;
+    const std::uintmax_t zip_size = std::filesystem::file_size(output_zip, ec);
+    Instrumentation::add(Instrumentation::Counter::EntriesProcessed, count);
+    Instrumentation::add(Instrumentation::Counter::BytesWritten, ec ? 0 : zip_size);
+    utils::print_color_msg("    Final zip generated", "\033[33m");  // Yellow
+    return count;
+}
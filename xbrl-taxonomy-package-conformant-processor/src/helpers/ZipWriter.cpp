@@ -0,0 +1,498 @@
+#include "../../includes/ZipWriter.hpp"
+#include <algorithm>
+#include <chrono>
+#include <ctime>
+#include <filesystem>
+#include <stdexcept>
+#include <zlib.h>
+
+namespace fs = std::filesystem;
+
+namespace {
+
+    constexpr std::uint32_t LOCAL_HEADER_SIGNATURE = 0x04034b50;
+    constexpr std::uint32_t CENTRAL_HEADER_SIGNATURE = 0x02014b50;
+    constexpr std::uint32_t EOCD_SIGNATURE = 0x06054b50;
+    constexpr std::uint32_t ZIP64_EOCD_SIGNATURE = 0x06064b50;
+    constexpr std::uint32_t ZIP64_LOCATOR_SIGNATURE = 0x07064b50;
+    constexpr std::uint64_t ZIP64_LIMIT = 0xFFFFFFFF;
+    constexpr std::uint16_t ZIP64_ENTRIES_LIMIT = 0xFFFF;
+    constexpr std::uint16_t VERSION_DEFAULT = 20;
+    constexpr std::uint16_t VERSION_ZIP64 = 45;
+    constexpr std::uint16_t HOST_UNIX = 3 << 8;
+    constexpr std::uint32_t REGULAR_FILE_ATTRIBUTES = 0100644u << 16;
+    constexpr std::uint16_t FLAG_ENCRYPTED = 0x0001;
+    constexpr std::uint16_t FLAG_UTF8 = 0x0800;
+
+    /// Deflate window, the dictionary a chunk is primed with.
+    constexpr std::size_t WINDOW_SIZE = 32 * 1024;
+
+    void put_u16(std::string& out, std::uint16_t value) {
+        out += static_cast<char>(value & 0xFF);
+        out += static_cast<char>(value >> 8);
+    }
+
+    void put_u32(std::string& out, std::uint32_t value) {
+        put_u16(out, static_cast<std::uint16_t>(value & 0xFFFF));
+        put_u16(out, static_cast<std::uint16_t>(value >> 16));
+    }
+
+    void put_u64(std::string& out, std::uint64_t value) {
+        put_u32(out, static_cast<std::uint32_t>(value & 0xFFFFFFFF));
+        put_u32(out, static_cast<std::uint32_t>(value >> 32));
+    }
+
+    /**
+     * @brief Converts a time to the MS-DOS format of zip headers (local time, date << 16 | time).
+     */
+    std::uint32_t to_dos_time(std::time_t time) {
+        std::tm tm{};
+#ifdef _WIN32
+        localtime_s(&tm, &time);
+#else
+        localtime_r(&time, &tm);
+#endif
+        if (tm.tm_year < 80) {
+            return (1u << 21) | (1u << 16);  // 1980-01-01, the earliest MS-DOS date.
+        }
+        return static_cast<std::uint32_t>(((tm.tm_year - 80) << 25) | ((tm.tm_mon + 1) << 21) | (tm.tm_mday << 16)
+            | (tm.tm_hour << 11) | (tm.tm_min << 5) | (tm.tm_sec / 2));
+    }
+
+    /**
+     * @brief Get the modification time of a file in MS-DOS format, or the current time.
+     */
+    std::uint32_t file_dos_time(const std::string& file_path) {
+        std::error_code ec;
+        const fs::file_time_type time = fs::last_write_time(file_path, ec);
+        if (ec) {
+            return to_dos_time(std::time(nullptr));
+        }
+        // The file clock's epoch is unspecified before C++20's clock_cast, so go through now().
+        const auto system_time = std::chrono::time_point_cast<std::chrono::system_clock::duration>(
+            time - fs::file_time_type::clock::now() + std::chrono::system_clock::now());
+        return to_dos_time(std::chrono::system_clock::to_time_t(system_time));
+    }
+
+    /**
+     * @brief Get the general purpose flags of a new entry: UTF-8 names and the deflate level hint.
+     */
+    std::uint16_t entry_flags(const std::string& name, int level) {
+        std::uint16_t flags = 0;
+        if (std::any_of(name.begin(), name.end(), [](char c) { return static_cast<unsigned char>(c) >= 0x80; })) {
+            flags |= FLAG_UTF8;
+        }
+        if (level >= 8) {
+            flags |= 0x0002;  // Maximum compression.
+        }
+        else if (level == 1) {
+            flags |= 0x0006;  // Super fast compression.
+        }
+        else if (level == 2) {
+            flags |= 0x0004;  // Fast compression.
+        }
+        return flags;
+    }
+
+    /**
+     * @brief Reads a whole file.
+     */
+    std::string read_file(const std::string& file_path) {
+        std::ifstream in(file_path, std::ios::binary);
+        if (!in) {
+            throw std::runtime_error("cannot open " + file_path);
+        }
+        std::error_code ec;
+        const std::uintmax_t size = fs::file_size(file_path, ec);
+        std::string content;
+        content.resize(ec ? 0 : static_cast<std::size_t>(size));
+        in.read(content.data(), static_cast<std::streamsize>(content.size()));
+        if (static_cast<std::size_t>(in.gcount()) != content.size()) {
+            throw std::runtime_error("cannot read " + file_path);
+        }
+        return content;
+    }
+
+    /**
+     * @brief Compresses one chunk into raw deflate data.
+     *
+     * A chunk primed with the end of the previous chunk as dictionary
+     * continues its back-references; a chunk that is not the last one ends
+     * with a sync flush, so it stops on a byte boundary without closing the
+     * stream. Level 0 stores the chunk.
+     */
+    std::string deflate_chunk(const char* data, std::size_t size, const char* dictionary, std::size_t dictionary_size, bool last, int level) {
+        if (level == 0) {
+            return std::string(data, size);
+        }
+
+        z_stream stream{};
+        if (deflateInit2(&stream, level, Z_DEFLATED, -MAX_WBITS, 8, Z_DEFAULT_STRATEGY) != Z_OK) {
+            throw std::runtime_error("deflateInit2 failed");
+        }
+        if (dictionary_size > 0) {
+            deflateSetDictionary(&stream, reinterpret_cast<const Bytef*>(dictionary), static_cast<uInt>(dictionary_size));
+        }
+
+        // The bound covers Z_FINISH; a sync flush adds at most a few bytes.
+        std::string compressed(deflateBound(&stream, static_cast<uLong>(size)) + 16, '\0');
+        stream.next_in = reinterpret_cast<Bytef*>(const_cast<char*>(data));
+        stream.avail_in = static_cast<uInt>(size);
+        int ret;
+        do {
+            if (stream.total_out == compressed.size()) {
+                compressed.resize(compressed.size() * 2);
+            }
+            stream.next_out = reinterpret_cast<Bytef*>(compressed.data() + stream.total_out);
+            stream.avail_out = static_cast<uInt>(compressed.size() - stream.total_out);
+            ret = deflate(&stream, last ? Z_FINISH : Z_SYNC_FLUSH);
+        } while (ret == Z_OK && (last || stream.avail_out == 0));
+        deflateEnd(&stream);
+        if (ret != (last ? Z_STREAM_END : Z_OK) && !(ret == Z_BUF_ERROR && !last)) {
+            throw std::runtime_error("deflate failed");
+        }
+        compressed.resize(stream.total_out);
+        return compressed;
+    }
+
+}  // namespace
+
+/**
+ * @brief Creates (or truncates) the archive.
+ */
+ZipWriter::ZipWriter(const std::string& path, int level, std::size_t num_threads)
+    : path_(path), level_(level < 0 ? Z_DEFAULT_COMPRESSION : level), offset_(0), added_(0), pending_bytes_(0), closed_(false),
+      pool_(num_threads == 0 ? ThreadPool::default_concurrency() : num_threads) {
+    if (level < -1 || level > 9) {
+        throw std::invalid_argument("Compression level must be between -1 and 9, got " + std::to_string(level));
+    }
+    if (level_ == Z_DEFAULT_COMPRESSION) {
+        level_ = 6;
+    }
+    out_.open(path, std::ios::binary | std::ios::trunc);
+    if (!out_) {
+        throw std::runtime_error("Cannot create " + path);
+    }
+}
+
+ZipWriter::~ZipWriter() {
+    if (!closed_) {
+        try {
+            close();
+        }
+        catch (const std::exception&) {
+            // Destructors must not throw; call close() to see the error.
+        }
+    }
+}
+
+/**
+ * @brief Adds a file from disk; small files are read by the compression workers.
+ */
+void ZipWriter::add_file(const std::string& name, const std::string& file_path) {
+    Pending pending;
+    pending.name = name;
+    pending.dos_time = file_dos_time(file_path);
+    pending.method = level_ == 0 ? 0 : 8;
+    pending.flags = entry_flags(name, level_);
+
+    std::error_code ec;
+    const std::uintmax_t size = fs::file_size(file_path, ec);
+    pending.pending_bytes = ec ? 0 : size;
+    if (ec || size <= CHUNK_SIZE) {
+        const int level = level_;
+        pending.chunks.push_back(pool_.submit([file_path, level] {
+            Chunk chunk;
+            const std::string content = read_file(file_path);
+            chunk.data = deflate_chunk(content.data(), content.size(), nullptr, 0, true, level);
+            chunk.crc = static_cast<std::uint32_t>(crc32(0L, reinterpret_cast<const Bytef*>(content.data()), static_cast<uInt>(content.size())));
+            chunk.size = content.size();
+            return chunk;
+        }));
+    }
+    else {
+        std::shared_ptr<const std::string> content;
+        try {
+            content = std::make_shared<const std::string>(read_file(file_path));
+        }
+        catch (const std::exception& e) {
+            failed_.push_back(name + ": " + e.what());
+            return;
+        }
+        submit_chunks(pending, std::move(content));
+    }
+    enqueue(std::move(pending));
+}
+
+/**
+ * @brief Adds content from memory.
+ */
+void ZipWriter::add_buffer(const std::string& name, std::string content) {
+    Pending pending;
+    pending.name = name;
+    pending.dos_time = to_dos_time(std::time(nullptr));
+    pending.method = level_ == 0 ? 0 : 8;
+    pending.flags = entry_flags(name, level_);
+    pending.pending_bytes = content.size();
+    if (content.size() <= CHUNK_SIZE) {
+        const int level = level_;
+        pending.chunks.push_back(pool_.submit([content = std::move(content), level] {
+            Chunk chunk;
+            chunk.data = deflate_chunk(content.data(), content.size(), nullptr, 0, true, level);
+            chunk.crc = static_cast<std::uint32_t>(crc32(0L, reinterpret_cast<const Bytef*>(content.data()), static_cast<uInt>(content.size())));
+            chunk.size = content.size();
+            return chunk;
+        }));
+    }
+    else {
+        submit_chunks(pending, std::make_shared<const std::string>(std::move(content)));
+    }
+    enqueue(std::move(pending));
+}
+
+/**
+ * @brief Adds an entry of another archive with its compressed data.
+ */
+void ZipWriter::add_raw(const std::string& name, const MappedZipReader& archive, const MappedZipReader::Entry& entry) {
+    if (entry.flags & FLAG_ENCRYPTED) {
+        throw std::runtime_error("Encrypted entries are not supported: " + std::string(entry.name));
+    }
+    Pending pending;
+    pending.name = name;
+    pending.dos_time = entry.dos_time;
+    pending.method = entry.comp_method;
+    // The sizes go into the local header, so no data descriptor (bit 3) follows the data.
+    pending.flags = static_cast<std::uint16_t>((entry.flags & 0x0006) | entry_flags(name, -1));
+    pending.raw = archive.raw(entry);
+    pending.raw_crc = entry.crc;
+    pending.raw_size = entry.size;
+    enqueue(std::move(pending));
+}
+
+/**
+ * @brief Submits the chunks of shared content to the thread pool.
+ */
+void ZipWriter::submit_chunks(Pending& pending, std::shared_ptr<const std::string> content) {
+    const int level = level_;
+    for (std::size_t start = 0; start < content->size(); start += CHUNK_SIZE) {
+        const std::size_t length = std::min(CHUNK_SIZE, content->size() - start);
+        const std::size_t dictionary = std::min(WINDOW_SIZE, start);
+        const bool last = start + length == content->size();
+        pending.chunks.push_back(pool_.submit([content, start, length, dictionary, last, level] {
+            Chunk chunk;
+            const char* data = content->data() + start;
+            chunk.data = deflate_chunk(data, length, data - dictionary, dictionary, last, level);
+            chunk.crc = static_cast<std::uint32_t>(crc32(0L, reinterpret_cast<const Bytef*>(data), static_cast<uInt>(length)));
+            chunk.size = length;
+            return chunk;
+        }));
+    }
+}
+
+/**
+ * @brief Queues an entry and writes the finished ones at the front of the queue.
+ */
+void ZipWriter::enqueue(Pending pending) {
+    if (closed_) {
+        throw std::runtime_error("Cannot add " + pending.name + ", " + path_ + " is closed");
+    }
+    ++added_;
+    pending_bytes_ += pending.pending_bytes;
+    pending_.push_back(std::move(pending));
+    flush(false);
+}
+
+/**
+ * @brief Writes the finished entries at the front of the queue, waiting for them if needed.
+ */
+void ZipWriter::flush(bool all) {
+    while (!pending_.empty()) {
+        Pending& front = pending_.front();
+        const bool wait = all || pending_bytes_ > MAX_PENDING_BYTES;
+        const bool ready = wait || std::all_of(front.chunks.begin(), front.chunks.end(), [](const std::future<Chunk>& chunk) {
+            return chunk.wait_for(std::chrono::seconds(0)) == std::future_status::ready;
+        });
+        if (!ready) {
+            break;
+        }
+        write_entry(front);
+        pending_bytes_ -= front.pending_bytes;
+        pending_.pop_front();
+    }
+}
+
+/**
+ * @brief Writes the local header and the data of an entry.
+ *
+ * The chunks are collected first, so an entry whose file cannot be read is
+ * left out without writing anything.
+ */
+void ZipWriter::write_entry(Pending& pending) {
+    std::vector<Chunk> chunks;
+    std::uint32_t crc = pending.raw_crc;
+    std::uint64_t size = pending.raw_size;
+    std::uint64_t comp_size = pending.raw.size();
+    if (pending.raw.data() == nullptr) {
+        crc = static_cast<std::uint32_t>(crc32(0L, Z_NULL, 0));
+        chunks.reserve(pending.chunks.size());
+        try {
+            for (auto& future : pending.chunks) {
+                chunks.push_back(future.get());
+            }
+        }
+        catch (const std::exception& e) {
+            failed_.push_back(pending.name + ": " + e.what());
+            return;
+        }
+        for (const auto& chunk : chunks) {
+            crc = static_cast<std::uint32_t>(crc32_combine(crc, chunk.crc, static_cast<z_off_t>(chunk.size)));
+            size += chunk.size;
+            comp_size += chunk.data.size();
+        }
+    }
+
+    Record record{ pending.name, pending.dos_time, pending.method, pending.flags, crc, comp_size, size, offset_ };
+    const bool zip64 = size >= ZIP64_LIMIT || comp_size >= ZIP64_LIMIT;
+
+    std::string header;
+    header.reserve(30 + pending.name.size() + 20);
+    put_u32(header, LOCAL_HEADER_SIGNATURE);
+    put_u16(header, zip64 ? VERSION_ZIP64 : VERSION_DEFAULT);
+    put_u16(header, pending.flags);
+    put_u16(header, pending.method);
+    put_u32(header, pending.dos_time);
+    put_u32(header, crc);
+    put_u32(header, zip64 ? static_cast<std::uint32_t>(ZIP64_LIMIT) : static_cast<std::uint32_t>(comp_size));
+    put_u32(header, zip64 ? static_cast<std::uint32_t>(ZIP64_LIMIT) : static_cast<std::uint32_t>(size));
+    put_u16(header, static_cast<std::uint16_t>(pending.name.size()));
+    put_u16(header, zip64 ? 20 : 0);
+    header += pending.name;
+    if (zip64) {
+        put_u16(header, 0x0001);
+        put_u16(header, 16);
+        put_u64(header, size);
+        put_u64(header, comp_size);
+    }
+    write(header.data(), header.size());
+
+    if (pending.raw.data() != nullptr) {
+        write(pending.raw.data(), pending.raw.size());
+    }
+    for (const auto& chunk : chunks) {
+        write(chunk.data.data(), chunk.data.size());
+    }
+    records_.push_back(std::move(record));
+}
+
+/**
+ * @brief Writes the central directory and the end of central directory records.
+ */
+void ZipWriter::write_central_directory() {
+    const std::uint64_t cd_offset = offset_;
+    for (const auto& record : records_) {
+        std::string extra;
+        if (record.size >= ZIP64_LIMIT) {
+            put_u64(extra, record.size);
+        }
+        if (record.comp_size >= ZIP64_LIMIT) {
+            put_u64(extra, record.comp_size);
+        }
+        if (record.offset >= ZIP64_LIMIT) {
+            put_u64(extra, record.offset);
+        }
+        if (!extra.empty()) {
+            std::string field;
+            put_u16(field, 0x0001);
+            put_u16(field, static_cast<std::uint16_t>(extra.size()));
+            extra = field + extra;
+        }
+        const std::uint16_t version = extra.empty() ? VERSION_DEFAULT : VERSION_ZIP64;
+
+        std::string header;
+        header.reserve(46 + record.name.size() + extra.size());
+        put_u32(header, CENTRAL_HEADER_SIGNATURE);
+        put_u16(header, static_cast<std::uint16_t>(HOST_UNIX | version));
+        put_u16(header, version);
+        put_u16(header, record.flags);
+        put_u16(header, record.method);
+        put_u32(header, record.dos_time);
+        put_u32(header, record.crc);
+        put_u32(header, static_cast<std::uint32_t>(std::min(record.comp_size, ZIP64_LIMIT)));
+        put_u32(header, static_cast<std::uint32_t>(std::min(record.size, ZIP64_LIMIT)));
+        put_u16(header, static_cast<std::uint16_t>(record.name.size()));
+        put_u16(header, static_cast<std::uint16_t>(extra.size()));
+        put_u16(header, 0);     // Comment length.
+        put_u16(header, 0);     // Disk number.
+        put_u16(header, 0);     // Internal attributes.
+        put_u32(header, REGULAR_FILE_ATTRIBUTES);
+        put_u32(header, static_cast<std::uint32_t>(std::min(record.offset, ZIP64_LIMIT)));
+        header += record.name;
+        header += extra;
+        write(header.data(), header.size());
+    }
+    const std::uint64_t cd_size = offset_ - cd_offset;
+    const std::uint64_t entries = records_.size();
+
+    std::string end;
+    if (entries >= ZIP64_ENTRIES_LIMIT || cd_offset >= ZIP64_LIMIT || cd_size >= ZIP64_LIMIT) {
+        const std::uint64_t zip64_eocd = offset_;
+        put_u32(end, ZIP64_EOCD_SIGNATURE);
+        put_u64(end, 44);       // Size of the remaining record.
+        put_u16(end, static_cast<std::uint16_t>(HOST_UNIX | VERSION_ZIP64));
+        put_u16(end, VERSION_ZIP64);
+        put_u32(end, 0);        // Disk number.
+        put_u32(end, 0);        // Disk of the central directory.
+        put_u64(end, entries);
+        put_u64(end, entries);
+        put_u64(end, cd_size);
+        put_u64(end, cd_offset);
+        put_u32(end, ZIP64_LOCATOR_SIGNATURE);
+        put_u32(end, 0);        // Disk of the ZIP64 end of central directory.
+        put_u64(end, zip64_eocd);
+        put_u32(end, 1);        // Number of disks.
+    }
+    put_u32(end, EOCD_SIGNATURE);
+    put_u16(end, 0);
+    put_u16(end, 0);
+    put_u16(end, static_cast<std::uint16_t>(std::min<std::uint64_t>(entries, ZIP64_ENTRIES_LIMIT)));
+    put_u16(end, static_cast<std::uint16_t>(std::min<std::uint64_t>(entries, ZIP64_ENTRIES_LIMIT)));
+    put_u32(end, static_cast<std::uint32_t>(std::min(cd_size, ZIP64_LIMIT)));
+    put_u32(end, static_cast<std::uint32_t>(std::min(cd_offset, ZIP64_LIMIT)));
+    put_u16(end, 0);            // Comment length.
+    write(end.data(), end.size());
+}
+
+/**
+ * @brief Writes bytes and keeps track of the offset.
+ */
+void ZipWriter::write(const void* data, std::size_t size) {
+    out_.write(static_cast<const char*>(data), static_cast<std::streamsize>(size));
+    if (!out_) {
+        throw std::runtime_error("Cannot write " + path_);
+    }
+    offset_ += size;
+}
+
+/**
+ * @brief Writes the pending entries and the central directory, and closes the archive.
+ */
+void ZipWriter::close() {
+    if (closed_) {
+        return;
+    }
+    closed_ = true;
+    flush(true);
+    write_central_directory();
+    out_.close();
+    if (!out_) {
+        throw std::runtime_error("Cannot write " + path_);
+    }
+}
+
+std::size_t ZipWriter::size() const {
+    return added_;
+}
+
+const std::vector<std::string>& ZipWriter::failed() const {
+    return failed_;
+}
@@ -1,17 +1,59 @@
 #include "../../includes/logger.hpp"
 #include <filesystem>
-#include <ctime>
+#include <functional>
+#include <stdexcept>
 
-std::unique_ptr<Logger> Logger::instance_ = nullptr;
+namespace {
+
+    /// Records a caller may queue before it waits for the writer.
+    constexpr std::size_t MAX_QUEUED = 1 << 16;
+
+    /**
+     * @brief Appends a string as a JSON string literal.
+     */
+    void append_json_string(const std::string& value, std::string& out) {
+        static const char* HEX = "0123456789abcdef";
+        out += '"';
+        for (const char c : value) {
+            switch (c) {
+            case '"':
+                out += "\\\"";
+                break;
+            case '\\':
+                out += "\\\\";
+                break;
+            case '\n':
+                out += "\\n";
+                break;
+            case '\r':
+                out += "\\r";
+                break;
+            case '\t':
+                out += "\\t";
+                break;
+            default:
+                if (static_cast<unsigned char>(c) < 0x20) {
+                    out += "\\u00";
+                    out += HEX[(c >> 4) & 0xF];
+                    out += HEX[c & 0xF];
+                }
+                else {
+                    out += c;
+                }
+            }
+        }
+        out += '"';
+    }
+
+}  // namespace
 
 /**
  * @brief Get the singleton instance of the Logger.
  */
 Logger& Logger::get_instance(const std::string& log_file, LogLevel level, size_t max_bytes, int backup_count) {
-    if (instance_ == nullptr) {
-        instance_ = std::unique_ptr<Logger>(new Logger(log_file, level, max_bytes, backup_count));
-    }
-    return *instance_;
+    // Initialization of a function-local static is thread-safe.
+    static Logger instance(log_file, level, max_bytes, backup_count);
+    return instance;
 }
 
 /**
@@ -26,6 +68,23 @@ Logger::Logger(const std::string& log_file, LogLevel level, size_t max_bytes, in
         std::cerr << "Failed to open log file: " << log_file_ << std::endl;
         throw std::runtime_error("Failed to open log file");
     }
+    std::error_code ec;
+    const std::uintmax_t size = std::filesystem::file_size(log_file_, ec);
+    written_bytes_ = ec ? 0 : size;
+
+    writer_ = std::thread(&Logger::run, this);
+}
+
+/**
+ * @brief Drains the queue and stops the writer thread.
+ */
+Logger::~Logger() {
+    {
+        std::lock_guard<std::mutex> lock(mutex_);
+        stop_ = true;
+    }
+    wake_writer_.notify_one();
+    writer_.join();
 }
 
 /**
@@ -39,8 +98,7 @@ void Logger::info(const std::string& message) {
  * @brief Log an error-level message.
  */
 void Logger::error(const std::string& message) {
-    log(LogLevel::ERROR, message);
-    std::cerr << level_to_string(LogLevel::ERROR) << ": " << message << std::endl;  // Console output
+    log(LogLevel::ERROR, message, true);  // Console output
 }
 
 /**
@@ -51,27 +109,128 @@ void Logger::debug(const std::string& message) {
 }
 
 /**
- * @brief Log a message with the given log level.
+ * @brief Block until all messages logged so far are written.
  */
-void Logger::log(LogLevel level, const std::string& message) {
-    if (level >= log_level_) {
-        // Rotate the log if necessary.
-        if (log_stream_.tellp() >= static_cast<std::streampos>(max_bytes_)) {
-            rotate_log();
+void Logger::flush() {
+    std::unique_lock<std::mutex> lock(mutex_);
+    const std::uint64_t target = queued_;
+    wake_callers_.wait(lock, [&] { return done_ >= target; });
+}
+
+void Logger::set_format(Format format) {
+    format_ = format;
+}
+
+Logger::Format Logger::parse_format(const std::string& name) {
+    if (name == "text") {
+        return Format::TEXT;
+    }
+    if (name == "json") {
+        return Format::JSON;
+    }
+    throw std::invalid_argument("Unknown log format: " + name + " (expected text or json)");
+}
+
+/**
+ * @brief Queue a message with the given log level.
+ */
+void Logger::log(LogLevel level, const std::string& message, bool console) {
+    const bool to_file = level >= log_level_.load(std::memory_order_relaxed);
+    if (!to_file && !console) {
+        return;
+    }
+
+    Record record{ std::time(nullptr), level, to_file, console, std::hash<std::thread::id>{}(std::this_thread::get_id()), message };
+    {
+        std::unique_lock<std::mutex> lock(mutex_);
+        wake_callers_.wait(lock, [&] { return queue_.size() < MAX_QUEUED; });
+        queue_.push_back(std::move(record));
+        ++queued_;
+    }
+    wake_writer_.notify_one();
+}
+
+/**
+ * @brief Writer thread: takes the whole queue at once and writes it as one batch.
+ */
+void Logger::run() {
+    std::vector<Record> batch;
+    std::string buffer;
+    std::string console;
+
+    while (true) {
+        {
+            std::unique_lock<std::mutex> lock(mutex_);
+            wake_writer_.wait(lock, [&] { return stop_ || !queue_.empty(); });
+            if (queue_.empty()) {
+                break;  // Stopped and drained.
+            }
+            batch.swap(queue_);
+        }
+        wake_callers_.notify_all();  // Room in the queue.
+
+        buffer.clear();
+        console.clear();
+        for (const Record& record : batch) {
+            if (record.console) {
+                console.append(level_to_string(record.level)).append(": ").append(record.message).append(1, '\n');
+            }
+            if (!record.to_file) {
+                continue;
+            }
+            // Rotate the log if necessary.
+            if (written_bytes_ + buffer.size() > 0 && written_bytes_ + buffer.size() >= max_bytes_) {
+                log_stream_.write(buffer.data(), static_cast<std::streamsize>(buffer.size()));
+                buffer.clear();
+                rotate_log();
+            }
+            format_record(record, buffer);
+        }
+        if (!console.empty()) {
+            std::cerr << console << std::flush;
         }
+        log_stream_.write(buffer.data(), static_cast<std::streamsize>(buffer.size()));
+        log_stream_.flush();
+        written_bytes_ += buffer.size();
+
+        const std::size_t count = batch.size();
+        batch.clear();
+        {
+            std::lock_guard<std::mutex> lock(mutex_);
+            done_ += count;
+        }
+        wake_callers_.notify_all();
+    }
+}
 
-        // Get current time.
-        std::time_t now = std::time(nullptr);
-        char time_str[20];
-        std::strftime(time_str, sizeof(time_str), "%Y-%m-%d %H:%M:%S", std::localtime(&now));
+/**
+ * @brief Appends one formatted line; the timestamp is formatted once per second.
+ */
+void Logger::format_record(const Record& record, std::string& out) {
+    if (record.time != cached_time_) {
+        std::tm tm{};
+#ifdef _WIN32
+        localtime_s(&tm, &record.time);
+#else
+        localtime_r(&record.time, &tm);
+#endif
+        std::strftime(cached_time_str_, sizeof(cached_time_str_), "%Y-%m-%d %H:%M:%S", &tm);
+        cached_time_ = record.time;
+    }
 
-        // Write log entry.
-        log_stream_ << time_str << " - " << level_to_string(level) << " - " << message << std::endl;
+    if (format_.load(std::memory_order_relaxed) == Format::JSON) {
+        out.append("{\"time\": \"").append(cached_time_str_).append("\", \"level\": \"").append(level_to_string(record.level))
+            .append("\", \"thread\": ").append(std::to_string(record.thread)).append(", \"message\": ");
+        append_json_string(record.message, out);
+        out.append("}\n");
+    }
+    else {
+        out.append(cached_time_str_).append(" - ").append(level_to_string(record.level)).append(" - ").append(record.message).append(1, '\n');
     }
 }
 
 /**
- * @brief Rotates the log file when it reaches the specified size limit.
+ * @brief Rotates the log file when it reaches the specified size limit (writer thread).
  */
 void Logger::rotate_log() {
     log_stream_.close();
@@ -80,23 +239,26 @@ void Logger::rotate_log() {
     for (int i = backup_count_ - 1; i > 0; --i) {
         std::string old_log = log_file_ + "." + std::to_string(i);
         std::string new_log = log_file_ + "." + std::to_string(i + 1);
-        if (std::filesystem::exists(old_log)) {
-            std::filesystem::rename(old_log, new_log);
+        std::error_code ec;
+        if (std::filesystem::exists(old_log, ec)) {
+            std::filesystem::rename(old_log, new_log, ec);
         }
     }
 
     // Rename the current log file to log_file.1
     std::string first_backup = log_file_ + ".1";
-    std::filesystem::rename(log_file_, first_backup);
+    std::error_code ec;
+    std::filesystem::rename(log_file_, first_backup, ec);
 
     // Reopen the log file for new entries.
     log_stream_.open(log_file_, std::ios::app | std::ios::out);
+    written_bytes_ = 0;
 }
 
 /**
  * @brief Converts a log level to a string representation.
  */
-std::string Logger::level_to_string(LogLevel level) {
+const char* Logger::level_to_string(LogLevel level) {
     switch (level) {
     case LogLevel::INFO:
         return "INFO";
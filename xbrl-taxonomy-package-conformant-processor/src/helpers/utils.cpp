@@ -1,4 +1,7 @@
 #include "../../includes/utils.hpp"
+#include "../../includes/Instrumentation.hpp"
+#include "../../includes/MappedZipReader.hpp"
+#include "../../includes/ZipWriter.hpp"
 #include <iostream>
 #include <filesystem>
 #include <boost/filesystem.hpp>
@@ -7,46 +10,317 @@
 #include <string>
 #include <vector>
 #include <cstdio>
+#include <cstring>
+#include <unordered_map>
+#include <zlib.h>
+#include <algorithm>
+#include <atomic>
+#include <memory>
+#include <mutex>
+#include <set>
+#include <stdexcept>
+#include <thread>
+#ifndef _WIN32
+#include <fcntl.h>
+#include <unistd.h>
+#endif
 
 namespace fs = std::filesystem;
 
 namespace utils {
 
+    namespace {
+
+        /// Deflate level of the archives written by gen_zip_archive (-1: zlib's default).
+        std::atomic<int> zip_compression_level(-1);
+
+        /// Threads of an extraction called with num_threads = 0 (0: number of cores).
+        std::atomic<unsigned int> default_extraction_threads(0);
+
+        /**
+         * @brief Central directory data of the source archive used for passthrough lookups.
+         */
+        struct SourceEntries {
+            std::unordered_multimap<std::uint64_t, const MappedZipReader::Entry*> by_size;  ///< Uncompressed size -> entry.
+        };
+
+        /**
+         * @brief Indexes all file entries of the source archive by size.
+         */
+        SourceEntries index_source_entries(const MappedZipReader& source) {
+            SourceEntries entries;
+            entries.by_size.reserve(source.entries().size());
+            for (const auto& entry : source.entries()) {
+                if (!entry.is_dir && (entry.flags & 0x1) == 0) {
+                    entries.by_size.emplace(entry.size, &entry);
+                }
+            }
+            return entries;
+        }
+
+        /**
+         * @brief Check whether a file has the same bytes as an archive entry.
+         */
+        bool same_content(const MappedZipReader& source, const MappedZipReader::Entry& entry, const fs::path& file) {
+            std::string buffer;
+            std::string_view content;
+            try {
+                content = source.read(entry, buffer);
+            }
+            catch (const std::runtime_error&) {
+                return false;
+            }
+            std::ifstream in(file, std::ios::binary);
+            std::vector<char> chunk(1 << 16);
+            std::size_t offset = 0;
+            while (in) {
+                in.read(chunk.data(), static_cast<std::streamsize>(chunk.size()));
+                const std::size_t bytes_read = static_cast<std::size_t>(in.gcount());
+                if (bytes_read > content.size() - offset || std::memcmp(chunk.data(), content.data() + offset, bytes_read) != 0) {
+                    return false;
+                }
+                offset += bytes_read;
+            }
+            return offset == content.size();
+        }
+
+        /**
+         * @brief Finds a source entry with the same content as a file on disk.
+         *
+         * The entry of the same path is trusted if its size and CRC-32 match,
+         * since the file was extracted from it. An entry of another path (a
+         * moved file) is only used if its bytes equal the file, as a CRC-32
+         * match alone could pass the data of a different file through. The CRC
+         * of the file is only computed if an entry of the same size exists.
+         *
+         * @return The entry, or nullptr if the file was modified or generated.
+         */
+        const MappedZipReader::Entry* find_unchanged_entry(const MappedZipReader& source, const SourceEntries& entries,
+            const fs::path& file, const std::string& relative_path) {
+            const std::uint64_t size = fs::file_size(file);
+            bool crc_known = false;
+            std::uint32_t crc = 0;
+            auto matches = [&](const MappedZipReader::Entry* entry) {
+                if (entry->is_dir || (entry->flags & 0x1) != 0 || entry->size != size) {
+                    return false;
+                }
+                if (!crc_known) {
+                    crc = file_crc32(file.string());
+                    crc_known = true;
+                }
+                return entry->crc == crc;
+            };
+
+            const MappedZipReader::Entry* by_name = source.find(relative_path);
+            if (by_name != nullptr && matches(by_name)) {
+                return by_name;
+            }
+            auto range = entries.by_size.equal_range(size);
+            for (auto it = range.first; it != range.second; ++it) {
+                if (it->second != by_name && matches(it->second) && same_content(source, *it->second, file)) {
+                    return it->second;
+                }
+            }
+            return nullptr;
+        }
+
+        /**
+         * @brief Copies an entry of another archive with its compressed data.
+         *
+         * @return False if the entry cannot be copied (encrypted or corrupt), so the file is compressed instead.
+         */
+        bool add_raw_entry(ZipWriter& zip, const std::string& name, const MappedZipReader& archive, const MappedZipReader::Entry& entry) {
+            try {
+                zip.add_raw(name, archive, entry);
+                return true;
+            }
+            catch (const std::runtime_error&) {
+                return false;
+            }
+        }
+
+        /**
+         * @brief Opens an archive for raw passthrough, or returns nullptr if it cannot be read.
+         */
+        std::unique_ptr<const MappedZipReader> open_archive(const std::string& archive) {
+            try {
+                return std::make_unique<const MappedZipReader>(archive);
+            }
+            catch (const std::exception&) {
+                return nullptr;
+            }
+        }
+
+    }  // namespace
+
+    /**
+     * @brief Sets the deflate level of the archives written by gen_zip_archive.
+     */
+    void set_compression_level(int level) {
+        if (level < -1 || level > 9) {
+            throw std::invalid_argument("Compression level must be between -1 and 9, got " + std::to_string(level));
+        }
+        zip_compression_level = level;
+    }
+
+    /**
+     * @brief Get the deflate level of the archives written by gen_zip_archive.
+     */
+    int compression_level() {
+        return zip_compression_level;
+    }
+
     /**
      * @brief Generates a zip archive out of a root input folder.
      */
-    void gen_zip_archive(const std::string& folder_path, const std::string& zip_filename) {
+    bool gen_zip_archive(const std::string& folder_path, const std::string& zip_filename) {
+        return gen_zip_archive(folder_path, zip_filename, "");
+    }
+
+    /**
+     * @brief Generates a zip archive out of a root input folder, reusing compressed data of unchanged files.
+     */
+    bool gen_zip_archive(const std::string& folder_path, const std::string& zip_filename, const std::string& source_zip) {
+        return gen_zip_archive(folder_path, zip_filename, source_zip, "", {});
+    }
+
+    /**
+     * @brief Generates a zip archive out of a root input folder, reusing the previous output for unchanged files.
+     *
+     * New and modified files are deflated on a thread pool (see ZipWriter),
+     * unchanged files are copied with their compressed data. An incomplete
+     * archive is removed.
+     */
+    bool gen_zip_archive(const std::string& folder_path, const std::string& zip_filename, const std::string& source_zip,
+        const std::string& previous_zip, const std::set<std::string>& unchanged_paths) {
+        Instrumentation::ScopedTimer timer("zip");
         // Open the zip file for writing
-        int error = 0;
-        zip_t* zip = zip_open(zip_filename.c_str(), ZIP_CREATE | ZIP_TRUNCATE, &error);
-        if (!zip) {
+        std::unique_ptr<ZipWriter> zip;
+        try {
+            zip = std::make_unique<ZipWriter>(zip_filename, compression_level());
+        }
+        catch (const std::exception&) {
             print_color_msg("    Failed to open zip file for writing", "\033[31m");  // Red for error
-            return;
+            return false;
+        }
+
+        // Open the source archive for raw passthrough of unchanged files
+        std::unique_ptr<const MappedZipReader> source;
+        SourceEntries source_entries;
+        if (!source_zip.empty()) {
+            source = open_archive(source_zip);
+            if (source) {
+                source_entries = index_source_entries(*source);
+            }
+            else {
+                print_color_msg("    Failed to open source zip, recompressing all files", "\033[31m");
+            }
+        }
+
+        // Open the output of the previous run for the files known to be unchanged
+        std::unique_ptr<const MappedZipReader> previous;
+        if (!previous_zip.empty() && !unchanged_paths.empty()) {
+            previous = open_archive(previous_zip);
+            if (!previous) {
+                print_color_msg("    Failed to open previous output zip, checking all files", "\033[31m");
+            }
         }
 
-        // Walk through the folder and add files to the zip
-        for (const auto& entry : fs::recursive_directory_iterator(folder_path)) {
-            if (entry.is_regular_file()) {
-                std::string file_path = entry.path().string();
-                std::string relative_path = fs::relative(file_path, folder_path).string();
+        std::size_t reused = 0;
+        std::size_t copied = 0;
+        std::size_t compressed = 0;
+        std::error_code remove_error;
+
+        try {
+            // Walk through the folder and add files to the zip
+            for (const auto& entry : fs::recursive_directory_iterator(folder_path)) {
+                if (entry.is_regular_file()) {
+                    std::string file_path = entry.path().string();
+                    std::string relative_path = fs::relative(file_path, folder_path).generic_string();
 
-                // Add file to the zip archive
-                zip_source_t* source = zip_source_file(zip, file_path.c_str(), 0, 0);
-                if (!source || zip_file_add(zip, relative_path.c_str(), source, ZIP_FL_OVERWRITE) < 0) {
-                    print_color_msg("    Failed to add file to zip", "\033[31m");
-                    zip_source_free(source);
+                    // Copy the compressed data of unchanged files, compress everything else
+                    if (previous && unchanged_paths.count(relative_path) > 0) {
+                        const MappedZipReader::Entry* previous_entry = previous->find(relative_path);
+                        if (previous_entry != nullptr && add_raw_entry(*zip, relative_path, *previous, *previous_entry)) {
+                            ++reused;
+                            continue;
+                        }
+                    }
+                    if (source) {
+                        const MappedZipReader::Entry* source_entry = find_unchanged_entry(*source, source_entries, entry.path(), relative_path);
+                        if (source_entry != nullptr && add_raw_entry(*zip, relative_path, *source, *source_entry)) {
+                            ++copied;
+                            continue;
+                        }
+                    }
+                    zip->add_file(relative_path, file_path);
+                    ++compressed;
                 }
             }
+
+            // The source archives must stay open until the output has been written
+            zip->close();
+        }
+        catch (const std::exception& e) {
+            print_color_msg("    Failed to write zip: " + std::string(e.what()), "\033[31m");
+            zip.reset();
+            fs::remove(zip_filename, remove_error);
+            return false;
+        }
+        if (!zip->failed().empty()) {
+            for (const auto& message : zip->failed()) {
+                print_color_msg("    Failed to add file to zip: " + message, "\033[31m");
+            }
+            fs::remove(zip_filename, remove_error);
+            return false;
         }
 
-        zip_close(zip);
+        std::error_code size_error;
+        const std::uintmax_t zip_size = fs::file_size(zip_filename, size_error);
+        Instrumentation::add(Instrumentation::Counter::EntriesProcessed, reused + copied + compressed);
+        Instrumentation::add(Instrumentation::Counter::BytesWritten, size_error ? 0 : zip_size);
+        if (previous) {
+            print_color_msg("    " + std::to_string(reused) + " file(s) reused from the previous output", "\033[33m");
+        }
+        if (source) {
+            print_color_msg("    " + std::to_string(copied) + " file(s) copied unchanged, "
+                + std::to_string(compressed) + " file(s) compressed", "\033[33m");
+        }
         print_color_msg("    Final zip generated", "\033[33m");  // Yellow
+        return true;
+    }
+
+    /**
+     * @brief Computes the CRC-32 of a file, as stored in zip central directories.
+     */
+    std::uint32_t file_crc32(const std::string& file_path) {
+        std::ifstream in(file_path, std::ios::binary);
+        std::vector<char> buffer(1 << 16);
+        uLong crc = crc32(0L, Z_NULL, 0);
+        while (in) {
+            in.read(buffer.data(), static_cast<std::streamsize>(buffer.size()));
+            std::streamsize bytes_read = in.gcount();
+            if (bytes_read > 0) {
+                crc = crc32(crc, reinterpret_cast<const Bytef*>(buffer.data()), static_cast<uInt>(bytes_read));
+            }
+        }
+        return static_cast<std::uint32_t>(crc);
     }
 
     /**
      * @brief Moves a folder recursively from one destination to another.
      */
     void move_folder_recursively(const std::string& source_folder, const std::string& destination_folder) {
+        // A single rename moves the whole tree if the destination is new and on the same volume
+        if (!fs::exists(destination_folder)) {
+            std::error_code ec;
+            fs::create_directories(fs::path(destination_folder).parent_path(), ec);
+            fs::rename(source_folder, destination_folder, ec);
+            if (!ec) {
+                return;
+            }
+        }
+
         fs::create_directories(destination_folder);  // Create destination folder if it doesn't exist
 
         for (const auto& entry : fs::directory_iterator(source_folder)) {
@@ -81,6 +355,10 @@ namespace utils {
         zip_int64_t num_entries = zip_get_num_entries(zip, 0);
         for (zip_uint64_t i = 0; i < num_entries; ++i) {
             const char* name = zip_get_name(zip, i, 0);
+            if (name == nullptr || !is_safe_entry_name(name)) {
+                print_color_msg("    Skipped entry outside the destination folder", "\033[31m");
+                continue;
+            }
             fs::path output_path = zip_dir + name;
 
             zip_file_t* zf = zip_fopen_index(zip, i, 0);
@@ -129,60 +407,233 @@ namespace utils {
         }
     }
 
-    void zip_dir_extractor(const std::string& zip_path, const std::string& destination_folder) {
-        // Create the destination folder if it doesn't exist
-        fs::create_directories(destination_folder);
+    namespace {
 
-        // Open the zip file
-        int error = 0;
-        zip_t* zip = zip_open(zip_path.c_str(), ZIP_RDONLY, &error);
-        if (!zip) {
-            print_color_msg("    Failed to open zip file for extraction", "\033[31m");  // Red for error
-            return;
-        }
+        constexpr std::size_t EXTRACT_BUFFER_SIZE = 1 << 20;  ///< Read/write buffer per extraction worker.
 
-        // Extract files
-        zip_int64_t num_entries = zip_get_num_entries(zip, 0);
-        for (zip_uint64_t i = 0; i < num_entries; ++i) {
-            const char* name = zip_get_name(zip, i, 0);
-            if (!name) {
-                print_color_msg("    Failed to get name of the file in zip", "\033[31m");
-                continue;
+        /**
+         * @brief A file entry to extract.
+         */
+        struct ExtractEntry {
+            zip_uint64_t index;     ///< Index in the archive.
+            zip_uint64_t size;      ///< Uncompressed size.
+            zip_uint64_t comp_size; ///< Compressed size.
+            fs::path output_path;   ///< Target file.
+        };
+
+        /**
+         * @brief Inflates one entry into a file pre-sized to its uncompressed length.
+         *
+         * @return An error message, or an empty string on success.
+         */
+        std::string extract_entry(zip_t* zip, const ExtractEntry& entry, std::vector<char>& buffer) {
+            zip_file_t* zf = zip_fopen_index(zip, entry.index, 0);
+            if (!zf) {
+                return "Failed to open file in zip for extraction: " + entry.output_path.string();
             }
 
-            // Construct the output path by appending the name to the destination folder
-            fs::path output_path = fs::path(destination_folder) / name;
+            // Write a new file: the existing one may be a hard link into the content store.
+            std::error_code remove_error;
+            fs::remove(entry.output_path, remove_error);
 
-            zip_file_t* zf = zip_fopen_index(zip, i, 0);
-            if (!zf) {
-                print_color_msg("    Failed to open file in zip for extraction", "\033[31m");
-                continue;
+            bool ok = true;
+#ifdef _WIN32
+            std::ofstream out;
+            out.rdbuf()->pubsetbuf(nullptr, 0);  // Writes go out in buffer-sized blocks
+            out.open(entry.output_path, std::ios::binary | std::ios::trunc);
+            zip_int64_t bytes_read;
+            while (out && (bytes_read = zip_fread(zf, buffer.data(), buffer.size())) > 0) {
+                out.write(buffer.data(), bytes_read);
             }
+            ok = static_cast<bool>(out);
+#else
+            int fd = ::open(entry.output_path.c_str(), O_WRONLY | O_CREAT | O_TRUNC, 0644);
+            if (fd < 0) {
+                zip_fclose(zf);
+                return "Failed to write file to output path: " + entry.output_path.string();
+            }
+            // Pre-size the file so the file system can allocate it in one go.
+            if (entry.size > 0 && ::ftruncate(fd, static_cast<off_t>(entry.size)) != 0) {
+                ok = false;
+            }
+            off_t offset = 0;
+            zip_int64_t bytes_read;
+            while (ok && (bytes_read = zip_fread(zf, buffer.data(), buffer.size())) > 0) {
+                ssize_t written = 0;
+                while (written < bytes_read) {
+                    ssize_t n = ::pwrite(fd, buffer.data() + written, static_cast<std::size_t>(bytes_read - written), offset + written);
+                    if (n <= 0) {
+                        ok = false;
+                        break;
+                    }
+                    written += n;
+                }
+                offset += written;
+            }
+            ok = ok && static_cast<zip_uint64_t>(offset) == entry.size;
+            ok = (::close(fd) == 0) && ok;
+#endif
+            zip_fclose(zf);
+            return ok ? std::string() : "Failed to write file to output path: " + entry.output_path.string();
+        }
 
-            // Create directories if necessary
-            if (name[std::strlen(name) - 1] == '/') {
-                fs::create_directories(output_path);
+        /**
+         * @brief Extracts the entries of a zip file on several threads.
+         *
+         * @param only Entry names to extract (nullptr: all entries).
+         */
+        void extract_entries(const std::string& zip_path, const std::string& destination_folder,
+            const std::set<std::string>* only, unsigned int num_threads) {
+            Instrumentation::ScopedTimer timer("extract");
+            // Create the destination folder if it doesn't exist
+            fs::create_directories(destination_folder);
+
+            // Open the zip file
+            int error = 0;
+            zip_t* zip = zip_open(zip_path.c_str(), ZIP_RDONLY, &error);
+            if (!zip) {
+                print_color_msg("    Failed to open zip file for extraction", "\033[31m");  // Red for error
+                return;
             }
-            else {
-                // Create parent directories if they do not exist
-                fs::create_directories(output_path.parent_path());
 
-                std::ofstream out(output_path, std::ios::binary);
-                char buffer[4096];
-                zip_int64_t bytes_read;
-                while ((bytes_read = zip_fread(zf, buffer, sizeof(buffer))) > 0) {
-                    out.write(buffer, bytes_read);
+            // Collect file entries and the unique set of directories in one pass
+            std::vector<ExtractEntry> files;
+            std::set<fs::path> directories;
+            zip_int64_t num_entries = zip_get_num_entries(zip, 0);
+            for (zip_int64_t i = 0; i < num_entries; ++i) {
+                zip_stat_t st;
+                zip_stat_init(&st);
+                if (zip_stat_index(zip, i, 0, &st) != 0 || !st.name) {
+                    print_color_msg("    Failed to get name of the file in zip", "\033[31m");
+                    continue;
                 }
 
-                if (out.fail()) {
-                    print_color_msg("    Failed to write file to output path", "\033[31m");
+                const std::string name = st.name;
+                if (only != nullptr && only->count(name) == 0) {
+                    continue;
+                }
+                if (!is_safe_entry_name(name)) {
+                    print_color_msg("    Skipped entry outside the destination folder: " + name, "\033[31m");
+                    continue;
+                }
+                fs::path output_path = fs::path(destination_folder) / name;
+                if (!name.empty() && name.back() == '/') {
+                    directories.insert(output_path);
+                }
+                else {
+                    directories.insert(output_path.parent_path());
+                    files.push_back({ static_cast<zip_uint64_t>(i), (st.valid & ZIP_STAT_SIZE) ? st.size : 0,
+                        (st.valid & ZIP_STAT_COMP_SIZE) ? st.comp_size : 0, output_path });
                 }
             }
-            zip_fclose(zf);
+            zip_close(zip);
+
+            for (const auto& directory : directories) {
+                fs::create_directories(directory);
+            }
+
+            // Largest entries first, so no worker is left with a big file at the end
+            std::sort(files.begin(), files.end(), [](const ExtractEntry& a, const ExtractEntry& b) {
+                return a.size > b.size;
+            });
+
+            if (num_threads == 0) {
+                num_threads = extraction_threads();
+            }
+            num_threads = static_cast<unsigned int>(std::min<std::size_t>(num_threads, std::max<std::size_t>(files.size(), 1)));
+
+            std::atomic<std::size_t> next(0);
+            std::mutex errors_mutex;
+            std::vector<std::string> errors;
+
+            auto worker = [&] {
+                // Every worker needs its own handle, libzip handles are not thread-safe.
+                int worker_error = 0;
+                zip_t* worker_zip = zip_open(zip_path.c_str(), ZIP_RDONLY, &worker_error);
+                if (!worker_zip) {
+                    std::lock_guard<std::mutex> lock(errors_mutex);
+                    errors.push_back("Failed to open zip file for extraction");
+                    return;
+                }
+                std::vector<char> buffer(EXTRACT_BUFFER_SIZE);
+                for (std::size_t i = next++; i < files.size(); i = next++) {
+                    std::string message = extract_entry(worker_zip, files[i], buffer);
+                    if (!message.empty()) {
+                        std::lock_guard<std::mutex> lock(errors_mutex);
+                        errors.push_back(std::move(message));
+                        continue;
+                    }
+                    Instrumentation::add(Instrumentation::Counter::EntriesProcessed);
+                    Instrumentation::add(Instrumentation::Counter::BytesRead, files[i].comp_size);
+                    Instrumentation::add(Instrumentation::Counter::BytesWritten, files[i].size);
+                }
+                zip_close(worker_zip);
+            };
+
+            std::vector<std::thread> workers;
+            for (unsigned int i = 1; i < num_threads; ++i) {
+                workers.emplace_back(worker);
+            }
+            worker();
+            for (auto& thread : workers) {
+                thread.join();
+            }
+
+            for (const auto& message : errors) {
+                print_color_msg("    " + message, "\033[31m");
+            }
+            print_color_msg("    Zip extracted successfully", "\033[33m");  // Yellow
         }
 
-        zip_close(zip);
-        print_color_msg("    Zip extracted successfully", "\033[33m");  // Yellow
+    }  // namespace
+
+    /**
+     * @brief Check whether a zip entry name stays inside the folder it is extracted to.
+     */
+    bool is_safe_entry_name(const std::string& name) {
+        if (name.empty() || name.front() == '/' || name.front() == '\\' || fs::path(name).has_root_name()
+            || (name.size() > 1 && name[1] == ':')) {
+            return false;
+        }
+        std::size_t start = 0;
+        while (start <= name.size()) {
+            std::size_t end = name.find_first_of("/\\", start);
+            if (end == std::string::npos) {
+                end = name.size();
+            }
+            if (name.compare(start, end - start, "..") == 0) {
+                return false;
+            }
+            start = end + 1;
+        }
+        return true;
+    }
+
+    /**
+     * @brief Sets the number of threads used by an extraction called with num_threads = 0.
+     */
+    void set_extraction_threads(unsigned int num_threads) {
+        default_extraction_threads = num_threads;
+    }
+
+    /**
+     * @brief Get the number of threads used by an extraction called with num_threads = 0.
+     */
+    unsigned int extraction_threads() {
+        const unsigned int num_threads = default_extraction_threads;
+        return num_threads > 0 ? num_threads : std::max(1u, std::thread::hardware_concurrency());
+    }
+
+    void zip_dir_extractor(const std::string& zip_path, const std::string& destination_folder, unsigned int num_threads) {
+        extract_entries(zip_path, destination_folder, nullptr, num_threads);
+    }
+
+    void zip_dir_extractor(const std::string& zip_path, const std::string& destination_folder,
+        const std::set<std::string>& entry_names, unsigned int num_threads) {
+        if (entry_names.empty()) {
+            return;
+        }
+        extract_entries(zip_path, destination_folder, &entry_names, num_threads);
     }
 
 }  // namespace utils
@@ -0,0 +1,240 @@
+#include "../../includes/BatchProcessor.hpp"
+#include "../../includes/CaseCollisionChecker.hpp"
+#include "../../includes/ProviderDetector.hpp"
+#include "../../includes/ThreadPool.hpp"
+#include "../../includes/utils.hpp"
+#include <algorithm>
+#include <filesystem>
+#include <fstream>
+#include <future>
+#include <iomanip>
+#include <set>
+#include <sstream>
+#include <stdexcept>
+#include <boost/algorithm/string.hpp>
+#include <libxml/parser.h>
+
+namespace fs = std::filesystem;
+
+namespace {
+
+    /**
+     * @brief Adds a job, detecting the provider for AUTO.
+     *
+     * Packages with an unknown or undetectable provider are reported and
+     * skipped, so one bad package does not abort the batch.
+     */
+    void add_job(std::vector<BatchJob>& jobs, const std::string& provider_name, const std::string& package) {
+        const std::string name = boost::algorithm::to_upper_copy(provider_name);
+        ProviderDetection detection;
+        try {
+            const Provider provider = ProviderDetector::resolve(name, package, &detection);
+            if (name == ProviderDetector::AUTO) {
+                std::ostringstream confidence;
+                confidence << std::fixed << std::setprecision(2) << detection.confidence;
+                utils::print_color_msg("    Detected " + providerToString(provider) + " for " + package
+                    + " (confidence " + confidence.str() + ")", "\033[33m");
+            }
+            jobs.push_back({ provider, package });
+        }
+        catch (const std::exception& e) {
+            utils::print_color_msg("    Skipping " + package + ": " + e.what(), "\033[33m");
+        }
+    }
+
+}  // namespace
+
+/**
+ * @brief Constructor for BatchProcessor.
+ */
+BatchProcessor::BatchProcessor(const std::string& output_root, std::size_t jobs)
+    : output_root_(output_root), jobs_(jobs == 0 ? ThreadPool::default_concurrency() : jobs) {}
+
+/**
+ * @brief Loads the batch jobs from a directory or a manifest file.
+ */
+std::vector<BatchJob> BatchProcessor::load_jobs(const std::string& source, const std::string& default_provider) {
+    std::vector<BatchJob> jobs;
+
+    if (fs::is_directory(source)) {
+        for (const auto& entry : fs::recursive_directory_iterator(source)) {
+            if (!entry.is_regular_file() || !boost::algorithm::iends_with(entry.path().string(), ".zip")) {
+                continue;
+            }
+
+            // Find the first path component that names a provider.
+            std::string provider_name = default_provider;
+            for (const auto& part : fs::relative(entry.path(), source).parent_path()) {
+                const std::string name = boost::algorithm::to_upper_copy(part.string());
+                if (name == "EBA" || name == "EDINET" || name == "CMFCLCI" || name == "CIPC") {
+                    provider_name = name;
+                    break;
+                }
+            }
+
+            if (provider_name.empty()) {
+                utils::print_color_msg("    Skipping " + entry.path().string() + ": no provider folder", "\033[33m");
+                continue;
+            }
+            add_job(jobs, provider_name, entry.path().string());
+        }
+    }
+    else if (fs::is_regular_file(source)) {
+        std::ifstream manifest(source);
+        const fs::path base = fs::path(source).parent_path();
+        std::string line;
+        int line_number = 0;
+        while (std::getline(manifest, line)) {
+            ++line_number;
+            boost::algorithm::trim(line);
+            if (line.empty() || line[0] == '#') {
+                continue;
+            }
+
+            const std::size_t split = line.find_first_of(" \t");
+            if (split == std::string::npos) {
+                utils::print_color_msg("    Skipping " + source + ":" + std::to_string(line_number) + ": expected 'PROVIDER PATH'", "\033[33m");
+                continue;
+            }
+            std::string provider_name = line.substr(0, split);
+            std::string package = boost::algorithm::trim_copy(line.substr(split + 1));
+            boost::algorithm::trim_if(package, boost::algorithm::is_any_of("\""));
+
+            fs::path package_path(package);
+            if (package_path.is_relative()) {
+                package_path = base / package_path;
+            }
+            add_job(jobs, provider_name, package_path.string());
+        }
+    }
+    else {
+        throw std::invalid_argument("Batch source not found: " + source);
+    }
+
+    return jobs;
+}
+
+/**
+ * @brief Computes a unique destination folder for every job.
+ *
+ * Packages with the same provider and zip stem get a numeric suffix so that
+ * no two workers share a destination folder.
+ */
+std::vector<std::string> BatchProcessor::destination_folders(const std::vector<BatchJob>& jobs) const {
+    std::vector<fs::path> bases;
+    bases.reserve(jobs.size());
+    // Folders are compared case-folded, as they may live on a case-insensitive file system.
+    std::set<std::string> taken;
+    for (const auto& job : jobs) {
+        bases.push_back(fs::path(output_root_) / providerToString(job.provider) / fs::path(job.package).stem());
+        taken.insert(CaseCollisionChecker::fold(bases.back().string()));
+    }
+
+    // The first job of a folder keeps it; later ones get the first "-N" suffix
+    // that is neither the folder of another package nor already handed out.
+    std::vector<std::string> folders;
+    folders.reserve(jobs.size());
+    std::set<std::string> used;
+    for (const auto& base : bases) {
+        fs::path folder = base;
+        if (!used.insert(CaseCollisionChecker::fold(base.string())).second) {
+            for (int n = 1;; ++n) {
+                folder = base;
+                folder += "-" + std::to_string(n);
+                if (taken.insert(CaseCollisionChecker::fold(folder.string())).second) {
+                    break;
+                }
+            }
+        }
+        folders.push_back(folder.string());
+    }
+    return folders;
+}
+
+/**
+ * @brief Processes all jobs on the worker pool.
+ */
+std::vector<PackageResult> BatchProcessor::run(const std::vector<BatchJob>& jobs) {
+    // libxml2 must be initialised once from the main thread before it is used concurrently.
+    xmlInitParser();
+
+    const std::vector<std::string> folders = destination_folders(jobs);
+    std::vector<std::future<PackageResult>> futures;
+    futures.reserve(jobs.size());
+
+    // Every worker extracts with its share of the cores, not with all of them.
+    const unsigned int cores = static_cast<unsigned int>(ThreadPool::default_concurrency());
+    utils::set_extraction_threads(std::max(1u, cores / static_cast<unsigned int>(std::min(jobs_, std::max<std::size_t>(jobs.size(), 1)))));
+
+    {
+        ThreadPool pool(jobs_, jobs_ * 2);
+        for (std::size_t i = 0; i < jobs.size(); ++i) {
+            const BatchJob job = jobs[i];
+            const std::string folder = folders[i];
+            futures.push_back(pool.submit([job, folder] {
+                PackageProcessor processor;
+                return processor.process_package(job.provider, job.package, folder);
+            }));
+        }
+    }
+
+    std::vector<PackageResult> results;
+    results.reserve(futures.size());
+    for (auto& future : futures) {
+        results.push_back(future.get());
+    }
+    utils::set_extraction_threads(0);
+    return results;
+}
+
+/**
+ * @brief Prints a consolidated results table.
+ */
+void BatchProcessor::print_results_table(const std::vector<PackageResult>& results, std::ostream& out) {
+    auto flag = [](bool value) { return value ? "ok" : "--"; };
+
+    std::size_t name_width = 7;
+    for (const auto& result : results) {
+        name_width = std::max(name_width, fs::path(result.package).filename().string().size());
+    }
+
+    out << "\nBatch results:\n--------------\n";
+    out << std::left
+        << std::setw(9) << "Provider"
+        << std::setw(name_width + 2) << "Package"
+        << std::setw(5) << "ZIP"
+        << std::setw(8) << "TopDir"
+        << std::setw(10) << "META-INF"
+        << std::setw(9) << "catalog"
+        << std::setw(7) << "tpXML"
+        << std::setw(11) << "Result"
+        << std::setw(10) << "Time [s]"
+        << "Output / Error\n";
+
+    std::size_t failed = 0;
+    for (const auto& result : results) {
+        std::string status = !result.ok() ? "FAILED"
+            : result.fixed ? "FIXED"
+            : result.checks.conformant() ? "CONFORMANT" : "NO FIXER";
+        if (!result.ok()) {
+            ++failed;
+        }
+
+        std::ostringstream seconds;
+        seconds << std::fixed << std::setprecision(2) << result.seconds;
+
+        out << std::left
+            << std::setw(9) << providerToString(result.provider)
+            << std::setw(name_width + 2) << fs::path(result.package).filename().string()
+            << std::setw(5) << flag(result.checks.zip_format)
+            << std::setw(8) << flag(result.checks.top_level_single_dir)
+            << std::setw(10) << flag(result.checks.meta_inf_folder)
+            << std::setw(9) << flag(result.checks.catalog_xml)
+            << std::setw(7) << flag(result.checks.taxonomy_package_xml)
+            << std::setw(11) << status
+            << std::setw(10) << seconds.str()
+            << (result.ok() ? result.destination : result.error) << "\n";
+    }
+
+    out << "\n" << results.size() << " package(s), " << failed << " failed\n";
+}
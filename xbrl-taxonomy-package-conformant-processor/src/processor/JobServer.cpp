@@ -0,0 +1,484 @@
+#include "../../includes/JobServer.hpp"
+#include "../../includes/CatalogResolver.hpp"
+#include "../../includes/PackageProcessor.hpp"
+#include "../../includes/ProviderDetector.hpp"
+#include "../../includes/Providers.hpp"
+#include "../../includes/SchemaCache.hpp"
+#include "../../includes/utils.hpp"
+#include <algorithm>
+#include <chrono>
+#include <cstring>
+#include <filesystem>
+#include <future>
+#include <sstream>
+#include <stdexcept>
+#include <thread>
+#include <libxml/parser.h>
+#ifndef _WIN32
+#include <poll.h>
+#include <sys/socket.h>
+#include <sys/stat.h>
+#include <sys/un.h>
+#include <unistd.h>
+#endif
+
+namespace fs = std::filesystem;
+
+namespace {
+
+    /// Longest accepted request line.
+    constexpr std::size_t MAX_REQUEST = 64 * 1024;
+
+    /// How often the accept loop looks at the stop flag.
+    constexpr int POLL_INTERVAL_MS = 200;
+
+    /// Base schemas compiled by warm_up().
+    const char* WARM_SCHEMAS[] = {
+        "http://www.xbrl.org/2016/taxonomy-package.xsd",
+        "http://www.xbrl.org/2016/taxonomy-package-catalog.xsd",
+    };
+
+    /**
+     * @brief Writes a string as a JSON string literal.
+     */
+    void write_json_string(std::ostream& out, const std::string& value) {
+        static const char* HEX = "0123456789abcdef";
+        out << '"';
+        for (const char c : value) {
+            if (c == '"' || c == '\\') {
+                out << '\\' << c;
+            }
+            else if (static_cast<unsigned char>(c) < 0x20) {
+                out << "\\u00" << HEX[(c >> 4) & 0xF] << HEX[c & 0xF];
+            }
+            else {
+                out << c;
+            }
+        }
+        out << '"';
+    }
+
+    std::string error_reply(const std::string& message) {
+        std::ostringstream out;
+        out << "{\"ok\": false, \"error\": ";
+        write_json_string(out, message);
+        out << "}";
+        return out.str();
+    }
+
+    /**
+     * @brief Rejects package paths that are not regular files (directories, devices, FIFOs, missing files).
+     */
+    void require_package_file(const std::string& package) {
+        std::error_code ec;
+        if (!fs::is_regular_file(package, ec)) {
+            throw std::runtime_error("Not a regular file: " + package);
+        }
+    }
+
+    void write_checks(std::ostream& out, const PackageChecks& checks) {
+        out << "\"conformant\": " << std::boolalpha << checks.conformant()
+            << ", \"checks\": {\"zip_format\": " << checks.zip_format
+            << ", \"top_level_single_dir\": " << checks.top_level_single_dir
+            << ", \"meta_inf_folder\": " << checks.meta_inf_folder
+            << ", \"catalog_xml\": " << checks.catalog_xml
+            << ", \"taxonomy_package_xml\": " << checks.taxonomy_package_xml << "}";
+    }
+
+    /**
+     * @brief Splits "VERB rest of line" at the first space.
+     */
+    std::pair<std::string, std::string> split_first(const std::string& line) {
+        const std::size_t space = line.find(' ');
+        if (space == std::string::npos) {
+            return { line, "" };
+        }
+        const std::size_t rest = line.find_first_not_of(' ', space);
+        return { line.substr(0, space), rest == std::string::npos ? "" : line.substr(rest) };
+    }
+
+    std::size_t worker_count(std::size_t jobs) {
+        return jobs == 0 ? ThreadPool::default_concurrency() : jobs;
+    }
+
+#ifndef _WIN32
+    /**
+     * @brief Sends all bytes, without raising SIGPIPE if the client has gone.
+     */
+    bool send_all(int fd, const std::string& data) {
+#ifdef MSG_NOSIGNAL
+        const int flags = MSG_NOSIGNAL;
+#else
+        const int flags = 0;
+#endif
+        std::size_t sent = 0;
+        while (sent < data.size()) {
+            const ssize_t n = ::send(fd, data.data() + sent, data.size() - sent, flags);
+            if (n <= 0) {
+                return false;
+            }
+            sent += static_cast<std::size_t>(n);
+        }
+        return true;
+    }
+
+    sockaddr_un socket_address(const std::string& path) {
+        sockaddr_un address{};
+        address.sun_family = AF_UNIX;
+        if (path.size() >= sizeof(address.sun_path)) {
+            throw std::runtime_error("Socket path is too long: " + path);
+        }
+        std::memcpy(address.sun_path, path.c_str(), path.size() + 1);
+        return address;
+    }
+#endif
+
+}  // namespace
+
+/**
+ * @brief Constructor for JobServer.
+ */
+JobServer::JobServer(const std::string& socket_path, const std::string& output_root, std::size_t jobs)
+    : socket_path_(socket_path),
+      output_root_(output_root),
+      max_connections_(4 * worker_count(jobs)),
+      listen_fd_(-1),
+      pool_(worker_count(jobs), 2 * worker_count(jobs)),
+      stopping_(false),
+      jobs_done_(0),
+      jobs_running_(0),
+      connections_(0) {
+#ifdef _WIN32
+    throw std::runtime_error("Server mode needs Unix domain sockets and is not available on Windows");
+#else
+    const sockaddr_un address = socket_address(socket_path_);
+
+    // Replace a stale socket file, but never steal the socket of a running server.
+    if (fs::exists(fs::symlink_status(socket_path_))) {
+        const int probe = ::socket(AF_UNIX, SOCK_STREAM, 0);
+        const bool in_use = probe >= 0 && ::connect(probe, reinterpret_cast<const sockaddr*>(&address), sizeof(address)) == 0;
+        if (probe >= 0) {
+            ::close(probe);
+        }
+        if (in_use) {
+            throw std::runtime_error("Another server is listening on " + socket_path_);
+        }
+        ::unlink(socket_path_.c_str());
+    }
+
+    listen_fd_ = ::socket(AF_UNIX, SOCK_STREAM, 0);
+    if (listen_fd_ < 0
+        || ::bind(listen_fd_, reinterpret_cast<const sockaddr*>(&address), sizeof(address)) != 0
+        || ::listen(listen_fd_, SOMAXCONN) != 0) {
+        const std::string reason = std::strerror(errno);
+        if (listen_fd_ >= 0) {
+            ::close(listen_fd_);
+        }
+        throw std::runtime_error("Failed to listen on " + socket_path_ + ": " + reason);
+    }
+    // Jobs read and write files with the server's rights: only its user and group may submit them.
+    ::chmod(socket_path_.c_str(), 0660);
+
+    // Every worker extracts with its share of the cores, not with all of them.
+    utils::set_extraction_threads(static_cast<unsigned int>(std::max<std::size_t>(1, ThreadPool::default_concurrency() / pool_.size())));
+#endif
+}
+
+/**
+ * @brief Destructor. Closes and removes the socket.
+ */
+JobServer::~JobServer() {
+#ifndef _WIN32
+    if (listen_fd_ >= 0) {
+        ::close(listen_fd_);
+        ::unlink(socket_path_.c_str());
+    }
+#endif
+}
+
+/**
+ * @brief Initialises libxml2 and loads the bundled base schemas into the caches.
+ */
+void JobServer::warm_up() {
+    xmlInitParser();
+    CatalogResolver& resolver = CatalogResolver::get_instance();
+
+    std::error_code ec;
+    for (fs::recursive_directory_iterator it(resolver.schema_store(), ec), end; !ec && it != end; it.increment(ec)) {
+        if (it->is_regular_file() && it->path().extension() == ".xsd") {
+            resolver.load_document(it->path().string());
+        }
+    }
+    for (const char* schema : WARM_SCHEMAS) {
+        if (!SchemaCache::get_instance().get(schema)) {
+            utils::print_color_msg(std::string("    Could not preload schema ") + schema, "\033[33m");
+        }
+    }
+}
+
+/**
+ * @brief Accepts connections and serves requests until SHUTDOWN or stop().
+ */
+void JobServer::serve() {
+#ifndef _WIN32
+    utils::print_color_msg("Listening on " + socket_path_, "\033[32m");
+
+    while (!stopping_.load()) {
+        {
+            // Backpressure: leave further clients in the listen backlog.
+            std::unique_lock<std::mutex> lock(mutex_);
+            connection_closed_.wait_for(lock, std::chrono::milliseconds(POLL_INTERVAL_MS), [this] {
+                return connections_ < max_connections_;
+            });
+            if (connections_ >= max_connections_) {
+                continue;
+            }
+        }
+
+        pollfd listener{ listen_fd_, POLLIN, 0 };
+        if (::poll(&listener, 1, POLL_INTERVAL_MS) <= 0) {
+            continue;
+        }
+        const int fd = ::accept(listen_fd_, nullptr, nullptr);
+        if (fd < 0) {
+            continue;
+        }
+#ifdef SO_NOSIGPIPE
+        const int on = 1;
+        ::setsockopt(fd, SOL_SOCKET, SO_NOSIGPIPE, &on, sizeof(on));
+#endif
+        {
+            std::lock_guard<std::mutex> lock(mutex_);
+            ++connections_;
+        }
+        std::thread([this, fd] { serve_connection(fd); }).detach();
+    }
+
+    // Connection threads finish their current job and notice the stop flag.
+    std::unique_lock<std::mutex> lock(mutex_);
+    connection_closed_.wait(lock, [this] { return connections_ == 0; });
+    utils::print_color_msg("Server stopped after " + std::to_string(jobs_done_.load()) + " jobs", "\033[32m");
+#endif
+}
+
+void JobServer::stop() {
+    stopping_.store(true);
+}
+
+/**
+ * @brief Connection thread body: reads request lines and writes the replies.
+ */
+void JobServer::serve_connection(int fd) {
+#ifndef _WIN32
+    std::string buffer;
+    char chunk[4096];
+    bool open = true;
+
+    while (open && !stopping_.load()) {
+        pollfd client{ fd, POLLIN, 0 };
+        const int ready = ::poll(&client, 1, POLL_INTERVAL_MS);
+        if (ready == 0) {
+            continue;
+        }
+        const ssize_t n = ready < 0 ? -1 : ::recv(fd, chunk, sizeof(chunk), 0);
+        if (n <= 0) {
+            break;
+        }
+        buffer.append(chunk, static_cast<std::size_t>(n));
+
+        std::size_t line_end;
+        while (open && (line_end = buffer.find('\n')) != std::string::npos) {
+            std::string line = buffer.substr(0, line_end);
+            buffer.erase(0, line_end + 1);
+            if (!line.empty() && line.back() == '\r') {
+                line.pop_back();
+            }
+            open = send_all(fd, handle(line) + "\n");
+        }
+        if (buffer.size() > MAX_REQUEST) {
+            send_all(fd, error_reply("Request too long") + "\n");
+            break;
+        }
+    }
+    ::close(fd);
+
+    std::lock_guard<std::mutex> lock(mutex_);
+    --connections_;
+    connection_closed_.notify_all();
+#else
+    (void)fd;
+#endif
+}
+
+/**
+ * @brief Executes one request line.
+ */
+std::string JobServer::handle(const std::string& request) {
+    const auto [verb, argument] = split_first(request);
+    try {
+        if (verb == "CHECK" && !argument.empty()) {
+            require_package_file(argument);
+            return check(argument);
+        }
+        if (verb == "DETECT" && !argument.empty()) {
+            require_package_file(argument);
+            return detect(argument);
+        }
+        if (verb == "FIX") {
+            const auto [provider_name, package] = split_first(argument);
+            if (!package.empty()) {
+                require_package_file(package);
+                return fix(provider_name, package);
+            }
+        }
+        if (verb == "STATS" && argument.empty()) {
+            return stats();
+        }
+        if (verb == "SHUTDOWN" && argument.empty()) {
+            stop();
+            return "{\"ok\": true}";
+        }
+    }
+    catch (const std::exception& e) {
+        return error_reply(e.what());
+    }
+    return error_reply("Unknown request (expected CHECK <package>, DETECT <package>, FIX <PROVIDER> <package>, STATS or SHUTDOWN): " + request);
+}
+
+/**
+ * @brief Runs a CHECK request on the worker pool.
+ */
+std::string JobServer::check(const std::string& package) {
+    ++jobs_running_;
+    std::future<std::pair<PackageChecks, double>> future = pool_.submit([package] {
+        const auto start = std::chrono::steady_clock::now();
+        PackageProcessor processor;
+        PackageChecks checks = processor.check_package(package);
+        return std::make_pair(checks, std::chrono::duration<double>(std::chrono::steady_clock::now() - start).count());
+    });
+    std::pair<PackageChecks, double> result;
+    std::string failure;
+    try {
+        result = future.get();
+    }
+    catch (const std::exception& e) {
+        failure = e.what();
+    }
+    --jobs_running_;
+    ++jobs_done_;
+    if (!failure.empty()) {
+        return error_reply(failure);
+    }
+
+    std::ostringstream out;
+    out << "{\"ok\": true, \"package\": ";
+    write_json_string(out, package);
+    out << ", ";
+    write_checks(out, result.first);
+    out << ", \"seconds\": " << result.second << "}";
+    return out.str();
+}
+
+/**
+ * @brief Detects the provider of a package from its central directory.
+ */
+std::string JobServer::detect(const std::string& package) const {
+    const ProviderDetection detection = ProviderDetector().detect(package);
+    std::ostringstream out;
+    out << "{\"ok\": true, \"package\": ";
+    write_json_string(out, package);
+    out << ", \"provider\": ";
+    write_json_string(out, providerToString(detection.provider));
+    out << ", \"confidence\": " << detection.confidence << ", \"scores\": {";
+    for (std::size_t i = 0; i < detection.scores.size(); ++i) {
+        out << (i > 0 ? ", " : "");
+        write_json_string(out, providerToString(detection.scores[i].first));
+        out << ": " << detection.scores[i].second;
+    }
+    out << "}, \"evidence\": [";
+    for (std::size_t i = 0; i < detection.evidence.size(); ++i) {
+        out << (i > 0 ? ", " : "");
+        write_json_string(out, detection.evidence[i]);
+    }
+    out << "]}";
+    return out.str();
+}
+
+/**
+ * @brief Runs a FIX request on the worker pool.
+ */
+std::string JobServer::fix(const std::string& provider_name, const std::string& package) {
+    ProviderDetection detection;
+    const Provider provider = ProviderDetector::resolve(provider_name, package, &detection);
+    const bool detected = provider_name == ProviderDetector::AUTO;
+    const std::string destination = (fs::path(output_root_) / providerToString(provider) / fs::path(package).stem()).string();
+    {
+        std::lock_guard<std::mutex> lock(mutex_);
+        if (!destinations_.insert(destination).second) {
+            return error_reply("Another job is writing to " + destination);
+        }
+    }
+
+    ++jobs_running_;
+    std::future<PackageResult> future = pool_.submit([provider, package, destination] {
+        PackageProcessor processor;
+        return processor.process_package(provider, package, destination);
+    });
+    PackageResult result;
+    std::string failure;
+    try {
+        result = future.get();
+    }
+    catch (const std::exception& e) {
+        failure = e.what();
+    }
+    // The next job for this package may see different files; the base schemas stay cached.
+    CatalogResolver::get_instance().forget(destination);
+    --jobs_running_;
+    ++jobs_done_;
+    {
+        std::lock_guard<std::mutex> lock(mutex_);
+        destinations_.erase(destination);
+    }
+    if (!failure.empty()) {
+        return error_reply(failure);
+    }
+
+    std::ostringstream out;
+    out << "{\"ok\": " << std::boolalpha << result.ok() << ", \"package\": ";
+    write_json_string(out, result.package);
+    out << ", \"provider\": ";
+    write_json_string(out, providerToString(result.provider));
+    if (detected) {
+        out << ", \"confidence\": " << detection.confidence;
+    }
+    out << ", \"destination\": ";
+    write_json_string(out, result.destination);
+    out << ", \"fixed\": " << result.fixed << ", ";
+    write_checks(out, result.checks);
+    if (!result.ok()) {
+        out << ", \"error\": ";
+        write_json_string(out, result.error);
+    }
+    out << ", \"seconds\": " << result.seconds << "}";
+    return out.str();
+}
+
+/**
+ * @brief Get the server and cache statistics.
+ */
+std::string JobServer::stats() const {
+    std::size_t connections;
+    {
+        std::lock_guard<std::mutex> lock(mutex_);
+        connections = connections_;
+    }
+    std::ostringstream out;
+    out << "{\"ok\": true, \"jobs_done\": " << jobs_done_.load()
+        << ", \"jobs_running\": " << jobs_running_.load()
+        << ", \"workers\": " << pool_.size()
+        << ", \"connections\": " << connections
+        << ", \"cached_schemas\": " << SchemaCache::get_instance().size()
+        << ", \"cached_document_bytes\": " << CatalogResolver::get_instance().document_cache_size() << "}";
+    return out.str();
+}
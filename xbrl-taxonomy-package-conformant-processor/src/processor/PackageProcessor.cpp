@@ -0,0 +1,236 @@
+#include "../../includes/PackageProcessor.hpp"
+#include "../../includes/ArchiveIndex.hpp"
+#include "../../includes/CatalogResolver.hpp"
+#include "../../includes/CMFCLCIFixer.hpp"
+#include "../../includes/CIPCFixer.hpp"
+#include "../../includes/ContentStore.hpp"
+#include "../../includes/Instrumentation.hpp"
+#include "../../includes/MappedZipReader.hpp"
+#include "../../includes/RunManifest.hpp"
+#include "../../includes/SchemaCache.hpp"
+#include "../../includes/VirtualPackage.hpp"
+#include "../../includes/utils.hpp"
+#include <chrono>
+#include <filesystem>
+#include <memory>
+#include <set>
+#include <stdexcept>
+
+namespace fs = std::filesystem;
+
+namespace {
+
+    /// Schema of META-INF/taxonomyPackage.xml.
+    const char* TAXONOMY_PACKAGE_SCHEMA = "http://www.xbrl.org/2016/taxonomy-package.xsd";
+
+    /// Schema of META-INF/catalog.xml.
+    const char* CATALOG_SCHEMA = "http://www.xbrl.org/2016/taxonomy-package-catalog.xsd";
+
+    /**
+     * @brief Makes sure a META-INF schema can be loaded before a file is validated against it.
+     *
+     * Without it, a missing schema store would report every META-INF file as invalid.
+     */
+    void require_schema(const char* schema) {
+        if (!SchemaCache::get_instance().get(schema)) {
+            throw std::runtime_error(std::string("Cannot load the schema ") + schema + " from the schema store "
+                + CatalogResolver::get_instance().schema_store() + " (set it with --schemas)");
+        }
+    }
+
+}  // namespace
+
+/**
+ * @brief Runs all TPChecker checks on a package.
+ */
+PackageChecks PackageProcessor::check_package(const std::string& package) {
+    Instrumentation::ScopedTimer timer("check_package");
+    PackageChecks checks;
+    checks.zip_format = checker_.has_zip_format(package);
+    if (!checks.zip_format) {
+        return checks;
+    }
+
+    // One mapping of the archive serves the structural checks and the
+    // validation of the two META-INF files; nothing is extracted.
+    std::unique_ptr<const MappedZipReader> zip;
+    try {
+        zip = std::make_unique<const MappedZipReader>(package);
+    }
+    catch (const std::exception& e) {
+        throw std::runtime_error("The file " + package + " is not a valid ZIP archive: " + e.what());
+    }
+    ArchiveIndex index(*zip);
+    checks.top_level_single_dir = checker_.has_top_level_single_dir(index);
+    checks.meta_inf_folder = checker_.has_meta_inf_folder(index);
+    checks.catalog_xml = checker_.has_catalog_xml(index);
+    if (checks.catalog_xml) {
+        require_schema(CATALOG_SCHEMA);
+        checks.catalog_xml = checker_.validate_xml(CATALOG_SCHEMA, *zip, index.meta_inf_file("catalog.xml"));
+    }
+    checks.taxonomy_package_xml = checker_.has_taxonomy_package_xml(index);
+    if (checks.taxonomy_package_xml) {
+        require_schema(TAXONOMY_PACKAGE_SCHEMA);
+        checks.taxonomy_package_xml = checker_.validate_xml(TAXONOMY_PACKAGE_SCHEMA, *zip, index.meta_inf_file("taxonomyPackage.xml"));
+    }
+    return checks;
+}
+
+/**
+ * @brief Fixes a package with the fixer of the given provider.
+ */
+void PackageProcessor::fix_package(Provider provider, const std::string& package, const std::string& destination_folder, const PackageChecks& checks) {
+    Instrumentation::ScopedTimer timer("fix_package");
+    (void)checks;  // The CMFCLCI and CIPC fixers restructure the whole package.
+    // The manifest of the previous run of this package, if any, allows incremental processing.
+    const std::string manifest_file = RunManifest::manifest_path(destination_folder);
+    const ArchiveIndex index(package);
+    RunManifest manifest(index, providerToString(provider));
+    RunManifest previous;
+    const bool has_previous = previous.load(manifest_file) && previous.provider() == manifest.provider();
+
+    switch (provider) {
+    case Provider::CMFCLCI: {
+        // Restructuring is pure path remapping plus a generated taxonomyPackage.xml,
+        // so the fixed zip is streamed from the source without extracting it.
+        CMFCLCITaxonomyPackage package_class(package, destination_folder);
+        package_class.repackage(output_zip(provider, package, destination_folder));
+        break;
+    }
+    case Provider::CIPC: {
+        if (!has_previous || !fix_cipc_incrementally(package, destination_folder, manifest, previous)) {
+            // The embedded IFRS taxonomy is dropped from the tree, so it is never extracted.
+            VirtualPackage tree = VirtualPackage::from_zip(package);
+            CIPCTaxonomyPackage::dropIFRSTaxonomy(tree);
+            tree.materialize_folder(destination_folder);
+            CIPCTaxonomyPackage package_class(destination_folder);
+            package_class.restructureFolder();
+            const std::string output = output_zip(provider, package, destination_folder);
+            if (!utils::gen_zip_archive(destination_folder, output, package)) {
+                throw std::runtime_error("Failed to write " + output);
+            }
+        }
+        break;
+    }
+    default:
+        throw std::invalid_argument("No fixer for " + providerToString(provider) + " packages yet");
+    }
+
+    const std::string output = output_zip(provider, package, destination_folder);
+    if (!output.empty()) {
+        ArchiveIndex output_index(output);
+        if (output_index.is_open()) {
+            manifest.record_output(output_index);
+        }
+    }
+    manifest.save(manifest_file);
+}
+
+/**
+ * @brief Re-processes only the entries of a CIPC package that changed since the previous run.
+ */
+bool PackageProcessor::fix_cipc_incrementally(const std::string& package, const std::string& destination_folder,
+    const RunManifest& manifest, const RunManifest& previous) {
+    const std::string output = output_zip(Provider::CIPC, package, destination_folder);
+    if (!fs::is_directory(destination_folder) || !fs::is_regular_file(output)) {
+        return false;
+    }
+
+    RunManifest::Diff diff = manifest.diff(previous);
+    utils::print_color_msg("    Incremental run: " + std::to_string(diff.added.size()) + " added, "
+        + std::to_string(diff.changed.size()) + " changed, " + std::to_string(diff.removed.size()) + " removed, "
+        + std::to_string(diff.unchanged.size()) + " unchanged", "\033[33m");
+
+    // Files of removed entries (the fixer may already have deleted them).
+    std::error_code ec;
+    for (const auto& path : diff.removed) {
+        if (utils::is_safe_entry_name(path)) {
+            fs::remove(fs::path(destination_folder) / path, ec);
+        }
+    }
+
+    // Extract and fix only the new and changed entries, minus the IFRS taxonomy.
+    std::set<std::string> to_extract(diff.added.begin(), diff.added.end());
+    to_extract.insert(diff.changed.begin(), diff.changed.end());
+    VirtualPackage tree = VirtualPackage::from_zip(package);
+    CIPCTaxonomyPackage::dropIFRSTaxonomy(tree);
+    for (auto it = to_extract.begin(); it != to_extract.end();) {
+        it = tree.exists(*it) ? std::next(it) : to_extract.erase(it);
+    }
+    ContentStore& store = ContentStore::get_instance();
+    if (store.is_enabled()) {
+        store.extract(package, destination_folder, to_extract);
+    }
+    else {
+        utils::zip_dir_extractor(package, destination_folder, to_extract);
+    }
+
+    std::vector<std::string> files;
+    for (const auto& path : to_extract) {
+        files.push_back((fs::path(destination_folder) / path).string());
+    }
+    CIPCTaxonomyPackage package_class(destination_folder);
+    package_class.restructureFiles(files);
+
+    // Unchanged entries keep the compressed data of the previous output, which
+    // is only replaced once the new one is complete.
+    std::set<std::string> unchanged(diff.unchanged.begin(), diff.unchanged.end());
+    const std::string next_output = output + ".next";
+    if (!utils::gen_zip_archive(destination_folder, next_output, package, output, unchanged)) {
+        throw std::runtime_error("Failed to write " + output + ", the previous output is kept");
+    }
+    fs::rename(next_output, output);
+    return true;
+}
+
+/**
+ * @brief Check whether a provider has a fixer that writes a fixed zip.
+ */
+bool PackageProcessor::has_fixer(Provider provider) {
+    return provider == Provider::CMFCLCI || provider == Provider::CIPC;
+}
+
+/**
+ * @brief Get the path of the fixed zip a provider's fixer produces.
+ */
+std::string PackageProcessor::output_zip(Provider provider, const std::string& package, const std::string& destination_folder) {
+    switch (provider) {
+    case Provider::CMFCLCI:
+        return (fs::path(destination_folder) / fs::path(package).filename()).string();
+    case Provider::CIPC:
+        return destination_folder + ".zip";
+    default:
+        return "";
+    }
+}
+
+/**
+ * @brief Checks a package and fixes it if any check failed.
+ */
+PackageResult PackageProcessor::process_package(Provider provider, const std::string& package, const std::string& destination_folder) {
+    Instrumentation::ScopedTimer timer("process_package");
+    auto start = std::chrono::steady_clock::now();
+
+    PackageResult result;
+    result.provider = provider;
+    result.package = package;
+    result.destination = destination_folder;
+
+    try {
+        result.checks = check_package(package);
+        if (!result.checks.zip_format) {
+            result.error = "Package is not a ZIP archive";
+        }
+        else if (!result.checks.conformant() && has_fixer(provider)) {
+            fs::create_directories(destination_folder);
+            fix_package(provider, package, destination_folder, result.checks);
+            result.fixed = fs::is_regular_file(output_zip(provider, package, destination_folder));
+        }
+    }
+    catch (const std::exception& e) {
+        result.error = e.what();
+    }
+
+    result.seconds = std::chrono::duration<double>(std::chrono::steady_clock::now() - start).count();
+    return result;
+}
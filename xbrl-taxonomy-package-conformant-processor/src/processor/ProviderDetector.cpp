@@ -0,0 +1,238 @@
+#include "../../includes/ProviderDetector.hpp"
+#include "../../includes/Instrumentation.hpp"
+#include <algorithm>
+#include <array>
+#include <iomanip>
+#include <sstream>
+#include <stdexcept>
+#include <string_view>
+#include <unordered_set>
+
+namespace {
+
+    /**
+     * @brief How a clue is matched against the entry names.
+     */
+    enum class Match {
+        Segment,    ///< A folder or file name equals the pattern.
+        Prefix,     ///< A folder or file name starts with the pattern.
+        Path        ///< A folder path contains the pattern, aligned on '/'.
+    };
+
+    /**
+     * @brief A pattern the entry names of a package may contain.
+     */
+    struct Clue {
+        Match match;
+        std::string_view pattern;   ///< Lower case.
+    };
+
+    /**
+     * @brief Clues of a provider; all clues of a signature must be found.
+     */
+    struct Signature {
+        Provider provider;
+        double weight;
+        std::string_view description;
+        std::array<Clue, 2> clues;  ///< The second clue is unused if its pattern is empty.
+    };
+
+    const Signature SIGNATURES[] = {
+        { Provider::EBA, 1.0, "www.eba.europa.eu/ folder", {{ { Match::Segment, "www.eba.europa.eu" }, {} }} },
+        { Provider::EBA, 0.3, "EBA_ prefix", {{ { Match::Prefix, "eba_" }, {} }} },
+        { Provider::EDINET, 1.0, "disclosure.edinet-fsa.go.jp/ folder", {{ { Match::Segment, "disclosure.edinet-fsa.go.jp" }, {} }} },
+        { Provider::EDINET, 0.6, "samples/ and taxonomy/ folders", {{ { Match::Segment, "samples" }, { Match::Segment, "taxonomy" } }} },
+        { Provider::EDINET, 0.5, "jpcrp prefix", {{ { Match::Prefix, "jpcrp" }, {} }} },
+        { Provider::EDINET, 0.5, "jppfs prefix", {{ { Match::Prefix, "jppfs" }, {} }} },
+        { Provider::CMFCLCI, 1.0, "cl-ci_ prefix", {{ { Match::Prefix, "cl-ci_" }, {} }} },
+        { Provider::CMFCLCI, 0.3, "archivos/ folders", {{ { Match::Segment, "archivos" }, {} }} },
+        { Provider::CMFCLCI, 0.2, "dimensiones/ folder", {{ { Match::Segment, "dimensiones" }, {} }} },
+        { Provider::CIPC, 1.0, "xbrl.cipc.co.za/ folder", {{ { Match::Segment, "xbrl.cipc.co.za" }, {} }} },
+        { Provider::CIPC, 0.6, "def/ifrs folder", {{ { Match::Path, "def/ifrs" }, {} }} },
+        { Provider::CIPC, 0.4, "cipc prefix", {{ { Match::Prefix, "cipc" }, {} }} },
+    };
+
+    constexpr std::size_t NUM_SIGNATURES = sizeof(SIGNATURES) / sizeof(SIGNATURES[0]);
+
+    const Provider PROVIDERS[] = { Provider::EBA, Provider::EDINET, Provider::CMFCLCI, Provider::CIPC };
+
+    /**
+     * @brief Lower-cases ASCII letters in place; entry names are not localized.
+     */
+    void to_lower(std::string& text) {
+        std::transform(text.begin(), text.end(), text.begin(), [](unsigned char c) {
+            return static_cast<char>(c >= 'A' && c <= 'Z' ? c - 'A' + 'a' : c);
+        });
+    }
+
+    /**
+     * @brief Clues found so far, by signature and clue.
+     */
+    class ClueTracker {
+    public:
+        ClueTracker() {
+            for (std::size_t i = 0; i < NUM_SIGNATURES; ++i) {
+                for (std::size_t j = 0; j < 2; ++j) {
+                    found_[i][j] = SIGNATURES[i].clues[j].pattern.empty();
+                    missing_ += found_[i][j] ? 0 : 1;
+                }
+            }
+        }
+
+        /**
+         * @brief Tests the Segment and Prefix clues against a folder or file name.
+         */
+        void name(std::string_view segment) {
+            lower_.assign(segment.begin(), segment.end());
+            to_lower(lower_);
+            test([this](const Clue& clue) {
+                return (clue.match == Match::Segment && lower_ == clue.pattern)
+                    || (clue.match == Match::Prefix && lower_.compare(0, clue.pattern.size(), clue.pattern) == 0);
+            });
+        }
+
+        /**
+         * @brief Tests the Path clues against a folder path (with a trailing '/').
+         */
+        void folder(std::string_view path) {
+            lower_.assign(1, '/');
+            lower_.append(path.begin(), path.end());
+            to_lower(lower_);
+            test([this](const Clue& clue) {
+                if (clue.match != Match::Path) {
+                    return false;
+                }
+                for (std::size_t pos = lower_.find(clue.pattern); pos != std::string::npos; pos = lower_.find(clue.pattern, pos + 1)) {
+                    const std::size_t end = pos + clue.pattern.size();
+                    if (lower_[pos - 1] == '/' && end < lower_.size() && lower_[end] == '/') {
+                        return true;
+                    }
+                }
+                return false;
+            });
+        }
+
+        /**
+         * @brief Check whether every clue was found, so the remaining entries can be skipped.
+         */
+        bool all_found() const {
+            return missing_ == 0;
+        }
+
+        /**
+         * @brief Check whether all clues of a signature were found.
+         */
+        bool matched(std::size_t signature) const {
+            return found_[signature][0] && found_[signature][1];
+        }
+
+    private:
+        template <typename Pred>
+        void test(Pred pred) {
+            for (std::size_t i = 0; i < NUM_SIGNATURES; ++i) {
+                for (std::size_t j = 0; j < 2; ++j) {
+                    if (!found_[i][j] && pred(SIGNATURES[i].clues[j])) {
+                        found_[i][j] = true;
+                        --missing_;
+                    }
+                }
+            }
+        }
+
+        std::array<std::array<bool, 2>, NUM_SIGNATURES> found_{};
+        std::size_t missing_ = 0;
+        std::string lower_;     ///< Lower-cased name, reused.
+    };
+
+}  // namespace
+
+/**
+ * @brief Scores the entry names of a mapped archive.
+ */
+ProviderDetection ProviderDetector::detect(const MappedZipReader& archive) const {
+    Instrumentation::ScopedTimer timer("detect_provider");
+    ClueTracker tracker;
+    std::unordered_set<std::string_view> folders;
+
+    for (const auto& entry : archive.entries()) {
+        if (tracker.all_found()) {
+            break;
+        }
+        const std::string_view name = entry.name;
+        std::size_t end = name.size();
+        if (!entry.is_dir) {
+            const std::size_t slash = name.rfind('/');
+            tracker.name(name.substr(slash == std::string_view::npos ? 0 : slash + 1));
+            end = slash == std::string_view::npos ? 0 : slash + 1;
+        }
+
+        // Folders from the deepest up; the parents of a known folder are known too.
+        while (end > 0) {
+            const std::string_view folder = name.substr(0, end);
+            if (!folders.insert(folder).second) {
+                break;
+            }
+            const std::size_t slash = folder.size() < 2 ? std::string_view::npos : folder.rfind('/', folder.size() - 2);
+            const std::size_t start = slash == std::string_view::npos ? 0 : slash + 1;
+            tracker.name(folder.substr(start, folder.size() - 1 - start));
+            tracker.folder(folder);
+            end = start;
+        }
+    }
+
+    ProviderDetection detection;
+    double total = 0.0;
+    for (Provider provider : PROVIDERS) {
+        double score = 0.0;
+        for (std::size_t i = 0; i < NUM_SIGNATURES; ++i) {
+            if (SIGNATURES[i].provider == provider && tracker.matched(i)) {
+                score += SIGNATURES[i].weight;
+            }
+        }
+        detection.scores.emplace_back(provider, score);
+        total += score;
+    }
+    std::stable_sort(detection.scores.begin(), detection.scores.end(),
+        [](const auto& a, const auto& b) { return a.second > b.second; });
+
+    const double best = detection.scores.front().second;
+    detection.provider = detection.scores.front().first;
+    detection.confidence = total > 0.0 ? std::min(1.0, best) * best / total : 0.0;
+    for (std::size_t i = 0; i < NUM_SIGNATURES; ++i) {
+        if (SIGNATURES[i].provider == detection.provider && tracker.matched(i)) {
+            detection.evidence.emplace_back(SIGNATURES[i].description);
+        }
+    }
+    return detection;
+}
+
+/**
+ * @brief Maps a package and scores its entry names.
+ */
+ProviderDetection ProviderDetector::detect(const std::string& archive) const {
+    const MappedZipReader zip(archive);
+    return detect(zip);
+}
+
+/**
+ * @brief Resolves a provider name, detecting the provider of the package for AUTO.
+ */
+Provider ProviderDetector::resolve(const std::string& provider_name, const std::string& package, ProviderDetection* detection) {
+    if (provider_name != AUTO) {
+        return stringToProvider(provider_name);
+    }
+    const ProviderDetection detected = ProviderDetector().detect(package);
+    if (detection != nullptr) {
+        *detection = detected;
+    }
+    if (detected.scores.front().second == 0.0) {
+        throw std::runtime_error("Cannot detect the provider of " + package + ": no provider signature found, please name it");
+    }
+    if (detected.confidence < MIN_CONFIDENCE) {
+        std::ostringstream message;
+        message << "Cannot detect the provider of " << package << " (best guess " << providerToString(detected.provider)
+            << ", confidence " << std::fixed << std::setprecision(2) << detected.confidence << "), please name it";
+        throw std::runtime_error(message.str());
+    }
+    return detected.provider;
+}
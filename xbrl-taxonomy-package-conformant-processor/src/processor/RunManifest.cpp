@@ -0,0 +1,190 @@
+#include "../../includes/RunManifest.hpp"
+#include <cstdio>
+#include <filesystem>
+#include <fstream>
+#include <map>
+#include <sstream>
+
+namespace fs = std::filesystem;
+
+/**
+ * @brief Builds the manifest of a package from its central directory.
+ */
+RunManifest::RunManifest(const ArchiveIndex& index, const std::string& provider)
+    : provider_(provider), package_(index.archive()) {
+    for (const auto& entry : index.entries()) {
+        if (entry.is_dir) {
+            continue;
+        }
+        lookup_.emplace(entry.name, entries_.size());
+        entries_.push_back({ entry.name, entry.crc, entry.size, "" });
+    }
+}
+
+std::string RunManifest::manifest_path(const std::string& destination_folder) {
+    std::string folder = destination_folder;
+    while (folder.size() > 1 && (folder.back() == '/' || folder.back() == '\\')) {
+        folder.pop_back();
+    }
+    return folder + ".manifest.tsv";
+}
+
+/**
+ * @brief Reads a manifest file.
+ */
+bool RunManifest::load(const std::string& manifest_file) {
+    std::ifstream in(manifest_file);
+    if (!in) {
+        return false;
+    }
+
+    RunManifest loaded;
+    std::string line;
+    while (std::getline(in, line)) {
+        if (!line.empty() && line.back() == '\r') {
+            line.pop_back();
+        }
+        if (line.empty()) {
+            continue;
+        }
+
+        std::vector<std::string> fields;
+        std::stringstream stream(line);
+        std::string field;
+        while (std::getline(stream, field, '\t')) {
+            fields.push_back(field);
+        }
+
+        if (line[0] == '#') {
+            if (fields.size() == 2 && fields[0] == "# provider") loaded.provider_ = fields[1];
+            else if (fields.size() == 2 && fields[0] == "# package") loaded.package_ = fields[1];
+            else if (fields.size() == 2 && fields[0] == "# output") loaded.output_ = fields[1];
+            continue;
+        }
+        if (fields.size() < 3) {
+            return false;
+        }
+
+        Entry entry;
+        entry.path = fields[0];
+        try {
+            entry.crc = static_cast<std::uint32_t>(std::stoul(fields[1], nullptr, 16));
+            entry.size = std::stoull(fields[2]);
+        }
+        catch (const std::exception&) {
+            return false;
+        }
+        entry.action = fields.size() > 3 ? fields[3] : "";
+        loaded.lookup_.emplace(entry.path, loaded.entries_.size());
+        loaded.entries_.push_back(std::move(entry));
+    }
+
+    *this = std::move(loaded);
+    return true;
+}
+
+/**
+ * @brief Writes the manifest, replacing the previous one atomically.
+ */
+bool RunManifest::save(const std::string& manifest_file) const {
+    const std::string temp_file = manifest_file + ".tmp";
+    {
+        std::ofstream out(temp_file, std::ios::trunc);
+        if (!out) {
+            return false;
+        }
+        out << "# provider\t" << provider_ << "\n"
+            << "# package\t" << package_ << "\n"
+            << "# output\t" << output_ << "\n";
+        char crc[9];
+        for (const auto& entry : entries_) {
+            std::snprintf(crc, sizeof(crc), "%08x", entry.crc);
+            out << entry.path << '\t' << crc << '\t' << entry.size << '\t' << entry.action << '\n';
+        }
+        if (!out) {
+            return false;
+        }
+    }
+
+    std::error_code ec;
+    fs::rename(temp_file, manifest_file, ec);
+    return !ec;
+}
+
+/**
+ * @brief Compares this manifest (the new package) with the one of a previous run.
+ */
+RunManifest::Diff RunManifest::diff(const RunManifest& previous) const {
+    Diff result;
+    for (const auto& entry : entries_) {
+        const Entry* old_entry = previous.find(entry.path);
+        if (old_entry == nullptr) {
+            result.added.push_back(entry.path);
+        }
+        else if (old_entry->crc != entry.crc || old_entry->size != entry.size) {
+            result.changed.push_back(entry.path);
+        }
+        else {
+            result.unchanged.push_back(entry.path);
+        }
+    }
+    for (const auto& old_entry : previous.entries_) {
+        if (find(old_entry.path) == nullptr) {
+            result.removed.push_back(old_entry.path);
+        }
+    }
+    return result;
+}
+
+/**
+ * @brief Records the action applied to every entry by comparing with the fixed package.
+ */
+void RunManifest::record_output(const ArchiveIndex& output) {
+    output_ = output.archive();
+
+    // Content of the output by (CRC, size), to recognise moved entries.
+    std::multimap<std::pair<std::uint32_t, std::uint64_t>, std::string> by_content;
+    for (const auto& entry : output.entries()) {
+        if (!entry.is_dir) {
+            by_content.emplace(std::make_pair(entry.crc, entry.size), entry.name);
+        }
+    }
+
+    for (auto& entry : entries_) {
+        const ArchiveIndex::Entry* same_name = output.find(entry.path);
+        if (same_name != nullptr) {
+            entry.action = (same_name->crc == entry.crc && same_name->size == entry.size) ? COPIED : REWRITTEN;
+        }
+        else if (by_content.count(std::make_pair(entry.crc, entry.size)) > 0) {
+            entry.action = MOVED;
+        }
+        else {
+            entry.action = REMOVED;
+        }
+    }
+}
+
+const RunManifest::Entry* RunManifest::find(const std::string& path) const {
+    auto it = lookup_.find(path);
+    return it != lookup_.end() ? &entries_[it->second] : nullptr;
+}
+
+const std::vector<RunManifest::Entry>& RunManifest::entries() const {
+    return entries_;
+}
+
+const std::string& RunManifest::provider() const {
+    return provider_;
+}
+
+const std::string& RunManifest::package() const {
+    return package_;
+}
+
+const std::string& RunManifest::output() const {
+    return output_;
+}
+
+void RunManifest::set_output(const std::string& output_zip) {
+    output_ = output_zip;
+}
@@ -2,13 +2,267 @@
 //
 
 #include "../includes/TPChecker.hpp"
+#include "../includes/CatalogResolver.hpp"
+#include "../includes/ContentStore.hpp"
+#include "../includes/Instrumentation.hpp"
+#include "../includes/JobServer.hpp"
+#include "../includes/ProviderDetector.hpp"
 #include "../includes/xbrl-taxonomy-package-conformant-processor.hpp"
+#include <csignal>
+#include <iomanip>
 #include <iostream>
 
 using namespace std;
 
-int main()
+namespace fs = std::filesystem;
+
+namespace {
+
+	JobServer* active_server = nullptr;  ///< Server stopped by SIGINT/SIGTERM.
+
+	extern "C" void stop_server(int) {
+		if (active_server != nullptr) {
+			active_server->stop();
+		}
+	}
+
+}  // namespace
+
+/**
+ * @brief Parses command-line arguments.
+ */
+void App::parse_arguments(int argc, char* argv[]) {
+	program_.add_argument("provider")
+		.help("abbreviation of the taxonomy package provider (EBA, EDINET, CMFCLCI, CIPC), or AUTO to detect it")
+		.nargs(argparse::nargs_pattern::optional)
+		.default_value(string(""));
+	program_.add_argument("package")
+		.help("full path to the taxonomy package (zip)")
+		.nargs(argparse::nargs_pattern::optional)
+		.default_value(string(""));
+	program_.add_argument("--batch")
+		.help("directory or manifest of 'PROVIDER PATH' lines to process in batch mode")
+		.default_value(string(""));
+	program_.add_argument("--provider")
+		.help("batch mode: provider for zips that are not inside a provider folder (AUTO = detect it)")
+		.default_value(string(""));
+	program_.add_argument("--serve")
+		.help("stay resident and accept CHECK/DETECT/FIX jobs on this Unix domain socket")
+		.default_value(string(""));
+	program_.add_argument("-j", "--jobs")
+		.help("batch and server mode: number of packages processed in parallel (0 = number of cores)")
+		.default_value(0)
+		.scan<'i', int>();
+	program_.add_argument("-o", "--output")
+		.help("root folder for the fixed packages")
+		.default_value(string("output"));
+	program_.add_argument("--compression-level")
+		.help("deflate level of the fixed packages: 0 (store), 1 (fastest) to 9 (smallest), -1 = zlib default")
+		.default_value(-1)
+		.scan<'i', int>();
+	program_.add_argument("--allow-network")
+		.help("fetch remote schemas that are neither in the package catalog nor in the schema store")
+		.default_value(false)
+		.implicit_value(true);
+	program_.add_argument("--schemas")
+		.help("folder of the bundled XBRL/W3C base schemas (default: schemas/ next to the executable)")
+		.default_value(string(""));
+	program_.add_argument("--store")
+		.help("content-addressed store folder shared by all runs; identical files are extracted once and linked")
+		.default_value(string(""));
+	program_.add_argument("--link-mode")
+		.help("how stored files are placed into the output (auto, reflink, hardlink, copy)")
+		.default_value(string("auto"));
+	program_.add_argument("--log-format")
+		.help("format of the log file lines (text, json)")
+		.default_value(string("text"));
+	program_.add_argument("--metrics")
+		.help("write per-phase timings and counters of the run as JSON to this file")
+		.default_value(string(""));
+	program_.add_argument("--trace")
+		.help("write the timed phases of the run in Chrome trace format to this file")
+		.default_value(string(""));
+
+	program_.parse_args(argc, argv);
+
+	if (program_.get<string>("--batch").empty() && program_.get<string>("--serve").empty()
+		&& (program_.get<string>("provider").empty() || program_.get<string>("package").empty())) {
+		throw invalid_argument("Please provide both: Abbreveation of provider and full path to taxonomy package (zip).");
+	}
+	if (program_.get<int>("--jobs") < 0) {
+		throw invalid_argument("--jobs must not be negative");
+	}
+	if (program_.get<int>("--compression-level") < -1 || program_.get<int>("--compression-level") > 9) {
+		throw invalid_argument("--compression-level must be between -1 and 9");
+	}
+}
+
+/**
+ * @brief Prints the analysis results of a package.
+ */
+void App::print_checks(const PackageChecks& checks) {
+	auto print_check = [](bool passed, const string& done_msg, const string& error_msg) {
+		if (passed) {
+			utils::print_color_msg("    DONE: " + done_msg, "\033[32m");  // Green
+		}
+		else {
+			utils::print_color_msg("    ERROR: " + error_msg, "\033[31m");  // Red
+		}
+	};
+
+	cout << "\nAnalysis results:\n------------------" << endl;
+	print_check(checks.zip_format, "Package is ZIP", "Package is not ZIP");
+	print_check(checks.top_level_single_dir, "Package has single toplevel dir", "Package has no single toplevel dir");
+	print_check(checks.meta_inf_folder, "Package has META-INF folder", "Package has no META-INF folder");
+	print_check(checks.catalog_xml, "Package has catalog.xml", "Package has no valid catalog.xml");
+	print_check(checks.taxonomy_package_xml, "Package has taxonomy-package.xml", "Package has no valid taxonomy-package.xml");
+}
+
+/**
+ * @brief Processes a single package and prints the analysis and the output result.
+ */
+int App::run_single(const string& provider_name, const string& package) {
+	ProviderDetection detection;
+	Provider provider = ProviderDetector::resolve(provider_name, package, &detection);
+	fs::path destination = fs::path(program_.get<string>("--output")) / fs::path(package).stem();
+
+	cout << "Input information:\n------------------" << endl;
+	if (provider_name == ProviderDetector::AUTO) {
+		cout << "    Provider -> " << providerToString(provider) << " (detected, confidence "
+			<< fixed << setprecision(2) << detection.confidence << ")" << endl;
+	}
+	else {
+		cout << "    Provider -> " << provider_name << endl;
+	}
+	cout << "    Package  -> " << package << endl;
+
+	PackageProcessor processor;
+	PackageChecks checks = processor.check_package(package);
+	print_checks(checks);
+	if (!checks.zip_format) {
+		return EXIT_FAILURE;
+	}
+	if (checks.conformant()) {
+		utils::print_color_msg("\nPackage is conformant, nothing to fix.", "\033[32m");
+		return EXIT_SUCCESS;
+	}
+
+	if (!PackageProcessor::has_fixer(provider)) {
+		utils::print_color_msg("\nNo fixer for " + providerToString(provider) + " packages yet, nothing written.", "\033[31m");
+		return EXIT_FAILURE;
+	}
+
+	cout << "\nFixing package..." << endl;
+	fs::create_directories(destination);
+	processor.fix_package(provider, package, destination.string(), checks);
+
+	cout << "\nOutput result:\n--------------" << endl;
+	cout << "    " << destination.string() << " is fixed!" << endl;
+	return EXIT_SUCCESS;
+}
+
+/**
+ * @brief Processes all packages of a directory or manifest on a worker pool.
+ */
+int App::run_batch(const string& source) {
+	vector<BatchJob> jobs = BatchProcessor::load_jobs(source, program_.get<string>("--provider"));
+	BatchProcessor batch(program_.get<string>("--output"), static_cast<size_t>(program_.get<int>("--jobs")));
+
+	cout << "Batch input:\n------------" << endl;
+	cout << "    Source   -> " << source << endl;
+	cout << "    Packages -> " << jobs.size() << endl;
+
+	vector<PackageResult> results = batch.run(jobs);
+	BatchProcessor::print_results_table(results);
+
+	for (const auto& result : results) {
+		if (!result.ok()) {
+			return EXIT_FAILURE;
+		}
+	}
+	return EXIT_SUCCESS;
+}
+
+/**
+ * @brief Serves check and fix jobs on a Unix domain socket until SHUTDOWN or SIGINT/SIGTERM.
+ */
+int App::run_server(const string& socket_path) {
+	JobServer::warm_up();
+	JobServer server(socket_path, program_.get<string>("--output"), static_cast<size_t>(program_.get<int>("--jobs")));
+
+	active_server = &server;
+	signal(SIGINT, stop_server);
+	signal(SIGTERM, stop_server);
+	server.serve();
+	signal(SIGINT, SIG_DFL);
+	signal(SIGTERM, SIG_DFL);
+	active_server = nullptr;
+	return EXIT_SUCCESS;
+}
+
+/**
+ * @brief Main entry point for the application.
+ */
+int App::run(int argc, char* argv[]) {
+	Logger& logger = Logger::get_instance("logs/xbrl-taxonomy-package-conformant-processor.log");
+
+	try {
+		parse_arguments(argc, argv);
+	}
+	catch (const exception& e) {
+		logger.error(e.what());
+		logger.flush();
+		cerr << program_;
+		return EXIT_FAILURE;
+	}
+
+	const string metrics_file = program_.get<string>("--metrics");
+	const string trace_file = program_.get<string>("--trace");
+	Instrumentation& instrumentation = Instrumentation::get_instance();
+	if (!metrics_file.empty() || !trace_file.empty()) {
+		instrumentation.enable();
+	}
+
+	int exit_code = EXIT_FAILURE;
+	try {
+		logger.set_format(Logger::parse_format(program_.get<string>("--log-format")));
+		CatalogResolver::get_instance().set_allow_network(program_.get<bool>("--allow-network"));
+		const string schema_store = program_.get<string>("--schemas");
+		if (!schema_store.empty()) {
+			CatalogResolver::get_instance().set_schema_store(schema_store);
+		}
+		utils::set_compression_level(program_.get<int>("--compression-level"));
+		const string store_root = program_.get<string>("--store");
+		if (!store_root.empty()) {
+			ContentStore::get_instance().enable(store_root, ContentStore::parse_link_mode(program_.get<string>("--link-mode")));
+		}
+		const string batch_source = program_.get<string>("--batch");
+		const string socket_path = program_.get<string>("--serve");
+		if (!socket_path.empty()) {
+			exit_code = run_server(socket_path);
+		}
+		else {
+			exit_code = batch_source.empty()
+				? run_single(program_.get<string>("provider"), program_.get<string>("package"))
+				: run_batch(batch_source);
+		}
+		logger.info("Finished with exit code " + to_string(exit_code));
+	}
+	catch (const exception& e) {
+		logger.error(e.what());
+	}
+
+	if (!metrics_file.empty() && !instrumentation.write_summary(metrics_file)) {
+		logger.error("Failed to write metrics to " + metrics_file);
+	}
+	if (!trace_file.empty() && !instrumentation.write_trace(trace_file)) {
+		logger.error("Failed to write trace to " + trace_file);
+	}
+	return exit_code;
+}
+
+int main(int argc, char* argv[])
 {
-	cout << "Hello CMake." << endl;
-	return 0;
+	App app;
+	return app.run(argc, argv);
 }
@@ -0,0 +1,217 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""test_xbrl_tp.py"""
+
+import os
+import random
+import sys
+import zipfile
+import pytest
+# line below ensures that python searhces through all directories for imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+xbrl_tp = pytest.importorskip("xbrl_tp")
+
+INPUT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'input'))
+
+PACKAGES = [
+    ("CMF-CL-CI-2020-01-02/CMF-CL-CI-2020-01-02.zip", xbrl_tp.Provider.CMFCLCI),
+    ("Reporting_Frameworks_3.3.0.0_errata/Reporting_Frameworks_3.3.0.0_errata.zip", xbrl_tp.Provider.EBA),
+    ("cipc_2023-09-07/cipc_2023-09-07.zip", xbrl_tp.Provider.CIPC),
+]
+
+
+def sample_entries():
+    """Entries of every kind: empty, small, compressible and larger than a chunk."""
+    rng = random.Random(42)
+    chunk = xbrl_tp.ZipWriter.CHUNK_SIZE
+    return {
+        "pkg/META-INF/empty.xml": b"",
+        "pkg/small.txt": b"hello",
+        "pkg/www.eba.europa.eu/linkbase.xml":
+            b"".join(b'<link:loc xlink:href="mem.xsd#eba_MC%d"/>\n' % i for i in range(20000)),
+        "pkg/random.bin": bytes(rng.getrandbits(8) for _ in range(chunk + 12345)),
+        "pkg/mixed.bin": (b"A" * chunk + bytes(rng.getrandbits(8) for _ in range(4096))) * 8,
+    }
+
+
+def write_zip(path, entries, level=-1):
+    """Write the entries with a ZipWriter."""
+    writer = xbrl_tp.ZipWriter(str(path), level)
+    for name, content in entries.items():
+        writer.add_buffer(name, content)
+    writer.close()
+    assert not writer.failed
+
+
+@pytest.mark.parametrize("level", [0, 1, 6, 9, -1])
+def test_zip_writer_levels(tmp_path, level):
+    """Test that ZipWriter writes a valid archive at every compression level."""
+    entries = sample_entries()
+    path = tmp_path / "out.zip"
+    write_zip(path, entries, level)
+    with zipfile.ZipFile(path) as archive:
+        assert archive.testzip() is None
+        assert archive.namelist() == list(entries)
+        for info in archive.infolist():
+            assert archive.read(info) == entries[info.filename]
+            if level == 0:
+                assert info.compress_type == zipfile.ZIP_STORED
+
+
+def test_zip_writer_add_file_and_raw(tmp_path):
+    """Test add_file and the copy of a compressed entry with add_raw."""
+    entries = sample_entries()
+    source = tmp_path / "source.zip"
+    write_zip(source, entries, 9)
+    on_disk = tmp_path / "on_disk.txt"
+    on_disk.write_bytes(b"from a file\n" * 1000)
+
+    target = tmp_path / "target.zip"
+    writer = xbrl_tp.ZipWriter(str(target), 6, 2)
+    reader = xbrl_tp.MappedZipReader(str(source))
+    for name in entries:
+        writer.add_raw("copy/" + name, reader, name)
+    writer.add_file("copy/on_disk.txt", str(on_disk))
+    writer.close()
+    assert not writer.failed
+    assert writer.size() == len(entries) + 1
+
+    with zipfile.ZipFile(target) as archive:
+        assert archive.testzip() is None
+        for name, content in entries.items():
+            assert archive.read("copy/" + name) == content
+        assert archive.read("copy/on_disk.txt") == on_disk.read_bytes()
+    with pytest.raises(KeyError):
+        xbrl_tp.ZipWriter(str(tmp_path / "missing.zip")).add_raw("x", reader, "no/such/entry")
+
+
+def test_mapped_zip_reader(tmp_path):
+    """Test that MappedZipReader lists and inflates what zipfile wrote."""
+    entries = sample_entries()
+    path = tmp_path / "python.zip"
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr("pkg/", b"")
+        for name, content in entries.items():
+            archive.writestr(name, content, zipfile.ZIP_DEFLATED if len(content) % 2 else zipfile.ZIP_STORED)
+
+    reader = xbrl_tp.MappedZipReader(str(path))
+    assert reader.archive == str(path)
+    assert [entry.name for entry in reader.entries()] == ["pkg/"] + list(entries)
+    assert reader.find("pkg/").is_dir
+    assert reader.find("pkg/missing.txt") is None
+    for name, content in entries.items():
+        entry = reader.find(name)
+        assert not entry.is_dir
+        assert entry.size == len(content)
+        assert entry.crc == zipfile.ZipFile(path).getinfo(name).CRC
+        assert reader.read(name) == content
+    with pytest.raises(KeyError):
+        reader.read("pkg/missing.txt")
+
+
+def test_mapped_zip_reader_zip64(tmp_path):
+    """Test ZIP64 records written by zipfile and by ZipWriter."""
+    path = tmp_path / "forced.zip"
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+        with archive.open("pkg/big.txt", "w", force_zip64=True) as entry:
+            entry.write(b"zip64 " * 10000)
+    reader = xbrl_tp.MappedZipReader(str(path))
+    assert reader.read("pkg/big.txt") == b"zip64 " * 10000
+
+    # More entries than the 16-bit counts of the end of central directory record hold.
+    count = 70000
+    path = tmp_path / "many.zip"
+    writer = xbrl_tp.ZipWriter(str(path), 1)
+    for i in range(count):
+        writer.add_buffer("pkg/%05d.txt" % i, b"%d" % i)
+    writer.close()
+    assert not writer.failed
+
+    with zipfile.ZipFile(path) as archive:
+        assert len(archive.infolist()) == count
+        assert archive.read("pkg/69999.txt") == b"69999"
+    reader = xbrl_tp.MappedZipReader(str(path))
+    assert len(reader.entries()) == count
+    assert reader.read("pkg/00000.txt") == b"0"
+    assert reader.read("pkg/69999.txt") == b"69999"
+
+
+def test_url_rewrite_rules_overlapping_prefixes():
+    """Test leftmost first, then longest, then first rule for overlapping patterns."""
+    rules = xbrl_tp.UrlRewriteRules([
+        ("http://www.eba.europa.eu/", "../"),
+        ("http://www.eba.europa.eu/eu/fr/xbrl/", "../../fr/"),
+        ("eu/", "EU/"),
+        ("http://www.eba.europa.eu/", "ignored/"),
+    ])
+    # The longest pattern starting at the same position wins.
+    assert rules.rewrite("http://www.eba.europa.eu/eu/fr/xbrl/crr/dict.xsd") == "../../fr/crr/dict.xsd"
+    # The shorter pattern applies where the longer one does not match; of identical patterns the first rule wins.
+    assert rules.rewrite("http://www.eba.europa.eu/eu/it/dict.xsd") == "../EU/it/dict.xsd"
+    # Matches are replaced leftmost first and do not overlap.
+    assert rules.rewrite("eu/http://www.eba.europa.eu/") == "EU/../"
+    assert rules.rewrite("eu/eu/") == "EU/EU/"
+    assert rules.rewrite("http://www.xbrl.org/2003/xbrl-linkbase-2003-12-31.xsd") is None
+    assert len(rules.rules()) == 4
+    assert not rules.empty()
+    assert xbrl_tp.UrlRewriteRules([]).empty()
+    with pytest.raises(ValueError):
+        xbrl_tp.UrlRewriteRules([("", "x")])
+
+
+def test_url_rewrite_rules_cipc():
+    """Test that the CIPC rules only rewrite references into the embedded full_ifrs taxonomy."""
+    rules = xbrl_tp.UrlRewriteRules.for_provider(xbrl_tp.Provider.CIPC)
+    # loc href of a linkbase
+    assert rules.rewrite("../../../def/ifrs/full_ifrs/full_ifrs-cor_2022-03-24.xsd#ifrs-full_Assets") == \
+        "https://xbrl.ifrs.org/taxonomy//full_ifrs/full_ifrs-cor_2022-03-24.xsd#ifrs-full_Assets"
+    # xs:import schemaLocation of a schema
+    assert rules.rewrite("../../def/ifrs/full_ifrs/full_ifrs-cor_2022-03-24.xsd") == \
+        "https://xbrl.ifrs.org/taxonomy//full_ifrs-cor_2022-03-24.xsd"
+    # The same rules apply to any reference attribute, e.g. xml:base.
+    assert rules.rewrite("../../../def/ifrs/full_ifrs/") == "https://xbrl.ifrs.org/taxonomy//full_ifrs/"
+    # Other files below def/ifrs are not part of the removed taxonomy.
+    assert rules.rewrite("../../../def/ifrs/cipc/cipc-cor.xsd") is None
+    assert rules.rewrite("../../def/ifrs_other/full_ifrs/x.xsd") is None
+    assert rules.rewrite("http://xbrl.cipc.co.za/taxonomy/def/cipc-cor.xsd") is None
+    assert xbrl_tp.UrlRewriteRules.for_provider(xbrl_tp.Provider.EBA).empty()
+
+
+def test_fold():
+    """Test the case and normalization folding of entry names."""
+    fold = xbrl_tp.CaseCollisionChecker.fold
+    assert fold("META-INF/Catalog.XML") == fold("meta-inf/catalog.xml")
+    # NFC and NFD spellings of the same name.
+    assert fold("\u00c4nderungen.xsd") == fold("A\u0308nderungen.xsd") == fold("änderungen.xsd")
+    assert fold("ΔΙΑΣΤΑΣΗ.xsd") == fold("διασταση.xsd")
+    assert fold("Размер.xsd") == fold("размер.xsd")
+    assert fold("ＡＢＣ.xsd") == fold("ａｂｃ.xsd")
+    assert fold("a.xsd") != fold("b.xsd")
+    assert fold("pkg/2020-01-02_x.xsd") == "pkg/2020-01-02_x.xsd"
+
+
+def test_edinet_convert_to_zip_archive_keeps_the_source(tmp_path):
+    """Test that the placeholder EDINET zip step raises instead of truncating the source zip."""
+    source = tmp_path / "pkg.zip"
+    with zipfile.ZipFile(source, "w") as archive:
+        archive.writestr("pkg/a.xsd", "<xs:schema/>")
+    size = source.stat().st_size
+    package = xbrl_tp.EDINETTaxonomyPackage(str(source), str(tmp_path / "out"))
+    with pytest.raises(NotImplementedError):
+        package.convert_to_zip_archive()
+    assert source.stat().st_size == size
+
+
+@pytest.mark.parametrize("package,provider", PACKAGES)
+def test_provider_detector(package, provider):
+    """Test the provider detection on the bundled input packages."""
+    path = os.path.join(INPUT, package)
+    if not os.path.isfile(path):
+        pytest.skip(path + " not found")
+    detection = xbrl_tp.ProviderDetector().detect(path)
+    assert detection.provider == provider
+    assert detection.confidence >= xbrl_tp.ProviderDetector.MIN_CONFIDENCE
+    assert detection.scores[0] == (provider, max(score for _, score in detection.scores))
+    assert detection.evidence